@@ -0,0 +1,113 @@
+# src/bench_arrow_load.py
+
+# Comparativa de tiempo y memoria entre el modo pandas (object) y el modo Arrow-nativo
+# de integrate_pipeline: load_sources → build_staging → deduplicate → write_parquet.
+#
+# Uso:
+#     python src/bench_arrow_load.py [--rows 100000] [--seed 42]
+#
+# Las fuentes son un landing sintético (synthetic_landing.py) de --rows filas por fuente,
+# en un directorio temporal: con libros distintos, nulos y duplicados, como a escala real.
+# Con --rows 0 se usan los ~40 registros de ejemplo de landing/.
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict
+
+import pyarrow as pa
+
+from integrate_pipeline import build_staging, deduplicate, load_sources
+from synthetic_landing import generate_landing, write_landing
+from utils_parquet import write_parquet
+
+GR_PATH = "landing/goodreads_books.json"
+GB_PATH = "landing/googlebooks_books.csv"
+DEFAULT_ROWS = 100_000
+
+
+def run_once(gr_path: str, gb_path: str, out_dir: str, arrow_native: bool) -> Dict[str, Any]:
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    df_gr, df_gb = load_sources(gr_path, gb_path, arrow_native=arrow_native)
+    timings["load_sources"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    staging = build_staging(df_gr, df_gb)
+    timings["build_staging"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dim_book, book_source_detail = deduplicate(staging)
+    timings["deduplicate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    write_parquet(staging, os.path.join(out_dir, "books_staging.parquet"))
+    write_parquet(dim_book, os.path.join(out_dir, "dim_book.parquet"))
+    write_parquet(book_source_detail, os.path.join(out_dir, "book_source_detail.parquet"))
+    timings["write_parquet"] = time.perf_counter() - t0
+
+    timings["total"] = sum(timings.values())
+
+    return {
+        "timings": timings,
+        "staging_bytes": int(staging.memory_usage(deep=True).sum()),
+        "book_source_detail_bytes": int(book_source_detail.memory_usage(deep=True).sum()),
+    }
+
+
+def measure(gr_path: str, gb_path: str, out_dir: str, arrow_native: bool) -> Dict[str, Any]:
+    # 1ª pasada: tiempos sin tracemalloc (que penaliza las asignaciones Python)
+    result = run_once(gr_path, gb_path, out_dir, arrow_native)
+
+    # 2ª pasada: picos de memoria Python (tracemalloc) y del pool de Arrow
+    # (un pool proxy nuevo para que max_memory refleje solo esta pasada)
+    default_pool = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(default_pool)
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    try:
+        run_once(gr_path, gb_path, out_dir, arrow_native)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(default_pool)
+
+    result["python_peak_bytes"] = int(peak)
+    result["arrow_pool_peak_bytes"] = int(pool.max_memory())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparativa modo pandas vs modo Arrow-nativo")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Filas sintéticas por fuente (0: landing/ de ejemplo)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.rows > 0:
+            gr_path, gb_path = write_landing(*generate_landing(args.rows, seed=args.seed), os.path.join(tmp_dir, "landing"))
+        else:
+            gr_path, gb_path = GR_PATH, GB_PATH
+
+        results = {
+            "pandas": measure(gr_path, gb_path, tmp_dir, arrow_native=False),
+            "arrow": measure(gr_path, gb_path, tmp_dir, arrow_native=True),
+        }
+
+    print(f"Filas por fuente: {args.rows if args.rows > 0 else 'landing/ de ejemplo'}")
+    print(f"{'métrica':<28}{'pandas':>16}{'arrow':>16}")
+    for step in results["pandas"]["timings"]:
+        print(
+            f"{'t_' + step + ' (s)':<28}"
+            f"{results['pandas']['timings'][step]:>16.4f}"
+            f"{results['arrow']['timings'][step]:>16.4f}"
+        )
+    for key in ["staging_bytes", "book_source_detail_bytes", "python_peak_bytes", "arrow_pool_peak_bytes"]:
+        print(f"{key:<28}{results['pandas'][key]:>16,}{results['arrow'][key]:>16,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# src/bench_entity_resolution.py
+
+# Throughput de la resolución de entidades (entity_resolution.resolve_book_ids) sobre
+# datos sintéticos con el mismo patrón que landing/: cada libro aparece como fila
+# Google Books (título corto, isbn13, año) y como fila Goodreads (título con subtítulo,
+# sin año y, en parte, sin isbn13). Una parte de los libros (--accented) lleva en Goodreads
+# apellido y una palabra del título con acentos / ñ ("García", "años") y en Google Books
+# sin ellos ("Garcia", "anos"): deben emparejarse igual.
+#
+# Uso:
+#     python src/bench_entity_resolution.py [--rows 100000,1000000] [--missing-isbn 0.3] [--accented 0.2]
+#
+# Se informa tiempo, filas/s, pares candidatos y precisión/recall frente a la verdad
+# sintética (pares de filas sin isbn13 que pertenecen al mismo libro).
+
+import argparse
+import hashlib
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from entity_resolution import DEFAULT_MAX_BLOCK_SIZE, DEFAULT_THRESHOLD, resolve_book_ids
+
+N_WORDS = 20_000
+N_SURNAMES = 5_000
+N_FIRST_NAMES = 500
+
+# Pares (con acentos, sin acentos) para los libros de --accented
+ACCENTED_SURNAMES = [("García", "Garcia"), ("López", "Lopez"), ("Muñoz", "Munoz"), ("Martínez", "Martinez"), ("Pérez", "Perez")]
+ACCENTED_WORDS = [("años", "anos"), ("corazón", "corazon"), ("música", "musica"), ("pequeño", "pequeno"), ("acción", "accion")]
+
+
+def _words(prefix: str, n: int) -> np.ndarray:
+    return np.array([f"{prefix}{i:05d}" for i in range(n)], dtype=object)
+
+
+def synthetic_staging(n_rows: int, missing_isbn: float, accented: float = 0.2, seed: int = 42) -> pd.DataFrame:
+    """
+    n_rows filas (n_rows/2 libros × 2 fuentes) con las columnas que usa resolve_book_ids.
+    La columna `libro` es la verdad sintética.
+    """
+    rng = np.random.default_rng(seed)
+    n_books = n_rows // 2
+    vocab = _words("w", N_WORDS)
+
+    # Títulos de 2-4 palabras y subtítulos de 3-6 palabras (distribución sesgada tipo Zipf)
+    def random_phrases(n_min: int, n_max: int) -> np.ndarray:
+        lengths = rng.integers(n_min, n_max + 1, size=n_books)
+        ranks = np.minimum(rng.zipf(1.3, size=lengths.sum()) - 1, N_WORDS - 1)
+        words = vocab[ranks]
+        bounds = np.cumsum(lengths)[:-1]
+        return np.array([" ".join(p) for p in np.split(words, bounds)], dtype=object)
+
+    titles = random_phrases(2, 4)
+    subtitles = random_phrases(3, 6)
+    authors = (
+        _words("nombre", N_FIRST_NAMES)[rng.integers(0, N_FIRST_NAMES, n_books)]
+        + " "
+        + _words("apellido", N_SURNAMES)[rng.integers(0, N_SURNAMES, n_books)]
+    )
+    gb_authors = authors.copy()
+    gb_titles = titles.copy()
+
+    # Libros con acentos: el sufijo numérico mantiene los apellidos / palabras distintos
+    with_accents = np.flatnonzero(rng.random(n_books) < accented)
+    suffix = np.char.mod("%05d", rng.integers(0, N_SURNAMES, len(with_accents))).astype(object)
+    surnames = rng.integers(0, len(ACCENTED_SURNAMES), len(with_accents))
+    words = rng.integers(0, len(ACCENTED_WORDS), len(with_accents))
+    first_names = np.array([a.split(" ")[0] for a in authors[with_accents]], dtype=object)
+    accented_surnames = np.array([ACCENTED_SURNAMES[i][0] for i in surnames], dtype=object)
+    plain_surnames = np.array([ACCENTED_SURNAMES[i][1] for i in surnames], dtype=object)
+    accented_words = np.array([ACCENTED_WORDS[i][0] for i in words], dtype=object)
+    plain_words = np.array([ACCENTED_WORDS[i][1] for i in words], dtype=object)
+    authors[with_accents] = first_names + " " + accented_surnames + suffix
+    gb_authors[with_accents] = first_names + " " + plain_surnames + suffix
+    gb_titles[with_accents] = titles[with_accents] + " " + plain_words
+    titles[with_accents] = titles[with_accents] + " " + accented_words
+
+    isbns = np.array([f"978{i:010d}" for i in rng.permutation(n_books)], dtype=object)
+    years = rng.integers(1990, 2025, n_books).astype(float)
+
+    gb = pd.DataFrame({
+        "libro": np.arange(n_books),
+        "titulo_normalizado": gb_titles,
+        "autor_normalizado": gb_authors,
+        "anio_publicacion": years,
+        "isbn13": isbns,
+    })
+    gr = pd.DataFrame({
+        "libro": np.arange(n_books),
+        "titulo_normalizado": titles + ": " + subtitles,
+        "autor_normalizado": authors,
+        "anio_publicacion": np.nan,
+        "isbn13": np.where(rng.random(n_books) < missing_isbn, None, isbns),
+    })
+    gb.loc[rng.random(n_books) < missing_isbn, "isbn13"] = None
+
+    staging = pd.concat([gb, gr], ignore_index=True)
+
+    # book_id exacto como en generate_book_id_from_row: isbn13 o SHA-1 de la clave
+    keys = (staging["titulo_normalizado"] + "|" + staging["autor_normalizado"] + "||" + staging["anio_publicacion"].astype(str))
+    hashes = [hashlib.sha1(k.encode("utf-8")).hexdigest() for k in keys]
+    staging["book_id"] = staging["isbn13"].where(staging["isbn13"].notna(), pd.Series(hashes))
+    return staging
+
+
+def evaluate(staging: pd.DataFrame, resolved: pd.Series) -> Dict[str, float]:
+    # Precisión/recall a nivel de libro: filas del mismo libro con el mismo book_id
+    truth_groups = staging.groupby("libro")["book_id"].nunique()
+    resolved_groups = resolved.groupby(staging["libro"]).nunique()
+    n_split_before = int((truth_groups > 1).sum())
+    n_split_after = int((resolved_groups > 1).sum())
+
+    libros_por_id = staging["libro"].groupby(resolved).nunique()
+    return {
+        "libros_partidos_antes": n_split_before,
+        "libros_partidos_despues": n_split_after,
+        "recall": 1.0 - n_split_after / n_split_before if n_split_before else 1.0,
+        "ids_con_varios_libros": int((libros_por_id > 1).sum()),
+    }
+
+
+def run(n_rows: int, missing_isbn: float, accented: float, threshold: float, max_block_size: int) -> Dict[str, Any]:
+    staging = synthetic_staging(n_rows, missing_isbn, accented)
+
+    t0 = time.perf_counter()
+    resolved, stats = resolve_book_ids(staging, threshold, max_block_size)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "filas": n_rows,
+        "segundos": elapsed,
+        "filas_por_segundo": n_rows / elapsed if elapsed else float("inf"),
+        **stats,
+        **evaluate(staging, resolved),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de la resolución de entidades")
+    parser.add_argument("--rows", default="100000,1000000", help="Tamaños a medir, separados por comas")
+    parser.add_argument("--missing-isbn", type=float, default=0.3, help="Fracción de filas sin isbn13")
+    parser.add_argument("--accented", type=float, default=0.2, help="Fracción de libros con acentos solo en Goodreads")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--max-block-size", type=int, default=DEFAULT_MAX_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    results = [
+        run(int(n), args.missing_isbn, args.accented, args.threshold, args.max_block_size)
+        for n in args.rows.split(",")
+        if n.strip()
+    ]
+
+    keys = [
+        "segundos", "filas_por_segundo", "bloques", "bloques_descartados", "pares_candidatos",
+        "pares_aceptados", "filas_reasignadas", "libros_partidos_antes", "libros_partidos_despues",
+        "recall", "ids_con_varios_libros",
+    ]
+    print(f"{'métrica':<26}" + "".join(f"{r['filas']:>16,}" for r in results))
+    for key in keys:
+        values = [r[key] for r in results]
+        cells = "".join(f"{v:>16.3f}" if isinstance(v, float) else f"{v:>16,}" for v in values)
+        print(f"{key:<26}{cells}")
+
+
+if __name__ == "__main__":
+    main()
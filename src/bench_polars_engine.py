@@ -0,0 +1,143 @@
+# src/bench_polars_engine.py
+
+# Paridad y comparativa de tiempos entre los motores pandas y polars de integrate_pipeline
+# (build_staging → deduplicate → compute_quality_metrics) sobre datos sintéticos
+# (synthetic_landing.py) y sobre el landing/ de ejemplo.
+#
+# Paridad: dim_book, book_source_detail y staging deben salir idénticos (valores y dtypes,
+# salvo los timestamps de ejecución) y las métricas de calidad iguales salvo memoria/perfilado.
+# Cualquier diferencia se lista y el script termina con código 1.
+#
+# Uso:
+#     python src/bench_polars_engine.py [--rows 1000,100000] [--arrow-native] [--entity-resolution] [--parity-only]
+
+import argparse
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import polars_engine
+from integrate_pipeline import build_staging, compute_profiles, compute_quality_metrics, deduplicate, load_sources
+from schema_plan import STAGING_DTYPE_PLAN
+from synthetic_landing import generate_landing, write_landing
+
+GR_PATH = "landing/goodreads_books.json"
+GB_PATH = "landing/googlebooks_books.csv"
+RUN_TS_COLUMNS = ["ts_ultima_act", "ts_ingesta"]
+
+
+def run_pandas(df_gr: pd.DataFrame, df_gb: pd.DataFrame, entity_resolution: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    staging = build_staging(df_gr, df_gb)
+    timings["build_staging"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dim_book, book_source_detail = deduplicate(staging, entity_resolution)
+    timings["deduplicate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    metrics = compute_quality_metrics(dim_book, book_source_detail, compute_profiles(dim_book, book_source_detail))
+    timings["compute_quality_metrics"] = time.perf_counter() - t0
+
+    timings["total"] = sum(timings.values())
+    return {"staging": staging, "dim_book": dim_book, "book_source_detail": book_source_detail, "metrics": metrics}, timings
+
+
+def run_polars(df_gr: pd.DataFrame, df_gb: pd.DataFrame, arrow_native: bool, entity_resolution: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    timings: Dict[str, float] = {}
+
+    # build_staging incluye la copia pandas del staging (la que se exporta en el pipeline)
+    t0 = time.perf_counter()
+    staging_pl = polars_engine.build_staging(df_gr, df_gb).collect()
+    staging = polars_engine.to_pandas(staging_pl, STAGING_DTYPE_PLAN, arrow_native)
+    timings["build_staging"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dim_book, book_source_detail = polars_engine.deduplicate(staging_pl, entity_resolution, arrow_native=arrow_native)
+    timings["deduplicate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    metrics = polars_engine.compute_quality_metrics(
+        dim_book, book_source_detail, compute_profiles(dim_book, book_source_detail)
+    )
+    timings["compute_quality_metrics"] = time.perf_counter() - t0
+
+    timings["total"] = sum(timings.values())
+    return {"staging": staging, "dim_book": dim_book, "book_source_detail": book_source_detail, "metrics": metrics}, timings
+
+
+def _comparable_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    # Sin bytes en memoria (dependen de la representación intermedia de cada motor)
+    out = dict(metrics)
+    for table in ["dim_book", "book_source_detail"]:
+        out[table] = {k: v for k, v in metrics[table].items() if k != "memoria_bytes"}
+    return out
+
+
+def compare_outputs(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    # Diferencias entre las salidas de los dos motores ([] = paridad)
+    problems: List[str] = []
+    for table in ["staging", "dim_book", "book_source_detail"]:
+        left = expected[table].drop(columns=RUN_TS_COLUMNS, errors="ignore")
+        right = actual[table].drop(columns=RUN_TS_COLUMNS, errors="ignore")
+        try:
+            pd.testing.assert_frame_equal(left, right, check_exact=True)
+        except AssertionError as e:
+            problems.append(f"{table}: {str(e).strip()}")
+    if _comparable_metrics(expected["metrics"]) != _comparable_metrics(actual["metrics"]):
+        problems.append("quality_metrics: las métricas de calidad no coinciden")
+    return problems
+
+
+def bench(label: str, gr_path: str, gb_path: str, arrow_native: bool, parity_only: bool, entity_resolution: bool = False) -> Optional[List[str]]:
+    df_gr, df_gb = load_sources(gr_path, gb_path, arrow_native=arrow_native)
+    expected, t_pandas = run_pandas(df_gr, df_gb, entity_resolution)
+    actual, t_polars = run_polars(df_gr, df_gb, arrow_native, entity_resolution)
+
+    problems = compare_outputs(expected, actual)
+    status = "OK" if not problems else f"{len(problems)} DIFERENCIAS"
+    print(f"\n{label}: {len(expected['book_source_detail']):,} filas, {len(expected['dim_book']):,} libros — paridad {status}")
+    for problem in problems:
+        print(f"  [DIFF] {problem}")
+
+    if not parity_only:
+        print(f"  {'etapa':<28}{'pandas (s)':>12}{'polars (s)':>12}{'x':>8}")
+        for step in t_pandas:
+            ratio = t_pandas[step] / t_polars[step] if t_polars[step] else float("nan")
+            print(f"  {step:<28}{t_pandas[step]:>12.4f}{t_polars[step]:>12.4f}{ratio:>8.1f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad y tiempos: motor pandas vs motor polars")
+    parser.add_argument("--rows", default="1000,20000,100000", help="Filas por fuente de los landings sintéticos (lista)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de synthetic_landing")
+    parser.add_argument("--arrow-native", action="store_true", help="Ambos motores en modo Arrow-nativo")
+    parser.add_argument("--entity-resolution", action="store_true", help="Ambos motores con resolución de entidades")
+    parser.add_argument("--parity-only", action="store_true", help="Solo comprobar la paridad (sin tabla de tiempos)")
+    args = parser.parse_args()
+
+    if not polars_engine.POLARS_AVAILABLE:
+        print("[ERROR] polars no está instalado (pip install polars)")
+        sys.exit(1)
+
+    failed = bool(bench("landing/ (ejemplo)", GR_PATH, GB_PATH, args.arrow_native, args.parity_only, args.entity_resolution))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in [int(n) for n in args.rows.split(",") if n.strip()]:
+            gr, gb = generate_landing(n_rows, seed=args.seed)
+            gr_path, gb_path = write_landing(gr, gb, f"{tmp_dir}/{n_rows}")
+            failed |= bool(bench(f"sintético {n_rows:,}", gr_path, gb_path, args.arrow_native, args.parity_only, args.entity_resolution))
+
+    if failed:
+        print("\n[ERROR] Los motores no producen las mismas tablas")
+        sys.exit(1)
+    print("\nParidad pandas / polars: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# src/bench_scaling.py
+
+# Benchmark de escalado de integrate_pipeline sobre landing/ sintético (synthetic_landing.py).
+# Para cada escala se generan los ficheros de entrada y se mide cada función pública de
+# la integración por separado:
+#     load_sources, build_staging, annotate_errors, deduplicate (y sus subetapas
+#     resolve_book_ids / annotate_errors), compute_profiles, compute_quality_metrics, write_schema
+# Cada función se ejecuta --repeat veces y se guarda la mejor (tiempo de pared, CPU, RSS),
+# medida con instrumentation.profiled_stage.
+#
+# Los resultados se guardan en docs/benchmarks/scaling_<commit>.json (commit de git actual,
+# con sufijo "-dirty" si hay cambios sin confirmar) para comparar regresiones entre commits:
+#     python src/bench_scaling.py --rows 10000,100000
+#     python src/bench_scaling.py --rows 10000,100000 --compare docs/benchmarks/scaling_<otro>.json
+#     python src/bench_scaling.py --compare A.json B.json       # solo compara, sin medir
+#
+# Las escrituras a disco (write_schema) se hacen en un directorio temporal.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+import instrumentation
+from instrumentation import profiled_stage, stage_report
+from entity_resolution import entity_resolution_options
+from integrate_pipeline import (
+    annotate_errors,
+    build_staging,
+    compute_profiles,
+    compute_quality_metrics,
+    deduplicate,
+    load_sources,
+    write_schema,
+)
+from synthetic_landing import (
+    DEFAULT_DUP_RATE,
+    DEFAULT_INVALID_RATE,
+    DEFAULT_ISBN_OVERLAP,
+    DEFAULT_NULL_RATE,
+    GB_NULLABLE,
+    GR_NULLABLE,
+    RULES,
+    generate_landing,
+    write_landing,
+)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SRC_DIR)
+RESULTS_DIR = os.path.join(BASE_DIR, "docs", "benchmarks")
+DEFAULT_ROWS = "1000,10000,100000"
+DEFAULT_TOLERANCE = 0.10
+# Por debajo de esta diferencia absoluta (segundos) el cambio se considera ruido
+MIN_DELTA_SECONDS = 0.02
+
+
+def git_commit() -> str:
+    # Commit actual (abreviado); "-dirty" si el árbol tiene cambios; "sin-git" fuera de un repo
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sin-git"
+    return commit + ("-dirty" if dirty else "")
+
+
+def _measure(name: str, fn: Callable[[], Any], rows_in: int, repeat: int) -> Any:
+    # Ejecuta fn `repeat` veces dentro de profiled_stage; devuelve el resultado de la última
+    result = None
+    for _ in range(repeat):
+        with profiled_stage(name, rows_in=rows_in) as stage:
+            result = fn()
+            if isinstance(result, pd.DataFrame):
+                stage["filas_salida"] = len(result)
+            elif isinstance(result, tuple) and all(isinstance(r, pd.DataFrame) for r in result):
+                stage["filas_salida"] = sum(len(r) for r in result)
+    return result
+
+
+def best_by_stage(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # Mejor repetición por etapa; las subetapas se nombran "padre/etapa"
+    best: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        key = record["etapa"] if record["padre"] is None else f"{record['padre']}/{record['etapa']}"
+        if key not in best or record["wall_s"] < best[key]["wall_s"]:
+            best[key] = {
+                "filas_entrada": record["filas_entrada"],
+                "filas_salida": record["filas_salida"],
+                "wall_s": record["wall_s"],
+                "cpu_s": record["cpu_s"],
+                "rss_max_bytes": record["rss_max_bytes"],
+                "filas_por_segundo": round(record["filas_entrada"] / record["wall_s"], 1)
+                if record["filas_entrada"] and record["wall_s"] else None,
+            }
+    return best
+
+
+def run_scale(n_rows: int, args: argparse.Namespace, work_dir: str) -> Dict[str, Any]:
+    # Genera los datos de una escala y mide cada función de integrate_pipeline
+    data_dir = os.path.join(work_dir, f"landing_{n_rows}")
+    gr, gb = generate_landing(
+        n_rows, args.isbn_overlap, {col: args.null_rate for col in GR_NULLABLE + GB_NULLABLE}, args.dup_rate,
+        {rule: args.invalid_rate for rule in RULES}, args.seed,
+    )
+    gr_path, gb_path = write_landing(gr, gb, data_dir)
+    del gr, gb
+
+    er = entity_resolution_options()
+    instrumentation.configure({"cprofile_stages": set(), "profile_dir": work_dir, "trace_malloc": False})
+
+    df_gr, df_gb = _measure("load_sources", lambda: load_sources(gr_path, gb_path, arrow_native=args.arrow_native), 0, args.repeat)
+    n_in = len(df_gr) + len(df_gb)
+    staging = _measure("build_staging", lambda: build_staging(df_gr, df_gb), n_in, args.repeat)
+    _measure("annotate_errors", lambda: annotate_errors(staging), len(staging), args.repeat)
+    dim_book, bsd = _measure(
+        "deduplicate",
+        lambda: deduplicate(staging, er["enabled"], er["threshold"], er["max_block_size"]),
+        len(staging), args.repeat,
+    )
+    n_out = len(dim_book) + len(bsd)
+    profiles = _measure("compute_profiles", lambda: compute_profiles(dim_book, bsd), n_out, args.repeat)
+    _measure("compute_quality_metrics", lambda: compute_quality_metrics(dim_book, bsd, profiles), n_out, args.repeat)
+
+    # write_schema escribe docs/schema.md relativo al directorio actual
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        _measure("write_schema", lambda: write_schema(dim_book, bsd, profiles), n_out, args.repeat)
+    finally:
+        os.chdir(cwd)
+
+    return {
+        "filas_por_fuente": n_rows,
+        "filas_staging": len(staging),
+        "filas_dim_book": len(dim_book),
+        "bytes_entrada": os.path.getsize(gr_path) + os.path.getsize(gb_path),
+        "etapas": best_by_stage(stage_report()["etapas"]),
+    }
+
+
+# --------------------------
+# Resultados
+# --------------------------
+
+def save_results(results: Dict[str, Any], path: Optional[str] = None) -> str:
+    path = path or os.path.join(RESULTS_DIR, f"scaling_{results['commit']}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    scales = results["escalas"]
+    stages = list(dict.fromkeys(stage for scale in scales for stage in scale["etapas"]))
+    print(f"\nCommit {results['commit']} (segundos de pared, mejor de {results['parametros']['repeat']})")
+    print(f"{'etapa':<34}" + "".join(f"{s['filas_por_fuente']:>14,}" for s in scales))
+    for stage in stages:
+        cells = "".join(
+            f"{s['etapas'][stage]['wall_s']:>14.3f}" if stage in s["etapas"] else f"{'-':>14}" for s in scales
+        )
+        print(f"{stage:<34}{cells}")
+
+
+def compare_results(base: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> int:
+    """
+    Compara dos ficheros de resultados (misma escala y etapa) y marca como regresión los
+    tiempos que empeoran más de `tolerance` (y más de MIN_DELTA_SECONDS en absoluto).
+    Devuelve el número de regresiones.
+    """
+    base_scales = {s["filas_por_fuente"]: s for s in base["escalas"]}
+    regressions = 0
+    print(f"\n{base['commit']} → {new['commit']} (tolerancia {tolerance:.0%})")
+    if base["parametros"] != new["parametros"]:
+        print(f"Aviso: parámetros distintos ({base['parametros']} vs {new['parametros']})")
+    print(f"{'escala':>10}  {'etapa':<34}{'antes':>10}{'después':>10}{'cambio':>10}")
+    for scale in new["escalas"]:
+        before = base_scales.get(scale["filas_por_fuente"])
+        if before is None:
+            continue
+        for stage, entry in scale["etapas"].items():
+            if stage not in before["etapas"]:
+                continue
+            t0, t1 = before["etapas"][stage]["wall_s"], entry["wall_s"]
+            change = (t1 - t0) / t0 if t0 else 0.0
+            flag = ""
+            if change > tolerance and t1 - t0 > MIN_DELTA_SECONDS:
+                flag = "  REGRESIÓN"
+                regressions += 1
+            print(f"{scale['filas_por_fuente']:>10,}  {stage:<34}{t0:>10.3f}{t1:>10.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado de integrate_pipeline con datos sintéticos")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="Filas por fuente en cada escala, separadas por comas")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por función (se guarda la mejor)")
+    parser.add_argument("--arrow-native", action="store_true", help="Mide el modo PIPELINE_ARROW_NATIVE")
+    parser.add_argument("--isbn-overlap", type=float, default=DEFAULT_ISBN_OVERLAP)
+    parser.add_argument("--null-rate", type=float, default=DEFAULT_NULL_RATE)
+    parser.add_argument("--dup-rate", type=float, default=DEFAULT_DUP_RATE)
+    parser.add_argument("--invalid-rate", type=float, default=DEFAULT_INVALID_RATE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero de resultados (por defecto docs/benchmarks/scaling_<commit>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="Resultados base (y opcionalmente nuevos) con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Empeoramiento relativo que cuenta como regresión")
+    args = parser.parse_args()
+
+    # Solo comparar dos ficheros ya guardados
+    if args.compare and len(args.compare) == 2:
+        regressions = compare_results(load_results(args.compare[0]), load_results(args.compare[1]), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "maquina": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": {
+            "repeat": args.repeat,
+            "arrow_native": args.arrow_native,
+            "isbn_overlap": args.isbn_overlap,
+            "null_rate": args.null_rate,
+            "dup_rate": args.dup_rate,
+            "invalid_rate": args.invalid_rate,
+            "seed": args.seed,
+        },
+        "escalas": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_scaling_") as work_dir:
+        for n in (int(x) for x in args.rows.split(",") if x.strip()):
+            print(f"Escala {n:,} filas por fuente...")
+            results["escalas"].append(run_scale(n, args, work_dir))
+
+    print_results(results)
+    path = save_results(results, args.output)
+    print(f"\nResultados: {path}")
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare[0]), results, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+# src/books_pipeline.py
+
+# CLI única del proyecto: `books-pipeline <subcomando> [opciones]`.
+#     scrape      Goodreads → landing/goodreads_books.json          (scrape_goodreads.py)
+#     enrich      Google Books → landing/googlebooks_books.csv      (enrich_googlebooks.py)
+#     prices      refresco de precios de Google Books y parche de standard/ (price_refresh.py)
+#     integrate   landing/ → staging/, standard/, docs/              (integrate_pipeline.py)
+#     export      standard/*.parquet → CSV / Feather / índice, sin volver a integrar
+#     bench       benchmarks (scaling, entity-resolution, arrow-load)
+#     lookup      consultas al índice de dim_book                  (lookup_index.py)
+#     query       SQL (DuckDB) sobre standard/, staging/ y los deltas (sql_query.py)
+#     covers      almacén empaquetado de portadas                  (cover_store.py)
+#     archive     archivo HTML de Goodreads y re-extracción sin red (html_archive.py)
+#     landing     conversión del landing entre JSON/CSV, Parquet e IPC (landing_format.py)
+#     run         scrape → enrich → integrate con caché de etapas   (stage_runner.py)
+#     config      valida las variables de entorno (.env incluido)
+#
+# Arranque rápido: este módulo solo importa la biblioteca estándar. Cada subcomando importa
+# su script (y con él pandas, bs4, playwright...) al ejecutarse, de modo que `--help` y
+# `config` no cargan dependencias pesadas y `lookup` solo carga numpy y pyarrow.
+# Las rutas (landing/, standard/, docs/...) son siempre relativas a la raíz del proyecto,
+# independientemente del directorio desde el que se invoque (cron, hooks...).
+#
+# Uso:
+#     python src/books_pipeline.py --help
+#     python src/books_pipeline.py integrate --arrow-native
+#     python src/books_pipeline.py integrate --engine polars
+#     python src/books_pipeline.py lookup --isbn13 9780553418811
+#     python src/books_pipeline.py query "SELECT idioma, count(*) FROM dim_book GROUP BY 1"
+#     alias books-pipeline="python /ruta/al/proyecto/src/books_pipeline.py"
+
+import argparse
+import importlib
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SRC_DIR)
+PROG = "books-pipeline"
+
+STANDARD_TABLES = ["dim_book", "book_source_detail"]
+ROLLUP_TABLES = ["agg_by_author", "agg_by_category", "agg_by_year_language", "agg_by_currency"]
+EXPORT_FORMATS = ["csv", "feather", "index"]
+
+# Benchmarks disponibles: nombre → módulo con main()
+BENCHMARKS = {
+    "scaling": "bench_scaling",
+    "entity-resolution": "bench_entity_resolution",
+    "arrow-load": "bench_arrow_load",
+    "polars-engine": "bench_polars_engine",
+}
+
+# Variables de entorno reconocidas: nombre → (tipo, valores permitidos)
+# Tipos: texto, secreto, booleano, entero (> 0), entero0 (>= 0), decimal, opcion, lista
+CONFIG_VARS: Dict[str, Tuple[str, Optional[List[str]]]] = {
+    "GOODREADS_SEARCH_QUERY": ("texto", None),
+    "GOODREADS_MAX_BOOKS": ("entero", None),
+    "GOODREADS_USER_AGENT": ("texto", None),
+    "GOODREADS_BACKEND": ("opcion", ["requests", "playwright"]),
+    "GOODREADS_FETCH_ISBN": ("booleano", None),
+    "GOODREADS_SKIP_KNOWN": ("booleano", None),
+    "GOODREADS_STOP_AFTER_KNOWN_PAGES": ("entero0", None),
+    "GOODREADS_ARCHIVE_HTML": ("booleano", None),
+    "GOODREADS_FETCH_WORKERS": ("entero", None),
+    "GOODREADS_PARSE_WORKERS": ("entero0", None),
+    "GOODREADS_PARSE_QUEUE": ("entero", None),
+    "GOOGLE_BOOKS_API_KEY": ("secreto", None),
+    "GOOGLE_BOOKS_PRICE_WORKERS": ("entero", None),
+    "GOOGLE_BOOKS_PRICE_CACHE": ("texto", None),
+    "PIPELINE_ARROW_NATIVE": ("booleano", None),
+    "PIPELINE_ENGINE": ("opcion", ["pandas", "polars"]),
+    "PIPELINE_ENTITY_RESOLUTION": ("booleano", None),
+    "PIPELINE_PROFILE_STAGES": ("lista", None),
+    "PIPELINE_PROFILE_DIR": ("texto", None),
+    "PIPELINE_TRACE_MALLOC": ("booleano", None),
+    "PIPELINE_CDC": ("booleano", None),
+    "PIPELINE_CDC_DIR": ("texto", None),
+    "PIPELINE_ROLLUPS": ("booleano", None),
+    "PIPELINE_ROLLUPS_INCREMENTAL": ("booleano", None),
+    "PIPELINE_ROLLUPS_DIR": ("texto", None),
+    "PIPELINE_ROLLUPS_REBUILD_FRACTION": ("decimal", None),
+    "PIPELINE_LANDING_FORMAT": ("opcion", ["json", "parquet", "ipc"]),
+    "PIPELINE_LANDING_BATCH_ROWS": ("entero", None),
+    "ER_THRESHOLD": ("decimal", None),
+    "ER_MAX_BLOCK_SIZE": ("entero", None),
+    "STANDARD_PARTITION_COLS": ("lista", None),
+    "STANDARD_ROW_GROUP_SIZE": ("entero", None),
+    "STANDARD_COMPRESSION": ("opcion", ["zstd", "snappy", "gzip", "brotli", "lz4", "none"]),
+    "EXPORT_CSV": ("booleano", None),
+    "EXPORT_FEATHER": ("booleano", None),
+    "EXPORT_CSV_DIR": ("texto", None),
+    "EXPORT_CSV_COMPRESSION": ("opcion", ["", "gzip", "bz2", "xz", "zstd", "zip"]),
+    "EXPORT_CSV_CHUNKSIZE": ("entero", None),
+    "EXPORT_MAX_WORKERS": ("entero", None),
+    "OPENLIBRARY_DUMP": ("lista", None),
+    "OPENLIBRARY_WORKS_DUMP": ("lista", None),
+    "OPENLIBRARY_AUTHORS_DUMP": ("lista", None),
+    "OPENLIBRARY_SUBJECTS": ("lista", None),
+    "OPENLIBRARY_MATCH_ISBNS": ("booleano", None),
+    "OPENLIBRARY_WORKERS": ("entero", None),
+    "OPENLIBRARY_CHUNK_LINES": ("entero", None),
+    "COVER_STORE_PATH": ("texto", None),
+    "COVER_THUMB_SIZE": ("entero", None),
+    "COVER_WORKERS": ("entero", None),
+    "HTML_ARCHIVE_PATH": ("texto", None),
+    "HTML_ARCHIVE_SEGMENT_MB": ("entero", None),
+    "HTML_ARCHIVE_WORKERS": ("entero", None),
+    "RATE_INITIAL": ("decimal", None),
+    "RATE_MIN": ("decimal", None),
+    "RATE_MAX": ("decimal", None),
+    "RATE_INCREASE": ("decimal", None),
+    "RATE_DECREASE": ("decimal", None),
+    "RATE_SLOW_LATENCY_S": ("decimal", None),
+    "RATE_MAX_RETRIES": ("entero", None),
+    "RATE_PERSIST": ("booleano", None),
+    "RATE_STATE_PATH": ("texto", None),
+    "QUERY_THREADS": ("entero", None),
+    "QUERY_MEMORY_LIMIT": ("texto", None),
+    "QUERY_MAX_ROWS": ("entero", None),
+}
+CONFIG_PREFIXES = ("GOODREADS_", "GOOGLE_BOOKS_", "PIPELINE_", "ER_", "STANDARD_", "EXPORT_", "OPENLIBRARY_", "COVER_", "HTML_ARCHIVE_", "RATE_", "QUERY_")
+
+
+def _prepare() -> None:
+    # Rutas relativas a la raíz del proyecto (como stage_runner) y .env si existe
+    os.chdir(BASE_DIR)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    if os.path.exists(".env"):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+def _set_env(values: Dict[str, Any]) -> None:
+    # Las opciones de la CLI se traducen a las variables que leen los scripts
+    for key, value in values.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+
+def _run_module(module: str, argv: Optional[List[str]] = None, prog: Optional[str] = None) -> None:
+    # Import diferido del script y ejecución de su main() (con sus propios argumentos, si los tiene)
+    if argv is not None:
+        sys.argv = [prog or module] + argv
+    importlib.import_module(module).main()
+
+
+# --------------------------
+# Subcomandos
+# --------------------------
+
+def cmd_scrape(args: argparse.Namespace, extra: List[str]) -> int:
+    _set_env({
+        "GOODREADS_SEARCH_QUERY": args.query,
+        "GOODREADS_MAX_BOOKS": args.max_books,
+        "GOODREADS_BACKEND": args.backend,
+        "GOODREADS_FETCH_ISBN": "false" if args.no_isbn else None,
+        "GOODREADS_SKIP_KNOWN": "false" if args.refetch_known else None,
+        "GOODREADS_STOP_AFTER_KNOWN_PAGES": args.stop_after_known_pages,
+        "GOODREADS_ARCHIVE_HTML": "false" if args.no_archive else None,
+        "GOODREADS_FETCH_WORKERS": args.fetch_workers,
+        "GOODREADS_PARSE_WORKERS": args.parse_workers,
+    })
+    _run_module("scrape_goodreads")
+    return 0
+
+
+def cmd_enrich(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("enrich_googlebooks")
+    return 0
+
+
+def cmd_integrate(args: argparse.Namespace, extra: List[str]) -> int:
+    _set_env({
+        "PIPELINE_ARROW_NATIVE": "true" if args.arrow_native else None,
+        "PIPELINE_ENGINE": args.engine,
+        "PIPELINE_ENTITY_RESOLUTION": "true" if args.entity_resolution else None,
+        "PIPELINE_PROFILE_STAGES": args.profile,
+        "OPENLIBRARY_DUMP": args.openlibrary_dump,
+    })
+    _run_module("integrate_pipeline")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace, extra: List[str]) -> int:
+    """
+    Vuelve a publicar las tablas de standard/ (CSV, Feather y/o índice de búsqueda) a partir
+    de sus Parquet, sin repetir la integración. Usa los mismos sinks que integrate_pipeline.
+    """
+    import pyarrow.dataset as ds
+
+    from lookup_index import LOOKUP_INDEX_PATH, build_lookup_index
+    from sinks import create_executor, sink_options, submit_table, submit_task, wait_for
+
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [t for t in tables if t not in STANDARD_TABLES + ROLLUP_TABLES] + [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        print(f"[ERROR] Tablas/formatos desconocidos: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    options = sink_options()
+    options["csv"] = "csv" in formats
+    options["feather"] = "feather" in formats
+
+    with create_executor(options) as executor:
+        futures = []
+        for name in tables:
+            path = os.path.join("standard", f"{name}.parquet")
+            if not os.path.exists(path):
+                print(f"[ERROR] No existe {path}: ejecutar antes `{PROG} integrate`", file=sys.stderr)
+                return 1
+            partitioning = "hive" if os.path.isdir(path) else None
+            table = ds.dataset(path, format="parquet", partitioning=partitioning).to_table()
+            df = table.to_pandas()
+
+            futures += submit_table(
+                executor, name, df, None, options, feather_path=os.path.join("standard", f"{name}.feather"),
+            )
+            if name == "dim_book" and "index" in formats:
+                futures.append(submit_task(executor, build_lookup_index, df, LOOKUP_INDEX_PATH))
+        written = wait_for(futures)
+
+    for path in written:
+        print(f"Exportado: {path}")
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module(BENCHMARKS[args.name], extra, f"{PROG} bench {args.name}")
+    return 0
+
+
+def cmd_lookup(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("lookup_index", extra, f"{PROG} lookup")
+    return 0
+
+
+def cmd_prices(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("price_refresh", extra, f"{PROG} prices")
+    return 0
+
+
+def cmd_query(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("sql_query", extra, f"{PROG} query")
+    return 0
+
+
+def cmd_covers(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("cover_store", extra, f"{PROG} covers")
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("html_archive", extra, f"{PROG} archive")
+    return 0
+
+
+def cmd_landing(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("landing_format", extra, f"{PROG} landing")
+    return 0
+
+
+def cmd_run(args: argparse.Namespace, extra: List[str]) -> int:
+    _run_module("stage_runner", extra, f"{PROG} run")
+    return 0
+
+
+def validate_config(environ: Dict[str, str]) -> List[Dict[str, str]]:
+    # Una entrada por variable reconocida o desconocida con prefijo del proyecto
+    entries: List[Dict[str, str]] = []
+    for name, (kind, allowed) in CONFIG_VARS.items():
+        value = environ.get(name)
+        error = ""
+        if value is not None:
+            if kind == "booleano" and value.lower() not in ("true", "false"):
+                error = "se esperaba true/false"
+            elif kind in ("entero", "entero0"):
+                try:
+                    if kind == "entero" and int(value) <= 0:
+                        error = "debe ser > 0"
+                    elif int(value) < 0:
+                        error = "debe ser >= 0"
+                except ValueError:
+                    error = "no es un entero"
+            elif kind == "decimal":
+                try:
+                    float(value)
+                except ValueError:
+                    error = "no es un número"
+            elif kind == "opcion" and value.strip().lower() not in allowed:
+                error = f"valores permitidos: {', '.join(v or '(vacío)' for v in allowed)}"
+        shown = "(por defecto)" if value is None else ("***" if kind == "secreto" else value)
+        entries.append({"variable": name, "valor": shown, "error": error})
+
+    for name in sorted(environ):
+        if name.startswith(CONFIG_PREFIXES) and name not in CONFIG_VARS:
+            entries.append({"variable": name, "valor": environ[name], "error": "variable desconocida (¿errata?)"})
+    return entries
+
+
+def cmd_config(args: argparse.Namespace, extra: List[str]) -> int:
+    entries = validate_config(dict(os.environ))
+    errors = [e for e in entries if e["error"]]
+    for entry in entries:
+        if args.all or entry["valor"] != "(por defecto)" or entry["error"]:
+            status = f"  [ERROR] {entry['error']}" if entry["error"] else ""
+            print(f"{entry['variable']:<28} {entry['valor']}{status}")
+    print(f"{len(errors)} error(es) de configuración" if errors else "Configuración válida")
+    return 1 if errors else 0
+
+
+# --------------------------
+# Argumentos
+# --------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=PROG, description="Pipeline Goodreads → Google Books → Parquet")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="<subcomando>")
+
+    p = sub.add_parser("scrape", help="Goodreads → landing/goodreads_books.{json,parquet,arrow}")
+    p.add_argument("--query", help="Búsqueda (GOODREADS_SEARCH_QUERY)")
+    p.add_argument("--max-books", type=int, help="Máximo de libros (GOODREADS_MAX_BOOKS)")
+    p.add_argument("--backend", choices=["requests", "playwright"], help="GOODREADS_BACKEND")
+    p.add_argument("--no-isbn", action="store_true", help="No visitar la ficha de cada libro (GOODREADS_FETCH_ISBN=false)")
+    p.add_argument("--refetch-known", action="store_true", help="Pedir también la ficha y portada de libros conocidos (GOODREADS_SKIP_KNOWN=false)")
+    p.add_argument("--stop-after-known-pages", type=int, metavar="N", help="GOODREADS_STOP_AFTER_KNOWN_PAGES")
+    p.add_argument("--no-archive", action="store_true", help="No guardar las páginas HTML en el archivo (GOODREADS_ARCHIVE_HTML=false)")
+    p.add_argument("--fetch-workers", type=int, metavar="N", help="Hilos de descarga de fichas y portadas (GOODREADS_FETCH_WORKERS)")
+    p.add_argument("--parse-workers", type=int, metavar="N", help="Procesos de parseo HTML, 0 = en los hilos de descarga (GOODREADS_PARSE_WORKERS)")
+    p.set_defaults(handler=cmd_scrape)
+
+    p = sub.add_parser("enrich", help="Google Books → landing/googlebooks_books.{csv,parquet,arrow}")
+    p.set_defaults(handler=cmd_enrich)
+
+    p = sub.add_parser("integrate", help="landing/ → staging/, standard/, docs/")
+    p.add_argument("--arrow-native", action="store_true", help="PIPELINE_ARROW_NATIVE=true")
+    p.add_argument("--engine", choices=["pandas", "polars"], help="Motor de transformación (PIPELINE_ENGINE)")
+    p.add_argument("--entity-resolution", action="store_true", help="PIPELINE_ENTITY_RESOLUTION=true")
+    p.add_argument("--profile", metavar="ETAPAS", help="Volcados cProfile (PIPELINE_PROFILE_STAGES)")
+    p.add_argument("--openlibrary-dump", metavar="RUTAS", help="Volcados de ediciones de Open Library (OPENLIBRARY_DUMP)")
+    p.set_defaults(handler=cmd_integrate)
+
+    p = sub.add_parser("export", help="standard/*.parquet → CSV / Feather / índice de búsqueda")
+    p.add_argument("--tables", default=",".join(STANDARD_TABLES), help="Tablas separadas por comas (también los rollups agg_*)")
+    p.add_argument("--formats", default=",".join(EXPORT_FORMATS), help="Formatos separados por comas (csv, feather, index)")
+    p.set_defaults(handler=cmd_export)
+
+    p = sub.add_parser("bench", help="Benchmarks (el resto de argumentos pasa al benchmark)")
+    p.add_argument("name", choices=list(BENCHMARKS))
+    p.set_defaults(handler=cmd_bench)
+
+    # Subcomandos que delegan en la CLI de su módulo (--help incluido)
+    for name, handler, help_text in (
+        ("prices", cmd_prices, "Refresco de precios de Google Books sin volver a integrar (ver price_refresh.py)"),
+        ("lookup", cmd_lookup, "Consultas al índice de dim_book (ver lookup_index.py)"),
+        ("query", cmd_query, "Consultas SQL (DuckDB) sobre las salidas Parquet (ver sql_query.py)"),
+        ("covers", cmd_covers, "Almacén empaquetado de portadas (ver cover_store.py)"),
+        ("archive", cmd_archive, "Archivo HTML de Goodreads y re-extracción sin red (ver html_archive.py)"),
+        ("landing", cmd_landing, "Conversión del landing a Parquet / Arrow IPC (ver landing_format.py)"),
+        ("run", cmd_run, "scrape → enrich → integrate omitiendo etapas sin cambios (ver stage_runner.py)"),
+    ):
+        p = sub.add_parser(name, help=help_text, add_help=False)
+        p.set_defaults(handler=handler)
+
+    p = sub.add_parser("config", help="Valida las variables de entorno")
+    p.add_argument("--all", action="store_true", help="Muestra también las variables sin definir")
+    p.set_defaults(handler=cmd_config)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in ("bench", "prices", "lookup", "query", "covers", "archive", "landing", "run"):
+        parser.error(f"argumentos no reconocidos: {' '.join(extra)}")
+    _prepare()
+    return args.handler(args, extra)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
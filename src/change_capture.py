@@ -0,0 +1,174 @@
+# src/change_capture.py
+
+# Captura de cambios (CDC) de dim_book entre ejecuciones de la integración.
+# Se compara el dim_book nuevo con el publicado en la ejecución anterior
+# (standard/dim_book.parquet) mediante un hash por fila de los campos del ganador
+# (todas las columnas salvo ts_ultima_act):
+#   - insert: book_id nuevo
+#   - update: book_id existente con hash distinto
+#   - delete: book_id que ya no está
+# Las filas sin cambios conservan el ts_ultima_act anterior; solo las insertadas o
+# actualizadas llevan el de esta ejecución.
+#
+# Cada ejecución escribe un fichero de delta en standard/dim_book_delta/
+# (delta_<ts>.parquet) con book_id, operacion, hash_antes, hash_despues, ts_ultima_act y los
+# valores nuevos de la fila (nulos en los delete). Un cargador aplica los deltas en orden
+# de nombre en lugar de recargar la tabla completa.
+#
+# El hash no depende del modo (pandas / Arrow-nativo) ni de los dtypes: cada columna se
+# pasa a texto canónico con Arrow antes de hashear.
+
+import os
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils_parquet import read_parquet_filtered, to_arrow_table, write_parquet
+
+DELTA_DIR = "standard/dim_book_delta"
+TS_COLUMN = "ts_ultima_act"
+OPERATIONS = ["insert", "update", "delete"]
+
+# Marcas del texto canónico: nulo y separador de elementos de lista
+NULL_TOKEN = "\x00"
+LIST_SEPARATOR = "\x1f"
+
+# Combinación de los hashes por columna (FNV-1a sobre enteros de 64 bits)
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def change_capture_options() -> Dict[str, Any]:
+    # PIPELINE_CDC=false desactiva la comparación (ts_ultima_act de la ejecución en todas las filas)
+    return {
+        "enabled": os.getenv("PIPELINE_CDC", "true").lower() == "true",
+        "delta_dir": os.getenv("PIPELINE_CDC_DIR", DELTA_DIR),
+    }
+
+
+def _canonical_text(column: pa.ChunkedArray) -> pa.Array:
+    # Texto canónico de una columna: listas unidas por LIST_SEPARATOR y nulos como NULL_TOKEN
+    column = column.combine_chunks()
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+        column = pc.binary_join(pc.cast(column, pa.list_(pa.string())), LIST_SEPARATOR)
+    else:
+        column = pc.cast(column, pa.string())
+    return pc.fill_null(column, NULL_TOKEN)
+
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Hash de 64 bits por fila de `columns` (las que falten cuentan como nulas). Estable entre
+    procesos y entre modos: pd.util.hash_array (SipHash con clave fija) sobre el texto
+    canónico de cada columna, combinado por orden de columna.
+    """
+    table = to_arrow_table(df[[c for c in columns if c in df.columns]].reset_index(drop=True))
+    hashes = np.full(len(df), FNV_OFFSET, dtype=np.uint64)
+    null_hash = pd.util.hash_array(np.array([NULL_TOKEN], dtype=object))[0]
+    for col in columns:
+        if col in table.column_names:
+            text = _canonical_text(table[col]).to_numpy(zero_copy_only=False)
+            col_hash = pd.util.hash_array(text.astype(object, copy=False))
+        else:
+            col_hash = np.full(len(df), null_hash, dtype=np.uint64)
+        hashes = (hashes ^ col_hash) * FNV_PRIME
+    return hashes
+
+
+def _hex(hashes: np.ndarray) -> np.ndarray:
+    return np.array([f"{h:016x}" for h in hashes.tolist()], dtype=object)
+
+
+def read_previous_dim_book(path: str) -> Optional[pd.DataFrame]:
+    # dim_book de la ejecución anterior (fichero o dataset particionado); None si no existe
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_parquet_filtered(path)
+    except Exception as e:
+        print(f"[AVISO] No se pudo leer el dim_book anterior ({path}): {e}. Se trata como primera carga.")
+        return None
+
+
+def apply_change_capture(
+    dim_book: pd.DataFrame,
+    previous: Optional[pd.DataFrame],
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """
+    Compara dim_book con el de la ejecución anterior. Devuelve:
+      - dim_book con ts_ultima_act anterior en las filas sin cambios
+      - delta: una fila por book_id insertado, actualizado o borrado
+      - contadores por operación
+    Sin ejecución anterior, todas las filas son insert.
+    """
+    columns = [c for c in dim_book.columns if c != TS_COLUMN]
+    run_ts = dim_book[TS_COLUMN].astype(object).iloc[0] if len(dim_book) else datetime.now(UTC).isoformat()
+
+    new = pd.DataFrame({
+        "book_id": dim_book["book_id"].astype(object).to_numpy(),
+        "hash_despues": _hex(row_hashes(dim_book, columns)),
+    })
+    if previous is not None and len(previous):
+        previous = previous.drop_duplicates("book_id", keep="last")
+        old = pd.DataFrame({
+            "book_id": previous["book_id"].astype(object).to_numpy(),
+            "hash_antes": _hex(row_hashes(previous, columns)),
+            "ts_anterior": previous[TS_COLUMN].astype(object).to_numpy()
+            if TS_COLUMN in previous.columns else run_ts,
+        })
+    else:
+        old = pd.DataFrame({"book_id": [], "hash_antes": [], "ts_anterior": []}, dtype=object)
+
+    merged = new.merge(old, on="book_id", how="outer", indicator=True, sort=False)
+    operacion = np.select(
+        [merged["_merge"] == "left_only", merged["_merge"] == "right_only", merged["hash_antes"] != merged["hash_despues"]],
+        ["insert", "delete", "update"],
+        default="",
+    )
+    merged["operacion"] = operacion
+
+    # ts_ultima_act: el anterior si la fila no cambia, el de esta ejecución si cambia
+    current = merged[merged["_merge"] != "right_only"].set_index("book_id")
+    unchanged = current["operacion"] == ""
+    keep_ts = current.loc[unchanged, "ts_anterior"]
+    ts_values = dim_book["book_id"].astype(object).map(keep_ts).fillna(run_ts)
+    dim_book = dim_book.copy()
+    dim_book[TS_COLUMN] = ts_values.astype(dim_book[TS_COLUMN].dtype) if len(dim_book) else dim_book[TS_COLUMN]
+
+    # Delta: filas nuevas/actualizadas con sus valores; borradas solo con el book_id
+    changes = merged.loc[merged["operacion"] != "", ["book_id", "operacion", "hash_antes", "hash_despues"]]
+    values = dim_book[dim_book["book_id"].astype(object).isin(changes["book_id"])]
+    values = values.assign(book_id=values["book_id"].astype(object))
+    delta = changes.merge(values, on="book_id", how="left", sort=False)
+    delta[TS_COLUMN] = delta[TS_COLUMN].astype(object).where(delta["operacion"] != "delete", run_ts)
+    delta["operacion"] = pd.Categorical(delta["operacion"], categories=OPERATIONS)
+    delta = delta.sort_values(["operacion", "book_id"], kind="stable").reset_index(drop=True)
+
+    counts = delta["operacion"].value_counts()
+    stats = {
+        "ts_ejecucion": run_ts,
+        "ejecucion_anterior": previous is not None,
+        "filas": int(len(dim_book)),
+        "sin_cambios": int(unchanged.sum()),
+        **{op: int(counts.get(op, 0)) for op in OPERATIONS},
+    }
+    return dim_book, delta, stats
+
+
+def delta_path(run_ts: str, delta_dir: str = DELTA_DIR) -> str:
+    # Nombre ordenable por fecha: delta_20250101T101500123456Z.parquet
+    stamp = datetime.fromisoformat(run_ts).strftime("%Y%m%dT%H%M%S%fZ")
+    return os.path.join(delta_dir, f"delta_{stamp}.parquet")
+
+
+def write_delta(delta: pd.DataFrame, path: str) -> str:
+    # Siempre se escribe (un delta vacío indica una ejecución sin cambios)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_parquet(delta, path, dictionary_cols=["operacion"])
+    return path
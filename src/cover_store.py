@@ -0,0 +1,539 @@
+# src/cover_store.py
+
+# Almacén empaquetado de portadas: sustituye a covers/ (un JPEG suelto por libro, con el
+# título como nombre) por dos ficheros de solo-añadir dentro de COVER_STORE_PATH:
+#   - blobs.bin: bytes de cada imagen (originales y miniaturas), uno detrás de otro.
+#   - index.bin: un registro de ancho fijo por imagen (INDEX_DTYPE): clave, variante
+#     (original / miniatura), offset y longitud en blobs.bin, ancho y alto.
+#   - urls.tsv: `clave<TAB>url` de cada portada descargada, para no volver a descargar una
+#     URL ya guardada (cover_key_for_url).
+#   - manifest.json: versión, tamaño máximo de las miniaturas y claves cuya miniatura no se
+#     pudo generar (miniaturas_fallidas; no se reintentan salvo con `thumbs --retry-failed`).
+# La clave es el contenido: los 16 primeros bytes del SHA-256 del original, en hexadecimal.
+# La misma portada descargada dos veces se guarda una sola vez. En landing/ la portada se
+# referencia como `cover:<clave>` (campo cover_local_path), independiente de la ruta del almacén.
+#
+# Escritura: un único escritor. Primero se añaden los bytes a blobs.bin y después los
+# registros a index.bin; si el proceso se corta a medias solo quedan bytes huérfanos al
+# final de blobs.bin, que ningún registro referencia (y un registro incompleto se ignora).
+# Lectura: index.bin con np.memmap y blobs.bin con mmap; get_cover devuelve un memoryview
+# sobre el fichero mapeado, sin copiar ni abrir un fichero por portada.
+#
+# Miniaturas: lado mayor <= COVER_THUMB_SIZE px, en JPEG, generadas en un pool de procesos
+# (COVER_WORKERS). Requieren Pillow (opcional); sin él solo se guardan los originales y
+# get_cover(..., thumbnail=True) devuelve el original.
+#
+# Uso (CLI):
+#     python src/cover_store.py pack --dir covers --rewrite-landing   # migra covers/ al almacén
+#     python src/cover_store.py thumbs                                 # miniaturas pendientes
+#     python src/cover_store.py thumbs --retry-failed                  # reintenta las fallidas
+#     python src/cover_store.py get cover:<clave> --thumb --out portada.jpg
+#     python src/cover_store.py stats
+
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+COVER_STORE_PATH = "covers.store"
+STORE_VERSION = 1
+COVER_REF_PREFIX = "cover:"
+DEFAULT_THUMB_SIZE = 160
+THUMB_QUALITY = 85
+
+VARIANT_ORIGINAL = 0
+VARIANT_THUMBNAIL = 1
+
+# Registro de index.bin (33 bytes, little-endian, sin relleno). La clave de 128 bits se
+# guarda como dos enteros big-endian para ordenar y buscar con numpy.
+INDEX_DTYPE = np.dtype([
+    ("key_hi", "<u8"),
+    ("key_lo", "<u8"),
+    ("variante", "u1"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+])
+
+# Marcadores SOF de JPEG (contienen alto y ancho); C4, C8 y CC no lo son
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def cover_store_options() -> Dict[str, Any]:
+    # Configuración por entorno (COVER_*)
+    return {
+        "path": os.getenv("COVER_STORE_PATH", COVER_STORE_PATH),
+        "thumb_size": int(os.getenv("COVER_THUMB_SIZE", DEFAULT_THUMB_SIZE)),
+        "workers": int(os.getenv("COVER_WORKERS", os.cpu_count() or 1)),
+    }
+
+
+# --------------------------
+# Claves
+# --------------------------
+
+def cover_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def cover_ref(key: str) -> str:
+    # Valor de cover_local_path para una clave del almacén
+    return COVER_REF_PREFIX + key
+
+
+def parse_cover_ref(value: Optional[str]) -> Optional[str]:
+    # "cover:<clave>" o la clave sola → clave; None si no es una referencia al almacén
+    if not value:
+        return None
+    key = value[len(COVER_REF_PREFIX):] if value.startswith(COVER_REF_PREFIX) else value
+    if len(key) != 32:
+        return None
+    try:
+        bytes.fromhex(key)
+    except ValueError:
+        return None
+    return key.lower()
+
+
+def _key_parts(key: str) -> Tuple[int, int]:
+    raw = bytes.fromhex(key)
+    return int.from_bytes(raw[:8], "big"), int.from_bytes(raw[8:], "big")
+
+
+def _key_from_parts(hi: int, lo: int) -> str:
+    return (int(hi).to_bytes(8, "big") + int(lo).to_bytes(8, "big")).hex()
+
+
+def jpeg_size(data: bytes) -> Tuple[int, int]:
+    # (ancho, alto) leyendo la cabecera SOF de un JPEG, sin decodificarlo; (0, 0) si no es JPEG
+    if data[:2] != b"\xff\xd8":
+        return 0, 0
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        (segment_length,) = struct.unpack(">H", data[pos + 2:pos + 4])
+        if marker in JPEG_SOF_MARKERS and pos + 9 <= len(data):
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + segment_length
+    return 0, 0
+
+
+# --------------------------
+# Escritura
+# --------------------------
+
+def _blob_path(path: str) -> str:
+    return os.path.join(path, "blobs.bin")
+
+
+def _index_path(path: str) -> str:
+    return os.path.join(path, "index.bin")
+
+
+def _urls_path(path: str) -> str:
+    return os.path.join(path, "urls.tsv")
+
+
+def _ensure_store(path: str, thumb_size: int) -> None:
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_VERSION, "clave": "sha256[:16]", "miniatura_max_px": thumb_size}, f, indent=2)
+
+
+def _read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    # Temporal + os.replace: un corte a medias no deja un manifest.json truncado
+    manifest_path = os.path.join(path, "manifest.json")
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def read_index(path: str) -> np.ndarray:
+    """
+    Registros válidos de index.bin (copia en memoria). Se descartan un registro final
+    incompleto y los que apuntan más allá del final de blobs.bin (escritura interrumpida).
+    """
+    index_path = _index_path(path)
+    if not os.path.exists(index_path):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    with open(index_path, "rb") as f:
+        raw = f.read()
+    records = np.frombuffer(raw[: len(raw) - len(raw) % INDEX_DTYPE.itemsize], dtype=INDEX_DTYPE)
+    blob_size = os.path.getsize(_blob_path(path)) if os.path.exists(_blob_path(path)) else 0
+    return records[records["offset"] + records["length"] <= blob_size]
+
+
+def _stored(records: np.ndarray, variant: int) -> set:
+    selected = records[records["variante"] == variant]
+    return {_key_from_parts(hi, lo) for hi, lo in zip(selected["key_hi"], selected["key_lo"])}
+
+
+def _append(path: str, entries: List[Tuple[str, int, bytes, int, int]]) -> None:
+    # entries: (clave, variante, bytes, ancho, alto). Primero blobs.bin, después index.bin
+    if not entries:
+        return
+    records = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    with open(_blob_path(path), "ab") as blob:
+        offset = blob.seek(0, os.SEEK_END)
+        for i, (key, variant, data, width, height) in enumerate(entries):
+            blob.write(data)
+            records[i] = (*_key_parts(key), variant, offset, len(data), width, height)
+            offset += len(data)
+        blob.flush()
+        os.fsync(blob.fileno())
+    with open(_index_path(path), "ab") as index:
+        # Registro incompleto de una escritura interrumpida: se recorta antes de añadir
+        size = index.seek(0, os.SEEK_END)
+        if size % INDEX_DTYPE.itemsize:
+            index.truncate(size - size % INDEX_DTYPE.itemsize)
+        index.write(records.tobytes())
+        index.flush()
+        os.fsync(index.fileno())
+
+
+def add_covers(blobs: Iterable[bytes], path: str = COVER_STORE_PATH, thumb_size: int = DEFAULT_THUMB_SIZE) -> List[str]:
+    """
+    Añade imágenes originales al almacén (las ya guardadas se omiten) y devuelve sus claves,
+    en el mismo orden. Las miniaturas se generan aparte con build_thumbnails.
+    """
+    _ensure_store(path, thumb_size)
+    present = _stored(read_index(path), VARIANT_ORIGINAL)
+    keys: List[str] = []
+    entries: List[Tuple[str, int, bytes, int, int]] = []
+    for data in blobs:
+        key = cover_key(data)
+        keys.append(key)
+        if key not in present:
+            present.add(key)
+            entries.append((key, VARIANT_ORIGINAL, data, *jpeg_size(data)))
+    _append(path, entries)
+    return keys
+
+
+def read_cover_urls(path: str = COVER_STORE_PATH) -> Dict[str, str]:
+    """
+    {url: clave} de las portadas descargadas (urls.tsv). Se ignoran las líneas incompletas
+    de una escritura interrumpida; si una URL aparece varias veces gana la última.
+    """
+    urls: Dict[str, str] = {}
+    if not os.path.exists(_urls_path(path)):
+        return urls
+    with open(_urls_path(path), "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            key, _, url = line.rstrip("\n").partition("\t")
+            if len(key) == 32 and url:
+                urls[url] = key
+    return urls
+
+
+def add_cover_url(url: str, key: str, path: str = COVER_STORE_PATH) -> None:
+    # Se llama después de add_covers: una URL anotada siempre tiene su original en el almacén
+    with open(_urls_path(path), "a", encoding="utf-8") as f:
+        f.write(f"{key}\t{url}\n")
+
+
+def _make_thumbnail(task: Tuple[str, bytes, int]) -> Tuple[str, Optional[bytes], int, int, int, int]:
+    # Proceso de trabajo: (clave, miniatura JPEG o None, ancho/alto de la miniatura y del original)
+    key, data, max_side = task
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            image.thumbnail((max_side, max_side))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=THUMB_QUALITY, optimize=True)
+            return key, out.getvalue(), image.size[0], image.size[1], width, height
+    except Exception as e:
+        print(f"[ERROR] No se pudo generar la miniatura de {key}: {e}")
+        return key, None, 0, 0, 0, 0
+
+
+def build_thumbnails(
+    path: str = COVER_STORE_PATH,
+    thumb_size: int = DEFAULT_THUMB_SIZE,
+    workers: int = 1,
+    batch_size: int = 256,
+    retry_failed: bool = False,
+) -> int:
+    """
+    Genera las miniaturas que faltan en un pool de procesos y las añade al almacén en lotes
+    de `batch_size`. Como mucho 2 × procesos imágenes en vuelo (memoria acotada).
+    Las claves que fallan se anotan en manifest.json (miniaturas_fallidas) y no se vuelven a
+    intentar en las ejecuciones siguientes, salvo con retry_failed=True.
+    Devuelve el número de miniaturas añadidas (0 sin Pillow).
+    """
+    if not PIL_AVAILABLE:
+        print("[AVISO] Pillow no está instalado: se omiten las miniaturas (pip install Pillow)")
+        return 0
+    manifest = _read_manifest(path)
+    previous_failures = set(manifest.get("miniaturas_fallidas", []))
+    skipped = set() if retry_failed else previous_failures
+    records = read_index(path)
+    done = _stored(records, VARIANT_THUMBNAIL) | skipped
+    originals = records[records["variante"] == VARIANT_ORIGINAL]
+    pending_originals = [r for r in originals if _key_from_parts(r["key_hi"], r["key_lo"]) not in done]
+    if not pending_originals:
+        return 0
+
+    workers = max(1, workers)
+    added = 0
+    batch: List[Tuple[str, int, bytes, int, int]] = []
+    failed: List[str] = []
+
+    def consume(future) -> None:
+        nonlocal added, batch
+        key, thumb, width, height, _, _ = future.result()
+        if thumb is None:
+            failed.append(key)
+            return
+        batch.append((key, VARIANT_THUMBNAIL, thumb, width, height))
+        if len(batch) >= batch_size:
+            _append(path, batch)
+            added += len(batch)
+            batch = []
+
+    with open(_blob_path(path), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight: Deque = deque()
+            for record in pending_originals:
+                key = _key_from_parts(record["key_hi"], record["key_lo"])
+                start = int(record["offset"])
+                data = blob[start:start + int(record["length"])]
+                in_flight.append(pool.submit(_make_thumbnail, (key, data, thumb_size)))
+                if len(in_flight) >= 2 * workers:
+                    consume(in_flight.popleft())
+            while in_flight:
+                consume(in_flight.popleft())
+    _append(path, batch)
+
+    # Fallidas: las de antes que no se han reintentado más las nuevas (sin las ya resueltas)
+    failures = (skipped | set(failed)) - _stored(read_index(path), VARIANT_THUMBNAIL)
+    if failures != previous_failures:
+        manifest["miniaturas_fallidas"] = sorted(failures)
+        _write_manifest(path, manifest)
+    if failed:
+        print(f"[AVISO] {len(failed)} miniaturas no se pudieron generar; anotadas en manifest.json")
+    return added + len(batch)
+
+
+def pack_directory(covers_dir: str, path: str = COVER_STORE_PATH, thumb_size: int = DEFAULT_THUMB_SIZE) -> Dict[str, str]:
+    # Migra un directorio de portadas sueltas al almacén: {nombre de fichero: "cover:<clave>"}
+    names = sorted(n for n in os.listdir(covers_dir) if os.path.isfile(os.path.join(covers_dir, n)))
+    mapping: Dict[str, str] = {}
+    # Por lotes, para no leer todo el directorio en memoria
+    for start in range(0, len(names), 1000):
+        chunk = names[start:start + 1000]
+        blobs = []
+        for name in chunk:
+            with open(os.path.join(covers_dir, name), "rb") as f:
+                blobs.append(f.read())
+        for name, key in zip(chunk, add_covers(blobs, path, thumb_size)):
+            mapping[name] = cover_ref(key)
+    return mapping
+
+
+def rewrite_landing(landing_path: str, mapping: Dict[str, str]) -> int:
+    # Sustituye en el landing de Goodreads las rutas de covers/ por referencias al almacén
+    from landing_format import read_landing_records, write_landing_records
+
+    books = read_landing_records(landing_path)
+    changed = 0
+    for book in books:
+        old = book.get("cover_local_path")
+        # Las rutas antiguas pueden venir con "\" (generadas en Windows)
+        name = old.replace("\\", "/").rsplit("/", 1)[-1] if old else None
+        if name in mapping:
+            book["cover_local_path"] = mapping[name]
+            changed += 1
+    write_landing_records(books, landing_path, "goodreads")
+    return changed
+
+
+# --------------------------
+# Lectura
+# --------------------------
+
+def open_cover_store(path: str = COVER_STORE_PATH) -> Dict[str, Any]:
+    """
+    Abre el almacén sin leer las imágenes: index.bin y blobs.bin quedan mapeados en memoria.
+    Las portadas añadidas después de abrirlo no se ven hasta volver a abrirlo.
+    """
+    manifest = _read_manifest(path)
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(f"Versión de almacén de portadas no soportada: {manifest.get('version')}")
+
+    blob_size = os.path.getsize(_blob_path(path)) if os.path.exists(_blob_path(path)) else 0
+    index_size = os.path.getsize(_index_path(path)) if os.path.exists(_index_path(path)) else 0
+    n_records = index_size // INDEX_DTYPE.itemsize
+    if n_records and blob_size:
+        records = np.memmap(_index_path(path), dtype=INDEX_DTYPE, mode="r", shape=(n_records,))
+        with open(_blob_path(path), "rb") as f:
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        records, blob = np.zeros(0, dtype=INDEX_DTYPE), None
+
+    # Orden por clave (y variante) para buscar con bisección
+    order = np.lexsort((records["variante"], records["key_lo"], records["key_hi"]))
+    return {
+        "manifest": manifest,
+        "records": records,
+        "order": order,
+        "key_hi": np.asarray(records["key_hi"])[order],
+        "blob": blob,
+        "blob_size": blob_size,
+    }
+
+
+def _find(store: Dict[str, Any], key: str, variant: int) -> Optional[np.void]:
+    # Comparaciones siempre en uint64 (un int de Python > 2**63 se compararía como float)
+    hi, lo = (np.uint64(part) for part in _key_parts(key))
+    key_hi = store["key_hi"]
+    pos = int(np.searchsorted(key_hi, hi, side="left"))
+    while pos < len(key_hi) and key_hi[pos] == hi:
+        record = store["records"][store["order"][pos]]
+        if record["key_lo"] == lo and record["variante"] == variant:
+            if record["offset"] + record["length"] <= store["blob_size"]:
+                return record
+        pos += 1
+    return None
+
+
+def get_cover(store: Dict[str, Any], ref: str, thumbnail: bool = False) -> Optional[memoryview]:
+    """
+    Bytes de la portada (`cover:<clave>` o la clave) como memoryview sobre blobs.bin.
+    Con thumbnail=True devuelve la miniatura, o el original si no la hay. None si no existe.
+    """
+    key = parse_cover_ref(ref)
+    if key is None or store["blob"] is None:
+        return None
+    record = _find(store, key, VARIANT_THUMBNAIL) if thumbnail else None
+    if record is None:
+        record = _find(store, key, VARIANT_ORIGINAL)
+    if record is None:
+        return None
+    start = int(record["offset"])
+    return memoryview(store["blob"])[start:start + int(record["length"])]
+
+
+def cover_info(store: Dict[str, Any], ref: str) -> Optional[Dict[str, Any]]:
+    # Tamaño en bytes y dimensiones del original y de la miniatura (si existe)
+    key = parse_cover_ref(ref)
+    if key is None:
+        return None
+    info: Dict[str, Any] = {"clave": key}
+    for name, variant in (("original", VARIANT_ORIGINAL), ("miniatura", VARIANT_THUMBNAIL)):
+        record = _find(store, key, variant)
+        if record is not None:
+            info[name] = {"bytes": int(record["length"]), "ancho": int(record["width"]), "alto": int(record["height"])}
+    return info if "original" in info else None
+
+
+def store_stats(store: Dict[str, Any]) -> Dict[str, Any]:
+    records = store["records"]
+    originals = records["variante"] == VARIANT_ORIGINAL
+    return {
+        "portadas": int(originals.sum()),
+        "miniaturas": int((~originals).sum()),
+        "bytes_originales": int(records["length"][originals].sum()),
+        "bytes_miniaturas": int(records["length"][~originals].sum()),
+        "bytes_blobs": int(store["blob_size"]),
+        "miniaturas_fallidas": len(store["manifest"].get("miniaturas_fallidas", [])),
+    }
+
+
+def main():
+    options = cover_store_options()
+    parser = argparse.ArgumentParser(description="Almacén empaquetado de portadas")
+    parser.add_argument("--store", default=options["path"], help="Directorio del almacén (COVER_STORE_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pack", help="Añade al almacén las portadas sueltas de un directorio")
+    p.add_argument("--dir", default="covers", help="Directorio de portadas sueltas")
+    p.add_argument("--rewrite-landing", action="store_true", help="Actualiza cover_local_path en el landing de Goodreads")
+    p.add_argument("--no-thumbs", action="store_true", help="No generar miniaturas")
+
+    p = sub.add_parser("thumbs", help="Genera las miniaturas que faltan")
+    p.add_argument("--retry-failed", action="store_true", help="Reintenta también las anotadas como fallidas en manifest.json")
+
+    p = sub.add_parser("get", help="Extrae una portada")
+    p.add_argument("ref", help="cover:<clave> o la clave")
+    p.add_argument("--thumb", action="store_true", help="Miniatura en lugar del original")
+    p.add_argument("--out", help="Fichero de salida (por defecto solo se muestra la información)")
+
+    sub.add_parser("stats", help="Resumen del almacén")
+    args = parser.parse_args()
+
+    if args.command in ("get", "stats") and not os.path.exists(os.path.join(args.store, "manifest.json")):
+        print(f"[ERROR] No existe el almacén {args.store}: ejecutar antes `pack` o el scraper")
+        return
+
+    if args.command == "pack":
+        t0 = time.perf_counter()
+        mapping = pack_directory(args.dir, args.store, options["thumb_size"])
+        print(f"Empaquetadas {len(mapping)} portadas de {args.dir} en {args.store} ({time.perf_counter() - t0:.2f} s)")
+        if not args.no_thumbs:
+            added = build_thumbnails(args.store, options["thumb_size"], options["workers"])
+            print(f"Miniaturas añadidas: {added}")
+        if args.rewrite_landing:
+            from landing_format import find_landing_file
+
+            landing_path = find_landing_file("landing", "goodreads")
+            print(f"cover_local_path actualizado en {rewrite_landing(landing_path, mapping)} libros de {landing_path}")
+    elif args.command == "thumbs":
+        t0 = time.perf_counter()
+        added = build_thumbnails(args.store, options["thumb_size"], options["workers"], retry_failed=args.retry_failed)
+        print(f"Miniaturas añadidas: {added} ({time.perf_counter() - t0:.2f} s)")
+    elif args.command == "get":
+        store = open_cover_store(args.store)
+        data = get_cover(store, args.ref, thumbnail=args.thumb)
+        if data is None:
+            print(f"No existe la portada {args.ref}")
+            return
+        print(json.dumps(cover_info(store, args.ref), ensure_ascii=False))
+        if args.out:
+            with open(args.out, "wb") as f:
+                f.write(data)
+            print(f"Escrita en {args.out} ({len(data)} bytes)")
+    else:
+        print(json.dumps(store_stats(open_cover_store(args.store)), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
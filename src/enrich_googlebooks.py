@@ -1,14 +1,14 @@
 # src/enrich_googlebooks.py
 
-import csv
-import json
 import os
-import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
 
+from landing_format import close_landing_writer, find_landing_file, landing_format_options, landing_path, open_landing_writer, read_landing_records, write_record
+from rate_control import format_rate_metrics, rate_limited_get, rate_metrics, save_rate_state
+
 GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
 
 # Utilidades de ruta base del proyecto (subimos desde src/ a la raíz)
@@ -43,9 +43,10 @@ def build_query(book: Dict[str, Any]) -> str:
     return "+".join(q_parts) if q_parts else ""
 
 
-def call_google_books_api(query: str, api_key: Optional[str] = None, max_retries: int = 3, backoff_seconds: float = 2.0,) -> Optional[Dict[str, Any]]:   
-    
-    # Llama a Google Books con reintentos simples en caso de 503/429.
+def call_google_books_api(query: str, api_key: Optional[str] = None, max_retries: Optional[int] = None,) -> Optional[Dict[str, Any]]:
+
+    # Llama a Google Books al ritmo adaptativo del host (ver rate_control.py): los 503/429
+    # reducen la tasa y se reintentan (hasta max_retries, RATE_MAX_RETRIES) respetando Retry-After.
     # Devuelve el primer item o None si no hay resultados / fallo.
 
     if not query:
@@ -55,34 +56,32 @@ def call_google_books_api(query: str, api_key: Optional[str] = None, max_retries
     if api_key:
         params["key"] = api_key
 
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=15)
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR RED] Fallo de red llamando a Google Books: {e}")
-            return None
+    try:
+        resp = rate_limited_get(GOOGLE_BOOKS_API_URL, max_retries=max_retries, params=params, timeout=15)
+    except requests.exceptions.RequestException as e:
+        print(f"[ERROR RED] Fallo de red llamando a Google Books: {e}")
+        return None
 
-        status = resp.status_code
+    status = resp.status_code
 
-        # OK
-        if status == 200:
-            data = resp.json()
-            if data.get("totalItems", 0) == 0 or not data.get("items"):
-                return None
-            return data["items"][0]
+    # OK
+    if status == 200:
+        data = resp.json()
+        if data.get("totalItems", 0) == 0 or not data.get("items"):
+            return None
+        return data["items"][0]
 
-        # Errores temporales: reintentamos
-        if status in (503, 429) and attempt < max_retries:
-            print(f"[AVISO] Google Books devolvió {status}. Reintentando ({attempt}/{max_retries})...")
-            time.sleep(backoff_seconds * attempt)
-            continue
+    # Otros errores HTTP (o 503/429 tras agotar los reintentos)
+    print(f"[ERROR HTTP] Google Books devolvió {status}: {resp.text[:200]}...")
+    return None
 
-        # Otros errores HTTP
-        print(f"[ERROR HTTP] Google Books devolvió {status}: {resp.text[:200]}...")
-        return None
 
-    # Si sale del bucle sin éxito
-    return None
+def extract_price(sale_info: Dict[str, Any]) -> Tuple[Optional[float], Optional[str]]:
+    # Precio de saleInfo: listPrice o, si falta, retailPrice → (importe, moneda)
+    list_price = sale_info.get("listPrice") or sale_info.get("retailPrice")
+    if not list_price:
+        return None, None
+    return list_price.get("amount"), list_price.get("currencyCode")
 
 
 def extract_book_fields(item: Dict[str, Any], original_book: Dict[str, Any],) -> Dict[str, Any]:
@@ -102,12 +101,7 @@ def extract_book_fields(item: Dict[str, Any], original_book: Dict[str, Any],) ->
             asin = iden.get("identifier")
 
     # Precio
-    price_amount = None
-    price_currency = None
-    list_price = sale_info.get("listPrice") or sale_info.get("retailPrice")
-    if list_price:
-        price_amount = list_price.get("amount")
-        price_currency = list_price.get("currencyCode")
+    price_amount, price_currency = extract_price(sale_info)
 
     authors = volume_info.get("authors", []) or []
     categories = volume_info.get("categories", []) or []
@@ -138,15 +132,18 @@ def main():
     if not api_key:
         print("[AVISO] GOOGLE_BOOKS_API_KEY no encontrado en el .env")
 
-    # Leer JSON de Goodreads desde landing/ relativo a la raíz del proyecto
-    input_path = os.path.join(LANDING_DIR, "goodreads_books.json")
+    # Leer el landing de Goodreads (JSON, Parquet o Arrow IPC) relativo a la raíz del proyecto
+    landing_options = landing_format_options()
+    input_path = find_landing_file(LANDING_DIR, "goodreads", landing_options["format"])
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"No se encuentra el fichero de entrada: {input_path}")
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        goodreads_books = json.load(f)
+    goodreads_books = read_landing_records(input_path)
 
-    rows: List[Dict[str, Any]] = []
+    # Salida en landing/ en el formato PIPELINE_LANDING_FORMAT (CSV ';' por defecto): en
+    # Parquet / IPC cada registro va a buffers por columna que se vuelcan por lotes
+    output_path = landing_path(LANDING_DIR, "googlebooks", landing_options["format"])
+    writer = open_landing_writer(output_path, "googlebooks", landing_options["batch_rows"])
 
     for book in goodreads_books:
         title = book.get("title")
@@ -162,46 +159,21 @@ def main():
             # catch-all por si algo raro se escapa
             print(f"[ERROR] Excepción inesperada para '{title}': {e}")
             continue
-        
-        time.sleep(0.3)  # pequeña pausa de buena práctica
 
         if not item:
             print(f"  → Sin resultados para '{title}'")
             continue
 
         enriched = extract_book_fields(item, book)
-        rows.append(enriched)
+        write_record(writer, enriched)
         print("  → Enriquecido correctamente")
 
-    # Guardar CSV en landing/
-    os.makedirs(LANDING_DIR, exist_ok=True)
-    output_path = os.path.join(LANDING_DIR, "googlebooks_books.csv")
-
-    fieldnames = [
-        "gb_id",
-        "original_title",
-        "original_author",
-        "title",
-        "subtitle",
-        "authors",
-        "publisher",
-        "pub_date",
-        "language",
-        "categories",
-        "isbn13",
-        "isbn10",
-        "asin",
-        "price_amount",
-        "price_currency",
-    ]
-
-    with open(output_path, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-
-    print(f"\nGuardados {len(rows)} registros enriquecidos en {output_path}")
+    # Columnas en el orden de GOOGLEBOOKS_SCHEMA (ver landing_format.py)
+    n_rows = close_landing_writer(writer)
+
+    print(f"\nGuardados {n_rows} registros enriquecidos en {output_path}")
+    print(format_rate_metrics(rate_metrics()))
+    save_rate_state()
 
 if __name__ == "__main__":
     main()
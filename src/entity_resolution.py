@@ -0,0 +1,264 @@
+# src/entity_resolution.py
+
+# Resolución de entidades para registros sin isbn13.
+# Sin isbn13 el book_id es un SHA-1 exacto de título/autor/editorial/año, y las filas de
+# Goodreads (sin editorial ni año) casi nunca coinciden con las de Google Books.
+# Comparar todos los pares sería cuadrático; en su lugar:
+#   1. Índice de bloques: clave = apellido del autor + tokens del "prefijo" del título
+#      principal (sus tokens menos frecuentes). Con prefix filtering, todo par con
+#      Jaccard >= umbral comparte al menos un token del prefijo, así que no se pierden
+#      candidatos y las palabras comunes no generan bloques enormes.
+#   2. Pares candidatos solo dentro de cada bloque (y con al menos una fila sin isbn13).
+#   3. Similitud vectorizada: Jaccard de tokens del título principal (explode + merge).
+#   4. Clusters con union-find; cada cluster comparte un book_id (su isbn13 si lo tiene).
+
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_BLOCK_SIZE = 200
+DEFAULT_MAX_YEAR_GAP = 1
+
+# Palabras vacías (en/es) que no forman bloque ni cuentan en la similitud
+STOPWORDS = {
+    "a", "an", "and", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with",
+    "de", "del", "el", "en", "la", "las", "los", "un", "una", "y",
+}
+
+
+def entity_resolution_options() -> Dict[str, Any]:
+    # Configuración por entorno (ER_*). Desactivada por defecto: cambia book_id (ver README 3.12)
+    return {
+        "enabled": os.getenv("PIPELINE_ENTITY_RESOLUTION", "false").lower() == "true",
+        "threshold": float(os.getenv("ER_THRESHOLD", DEFAULT_THRESHOLD)),
+        "max_block_size": int(os.getenv("ER_MAX_BLOCK_SIZE", DEFAULT_MAX_BLOCK_SIZE)),
+    }
+
+
+def _strings(s: pd.Series) -> pa.Array:
+    # Series object o respaldada por Arrow → pa.Array de texto (un solo bloque)
+    arr = pa.array(s, type=pa.string(), from_pandas=True)
+    return arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+
+
+def _fold(arr: pa.Array) -> pa.Array:
+    # minúsculas, sin acentos ni signos de puntuación (pyarrow.compute, sin bucles Python)
+    # NFKD separa las marcas ("í" → "i" + acento): se quitan antes de sustituir el resto de
+    # caracteres por espacios, o "garcía" quedaría partido en "garci a"
+    arr = pc.utf8_normalize(pc.utf8_lower(pc.fill_null(arr, "")), "NFKD")
+    arr = pc.replace_substring_regex(arr, r"\p{Mn}+", "")
+    arr = pc.replace_substring_regex(arr, r"[^a-z0-9]+", " ")
+    return pc.utf8_trim_whitespace(arr)
+
+
+def main_title(titulo: pa.Array) -> pa.Array:
+    # Título principal: lo anterior a ":" o "(" ("big data: a very short..." → "big data")
+    return pc.replace_substring_regex(titulo, r"[:(].*", "")
+
+
+def author_parts(autor: pd.Series) -> Tuple[pa.Array, np.ndarray]:
+    """
+    Primer y último token del autor normalizado ("michael d.   smith" → michael, smith).
+    Devuelve (nombre, código de apellido); el nombre queda vacío si el autor tiene un solo
+    token y el código es -1 si no hay autor.
+    """
+    folded = _fold(_strings(autor))
+    surname = pc.replace_substring_regex(folded, r"^.* ", "")
+    surname_codes = pc.dictionary_encode(pc.if_else(pc.equal(surname, ""), None, surname)).indices
+    first_name = pc.if_else(
+        pc.match_substring(folded, " "),
+        pc.replace_substring_regex(folded, r" .*$", ""),
+        "",
+    )
+    return first_name, pc.fill_null(surname_codes, -1).to_numpy()
+
+
+def first_names_compatible(left: pa.Array, right: pa.Array) -> np.ndarray:
+    # Compatibles si falta alguno, coinciden, o uno es inicial del otro ("m" / "michael")
+    missing = pc.or_(pc.equal(left, ""), pc.equal(right, ""))
+    one_initial = pc.or_(pc.equal(pc.utf8_length(left), 1), pc.equal(pc.utf8_length(right), 1))
+    same_initial = pc.equal(pc.utf8_slice_codeunits(left, 0, 1), pc.utf8_slice_codeunits(right, 0, 1))
+    compatible = pc.or_(pc.or_(missing, pc.equal(left, right)), pc.and_(one_initial, same_initial))
+    return compatible.to_numpy(zero_copy_only=False)
+
+
+def title_tokens(titulo: pd.Series) -> pd.DataFrame:
+    """
+    Tokens distintos del título principal, uno por fila: columnas `row` (posición) y `token`
+    (código entero). Se descartan palabras vacías y tokens de un carácter.
+    """
+    tokens = pc.split_pattern(_fold(main_title(_strings(titulo))), " ")
+    flat = pc.list_flatten(tokens)
+    rows = pc.list_parent_indices(tokens)
+
+    keep = pc.and_(
+        pc.greater(pc.utf8_length(flat), 1),
+        pc.invert(pc.is_in(flat, value_set=pa.array(sorted(STOPWORDS)))),
+    )
+    df = pd.DataFrame({
+        "row": pc.filter(rows, keep).to_numpy(),
+        "token": pc.dictionary_encode(pc.filter(flat, keep)).indices.to_numpy(),
+    })
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+def prefix_tokens(tokens: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Prefijo de cada fila para el índice de bloques: sus tokens ordenados por frecuencia
+    global ascendente, los primeros |A| - ceil(umbral * |A|) + 1.
+    """
+    frequency = np.bincount(tokens["token"].to_numpy())
+    ranked = tokens.assign(freq=frequency[tokens["token"].to_numpy()])
+    ranked = ranked.sort_values(["row", "freq", "token"], kind="stable")
+
+    n_tokens = ranked.groupby("row")["token"].transform("size").to_numpy()
+    prefix_len = n_tokens - np.ceil(threshold * n_tokens - 1e-9).astype(np.int64) + 1
+    position = ranked.groupby("row").cumcount().to_numpy()
+    return ranked.loc[position < prefix_len, ["row", "token"]]
+
+
+def candidate_pairs(
+    surname_codes: np.ndarray,
+    tokens: pd.DataFrame,
+    has_isbn: np.ndarray,
+    threshold: float = DEFAULT_THRESHOLD,
+    max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Pares (left, right) con left < right que comparten algún bloque apellido+token de prefijo.
+    Los bloques de más de `max_block_size` filas se descartan (solo quedan con apellidos y
+    títulos muy repetidos); los pares en que ambas filas tienen isbn13 no se comparan.
+    """
+    keys = prefix_tokens(tokens, threshold)
+    keys["surname"] = surname_codes[keys["row"].to_numpy()]
+    keys = keys[keys["surname"] >= 0]
+
+    # Clave de bloque como entero único (apellido, token)
+    n_tokens = int(tokens["token"].max()) + 1 if len(tokens) else 1
+    keys["block"] = keys["surname"].to_numpy(dtype=np.int64) * n_tokens + keys["token"].to_numpy(dtype=np.int64)
+
+    sizes = keys.groupby("block")["row"].transform("size")
+    stats = {
+        "bloques": int(keys["block"].nunique()),
+        "bloques_descartados": int(keys.loc[sizes > max_block_size, "block"].nunique()),
+    }
+    keys = keys.loc[(sizes > 1) & (sizes <= max_block_size), ["block", "row"]]
+
+    pairs = keys.merge(keys, on="block", suffixes=("_l", "_r"))
+    pairs = pairs[pairs["row_l"] < pairs["row_r"]]
+    pairs = pairs[~(has_isbn[pairs["row_l"].to_numpy()] & has_isbn[pairs["row_r"].to_numpy()])]
+    pairs = (
+        pairs[["row_l", "row_r"]]
+        .drop_duplicates()
+        .rename(columns={"row_l": "left", "row_r": "right"})
+        .reset_index(drop=True)
+    )
+    stats["pares_candidatos"] = int(len(pairs))
+    return pairs, stats
+
+
+def jaccard_scores(pairs: pd.DataFrame, tokens: pd.DataFrame, n_rows: int) -> np.ndarray:
+    # |A ∩ B| / |A ∪ B| con los tokens de cada fila, sin bucles por par
+    n_per_row = np.bincount(tokens["row"].to_numpy(), minlength=n_rows)
+    pair_ids = np.arange(len(pairs))
+
+    left = pd.DataFrame({"pair": pair_ids, "row": pairs["left"].to_numpy()}).merge(tokens, on="row")
+    right = pd.DataFrame({"pair": pair_ids, "row": pairs["right"].to_numpy()}).merge(tokens, on="row")
+    common = left[["pair", "token"]].merge(right[["pair", "token"]], on=["pair", "token"])
+    inter = np.bincount(common["pair"].to_numpy(), minlength=len(pairs))
+
+    union = n_per_row[pairs["left"].to_numpy()] + n_per_row[pairs["right"].to_numpy()] - inter
+    return np.divide(inter, union, out=np.zeros(len(pairs)), where=union > 0)
+
+
+def cluster_pairs(pairs: pd.DataFrame, n_rows: int, isbn_ids: np.ndarray) -> np.ndarray:
+    """
+    Union-find sobre los pares aceptados (de mayor a menor score).
+    No se unen dos clusters con isbn13 distintos: serían ediciones diferentes.
+    Devuelve la raíz de cada fila (las filas sin pares son su propia raíz).
+    """
+    parent: Dict[int, int] = {}
+    isbn_root: Dict[int, Any] = {}
+
+    def find(x: int) -> int:
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for left, right in zip(pairs["left"].tolist(), pairs["right"].tolist()):
+        root_l, root_r = find(left), find(right)
+        if root_l == root_r:
+            continue
+        isbn_l = isbn_root.get(root_l, isbn_ids[root_l])
+        isbn_r = isbn_root.get(root_r, isbn_ids[root_r])
+        if isbn_l is not None and isbn_r is not None and isbn_l != isbn_r:
+            continue
+        parent[root_r] = root_l
+        isbn_root[root_l] = isbn_l if isbn_l is not None else isbn_r
+
+    roots = np.arange(n_rows)
+    for node in list(parent):
+        roots[node] = find(node)
+    return roots
+
+
+def resolve_book_ids(
+    staging: pd.DataFrame,
+    threshold: float = DEFAULT_THRESHOLD,
+    max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+    max_year_gap: int = DEFAULT_MAX_YEAR_GAP,
+) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Recalcula book_id agrupando filas que describen el mismo libro aunque falte isbn13.
+    Requiere las columnas book_id, titulo_normalizado y autor_normalizado (mismo apellido y
+    nombre compatible; anio_publicacion es opcional: si ambos años existen, deben diferir <= max_year_gap).
+    Cada cluster toma el book_id de su isbn13 si lo tiene; si no, el menor hash del cluster.
+    Devuelve (book_id resuelto con el índice de staging, estadísticas).
+    """
+    n_rows = len(staging)
+    book_id = staging["book_id"]
+    # book_id ya es el isbn13 normalizado (13 dígitos) o un SHA-1 (40 hex)
+    has_isbn = book_id.astype("string").str.fullmatch(r"\d{13}").fillna(False).to_numpy(dtype=bool)
+
+    tokens = title_tokens(staging["titulo_normalizado"])
+    first_name, surname_codes = author_parts(staging["autor_normalizado"])
+    pairs, stats = candidate_pairs(surname_codes, tokens, has_isbn, threshold, max_block_size)
+
+    scores = jaccard_scores(pairs, tokens, n_rows)
+    accepted = scores >= threshold
+
+    # Mismo apellido (por el bloque) y nombre compatible
+    accepted &= first_names_compatible(
+        first_name.take(pairs["left"].to_numpy()),
+        first_name.take(pairs["right"].to_numpy()),
+    )
+
+    if "anio_publicacion" in staging.columns and len(pairs):
+        years = pd.to_numeric(staging["anio_publicacion"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        gap = np.abs(years[pairs["left"].to_numpy()] - years[pairs["right"].to_numpy()])
+        accepted &= ~(gap > max_year_gap)
+
+    matches = pairs[accepted].assign(score=scores[accepted]).sort_values("score", ascending=False, kind="stable")
+    stats["pares_aceptados"] = int(len(matches))
+
+    ids = book_id.astype(object).to_numpy()
+    roots = cluster_pairs(matches, n_rows, np.where(has_isbn, ids, None))
+
+    # book_id del cluster: isbn13 si algún miembro lo tiene; si no, el menor hash
+    clusters = pd.DataFrame({"root": roots, "book_id": ids, "has_isbn": has_isbn})
+    clusters = clusters.sort_values(["root", "has_isbn", "book_id"], ascending=[True, False, True])
+    canonical = clusters.groupby("root", sort=False)["book_id"].first()
+
+    resolved = pd.Series(canonical.reindex(roots).to_numpy(), index=staging.index)
+    stats["filas_reasignadas"] = int((resolved.to_numpy() != ids).sum())
+    stats["umbral"] = threshold
+
+    return resolved.astype(book_id.dtype), stats
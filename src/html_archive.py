@@ -0,0 +1,251 @@
+# src/html_archive.py
+
+# Archivo de las páginas HTML crudas que descarga el scraper de Goodreads (búsquedas y
+# fichas de libro), para poder volver a extraer los datos sin red cuando cambia el parseo.
+# Dentro de HTML_ARCHIVE_PATH:
+#   - segment_00001.gz, segment_00002.gz, ...: cada página es un miembro gzip independiente
+#     añadido al final del segmento activo (el segmento completo sigue siendo un .gz válido:
+#     `zcat segment_00001.gz` muestra todas sus páginas). Se pasa a un segmento nuevo al
+#     superar HTML_ARCHIVE_SEGMENT_MB.
+#   - index.jsonl: una línea por página con url, tipo (busqueda / ficha), ts de descarga,
+#     ejecucion (ts de inicio de la ejecución del scraper), segmento, offset y longitud del
+#     miembro gzip y los metadatos de la petición (consulta, página, máx. de libros...).
+#
+# Escritura: solo-añadir. Primero se añaden los bytes al segmento y después la línea del
+# índice; si el proceso se corta a medias solo quedan bytes huérfanos al final del segmento
+# (y una línea incompleta del índice se ignora). Un lock permite escribir desde varios hilos.
+# Lectura: read_page lee un único miembro (seek + read + gunzip), sin descomprimir el resto.
+#
+# La re-extracción (volver a generar el landing de Goodreads desde el archivo, en un pool
+# de procesos y sin red) está en scrape_goodreads.reextract_landing.
+#
+# Uso (CLI):
+#     python src/html_archive.py stats
+#     python src/html_archive.py runs
+#     python src/html_archive.py get <url> [--as-of TS] [--out pagina.html]
+#     python src/html_archive.py reextract [--run TS] [--out landing/goodreads_books.parquet]
+
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+HTML_ARCHIVE_PATH = "landing/html_archive"
+INDEX_FILE = "index.jsonl"
+DEFAULT_SEGMENT_MB = 64
+COMPRESS_LEVEL = 6
+
+KIND_SEARCH = "busqueda"
+KIND_BOOK = "ficha"
+
+
+def html_archive_options() -> Dict[str, Any]:
+    # Configuración por entorno (HTML_ARCHIVE_*); el scraper lo activa con GOODREADS_ARCHIVE_HTML
+    return {
+        "path": os.getenv("HTML_ARCHIVE_PATH", HTML_ARCHIVE_PATH),
+        "segment_mb": int(os.getenv("HTML_ARCHIVE_SEGMENT_MB", DEFAULT_SEGMENT_MB)),
+        "workers": int(os.getenv("HTML_ARCHIVE_WORKERS", os.cpu_count() or 1)),
+    }
+
+
+def _index_path(path: str) -> str:
+    return os.path.join(path, INDEX_FILE)
+
+
+def _segment_name(number: int) -> str:
+    return f"segment_{number:05d}.gz"
+
+
+def _segments(path: str) -> List[str]:
+    if not os.path.isdir(path):
+        return []
+    return sorted(f for f in os.listdir(path) if f.startswith("segment_") and f.endswith(".gz"))
+
+
+# ------------------------------------------------------------
+# ESCRITURA
+# ------------------------------------------------------------
+
+def open_archive_writer(path: str = HTML_ARCHIVE_PATH, segment_mb: int = DEFAULT_SEGMENT_MB) -> Dict[str, Any]:
+    """
+    Abre el archivo para añadir páginas. Devuelve el handle que recibe archive_page; la
+    `ejecucion` (ts de apertura) agrupa las páginas de una misma ejecución del scraper.
+    """
+    os.makedirs(path, exist_ok=True)
+    segments = _segments(path)
+    number = int(segments[-1][len("segment_"):-len(".gz")]) if segments else 1
+    return {
+        "path": path,
+        "segment_bytes": segment_mb * 1024 * 1024,
+        "segment": number,
+        "run": datetime.now(UTC).isoformat(),
+        "lock": threading.Lock(),
+        "pages": 0,
+        "bytes": 0,
+    }
+
+
+def archive_page(writer: Optional[Dict[str, Any]], kind: str, url: str, html: str, **meta: Any) -> Optional[Dict[str, Any]]:
+    """
+    Añade una página al archivo y devuelve su entrada del índice. Con writer=None no hace
+    nada (archivo desactivado). Un fallo de escritura se avisa sin cortar el scraping.
+    """
+    if writer is None:
+        return None
+
+    data = gzip.compress(html.encode("utf-8"), compresslevel=COMPRESS_LEVEL, mtime=0)
+    try:
+        with writer["lock"]:
+            segment_path = os.path.join(writer["path"], _segment_name(writer["segment"]))
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) >= writer["segment_bytes"]:
+                writer["segment"] += 1
+                segment_path = os.path.join(writer["path"], _segment_name(writer["segment"]))
+
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {
+                "url": url,
+                "tipo": kind,
+                "ts": datetime.now(UTC).isoformat(),
+                "ejecucion": writer["run"],
+                "segmento": _segment_name(writer["segment"]),
+                "offset": offset,
+                "longitud": len(data),
+                **meta,
+            }
+            with open(_index_path(writer["path"]), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            writer["pages"] += 1
+            writer["bytes"] += len(data)
+    except OSError as e:
+        print(f"[AVISO] No se pudo archivar {url}: {e}")
+        return None
+    return entry
+
+
+# ------------------------------------------------------------
+# LECTURA
+# ------------------------------------------------------------
+
+def read_archive_index(path: str = HTML_ARCHIVE_PATH) -> List[Dict[str, Any]]:
+    # Entradas del índice en orden de escritura (una última línea incompleta se ignora)
+    index_path = _index_path(path)
+    if not os.path.exists(index_path):
+        return []
+    entries: List[Dict[str, Any]] = []
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            entries.append(json.loads(line))
+    return entries
+
+
+def read_page(path: str, entry: Dict[str, Any]) -> str:
+    # HTML de una entrada del índice (solo se lee y descomprime su miembro gzip)
+    with open(os.path.join(path, entry["segmento"]), "rb") as f:
+        f.seek(entry["offset"])
+        data = f.read(entry["longitud"])
+    return gzip.decompress(data).decode("utf-8")
+
+
+def list_runs(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Ejecuciones del archivo (más antigua primero) con su número de páginas por tipo
+    runs: Dict[str, Dict[str, Any]] = {}
+    for e in entries:
+        run = runs.setdefault(e["ejecucion"], {"ejecucion": e["ejecucion"], "consulta": None, KIND_SEARCH: 0, KIND_BOOK: 0, "fin": e["ts"]})
+        run[e["tipo"]] = run.get(e["tipo"], 0) + 1
+        run["fin"] = max(run["fin"], e["ts"])
+        if e["tipo"] == KIND_SEARCH and run["consulta"] is None:
+            run["consulta"] = e.get("consulta")
+    return sorted(runs.values(), key=lambda r: r["ejecucion"])
+
+
+def latest_pages(entries: Iterable[Dict[str, Any]], kind: Optional[str] = None, as_of: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    # Última descarga de cada URL (opcionalmente de un tipo y hasta el ts `as_of`)
+    latest: Dict[str, Dict[str, Any]] = {}
+    for e in entries:
+        if kind is not None and e["tipo"] != kind:
+            continue
+        if as_of is not None and e["ts"] > as_of:
+            continue
+        current = latest.get(e["url"])
+        if current is None or e["ts"] >= current["ts"]:
+            latest[e["url"]] = e
+    return latest
+
+
+def archive_stats(path: str = HTML_ARCHIVE_PATH) -> Dict[str, Any]:
+    entries = read_archive_index(path)
+    segments = _segments(path)
+    return {
+        "ruta": path,
+        "paginas": len(entries),
+        "urls": len({e["url"] for e in entries}),
+        "por_tipo": {kind: sum(e["tipo"] == kind for e in entries) for kind in (KIND_SEARCH, KIND_BOOK)},
+        "ejecuciones": len({e["ejecucion"] for e in entries}),
+        "segmentos": len(segments),
+        "bytes_comprimidos": sum(os.path.getsize(os.path.join(path, s)) for s in segments),
+    }
+
+
+def main():
+    options = html_archive_options()
+    parser = argparse.ArgumentParser(description="Archivo de páginas HTML de Goodreads")
+    parser.add_argument("--archive", default=options["path"], help="Directorio del archivo (HTML_ARCHIVE_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="Resumen del archivo")
+    sub.add_parser("runs", help="Ejecuciones archivadas")
+
+    p = sub.add_parser("get", help="Extrae la última versión archivada de una URL")
+    p.add_argument("url")
+    p.add_argument("--as-of", help="Última versión descargada hasta este ts (ISO)")
+    p.add_argument("--out", help="Fichero de salida (por defecto se muestra la entrada del índice)")
+
+    p = sub.add_parser("reextract", help="Regenera el landing de Goodreads desde el archivo, sin red")
+    p.add_argument("--run", help="Ejecución a re-extraer (ts de `runs`); por defecto la última con búsquedas")
+    p.add_argument("--out", help="Fichero de salida (.json, .parquet o .arrow); por defecto el landing de PIPELINE_LANDING_FORMAT")
+    p.add_argument("--workers", type=int, default=options["workers"], help="Procesos de parseo (HTML_ARCHIVE_WORKERS)")
+    args = parser.parse_args()
+
+    if not os.path.exists(_index_path(args.archive)):
+        print(f"[ERROR] No existe el archivo {args.archive}: ejecutar antes el scraper con GOODREADS_ARCHIVE_HTML=true")
+        return
+
+    if args.command == "stats":
+        print(json.dumps(archive_stats(args.archive), ensure_ascii=False, indent=2))
+    elif args.command == "runs":
+        for run in list_runs(read_archive_index(args.archive)):
+            print(json.dumps(run, ensure_ascii=False))
+    elif args.command == "get":
+        entry = latest_pages(read_archive_index(args.archive), as_of=args.as_of).get(args.url)
+        if entry is None:
+            print(f"No hay ninguna versión archivada de {args.url}")
+            return
+        print(json.dumps(entry, ensure_ascii=False))
+        if args.out:
+            html = read_page(args.archive, entry)
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"Escrita en {args.out} ({len(html)} caracteres)")
+    else:
+        from scrape_goodreads import reextract_landing
+
+        t0 = time.perf_counter()
+        books = reextract_landing(args.archive, args.out, run=args.run, workers=args.workers)
+        if books is not None:
+            print(f"Re-extraídos {len(books)} libros ({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
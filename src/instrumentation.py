@@ -0,0 +1,254 @@
+# src/instrumentation.py
+
+# Instrumentación por etapas de integrate_pipeline.
+# Cada etapa envuelta en `profiled_stage(...)` registra:
+#   - tiempo de pared y de CPU del proceso (incluye hilos concurrentes, p.ej. exportaciones)
+#   - RSS al terminar y pico de RSS del proceso hasta ese momento
+#   - pico de memoria Python asignada (tracemalloc), si PIPELINE_TRACE_MALLOC=true
+#   - filas de entrada y salida (las fija quien llama)
+# Las etapas pueden anidarse (p.ej. annotate_errors dentro de deduplicate): cada registro
+# indica su etapa padre. El resultado va a quality_metrics.json → "perfilado".
+#
+# Ruta crítica: cada registro lleva inicio_s / fin_s (desde configure()) y sus dependencias
+# (depende_de). Una etapa de primer nivel del hilo principal depende de la anterior; una tarea
+# en segundo plano (lecturas y escrituras de sinks.py) depende de la etapa del hilo principal
+# tras la que se encoló, más las que se indiquen. critical_path recorre hacia atrás, desde la
+# etapa que termina la última, la dependencia que terminó más tarde: esa cadena es la que
+# fija el tiempo total (acelerar cualquier otra etapa no lo reduce).
+#
+# PIPELINE_PROFILE_STAGES="deduplicate,build_staging" (o "all") guarda además un volcado
+# cProfile por etapa en PIPELINE_PROFILE_DIR (docs/profiles por defecto): <etapa>.prof y un
+# resumen <etapa>.txt con las funciones de mayor tiempo acumulado.
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PROFILE_DIR = os.path.join("docs", "profiles")
+PROFILE_SUMMARY_LINES = 40
+
+_records: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_local = threading.local()
+_t0 = time.perf_counter()
+_last_main_stage: Optional[str] = None
+
+
+def profiling_options() -> Dict[str, Any]:
+    # Configuración por entorno (PIPELINE_PROFILE_* / PIPELINE_TRACE_MALLOC)
+    stages = {s.strip() for s in os.getenv("PIPELINE_PROFILE_STAGES", "").split(",") if s.strip()}
+    return {
+        "cprofile_stages": stages,
+        "profile_dir": os.getenv("PIPELINE_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+        "trace_malloc": os.getenv("PIPELINE_TRACE_MALLOC", "false").lower() == "true",
+    }
+
+
+_options = profiling_options()
+
+
+def configure(options: Optional[Dict[str, Any]] = None) -> None:
+    # Reinicia los registros y relee la configuración (al principio de cada ejecución)
+    global _options, _t0, _last_main_stage
+    _options = options or profiling_options()
+    with _lock:
+        _records.clear()
+        _t0 = time.perf_counter()
+        _last_main_stage = None
+    if _options["trace_malloc"] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _rss_bytes() -> Optional[int]:
+    # RSS actual (Linux: /proc/self/statm); None si no está disponible
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    # Pico de RSS de todo el proceso hasta ahora (no de la etapa); None si no está
+    # disponible (Windows no tiene `resource`). ru_maxrss viene en KB en Linux y en bytes en macOS
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(max_rss if sys.platform == "darwin" else max_rss * 1024)
+
+
+def _stack() -> List[Dict[str, Any]]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _wants_cprofile(name: str) -> bool:
+    stages = _options["cprofile_stages"]
+    return "all" in stages or name in stages
+
+
+def _dump_profile(profiler: cProfile.Profile, name: str, target: Optional[str] = None) -> str:
+    # Un fichero por etapa; las exportaciones concurrentes se distinguen por su destino
+    if target:
+        name = f"{name}_{os.path.basename(os.path.normpath(target))}"
+    os.makedirs(_options["profile_dir"], exist_ok=True)
+    base = os.path.join(_options["profile_dir"], name)
+    profiler.dump_stats(base + ".prof")
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+    return base + ".prof"
+
+
+def stage_id(name: str, destino: Optional[str] = None) -> str:
+    # Identificador de una etapa en la ruta crítica ("export:standard/dim_book.parquet")
+    return f"{name}:{destino}" if destino else name
+
+
+def last_main_stage() -> Optional[str]:
+    # Última etapa de primer nivel terminada en el hilo principal (dependencia implícita de
+    # las tareas que se encolan ahora)
+    return _last_main_stage
+
+
+@contextmanager
+def profiled_stage(name: str, rows_in: Optional[int] = None, depends_on: Optional[List[str]] = None, **extra: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Mide una etapa. Uso:
+        with profiled_stage("build_staging", rows_in=len(df)) as stage:
+            staging = build_staging(...)
+            stage["filas_salida"] = len(staging)
+    Campos adicionales (p.ej. destino=ruta) se copian al registro. `depends_on`: ids o nombres
+    de etapas de las que depende (un nombre cubre todos sus destinos, p.ej. "export").
+    """
+    global _last_main_stage
+    stack = _stack()
+    record: Dict[str, Any] = {
+        "etapa": name,
+        "id": stage_id(name, extra.get("destino")),
+        "padre": stack[-1]["etapa"] if stack else None,
+        "hilo": threading.current_thread().name,
+        "filas_entrada": rows_in,
+        "filas_salida": None,
+        "depende_de": [d for d in (depends_on or []) if d],
+        **extra,
+    }
+
+    # cProfile solo en el hilo actual y sin anidar perfiles (el de la etapa padre ya la cubre)
+    profiler = None
+    if _wants_cprofile(name) and not any(frame.get("_profiler") for frame in stack):
+        profiler = cProfile.Profile()
+        record["_profiler"] = profiler
+
+    # tracemalloc: el pico se reinicia por etapa y se propaga a la etapa padre
+    tracing = tracemalloc.is_tracing() and threading.current_thread() is threading.main_thread()
+    if tracing:
+        if stack and "_traced_peak" in stack[-1]:
+            stack[-1]["_traced_peak"] = max(stack[-1]["_traced_peak"], tracemalloc.get_traced_memory()[1])
+        record["_traced_peak"] = 0
+        tracemalloc.reset_peak()
+
+    stack.append(record)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    record["inicio_s"] = round(wall_start - _t0, 6)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall_end = time.perf_counter()
+        record["wall_s"] = round(wall_end - wall_start, 6)
+        record["fin_s"] = round(wall_end - _t0, 6)
+        record["cpu_s"] = round(time.process_time() - cpu_start, 6)
+        record["rss_bytes"] = _rss_bytes()
+        record["rss_max_bytes"] = _max_rss_bytes()
+        stack.pop()
+
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], record.pop("_traced_peak"))
+            record["tracemalloc_pico_bytes"] = int(peak)
+            if stack and "_traced_peak" in stack[-1]:
+                stack[-1]["_traced_peak"] = max(stack[-1]["_traced_peak"], peak)
+            tracemalloc.reset_peak()
+        if profiler is not None:
+            record["cprofile"] = _dump_profile(record.pop("_profiler"), name, extra.get("destino"))
+
+        with _lock:
+            _records.append(record)
+            if not stack and threading.current_thread() is threading.main_thread():
+                _last_main_stage = record["id"]
+
+
+def critical_path(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Ruta crítica entre las etapas de primer nivel de `records` (ver cabecera del módulo).
+    Devuelve las etapas de la ruta en orden, su tiempo total de pared y el tiempo que la ruta
+    pasa esperando (huecos entre una etapa y la siguiente).
+    """
+    nodes = [r for r in records if r.get("padre") is None and "fin_s" in r]
+    if not nodes:
+        return {"etapas": [], "duracion_s": 0.0, "espera_s": 0.0}
+
+    main_nodes = sorted((r for r in nodes if r["hilo"] == threading.main_thread().name), key=lambda r: r["inicio_s"])
+
+    def predecessors(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        deps = set(node.get("depende_de") or [])
+        found = [r for r in nodes if r is not node and (r["id"] in deps or r["etapa"] in deps)]
+        if node["hilo"] == threading.main_thread().name:
+            previous = [r for r in main_nodes if r["fin_s"] <= node["inicio_s"] and r is not node]
+            if previous:
+                found.append(previous[-1])
+        return found
+
+    path = [max(nodes, key=lambda r: r["fin_s"])]
+    while True:
+        preds = [r for r in predecessors(path[-1]) if r["fin_s"] <= path[-1]["fin_s"] and r not in path]
+        if not preds:
+            break
+        path.append(max(preds, key=lambda r: r["fin_s"]))
+    path.reverse()
+
+    # Espera: huecos entre el fin de una etapa y el inicio de la siguiente (p.ej. una tarea en
+    # cola porque todos los hilos del pool estaban ocupados)
+    waiting = sum(max(0.0, nxt["inicio_s"] - prev["fin_s"]) for prev, nxt in zip(path, path[1:]))
+    total = path[-1]["fin_s"] - min(r["inicio_s"] for r in nodes)
+    return {
+        "etapas": [
+            {k: r[k] for k in ("id", "hilo", "inicio_s", "fin_s", "wall_s")} for r in path
+        ],
+        "duracion_s": round(total, 6),
+        "espera_s": round(waiting, 6),
+    }
+
+
+def format_critical_path(report: Dict[str, Any]) -> str:
+    # Resumen de una línea por etapa para la salida por consola
+    lines = [f"Ruta crítica ({report['duracion_s']:.3f} s, {report['espera_s']:.3f} s de espera):"]
+    for r in report["etapas"]:
+        lines.append(f"  {r['inicio_s']:>9.3f} → {r['fin_s']:>9.3f} s  {r['wall_s']:>8.3f} s  {r['id']}  [{r['hilo']}]")
+    return "\n".join(lines)
+
+
+def stage_report() -> Dict[str, Any]:
+    # Sección "perfilado" de quality_metrics.json (etapas en orden de finalización)
+    with _lock:
+        stages = [dict(r) for r in _records]
+    return {
+        "tracemalloc": tracemalloc.is_tracing(),
+        "cprofile_etapas": sorted(_options["cprofile_stages"]),
+        "etapas": stages,
+        "ruta_critica": critical_path(stages),
+    }
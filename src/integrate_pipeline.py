@@ -4,36 +4,286 @@ import hashlib
 import json
 import os
 from datetime import datetime, UTC
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
 
 from utils_isbn import clean_isbn, is_isbn13, is_isbn10, to_isbn13, normalize_isbn13
-from utils_quality import compute_null_percentages, compute_basic_counts, count_duplicates
+from utils_quality import (
+    count_duplicates_from_codes,
+    count_list_items_by,
+    counts_from_codes,
+    factorize_column,
+    profile_table,
+    valid_ratio_by_unique,
+)
+from utils_parquet import standard_parquet_options, write_parquet
+from schema_plan import (
+    BOOK_SOURCE_DETAIL_DTYPE_PLAN,
+    DIM_BOOK_DTYPE_PLAN,
+    STAGING_DTYPE_PLAN,
+    apply_dtype_plan_with_report,
+    memory_report_of,
+)
+from sinks import sink_options, create_executor, submit_io, submit_table, submit_task, wait_for
+from lookup_index import LOOKUP_INDEX_PATH, build_lookup_index
+from instrumentation import configure as configure_profiling, format_critical_path, profiled_stage, stage_report
+from openlibrary_source import interest_isbns, load_openlibrary, openlibrary_options
+from landing_format import find_landing_file, is_columnar, read_landing_table
+from change_capture import apply_change_capture, change_capture_options, delta_path, read_previous_dim_book, write_delta
+from rollups import (
+    STATE_TABLE,
+    book_contributions,
+    format_rollup_stats,
+    read_previous_rollups,
+    refresh_rollups,
+    rollup_options,
+    rollup_path,
+)
+from entity_resolution import (
+    DEFAULT_MAX_BLOCK_SIZE,
+    DEFAULT_THRESHOLD,
+    entity_resolution_options,
+    resolve_book_ids,
+)
 
 # ------------------------------------------------------------
-# Carga ficheros fuente (JSON y CSV) - SOLO LECTURA EN landing/
+# Carga ficheros fuente (JSON y CSV, o Parquet / Arrow IPC) - SOLO LECTURA EN landing/
 # ------------------------------------------------------------
 
-def load_sources() -> tuple[pd.DataFrame, pd.DataFrame]:
+def load_sources(
+    gr_path: str | None = None,
+    gb_path: str | None = None,
+    arrow_native: bool = False,
+    executor: ThreadPoolExecutor | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Sin rutas: los ficheros de landing/ del formato PIPELINE_LANDING_FORMAT (ver landing_format.py)
+    gr_path = gr_path or find_landing_file("landing", "goodreads")
+    gb_path = gb_path or find_landing_file("landing", "googlebooks")
+
+    if executor is None:
+        return _load_source("goodreads", gr_path, arrow_native), _load_source("googlebooks", gb_path, arrow_native)
+
+    # Con pool (main): las dos fuentes se leen a la vez, cada una como etapa "read_source"
+    futures = [
+        submit_io(executor, "read_source", _load_source, source, path, arrow_native, destino=path)
+        for source, path in (("goodreads", gr_path), ("googlebooks", gb_path))
+    ]
+    return futures[0].result(), futures[1].result()
+
+
+def _load_source(source: str, path: str, arrow_native: bool) -> pd.DataFrame:
+    # Modo Arrow-nativo: lectores multihilo de pyarrow y columnas respaldadas por Arrow
+    read_pandas, read_arrow = SOURCE_READERS[source]
+    df = _arrow_table_to_pandas(read_arrow(path)) if arrow_native else read_pandas(path)
+
+    # Ruta de origen: build_staging la usa como source_file y las métricas como ruta de entrada
+    df.attrs["landing_path"] = path
+    return df
+
+
+# Landing columnar: tipos ya fijados en el fichero, sin parseo (solo los ISBN/ASIN pasan a
+# string, como con el dtype forzado en JSON/CSV)
+def _landing_table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    df = table.to_pandas()
+    for col in ("isbn10", "isbn13", "asin"):
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def _read_goodreads(gr_path: str) -> pd.DataFrame:
+    if is_columnar(gr_path):
+        return _landing_table_to_pandas(read_landing_table(gr_path))
+
     # Goodreads JSON → Forzamos tipos a STRING
-    df_gr = pd.read_json(
-        "landing/goodreads_books.json",
+    return pd.read_json(
+        gr_path,
         orient="records",
         dtype={"isbn10": "string", "isbn13": "string", "asin": "string"}
     )
 
+
+def _read_googlebooks(gb_path: str) -> pd.DataFrame:
+    if is_columnar(gb_path):
+        return _landing_table_to_pandas(read_landing_table(gb_path))
+
     # Google Books CSV
-    df_gb = pd.read_csv(
-        "landing/googlebooks_books.csv",
+    return pd.read_csv(
+        gb_path,
         delimiter=";",
         encoding="utf-8",
         dtype={"isbn10": "string", "isbn13": "string", "asin": "string"},
         low_memory=False,
     )
 
-    return df_gr, df_gb
+
+# ------------------------------------------------------------
+# Modo Arrow-nativo (PIPELINE_ARROW_NATIVE=true)
+# ------------------------------------------------------------
+# Las columnas se mantienen como string[pyarrow] / list<string>[pyarrow] / int64[pyarrow]
+# durante build_staging y deduplicate, de modo que to_parquet no tiene que reconvertir
+# objetos Python. El modo se detecta por los dtypes del DataFrame (ver is_arrow_frame).
+
+ARROW_STRING = pd.ArrowDtype(pa.string())
+ARROW_STRING_LIST = pd.ArrowDtype(pa.list_(pa.string()))
+
+# Tipos fijos en la lectura Arrow (equivalentes a los dtype forzados en el modo pandas)
+ARROW_COLUMN_TYPES = {
+    "isbn10": pa.string(),
+    "isbn13": pa.string(),
+    "asin": pa.string(),
+    "price_amount": pa.float64(),
+    "price_currency": pa.string(),
+}
+
+
+def _arrow_table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    # Columnas totalmente vacías llegan como tipo null: las tratamos como texto
+    fields = []
+    for field in table.schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(ARROW_COLUMN_TYPES.get(field.name, pa.string()))
+        fields.append(field)
+    table = table.cast(pa.schema(fields))
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def load_sources_arrow(gr_path: str, gb_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    return _arrow_table_to_pandas(_read_goodreads_arrow(gr_path)), _arrow_table_to_pandas(_read_googlebooks_arrow(gb_path))
+
+
+def _read_goodreads_arrow(gr_path: str) -> pa.Table:
+    # Landing columnar (Parquet / IPC): la tabla tal cual
+    if is_columnar(gr_path):
+        return read_landing_table(gr_path)
+
+    # Goodreads: JSON por líneas (NDJSON) con el lector multihilo de pyarrow.
+    # El scraper escribe un array JSON indentado, que pyarrow.json no admite: en ese caso
+    # se decodifica con json y se construye la tabla Arrow directamente.
+    with open(gr_path, "rb") as f:
+        first_char = f.read(64).lstrip()[:1]
+
+    if first_char == b"[":
+        with open(gr_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        schema = None
+        if records:
+            inferred = pa.Table.from_pylist(records).schema
+            schema = pa.schema(
+                [f.with_type(ARROW_COLUMN_TYPES.get(f.name, f.type)) for f in inferred]
+            )
+        table_gr = pa.Table.from_pylist(records, schema=schema)
+    else:
+        table_gr = pa_json.read_json(
+            gr_path,
+            read_options=pa_json.ReadOptions(use_threads=True),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=pa.schema(
+                    [(c, t) for c, t in ARROW_COLUMN_TYPES.items() if c in ("isbn10", "isbn13", "asin")]
+                ),
+                unexpected_field_behavior="infer",
+            ),
+        )
+    return table_gr
+
+
+def _read_googlebooks_arrow(gb_path: str) -> pa.Table:
+    if is_columnar(gb_path):
+        return read_landing_table(gb_path)
+
+    # Google Books: CSV con ';' y lector multihilo
+    return pa_csv.read_csv(
+        gb_path,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding="utf8"),
+        parse_options=pa_csv.ParseOptions(delimiter=";", newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=ARROW_COLUMN_TYPES,
+            strings_can_be_null=True,
+        ),
+    )
+
+
+# Fuente → (lector pandas, lector Arrow-nativo)
+SOURCE_READERS = {
+    "goodreads": (_read_goodreads, _read_goodreads_arrow),
+    "googlebooks": (_read_googlebooks, _read_googlebooks_arrow),
+}
+
+
+# El modo se reconoce por las columnas de texto string[pyarrow]
+# (las listas list<string>[pyarrow] del plan de tipos existen en ambos modos)
+def is_arrow_frame(df: pd.DataFrame) -> bool:
+    return any(
+        isinstance(dtype, pd.ArrowDtype) and pa.types.is_string(dtype.pyarrow_dtype)
+        for dtype in df.dtypes
+    )
+
+
+def _arrow_null_series(index: pd.Index, dtype=ARROW_STRING) -> pd.Series:
+    return pd.Series(pd.array([None] * len(index), dtype=dtype), index=index)
+
+
+def _arrow_constant_series(value: str, index: pd.Index) -> pd.Series:
+    return pd.Series(pd.array([value] * len(index), dtype=ARROW_STRING), index=index)
+
+
+def _to_arrow(s: pd.Series) -> pa.Array:
+    arr = pa.array(s.array)
+    return arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+
+
+# Equivalente vectorizado de clean_isbn (solo 0-9 y X; vacío → nulo)
+def _arrow_clean_isbn(s: pd.Series) -> pd.Series:
+    s = s.astype(ARROW_STRING).str.replace(r"[^0-9Xx]", "", regex=True)
+    return s.where(s.str.len() > 0)
+
+
+# Equivalente vectorizado de normalize_isbn13 (13 dígitos exactos)
+def _arrow_normalize_isbn13(s: pd.Series) -> pd.Series:
+    s = _arrow_clean_isbn(s)
+    return s.where(s.str.fullmatch(r"[0-9]{13}").fillna(False))
+
+
+def _arrow_strip_to_null(s: pd.Series) -> pd.Series:
+    s = s.astype(ARROW_STRING).str.strip()
+    return s.where(s.str.len() > 0)
+
+
+# "A1|A2" → ["A1", "A2"] sin vacíos, con pyarrow.compute (sin listas Python)
+def _arrow_split_pipe_list(s: pd.Series) -> pd.Series:
+    text = _to_arrow(s.astype(ARROW_STRING).fillna(""))
+    lists = pc.split_pattern(text, "|")
+    items = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    parents = pc.list_parent_indices(lists)
+    keep = pc.not_equal(items, "")
+    items = items.filter(keep)
+    counts = np.bincount(parents.filter(keep).to_numpy(), minlength=len(lists))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+    result = pa.ListArray.from_arrays(pa.array(offsets), items)
+    return pd.Series(pd.arrays.ArrowExtensionArray(result), index=s.index)
+
+
+def _arrow_first_item(s: pd.Series) -> pd.Series:
+    lists = _to_arrow(s)
+    has_items = pc.greater(pc.list_value_length(lists), 0).to_numpy(zero_copy_only=False)
+    firsts = pc.list_flatten(pc.list_slice(lists, 0, 1))
+    positions = pa.array(np.cumsum(has_items) - 1, mask=~has_items)
+    return pd.Series(pd.arrays.ArrowExtensionArray(firsts.take(positions)), index=s.index)
+
+
+def _arrow_backed(df: pd.DataFrame) -> pd.DataFrame:
+    # Convierte a Arrow las columnas que aún sean object (listas, constantes, etc.)
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = pd.arrays.ArrowExtensionArray(pa.array(df[col], from_pandas=True))
+    return df
 
 
 # ------------------------------------------------------------
@@ -88,12 +338,22 @@ def generate_book_id_from_row(row: pd.Series) -> str:
             return ""
         return str(v).strip().lower()
 
+    # El año entra en la clave como float ("2017.0"), tal y como llegaba siempre con la
+    # columna float64 con nulos; así el hash no depende del dtype (float64, Int64, int64[pyarrow])
+    def year_str(v) -> str:
+        if v is None or pd.isna(v):
+            return ""
+        try:
+            return str(float(v))
+        except (TypeError, ValueError):
+            return safe_str(v)
+
     key = "|".join(
         [
             safe_str(row.get("titulo_normalizado")),
             safe_str(row.get("autor_normalizado")),
             safe_str(row.get("editorial_normalizada")),
-            safe_str(row.get("anio_publicacion")),
+            year_str(row.get("anio_publicacion")),
         ]
     )
 
@@ -132,32 +392,49 @@ def moneda_valida(x) -> bool:
 # Construcción staging
 # ------------------------------------------------------------
 
-def build_staging(df_gr: pd.DataFrame, df_gb: pd.DataFrame) -> pd.DataFrame:
+def build_staging(df_gr: pd.DataFrame, df_gb: pd.DataFrame, df_ol: pd.DataFrame | None = None) -> pd.DataFrame:
+    # Si las fuentes vienen de load_sources(arrow_native=True) se mantienen los dtypes Arrow
+    arrow_native = is_arrow_frame(df_gr) or is_arrow_frame(df_gb)
+
     # Goodreads
     df_gr = df_gr.copy()
-    df_gr["source_name"] = "goodreads"
-    df_gr["source_file"] = "goodreads_books.json"
+    df_gr["source_name"] = _arrow_constant_series("goodreads", df_gr.index) if arrow_native else "goodreads"
+    gr_file = os.path.basename(df_gr.attrs.get("landing_path", "goodreads_books.json"))
+    df_gr["source_file"] = _arrow_constant_series(gr_file, df_gr.index) if arrow_native else gr_file
     df_gr["row_number"] = df_gr.index + 1
 
     # limpia ISBN
-    df_gr["isbn10"] = df_gr["isbn10"].apply(clean_isbn)
-    #df_gr["isbn13"] = df_gr["isbn13"].apply(clean_isbn)
-    df_gr["isbn13"] = df_gr["isbn13"].apply(normalize_isbn13)
+    if arrow_native:
+        df_gr["isbn10"] = _arrow_clean_isbn(df_gr["isbn10"])
+        df_gr["isbn13"] = _arrow_normalize_isbn13(df_gr["isbn13"])
+    else:
+        df_gr["isbn10"] = df_gr["isbn10"].apply(clean_isbn)
+        #df_gr["isbn13"] = df_gr["isbn13"].apply(clean_isbn)
+        df_gr["isbn13"] = df_gr["isbn13"].apply(normalize_isbn13)
 
     # Google Books
     df_gb = df_gb.copy()
-    df_gb["source_name"] = "googlebooks"
-    df_gb["source_file"] = "googlebooks_books.csv"
+    df_gb["source_name"] = _arrow_constant_series("googlebooks", df_gb.index) if arrow_native else "googlebooks"
+    gb_file = os.path.basename(df_gb.attrs.get("landing_path", "googlebooks_books.csv"))
+    df_gb["source_file"] = _arrow_constant_series(gb_file, df_gb.index) if arrow_native else gb_file
     df_gb["row_number"] = df_gb.index + 1
 
     # limpia ISBN
-    df_gb["isbn10"] = df_gb["isbn10"].apply(clean_isbn)
-    #df_gb["isbn13"] = df_gb["isbn13"].apply(clean_isbn)
-    df_gb["isbn13"] = df_gb["isbn13"].apply(normalize_isbn13)
+    if arrow_native:
+        df_gb["isbn10"] = _arrow_clean_isbn(df_gb["isbn10"])
+        df_gb["isbn13"] = _arrow_normalize_isbn13(df_gb["isbn13"])
+    else:
+        df_gb["isbn10"] = df_gb["isbn10"].apply(clean_isbn)
+        #df_gb["isbn13"] = df_gb["isbn13"].apply(clean_isbn)
+        df_gb["isbn13"] = df_gb["isbn13"].apply(normalize_isbn13)
 
     # Intentar derivar isbn13 desde isbn10 si falta
     mask_missing_isbn13 = df_gb["isbn13"].isna() & df_gb["isbn10"].notna()
-    df_gb.loc[mask_missing_isbn13, "isbn13"] = df_gb.loc[mask_missing_isbn13, "isbn10"].apply(to_isbn13)
+    if arrow_native:
+        derived = df_gb.loc[mask_missing_isbn13, "isbn10"].apply(to_isbn13)
+        df_gb.loc[mask_missing_isbn13, "isbn13"] = derived.astype(ARROW_STRING)
+    else:
+        df_gb.loc[mask_missing_isbn13, "isbn13"] = df_gb.loc[mask_missing_isbn13, "isbn10"].apply(to_isbn13)
 
     # Opcional para asegurar tipo string
     #df_gr["isbn13"] = df_gr["isbn13"].astype("string")
@@ -193,21 +470,45 @@ def build_staging(df_gr: pd.DataFrame, df_gb: pd.DataFrame) -> pd.DataFrame:
     # Asegurar columnas aunque no existan en df_gb
     for col in gb_cols.keys():
         if col not in df_gb.columns:
-            df_gb[col] = np.nan
+            df_gb[col] = _arrow_null_series(df_gb.index) if arrow_native else np.nan
 
     df_gb_common = df_gb[list(gb_cols.keys()) + ["source_name", "source_file", "row_number"]].rename(columns=gb_cols)
 
     # Campos que Goodreads no tiene, los añadimos vacíos
+    # (en modo Arrow con el mismo dtype que la otra fuente para que concat no degrade a object)
     for col in ["autores", "editorial", "fecha_publicacion_raw", "idioma_raw", "categorias", "precio", "moneda"]:
         if col not in df_gr_common.columns:
-            df_gr_common[col] = np.nan
+            if arrow_native:
+                df_gr_common[col] = _arrow_null_series(df_gr_common.index, df_gb_common[col].dtype)
+            else:
+                df_gr_common[col] = np.nan
 
     # Google no tiene rating/ratings_count/book_url
     for col in ["rating", "ratings_count", "book_url"]:
         if col not in df_gb_common.columns:
-            df_gb_common[col] = np.nan
+            if arrow_native:
+                df_gb_common[col] = _arrow_null_series(df_gb_common.index, df_gr_common[col].dtype)
+            else:
+                df_gb_common[col] = np.nan
 
-    staging = pd.concat([df_gr_common, df_gb_common], ignore_index=True)
+    frames = [df_gr_common, df_gb_common]
+
+    # Open Library (opcional): mismas columnas que Google Books más paginas/formato
+    if df_ol is not None and len(df_ol):
+        df_ol_common = _openlibrary_common(df_ol, df_gr_common, arrow_native)
+        for col in OPENLIBRARY_EXTRA_COLUMNS:
+            for frame in frames:
+                if arrow_native:
+                    frame[col] = _arrow_null_series(frame.index, df_ol_common[col].dtype)
+                else:
+                    frame[col] = pd.Series(np.nan, index=frame.index, dtype=df_ol_common[col].dtype)
+        frames.append(df_ol_common)
+
+    staging = pd.concat(frames, ignore_index=True)
+
+    if arrow_native:
+        staging = _build_staging_arrow(staging)
+        return apply_dtype_plan_with_report(staging, STAGING_DTYPE_PLAN, arrow_native=True)
 
     # Normalización
     staging["titulo_normalizado"] = staging["titulo"].apply(normalize_title)
@@ -239,6 +540,84 @@ def build_staging(df_gr: pd.DataFrame, df_gb: pd.DataFrame) -> pd.DataFrame:
     # Enriquecimiento ligero: longitud del título
     staging["longitud_titulo"] = staging["titulo"].fillna("").apply(lambda x: len(str(x)))
 
+    # Plan de tipos (categorías, enteros nullable pequeños, listas Arrow); ver schema_plan.py
+    return apply_dtype_plan_with_report(staging, STAGING_DTYPE_PLAN)
+
+
+OPENLIBRARY_EXTRA_COLUMNS = ["paginas", "formato"]
+
+
+def _openlibrary_common(df_ol: pd.DataFrame, df_gr_common: pd.DataFrame, arrow_native: bool) -> pd.DataFrame:
+    # Filas de openlibrary_source.load_openlibrary → columnas comunes de staging
+    if arrow_native and not is_arrow_frame(df_ol):
+        df_ol = _arrow_table_to_pandas(pa.Table.from_pandas(df_ol, preserve_index=False))
+    df_ol = df_ol.copy()
+    df_ol["source_name"] = _arrow_constant_series("openlibrary", df_ol.index) if arrow_native else "openlibrary"
+    df_ol["row_number"] = df_ol.index + 1
+
+    # Los ISBN ya vienen limpios del volcado; se aplican las mismas reglas que a Google Books
+    if arrow_native:
+        df_ol["isbn10"] = _arrow_clean_isbn(df_ol["isbn10"])
+        df_ol["isbn13"] = _arrow_normalize_isbn13(df_ol["isbn13"])
+    else:
+        df_ol["isbn10"] = df_ol["isbn10"].apply(clean_isbn)
+        df_ol["isbn13"] = df_ol["isbn13"].apply(normalize_isbn13)
+
+    ol_cols = {
+        "title": "titulo",
+        "authors": "autores",
+        "publisher": "editorial",
+        "pub_date": "fecha_publicacion_raw",
+        "language": "idioma_raw",
+        "categories": "categorias",
+        "isbn10": "isbn10",
+        "isbn13": "isbn13",
+        "paginas": "paginas",
+        "formato": "formato",
+    }
+    df_ol_common = df_ol[list(ol_cols.keys()) + ["source_name", "source_file", "row_number"]].rename(columns=ol_cols)
+
+    # Sin ASIN, precio ni valoraciones
+    for col in ["asin", "precio", "moneda", "rating", "ratings_count", "book_url"]:
+        if arrow_native:
+            df_ol_common[col] = _arrow_null_series(df_ol_common.index, df_gr_common[col].dtype)
+        else:
+            df_ol_common[col] = pd.Series(np.nan, index=df_ol_common.index, dtype=df_gr_common[col].dtype)
+    return df_ol_common
+
+
+# Misma normalización que build_staging, pero con operaciones vectorizadas sobre Arrow
+def _build_staging_arrow(staging: pd.DataFrame) -> pd.DataFrame:
+    # Normalización
+    titulo = staging["titulo"].astype(ARROW_STRING)
+    staging["titulo_normalizado"] = titulo.str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+    staging["idioma"] = _arrow_strip_to_null(staging["idioma_raw"]).str.lower()
+
+    fechas = pd.to_datetime(staging["fecha_publicacion_raw"], errors="coerce", format="mixed")
+    staging["fecha_publicacion"] = fechas.dt.strftime("%Y-%m-%d").astype(ARROW_STRING)
+    staging["moneda"] = _arrow_strip_to_null(staging["moneda"]).str.upper()
+
+    # Autores y categorías como listas (se asume separador "|")
+    staging["autores"] = staging["autores"].astype(ARROW_STRING).fillna("")
+    staging["categorias"] = staging["categorias"].astype(ARROW_STRING).fillna("")
+
+    staging["autores_list"] = _arrow_split_pipe_list(staging["autores"])
+    staging["categorias_list"] = _arrow_split_pipe_list(staging["categorias"])
+
+    # autor_principal: si falta, coger el primer autor de la lista
+    if "autor_principal" not in staging.columns:
+        staging["autor_principal"] = _arrow_null_series(staging.index)
+
+    staging["autor_principal"] = staging["autor_principal"].astype(ARROW_STRING).fillna(
+        _arrow_first_item(staging["autores_list"])
+    )
+
+    # Año de publicación derivado de fecha_publicacion
+    staging["anio_publicacion"] = staging["fecha_publicacion"].str.slice(0, 4).astype(pd.ArrowDtype(pa.int64()))
+
+    # Enriquecimiento ligero: longitud del título
+    staging["longitud_titulo"] = titulo.fillna("").str.len()
+
     return staging
 
 # ------------------------------------------------------------
@@ -300,25 +679,81 @@ def annotate_errors(staging: pd.DataFrame) -> pd.DataFrame:
     staging["has_error"] = staging["error_codes"].apply(lambda codes: len(codes) > 0)
     return staging
 
+# ------------------------------------------------------------
+# Agregación por book_id (vectorizada)
+# ------------------------------------------------------------
+
+def first_valid_by_group(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """
+    Lo mismo que df.groupby(key, as_index=False).first(): primer valor no nulo de cada
+    columna por grupo (en el orden de df), grupos ordenados por clave. Vectorizado con
+    factorize + take: groupby().first() recorre los grupos en Python con columnas Arrow
+    (listas, ArrowDtype) y con él deduplicate es varias veces más lento.
+    """
+    codes, uniques = pd.factorize(df[key], sort=True)
+    out = {key: pd.Series(uniques, dtype=df[key].dtype) if len(uniques) else df[key].iloc[:0].reset_index(drop=True)}
+    for col in df.columns:
+        if col == key:
+            continue
+        positions = np.flatnonzero(df[col].notna().to_numpy())
+        # Primera posición válida de cada grupo (-1 si no tiene): asignando en orden inverso,
+        # la última escritura de cada grupo es la primera fila
+        first = np.full(len(uniques), -1, dtype=np.int64)
+        first[codes[positions[::-1]]] = positions[::-1]
+        values = df[col].array
+        if (first < 0).any():
+            taken = values.take(first, allow_fill=True)
+        else:
+            taken = values.take(first)
+        out[col] = pd.Series(taken, name=col)
+    return pd.DataFrame(out)
+
+
+def union_by_group(df: pd.DataFrame, key: str, column: str) -> pd.Series:
+    # Unión ordenada y sin duplicados de las listas de `column` por `key` (explode, sin apply)
+    items = df[[key, column]].explode(column).dropna(subset=[column])
+    items = items.astype({column: object}).drop_duplicates().sort_values([key, column], kind="stable")
+    keys = items[key].to_numpy()
+    values = items[column].to_numpy(dtype=object)
+    if not len(keys):
+        return pd.Series([], dtype=object)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return pd.Series([chunk.tolist() for chunk in np.split(values, starts[1:])], index=keys[starts], dtype=object)
+
+
 # ------------------------------------------------------------
 # Deduplicación & dim_book
 # ------------------------------------------------------------
 
-def deduplicate(staging: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+# Orden de supervivencia por book_id (también el de book_source_detail; ver deduplicate)
+SURVIVOR_SORT_COLUMNS = ["book_id", "has_isbn13", "has_precio", "prioridad_fuente", "longitud_titulo"]
+SURVIVOR_SORT_ASCENDING = [True, False, False, False, False]
+
+
+def deduplicate(
+    staging: pd.DataFrame,
+    entity_resolution: bool = False,
+    er_threshold: float = DEFAULT_THRESHOLD,
+    er_max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Deduplicar por book_id usando reglas de supervivencia:
       - ID preferente: isbn13.
       - En ausencia de isbn13: hash de (titulo_normalizado, autor_normalizado, editorial_normalizada, anio_publicacion).
+      - Resolución de entidades (entity_resolution=True): las filas sin isbn13 se agrupan con
+        otras del mismo libro (bloques apellido + token de título y similitud de títulos) y
+        comparten book_id; el id exacto queda en book_id_candidato.
       - Fila ganadora por book_id (SOLO REGISTROS VÁLIDOS):
           * tiene isbn13
           * tiene precio
-          * prioridad de fuente (googlebooks > goodreads)
+          * prioridad de fuente (googlebooks > openlibrary > goodreads)
           * título más completo (longitud_titulo mayor)
       - Unión de autores y categorías sin duplicados (sobre todas las filas válidas del mismo book_id).
       - Registros con errores se marcan en book_source_detail pero NO se incluyen en dim_book.
     """
 
     staging = staging.copy()
+    arrow_native = is_arrow_frame(staging)
 
     # 1. Asegurar columnas normalizadas
     
@@ -341,7 +776,7 @@ def deduplicate(staging: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
                 break
 
         if base_col is not None:
-            staging["autor_normalizado"] = (staging[base_col].fillna("").astype(str).str.strip().str.lower())
+            staging["autor_normalizado"] = (_as_text(staging[base_col].fillna("")).str.strip().str.lower())
         else:
             staging["autor_normalizado"] = ""
 
@@ -354,49 +789,49 @@ def deduplicate(staging: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
                 break
 
         if base_col is not None:
-            staging["editorial_normalizada"] = (staging[base_col].fillna("").astype(str).str.strip().str.lower())
+            staging["editorial_normalizada"] = (_as_text(staging[base_col].fillna("")).str.strip().str.lower())
         else:
             staging["editorial_normalizada"] = ""
 
     # 2. Generar book_id
-    staging["book_id"] = staging.apply(generate_book_id_from_row, axis=1)
+    if arrow_native:
+        staging["book_id"] = _arrow_book_ids(staging)
+    else:
+        staging["book_id"] = staging.apply(generate_book_id_from_row, axis=1)
+
+    staging["book_id_candidato"] = staging["book_id"]
+    er_stats: Dict[str, Any] = {}
+    if entity_resolution and len(staging):
+        with profiled_stage("resolve_book_ids", rows_in=len(staging)) as stage:
+            staging["book_id"], er_stats = resolve_book_ids(staging, er_threshold, er_max_block_size)
+            stage["filas_salida"] = len(staging)
 
     # 3. Flags y prioridad de fuente
     staging["has_isbn13"] = staging["isbn13"].notna()
     staging["has_precio"] = staging["precio"].notna()
 
-    prioridad_fuente = {"googlebooks": 3, "goodreads": 2}
-    staging["prioridad_fuente"] = staging["source_name"].map(prioridad_fuente).fillna(1)
+    prioridad_fuente = {"googlebooks": 4, "openlibrary": 3, "goodreads": 2}
+    staging["prioridad_fuente"] = staging["source_name"].astype(object).map(prioridad_fuente).fillna(1)
 
     # 4. Anotar errores (soft fail)
-    staging = annotate_errors(staging)
+    with profiled_stage("annotate_errors", rows_in=len(staging)) as stage:
+        staging = annotate_errors(staging)
+        stage["filas_salida"] = len(staging)
 
     # Solo los registros válidos participan en la deduplicación de dim_book
     staging_valid = staging[~staging["has_error"]].copy()
 
     # Orden para elegir ganador (solo válidos)
-    staging_valid_sorted = staging_valid.sort_values(
-        by=["book_id", "has_isbn13", "has_precio", "prioridad_fuente", "longitud_titulo"],
-        ascending=[True, False, False, False, False],
-    )
+    staging_valid_sorted = staging_valid.sort_values(by=SURVIVOR_SORT_COLUMNS, ascending=SURVIVOR_SORT_ASCENDING)
 
-    winners = staging_valid_sorted.groupby("book_id", as_index=False).first()
+    winners = first_valid_by_group(staging_valid_sorted, "book_id")
 
     # 5. Unión de autores/categorías sin duplicados (solo válidos)
-    autores_agg = (
-        staging_valid.groupby("book_id")["autores_list"]
-        .apply(lambda lists_: sorted({a for sub in lists_ for a in sub}))
-        .rename("autores_unificados")
-    )
-
-    categorias_agg = (
-        staging_valid.groupby("book_id")["categorias_list"]
-        .apply(lambda lists_: sorted({c for sub in lists_ for c in sub}))
-        .rename("categorias_unificadas")
-    )
+    autores_agg = union_by_group(staging_valid, "book_id", "autores_list").rename("autores_unificados")
+    categorias_agg = union_by_group(staging_valid, "book_id", "categorias_list").rename("categorias_unificadas")
 
-    winners = winners.merge(autores_agg, on="book_id", how="left")
-    winners = winners.merge(categorias_agg, on="book_id", how="left")
+    winners["autores_unificados"] = winners["book_id"].map(autores_agg)
+    winners["categorias_unificadas"] = winners["book_id"].map(categorias_agg)
 
     # 6. Construir dim_book (solo con winners válidos)
     dim_book = pd.DataFrame()
@@ -462,65 +897,124 @@ def deduplicate(staging: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
 
     # 7. book_source_detail con TODOS los registros (válidos + con error)
     # Orden similar al de deduplicación, pero incluyendo los inválidos
-    staging_sorted_full = staging.sort_values(
-        by=["book_id", "has_isbn13", "has_precio", "prioridad_fuente", "longitud_titulo"],
-        ascending=[True, False, False, False, False],
-    )
+    staging_sorted_full = staging.sort_values(by=SURVIVOR_SORT_COLUMNS, ascending=SURVIVOR_SORT_ASCENDING)
 
     book_source_detail = staging_sorted_full.copy()
     book_source_detail.reset_index(drop=True, inplace=True)
     book_source_detail["source_id"] = book_source_detail.index + 1
-    book_source_detail["row_number"] = book_source_detail.groupby("source_name").cumcount() + 1
-    book_source_detail["book_id_candidato"] = book_source_detail["book_id"]
+    book_source_detail["row_number"] = book_source_detail.groupby("source_name", observed=True).cumcount() + 1
+    book_source_detail["book_id_candidato"] = book_source_detail.pop("book_id_candidato")
     book_source_detail["ts_ingesta"] = datetime.now(UTC).isoformat()
 
+    # En modo Arrow, las columnas nuevas (listas, error_codes, timestamps...) también a Arrow
+    if arrow_native:
+        dim_book = _arrow_backed(dim_book)
+        book_source_detail = _arrow_backed(book_source_detail)
+
+    dim_book = apply_dtype_plan_with_report(dim_book, DIM_BOOK_DTYPE_PLAN, arrow_native)
+    book_source_detail = apply_dtype_plan_with_report(book_source_detail, BOOK_SOURCE_DETAIL_DTYPE_PLAN, arrow_native)
+    if er_stats:
+        book_source_detail.attrs["resolucion_entidades"] = er_stats
+
     return dim_book, book_source_detail
 
 
+# Texto para normalizaciones: en modo Arrow se evita astype(str), que volvería a object
+def _as_text(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.ArrowDtype):
+        return s.astype(ARROW_STRING)
+    return s.astype(str)
+
+
+# book_id vectorizado: isbn13 directamente y hash SHA-1 solo para las filas sin isbn13
+def _arrow_book_ids(staging: pd.DataFrame) -> pd.Series:
+    book_id = _arrow_normalize_isbn13(staging["isbn13"])
+    missing = book_id.isna()
+    if missing.any():
+        hashed = staging.loc[missing].apply(generate_book_id_from_row, axis=1)
+        book_id[missing] = hashed.astype(ARROW_STRING)
+    return book_id
+
+
 # --------------------------
 # Métricas de calidad
 # --------------------------
 
-def compute_quality_metrics(dim_book: pd.DataFrame, book_source_detail: pd.DataFrame) -> Dict[str, Any]:
-    metrics: Dict[str, Any] = {}
+def compute_profiles(dim_book: pd.DataFrame, book_source_detail: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    # Un perfil por tabla (nulos, tipos, ejemplos); lo comparten las métricas y schema.md
+    return {
+        "dim_book": profile_table(dim_book),
+        "book_source_detail": profile_table(book_source_detail),
+    }
 
-    # Métricas sobre dim_book
-    metrics["dim_book"] = {
-        **compute_basic_counts(dim_book),
-        "nulos_por_campo": compute_null_percentages(dim_book),
+
+def _public_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "rows": profile["rows"],
+        "columns": profile["columns"],
+        "nulos_por_campo": profile["nulos_por_campo"],
     }
 
-    # Métricas sobre book_source_detail
+
+def compute_quality_metrics(
+    dim_book: pd.DataFrame,
+    book_source_detail: pd.DataFrame,
+    profiles: Dict[str, Dict[str, Any]] | None = None,
+) -> Dict[str, Any]:
+    """
+    Métricas de calidad con una pasada vectorizada por tabla:
+      - perfil por columna (profile_table) para nulos
+      - factorize de las columnas clave, reutilizado para duplicados, conteos por fuente
+        y validaciones de idioma/moneda (el validador se aplica una vez por valor distinto)
+      - logs por archivo/regla con explode + groupby
+    """
+    metrics: Dict[str, Any] = {}
+
     # Asegurar que las columnas usadas en duplicados existen (por si acaso)
-    for col in ["titulo_normalizado", "autor_principal", "editorial"]:
+    for col in ["titulo_normalizado", "autor_principal", "editorial", "titulo"]:
         if col not in book_source_detail.columns:
             book_source_detail[col] = None
 
-    # Asegurar también 'titulo' para validaciones de clave
-    if "titulo" not in book_source_detail.columns:
-        book_source_detail["titulo"] = None
+    if profiles is None:
+        profiles = compute_profiles(dim_book, book_source_detail)
+    nulos = profiles["book_source_detail"]["nulos_por_campo"]
+    n_rows = len(book_source_detail)
+
+    # Códigos por columna (una pasada de hash por columna)
+    codes = {
+        col: factorize_column(book_source_detail[col])
+        for col in ["isbn13", "titulo_normalizado", "autor_principal", "editorial", "source_name", "idioma", "moneda"]
+        if col in book_source_detail.columns
+    }
 
+    # Métricas sobre dim_book
+    metrics["dim_book"] = _public_profile(profiles["dim_book"])
+
+    # Métricas sobre book_source_detail
     metrics["book_source_detail"] = {
-        **compute_basic_counts(book_source_detail),
-        "nulos_por_campo": compute_null_percentages(book_source_detail),
-        "duplicados_por_isbn13": count_duplicates(book_source_detail, subset=["isbn13"]),
-        "duplicados_por_titulo_autor_editorial": count_duplicates(
-            book_source_detail, subset=["titulo_normalizado", "autor_principal", "editorial"]
+        **_public_profile(profiles["book_source_detail"]),
+        "duplicados_por_isbn13": count_duplicates_from_codes([codes["isbn13"][0]]),
+        "duplicados_por_titulo_autor_editorial": count_duplicates_from_codes(
+            [codes[c][0] for c in ["titulo_normalizado", "autor_principal", "editorial"]]
         ),
     }
 
     # Filas por fuente (conteos)
-    if "source_name" in book_source_detail.columns:
-        filas_por_fuente = (
-            book_source_detail["source_name"]
-            .value_counts(dropna=False)
-            .to_dict()
-        )
+    if "source_name" in codes:
+        filas_por_fuente = counts_from_codes(*codes["source_name"])
     else:
         filas_por_fuente = {}
 
     metrics["book_source_detail"]["filas_por_fuente"] = filas_por_fuente
 
+    # Bytes por columna antes/después del plan de tipos (schema_plan.py)
+    if "memoria" in dim_book.attrs:
+        metrics["dim_book"]["memoria_bytes"] = memory_report_of(dim_book)
+    if "memoria" in book_source_detail.attrs:
+        metrics["book_source_detail"]["memoria_bytes"] = memory_report_of(book_source_detail)
+    if "resolucion_entidades" in book_source_detail.attrs:
+        metrics["book_source_detail"]["resolucion_entidades"] = book_source_detail.attrs["resolucion_entidades"]
+
     # --------------------------
     # Validaciones
     # --------------------------
@@ -532,11 +1026,11 @@ def compute_quality_metrics(dim_book: pd.DataFrame, book_source_detail: pd.DataF
         pct_fechas_validas = 0.0
 
     validaciones: Dict[str, Any] = {
-        "porcentaje_idiomas_validos": float(book_source_detail["idioma"].apply(idioma_valido).mean())
-        if "idioma" in book_source_detail.columns
+        "porcentaje_idiomas_validos": valid_ratio_by_unique(*codes["idioma"], idioma_valido)
+        if "idioma" in codes
         else 0.0,
-        "porcentaje_monedas_validas": float(book_source_detail["moneda"].apply(moneda_valida).mean())
-        if "moneda" in book_source_detail.columns
+        "porcentaje_monedas_validas": valid_ratio_by_unique(*codes["moneda"], moneda_valida)
+        if "moneda" in codes
         else 0.0,
         "porcentaje_fechas_validas": pct_fechas_validas,
     }
@@ -553,18 +1047,18 @@ def compute_quality_metrics(dim_book: pd.DataFrame, book_source_detail: pd.DataF
 
     # Rango simple para rating (si la columna existe)
     if "rating" in book_source_detail.columns:
-        validaciones["porcentaje_ratings_validos"] = float(
-            book_source_detail["rating"].apply(
-                lambda x: pd.isna(x)
-                or (isinstance(x, (int, float)) and 0 <= x <= 5)
-            ).mean()
-        )
+        rating = book_source_detail["rating"]
+        if pd.api.types.is_numeric_dtype(rating) and not pd.api.types.is_bool_dtype(rating):
+            rating_ok = rating.isna() | rating.between(0, 5)
+        else:
+            rating_ok = rating.apply(lambda x: pd.isna(x) or (isinstance(x, (int, float)) and 0 <= x <= 5))
+        validaciones["porcentaje_ratings_validos"] = float(rating_ok.mean())
 
     # Nulos “clave” destacados
     for col in ["titulo", "isbn13", "precio"]:
-        if col in book_source_detail.columns:
+        if col in nulos:
             key = f"porcentaje_nulos_{col}"
-            validaciones[key] = float(book_source_detail[col].isna().mean())
+            validaciones[key] = nulos[col]
 
     # % registros marcados con error (soft fail)
     if "has_error" in book_source_detail.columns:
@@ -578,17 +1072,12 @@ def compute_quality_metrics(dim_book: pd.DataFrame, book_source_detail: pd.DataF
     logs_por_archivo: Dict[str, Dict[str, int]] = {}
     logs_por_regla: Dict[str, int] = {}
 
-    if "error_codes" in book_source_detail.columns and "source_file" in book_source_detail.columns:
-        for _, row in book_source_detail[["source_file", "error_codes"]].iterrows():
-            src = row["source_file"] if pd.notna(row["source_file"]) else "UNKNOWN"
-            codes = row["error_codes"]
-            if not isinstance(codes, list):
-                continue
-            for code in codes:
-                logs_por_archivo.setdefault(src, {}).setdefault(code, 0)
-                logs_por_archivo[src][code] += 1
-                logs_por_regla.setdefault(code, 0)
-                logs_por_regla[code] += 1
+    if "error_codes" in book_source_detail.columns and "source_file" in book_source_detail.columns and n_rows:
+        conteos = count_list_items_by(book_source_detail, "source_file", "error_codes")
+        for (src, code), n in conteos.items():
+            logs_por_archivo.setdefault(src, {})[code] = int(n)
+        for code, n in conteos.groupby(level=1, sort=False).sum().items():
+            logs_por_regla[code] = int(n)
 
     metrics["logs"] = {
         "por_archivo": logs_por_archivo,
@@ -602,28 +1091,35 @@ def compute_quality_metrics(dim_book: pd.DataFrame, book_source_detail: pd.DataF
 # Generación schema.md
 # --------------------------
 
-def write_schema(dim_book: pd.DataFrame, book_source_detail: pd.DataFrame) -> None:
+def write_schema(
+    dim_book: pd.DataFrame,
+    book_source_detail: pd.DataFrame,
+    profiles: Dict[str, Dict[str, Any]] | None = None,
+) -> None:
     """
     Genera docs/schema.md con un esquema más rico de ambas tablas:
       - nombre, tipo, nullability, ejemplo
       - breve descripción/reglas globales de deduplicación y supervivencia
+    Reutiliza los perfiles de compute_profiles (no vuelve a recorrer las tablas).
     """
+    if profiles is None:
+        profiles = compute_profiles(dim_book, book_source_detail)
+
     lines: List[str] = []
     lines.append("# Esquema de tablas\n\n")
 
-    def describe_df(name: str, df: pd.DataFrame):
+    def describe_df(name: str, profile: Dict[str, Any]):
         lines.append(f"## {name}\n\n")
         lines.append("| columna | tipo | nullability | ejemplo |\n")
         lines.append("|---------|------|-------------|---------|\n")
 
-        nulls = compute_null_percentages(df)
-        for col, dtype in df.dtypes.items():
-            pct_null = nulls.get(col, 0.0)
+        for col, dtype in profile["tipos"].items():
+            pct_null = profile["nulos_por_campo"].get(col, 0.0)
             nullability = "NOT NULL" if pct_null == 0 else f"NULL ({pct_null:.1%})"
             # ejemplo: primer valor no nulo
-            non_null_series = df[col].dropna()
-            if not non_null_series.empty:
-                ejemplo_val = str(non_null_series.iloc[0])
+            ejemplo = profile["ejemplos"].get(col)
+            if ejemplo is not None:
+                ejemplo_val = str(ejemplo)
                 if len(ejemplo_val) > 40:
                     ejemplo_val = ejemplo_val[:37] + "..."
             else:
@@ -631,54 +1127,223 @@ def write_schema(dim_book: pd.DataFrame, book_source_detail: pd.DataFrame) -> No
             lines.append(f"| {col} | {dtype} | {nullability} | {ejemplo_val} |\n")
         lines.append("\n")
 
-    describe_df("dim_book", dim_book)
-    describe_df("book_source_detail", book_source_detail)
+    describe_df("dim_book", profiles["dim_book"])
+    describe_df("book_source_detail", profiles["book_source_detail"])
 
     os.makedirs("docs", exist_ok=True)
     with open("docs/schema.md", "w", encoding="utf-8") as f:
         f.writelines(lines)
 
 
+ENGINES = ["pandas", "polars"]
+
+
+def engine_option() -> str:
+    # PIPELINE_ENGINE: motor de build_staging / deduplicate / métricas (ver polars_engine.py).
+    # Sin Polars instalado se avisa y se usa pandas
+    engine = os.getenv("PIPELINE_ENGINE", "pandas").strip().lower()
+    if engine not in ENGINES:
+        raise ValueError(f"PIPELINE_ENGINE debe ser uno de {ENGINES}; recibido {engine!r}")
+    if engine == "polars":
+        from polars_engine import POLARS_AVAILABLE
+
+        if not POLARS_AVAILABLE:
+            print("[AVISO] PIPELINE_ENGINE=polars pero polars no está instalado (pip install polars); se usa pandas")
+            return "pandas"
+    return engine
+
+
 def main():
     os.makedirs("standard", exist_ok=True)
     os.makedirs("docs", exist_ok=True)
     os.makedirs("staging", exist_ok=True)  # temporales fuera de landing/
 
-    df_gr, df_gb = load_sources()
-    staging = build_staging(df_gr, df_gb)
-
-    # Guardar staging como artefacto temporal (no obligatorio, pero útil)
-    staging.to_parquet("staging/books_staging.parquet", index=False)
-
-    dim_book, book_source_detail = deduplicate(staging)
-    metrics = compute_quality_metrics(dim_book, book_source_detail)
-
-    # Metadatos de entrada (filas/columnas/tamaño por fuente)
-    metrics["entradas"] = {
-        "goodreads": {
-            "ruta": "landing/goodreads_books.json",
-            "n_filas": int(df_gr.shape[0]),
-            "n_columnas": int(df_gr.shape[1]),
-            "tamano_bytes": int(os.path.getsize("landing/goodreads_books.json")),
-        },
-        "googlebooks": {
-            "ruta": "landing/googlebooks_books.csv",
-            "n_filas": int(df_gb.shape[0]),
-            "n_columnas": int(df_gb.shape[1]),
-            "tamano_bytes": int(os.path.getsize("landing/googlebooks_books.csv")),
-        },
-    }
+    # PIPELINE_ARROW_NATIVE=true → lectura con pyarrow y columnas Arrow hasta los Parquet
+    arrow_native = os.getenv("PIPELINE_ARROW_NATIVE", "false").lower() == "true"
+
+    # Resolución de entidades sin isbn13: ver entity_resolution.py y ER_*
+    er_options = entity_resolution_options()
+
+    # Volcados de Open Library como tercera fuente: ver openlibrary_source.py y OPENLIBRARY_*
+    ol_options = openlibrary_options()
+
+    # Delta (CDC) de dim_book respecto a la ejecución anterior: ver change_capture.py
+    cdc_options = change_capture_options()
+
+    # Agregados para cuadros de mando (por autor, categoría, año/idioma, moneda): ver rollups.py
+    rollup_opts = rollup_options()
+
+    # Salidas (Parquet + CSV) en un pool de hilos: ver sinks.py y EXPORT_*
+    export_options = sink_options()
+
+    # Motor de las etapas de transformación: pandas (por defecto) o polars (consultas perezosas)
+    engine = engine_option()
+    if engine == "polars":
+        import polars_engine
+
+    # Tiempos/memoria/filas por etapa → quality_metrics.json["perfilado"] (ver instrumentation.py)
+    configure_profiling()
+
+    # Planificador de E/S: el pool de sinks ejecuta también las lecturas independientes
+    # (landing de las dos fuentes, dim_book anterior) y schema.md, solapadas con las etapas
+    # de CPU. Cada consumidor declara de qué lectura depende (ruta crítica en el perfilado).
+    with create_executor(export_options) as executor:
+        # El dim_book publicado se lee ya (las escrituras del nuevo se encolan después del CDC)
+        previous_future = None
+        if cdc_options["enabled"]:
+            previous_future = submit_io(
+                executor, "read_previous_dim_book", read_previous_dim_book, "standard/dim_book.parquet",
+                destino="standard/dim_book.parquet",
+            )
+
+        previous_rollups_future = None
+        if rollup_opts["enabled"] and rollup_opts["incremental"]:
+            previous_rollups_future = submit_io(
+                executor, "read_previous_rollups", read_previous_rollups, rollup_opts["dir"], destino=rollup_opts["dir"],
+            )
+
+        with profiled_stage("load_sources", depends_on=["read_source"]) as stage:
+            df_gr, df_gb = load_sources(arrow_native=arrow_native, executor=executor)
+            stage["filas_salida"] = len(df_gr) + len(df_gb)
+
+        df_ol, ol_stats = None, {}
+        if ol_options["dumps"]:
+            with profiled_stage("load_openlibrary") as stage:
+                df_ol, ol_stats = load_openlibrary(ol_options, interest_isbns(df_gr, df_gb))
+                stage["filas_salida"] = len(df_ol)
+                stage["lineas_leidas"] = ol_stats["ediciones"].get("lineas", 0)
+
+        n_sources = len(df_gr) + len(df_gb) + (len(df_ol) if df_ol is not None else 0)
+        with profiled_stage("build_staging", rows_in=n_sources, motor=engine) as stage:
+            if engine == "polars":
+                # El staging Polars alimenta deduplicate; la copia pandas, la exportación
+                staging_pl = polars_engine.build_staging(df_gr, df_gb, df_ol).collect()
+                staging = polars_engine.to_pandas(staging_pl, STAGING_DTYPE_PLAN, arrow_native)
+            else:
+                staging = build_staging(df_gr, df_gb, df_ol)
+            stage["filas_salida"] = len(staging)
+
+        # Guardar staging como artefacto temporal (no obligatorio, pero útil)
+        # Se escribe en segundo plano mientras se deduplica (deduplicate no modifica staging)
+        futures = submit_table(executor, "books_staging", staging, "staging/books_staging.parquet", export_options)
+
+        with profiled_stage("deduplicate", rows_in=len(staging), motor=engine) as stage:
+            if engine == "polars":
+                dim_book, book_source_detail = polars_engine.deduplicate(
+                    staging_pl,
+                    entity_resolution=er_options["enabled"],
+                    er_threshold=er_options["threshold"],
+                    er_max_block_size=er_options["max_block_size"],
+                    arrow_native=arrow_native,
+                )
+            else:
+                dim_book, book_source_detail = deduplicate(
+                    staging,
+                    entity_resolution=er_options["enabled"],
+                    er_threshold=er_options["threshold"],
+                    er_max_block_size=er_options["max_block_size"],
+                )
+            stage["filas_salida"] = len(dim_book)
+            stage["filas_salida_book_source_detail"] = len(book_source_detail)
+
+        # El dim_book publicado se leyó en segundo plano antes de sustituirlo
+        cdc_stats, delta = None, None
+        if previous_future is not None:
+            with profiled_stage("change_capture", rows_in=len(dim_book), depends_on=["read_previous_dim_book"]) as stage:
+                dim_book, delta, cdc_stats = apply_change_capture(dim_book, previous_future.result())
+                stage["filas_salida"] = len(delta)
+
+        # Rollups desde las tablas ya en memoria; con los de la ejecución anterior solo se
+        # reagregan los libros que cambian
+        rollups, rollup_state, rollup_stats = {}, None, None
+        if rollup_opts["enabled"]:
+            with profiled_stage("rollups", rows_in=len(dim_book), depends_on=["read_previous_rollups"]) as stage:
+                previous_rollups = previous_rollups_future.result() if previous_rollups_future is not None else None
+                rollups, rollup_state, rollup_stats = refresh_rollups(
+                    book_contributions(dim_book, book_source_detail), previous_rollups, rollup_opts["rebuild_fraction"],
+                )
+                stage["filas_salida"] = sum(len(df) for df in rollups.values())
+                stage["modo"] = rollup_stats["modo"]
+
+        with profiled_stage("compute_quality_metrics", rows_in=len(dim_book) + len(book_source_detail), motor=engine):
+            profiles = compute_profiles(dim_book, book_source_detail)
+            if engine == "polars":
+                metrics = polars_engine.compute_quality_metrics(dim_book, book_source_detail, profiles)
+            else:
+                metrics = compute_quality_metrics(dim_book, book_source_detail, profiles)
+
+        if "memoria" in staging.attrs:
+            metrics["staging"] = {"memoria_bytes": memory_report_of(staging)}
+
+        if delta is not None:
+            cdc_stats["delta"] = delta_path(cdc_stats["ts_ejecucion"], cdc_options["delta_dir"])
+            metrics["cdc"] = cdc_stats
+            futures.append(submit_task(executor, write_delta, delta, cdc_stats["delta"]))
+
+        # Metadatos de entrada (filas/columnas/tamaño por fuente)
+        metrics["entradas"] = {
+            "goodreads": {
+                "ruta": df_gr.attrs["landing_path"],
+                "n_filas": int(df_gr.shape[0]),
+                "n_columnas": int(df_gr.shape[1]),
+                "tamano_bytes": int(os.path.getsize(df_gr.attrs["landing_path"])),
+            },
+            "googlebooks": {
+                "ruta": df_gb.attrs["landing_path"],
+                "n_filas": int(df_gb.shape[0]),
+                "n_columnas": int(df_gb.shape[1]),
+                "tamano_bytes": int(os.path.getsize(df_gb.attrs["landing_path"])),
+            },
+        }
+        if df_ol is not None:
+            metrics["entradas"]["openlibrary"] = {
+                "ruta": ",".join(ol_options["dumps"]),
+                "n_filas": int(df_ol.shape[0]),
+                "n_columnas": int(df_ol.shape[1]),
+                "tamano_bytes": int(sum(os.path.getsize(p) for p in ol_options["dumps"])),
+                "lectura": ol_stats,
+            }
+
+        # Guardar Parquet (standard/) y sus CSV
+        # (zstd, diccionario en columnas de baja cardinalidad, book_id ordenado y, opcionalmente,
+        # layout particionado: ver STANDARD_PARTITION_COLS / STANDARD_ROW_GROUP_SIZE)
+        parquet_options = standard_parquet_options()
+        # Además se publican en Feather v2 sin comprimir para lectura con mmap (EXPORT_FEATHER)
+        futures += submit_table(
+            executor, "dim_book", dim_book, "standard/dim_book.parquet", export_options,
+            feather_path="standard/dim_book.feather", sort_by="book_id", **parquet_options,
+        )
+        futures += submit_table(
+            executor, "book_source_detail", book_source_detail, "standard/book_source_detail.parquet", export_options,
+            feather_path="standard/book_source_detail.feather", sort_by="book_id", **parquet_options,
+        )
+        if rollup_state is not None:
+            os.makedirs(rollup_opts["dir"], exist_ok=True)
+            for name, df in rollups.items():
+                futures += submit_table(executor, name, df, rollup_path(name, rollup_opts["dir"]), export_options)
+            futures.append(submit_task(executor, write_parquet, rollup_state, rollup_path(STATE_TABLE, rollup_opts["dir"])))
+            metrics["rollups"] = {**rollup_stats, "filas": {name: len(df) for name, df in rollups.items()}}
+            print(format_rollup_stats(rollup_stats, rollups))
+
+        # Índice de búsqueda por ISBN/ASIN/book_id/prefijo de título (ver lookup_index.py)
+        futures.append(submit_task(executor, build_lookup_index, dim_book, LOOKUP_INDEX_PATH))
+
+        # Guardar schema.md (en segundo plano, como las exportaciones)
+        schema_future = submit_io(
+            executor, "write_schema", write_schema, dim_book, book_source_detail, profiles, destino="docs/schema.md"
+        )
 
-    # Guardar Parquet (standard/)
-    dim_book.to_parquet("standard/dim_book.parquet", index=False)
-    book_source_detail.to_parquet("standard/book_source_detail.parquet", index=False)
+        # Esperar a las exportaciones (cada escritura registra su propia etapa "export")
+        with profiled_stage("wait_exports", depends_on=["export", "write_schema"]):
+            written = wait_for(futures)
+            schema_future.result()
 
-    # Guardar quality_metrics.json
-    with open("docs/quality_metrics.json", "w", encoding="utf-8") as f:
-        json.dump(metrics, f, ensure_ascii=False, indent=2)
+        # Guardar quality_metrics.json (al final, para incluir el perfilado de todas las etapas)
+        metrics["perfilado"] = stage_report()
+        with open("docs/quality_metrics.json", "w", encoding="utf-8") as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
 
-    # Guardar schema.md
-    write_schema(dim_book, book_source_detail)
+    print(format_critical_path(metrics["perfilado"]["ruta_critica"]))
 
     print("Pipeline de integración completado.")
     print("standard/dim_book.parquet")
@@ -687,20 +1352,13 @@ def main():
     print("docs/quality_metrics.json")
     print("docs/schema.md")
 
-    # Convertir Parquet → CSV
-    os.makedirs("parquet_a_csv", exist_ok=True)
-    parquet_files = [
-        "standard/dim_book.parquet",
-        "standard/book_source_detail.parquet",
-        "staging/books_staging.parquet",
-    ]
-
-    for pq_file in parquet_files:
-        df = pd.read_parquet(pq_file)
-        csv_name = os.path.splitext(os.path.basename(pq_file))[0] + ".csv"
-        csv_path = os.path.join("parquet_a_csv", csv_name)
-        df.to_csv(csv_path, index=False)
-        print(f"Convertido a CSV: {csv_path}")
+    for path in written:
+        if path.endswith(".feather"):
+            print(f"Exportado a Feather: {path}")
+        elif path == LOOKUP_INDEX_PATH:
+            print(f"Índice de búsqueda: {path}")
+        elif not path.endswith(".parquet"):
+            print(f"Exportado a CSV: {path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,264 @@
+# src/landing_format.py
+
+# Formato de los ficheros de landing/ de Goodreads y Google Books (PIPELINE_LANDING_FORMAT):
+#   - json (por defecto): goodreads_books.json (array JSON indentado) y
+#     googlebooks_books.csv (separador ';'), como hasta ahora.
+#   - parquet: goodreads_books.parquet / googlebooks_books.parquet (zstd).
+#   - ipc: goodreads_books.arrow / googlebooks_books.arrow (Arrow IPC / Feather v2, sin
+#     compresión: load_sources los lee con mmap).
+# En los formatos columnares cada registro se añade a buffers por columna (una lista por
+# campo del esquema) y cada LANDING_BATCH_ROWS registros se vuelcan como un RecordBatch
+# tipado (GOODREADS_SCHEMA / GOOGLEBOOKS_SCHEMA). Al releer no hay que parsear texto ni
+# forzar tipos: los ISBN siguen siendo texto y rating / price_amount números.
+#
+# Un landing existente se pasa a otro formato con:
+#     python src/landing_format.py convert --to parquet
+#
+# La escritura va a un fichero temporal que se renombra al cerrar: un lector nunca ve un
+# fichero a medias. Los lectores (find_landing_file) buscan primero el formato configurado y
+# si no existe cualquiera de los otros, de modo que cambiar de formato no rompe un landing
+# ya escrito.
+
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+LANDING_FORMATS = ["json", "parquet", "ipc"]
+DEFAULT_BATCH_ROWS = 1024
+
+# Fuente → nombre base del fichero y extensión del formato json (texto)
+LANDING_FILES = {"goodreads": "goodreads_books", "googlebooks": "googlebooks_books"}
+TEXT_EXTENSIONS = {"goodreads": ".json", "googlebooks": ".csv"}
+COLUMNAR_EXTENSIONS = {"parquet": ".parquet", "ipc": ".arrow"}
+
+GOODREADS_SCHEMA = pa.schema([
+    ("title", pa.string()),
+    ("author", pa.string()),
+    ("rating", pa.float64()),
+    ("ratings_count", pa.int64()),
+    ("book_url", pa.string()),
+    ("cover_url", pa.string()),
+    ("isbn10", pa.string()),
+    ("isbn13", pa.string()),
+    ("asin", pa.string()),
+    ("cover_local_path", pa.string()),
+])
+
+GOOGLEBOOKS_SCHEMA = pa.schema([
+    ("gb_id", pa.string()),
+    ("original_title", pa.string()),
+    ("original_author", pa.string()),
+    ("title", pa.string()),
+    ("subtitle", pa.string()),
+    ("authors", pa.string()),
+    ("publisher", pa.string()),
+    ("pub_date", pa.string()),
+    ("language", pa.string()),
+    ("categories", pa.string()),
+    ("isbn13", pa.string()),
+    ("isbn10", pa.string()),
+    ("asin", pa.string()),
+    ("price_amount", pa.float64()),
+    ("price_currency", pa.string()),
+])
+
+SCHEMAS = {"goodreads": GOODREADS_SCHEMA, "googlebooks": GOOGLEBOOKS_SCHEMA}
+
+
+def landing_format_options() -> Dict[str, Any]:
+    fmt = os.getenv("PIPELINE_LANDING_FORMAT", "json").strip().lower()
+    if fmt not in LANDING_FORMATS:
+        raise ValueError(f"PIPELINE_LANDING_FORMAT no soportado: {fmt} (valores: {', '.join(LANDING_FORMATS)})")
+    return {
+        "format": fmt,
+        "batch_rows": int(os.getenv("PIPELINE_LANDING_BATCH_ROWS", DEFAULT_BATCH_ROWS)),
+    }
+
+
+def landing_path(landing_dir: str, source: str, fmt: str) -> str:
+    extension = TEXT_EXTENSIONS[source] if fmt == "json" else COLUMNAR_EXTENSIONS[fmt]
+    return os.path.join(landing_dir, LANDING_FILES[source] + extension)
+
+
+def find_landing_file(landing_dir: str, source: str, fmt: Optional[str] = None) -> str:
+    # Fichero de landing de `source`: el del formato configurado o, si no existe, el de
+    # cualquier otro formato. Si no hay ninguno, la ruta del formato configurado.
+    fmt = fmt or landing_format_options()["format"]
+    for candidate in [fmt] + [f for f in LANDING_FORMATS if f != fmt]:
+        path = landing_path(landing_dir, source, candidate)
+        if os.path.exists(path):
+            return path
+    return landing_path(landing_dir, source, fmt)
+
+
+def is_columnar(path: str) -> bool:
+    return path.endswith(tuple(COLUMNAR_EXTENSIONS.values()))
+
+
+# ------------------------------------------------------------
+# ESCRITURA
+# ------------------------------------------------------------
+
+def open_landing_writer(path: str, source: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Dict[str, Any]:
+    """
+    Abre un fichero de landing para añadir registros (dicts) con write_record. El formato
+    sale de la extensión de `path`. En json/csv los registros se guardan hasta el cierre;
+    en parquet/ipc se acumulan por columna y se vuelcan en lotes de `batch_rows`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    schema = SCHEMAS[source]
+    return {
+        "path": path,
+        "tmp_path": path + ".tmp",
+        "source": source,
+        "schema": schema,
+        "batch_rows": max(1, batch_rows),
+        "columns": {name: [] for name in schema.names},
+        "records": [],
+        "buffered": 0,
+        "rows": 0,
+        "writer": None,
+    }
+
+
+def _flush(writer: Dict[str, Any]) -> None:
+    if writer["buffered"] == 0:
+        return
+    schema = writer["schema"]
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(writer["columns"][field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+    if writer["writer"] is None:
+        if writer["path"].endswith(COLUMNAR_EXTENSIONS["parquet"]):
+            writer["writer"] = pq.ParquetWriter(writer["tmp_path"], schema, compression="zstd")
+        else:
+            writer["writer"] = pa.ipc.new_file(writer["tmp_path"], schema)
+    writer["writer"].write_batch(batch)
+    for values in writer["columns"].values():
+        values.clear()
+    writer["buffered"] = 0
+
+
+def write_record(writer: Dict[str, Any], record: Dict[str, Any]) -> None:
+    writer["rows"] += 1
+    if not is_columnar(writer["path"]):
+        writer["records"].append(record)
+        return
+    for name, values in writer["columns"].items():
+        values.append(record.get(name))
+    writer["buffered"] += 1
+    if writer["buffered"] >= writer["batch_rows"]:
+        _flush(writer)
+
+
+def close_landing_writer(writer: Dict[str, Any]) -> int:
+    # Escribe lo pendiente, renombra el temporal al destino y devuelve el nº de registros
+    tmp_path = writer["tmp_path"]
+    if is_columnar(writer["path"]):
+        _flush(writer)
+        if writer["writer"] is None:
+            # Sin registros: fichero vacío con el esquema
+            empty = writer["schema"].empty_table()
+            if writer["path"].endswith(COLUMNAR_EXTENSIONS["parquet"]):
+                pq.write_table(empty, tmp_path, compression="zstd")
+            else:
+                with pa.ipc.new_file(tmp_path, writer["schema"]) as ipc_writer:
+                    ipc_writer.write_table(empty)
+        else:
+            writer["writer"].close()
+    elif writer["source"] == "goodreads":
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(writer["records"], f, ensure_ascii=False, indent=2)
+    else:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            csv_writer = csv.DictWriter(f, fieldnames=writer["schema"].names, delimiter=";")
+            csv_writer.writeheader()
+            for record in writer["records"]:
+                csv_writer.writerow(record)
+    os.replace(tmp_path, writer["path"])
+    return writer["rows"]
+
+
+def write_landing_records(records: Iterable[Dict[str, Any]], path: str, source: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    writer = open_landing_writer(path, source, batch_rows)
+    for record in records:
+        write_record(writer, record)
+    return close_landing_writer(writer)
+
+
+# ------------------------------------------------------------
+# LECTURA
+# ------------------------------------------------------------
+
+def read_landing_table(path: str) -> pa.Table:
+    # Fichero columnar de landing como tabla Arrow (IPC con mmap, sin copia)
+    if path.endswith(COLUMNAR_EXTENSIONS["parquet"]):
+        return pq.read_table(path)
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_landing_records(path: str) -> List[Dict[str, Any]]:
+    # Registros (dicts) de un fichero de landing en cualquier formato
+    if is_columnar(path):
+        return read_landing_table(path).to_pylist()
+    if path.endswith(".csv"):
+        converters = _numeric_converters(GOOGLEBOOKS_SCHEMA)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return [
+                {name: None if not value else converters.get(name, str)(value) for name, value in row.items()}
+                for row in csv.DictReader(f, delimiter=";")
+            ]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _numeric_converters(schema: pa.Schema) -> Dict[str, Any]:
+    # En el CSV todo es texto: los campos numéricos del esquema se convierten (vacío → None)
+    converters: Dict[str, Any] = {}
+    for field in schema:
+        if pa.types.is_floating(field.type):
+            converters[field.name] = float
+        elif pa.types.is_integer(field.type):
+            converters[field.name] = lambda value: int(float(value))
+    return converters
+
+
+def convert_landing(landing_dir: str, source: str, fmt: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Optional[str]:
+    # Reescribe el landing de `source` en el formato `fmt` (el fichero original se conserva)
+    src_path = find_landing_file(landing_dir, source, fmt)
+    dst_path = landing_path(landing_dir, source, fmt)
+    if not os.path.exists(src_path) or src_path == dst_path:
+        return None
+    write_landing_records(read_landing_records(src_path), dst_path, source, batch_rows)
+    return dst_path
+
+
+def main():
+    options = landing_format_options()
+    parser = argparse.ArgumentParser(description="Formato de los ficheros de landing/")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("convert", help="Reescribe el landing existente en otro formato")
+    p.add_argument("--to", choices=LANDING_FORMATS, required=True)
+    p.add_argument("--dir", default="landing", help="Directorio de landing")
+    p.add_argument("--source", choices=list(LANDING_FILES), action="append", help="Fuente (por defecto todas)")
+    args = parser.parse_args()
+
+    for source in args.source or list(LANDING_FILES):
+        t0 = time.perf_counter()
+        path = convert_landing(args.dir, source, args.to, options["batch_rows"])
+        if path is None:
+            print(f"{source}: nada que convertir (no hay landing o ya está en {args.to})")
+        else:
+            print(f"{source}: {path} ({os.path.getsize(path):,} bytes, {time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
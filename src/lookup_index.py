@@ -0,0 +1,393 @@
+# src/lookup_index.py
+
+# Índice de búsqueda en disco sobre dim_book, mapeable en memoria.
+# Responde "¿existe este ISBN / ASIN / título y cuál es su book_id?" sin cargar la tabla:
+#   - Tablas hash (direccionamiento abierto, sondeo lineal) para isbn13, isbn10, asin y book_id:
+#     <campo>.hash.npy (huella de 64 bits, 0 = vacío) y <campo>.row.npy (fila en rows.arrow).
+#   - titulos.arrow: titulo_normalizado ordenado + fila, para búsqueda por prefijo (bisección).
+#   - rows.arrow: columnas de respuesta (book_id, titulo, autor, isbn...) en Arrow IPC sin comprimir.
+#   - claves.arrow: clave normalizada de cada campo hash por fila (confirma cada acierto).
+# Cada construcción es una versión (subdirectorio v<ns>/ con los ficheros anteriores) y
+# CURRENT, un fichero de texto con el nombre de la versión vigente, se sustituye con os.replace:
+# un lector ve siempre una versión completa y nunca se queda sin índice. Se conserva la versión
+# anterior (lectores que ya la estaban abriendo) y se borran las demás.
+# Todo se abre con mmap (np.load(mmap_mode="r") y pa.memory_map): abrir cuesta milisegundos
+# y cada consulta solo toca las páginas que lee.
+# Las consultas solo necesitan numpy y pyarrow: pandas y pyarrow.compute se importan al
+# construir el índice (arranque rápido de `books-pipeline lookup`).
+#
+# Uso (CLI):
+#     python src/lookup_index.py --isbn13 9780553418811
+#     python src/lookup_index.py --asin B01AXXXXXX
+#     python src/lookup_index.py --titulo-prefijo "big data" --limite 5
+
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LOOKUP_INDEX_PATH = "standard/dim_book.index"
+INDEX_VERSION = 2
+CURRENT_FILE = "CURRENT"
+
+# FNV-1a de 64 bits
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+HASH_FIELDS = ["isbn13", "isbn10", "asin", "book_id"]
+ROW_COLUMNS = ["book_id", "titulo", "titulo_normalizado", "autor_principal", "isbn13", "isbn10", "asin"]
+
+# Ocupación máxima de las tablas hash (capacidad = potencia de 2 >= entradas / LOAD_FACTOR)
+LOAD_FACTOR = 0.5
+
+
+def normalize_keys(field: str, values: pa.Array) -> pa.Array:
+    """
+    Normalización de claves, común a la construcción y a las consultas (vectorizada):
+      - isbn13/isbn10: solo dígitos y X (como clean_isbn), en mayúsculas
+      - titulo_normalizado: minúsculas y espacios colapsados
+      - asin: mayúsculas; book_id: sin espacios en los extremos
+    Las claves vacías quedan nulas. lookup_key aplica las mismas reglas a un valor suelto.
+    """
+    import pyarrow.compute as pc
+
+    values = pc.cast(values, pa.string())
+    if field in ("isbn13", "isbn10"):
+        keys = pc.utf8_upper(pc.replace_substring_regex(values, r"[^0-9Xx]", ""))
+    elif field == "titulo_normalizado":
+        keys = pc.utf8_trim_whitespace(pc.replace_substring_regex(pc.utf8_lower(values), r"\s+", " "))
+    elif field == "asin":
+        keys = pc.utf8_upper(pc.utf8_trim_whitespace(values))
+    else:
+        keys = pc.utf8_trim_whitespace(values)
+    return pc.if_else(pc.equal(keys, ""), None, keys)
+
+
+def lookup_key(field: str, value: Any) -> Optional[str]:
+    # Versión escalar de normalize_keys para las consultas (sin pyarrow.compute)
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value)
+    if field in ("isbn13", "isbn10"):
+        key = re.sub(r"[^0-9Xx]", "", value).upper()
+    elif field == "titulo_normalizado":
+        # \s de RE2 (pyarrow) = [\t\n\f\r ]
+        key = re.sub(r"[\t\n\f\r ]+", " ", value.lower()).strip()
+    elif field == "asin":
+        key = value.strip().upper()
+    else:
+        key = value.strip()
+    return key or None
+
+
+def key_hashes(keys: pa.Array) -> np.ndarray:
+    """
+    Huella de 64 bits estable entre procesos: FNV-1a sobre los bytes UTF-8 de cada clave
+    (sin nulos), nunca 0. Vectorizada por posición de byte sobre los buffers Arrow.
+    """
+    if keys.type != pa.string():
+        keys = keys.cast(pa.string())
+    n = len(keys)
+    offsets = np.frombuffer(keys.buffers()[1], dtype=np.int32)[keys.offset:keys.offset + n + 1]
+    data_buffer = keys.buffers()[2]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, np.uint8)
+    lengths = np.diff(offsets)
+
+    # Claves ordenadas por longitud descendente: en la posición j siguen activas las primeras
+    order = np.argsort(-lengths, kind="stable")
+    starts = offsets[:-1][order].astype(np.int64)
+    max_length = int(lengths.max()) if n else 0
+    active = n - np.searchsorted(lengths[order][::-1], np.arange(max_length), side="right")
+
+    sorted_hashes = np.full(n, FNV_OFFSET, dtype=np.uint64)
+    for j, m in enumerate(active):
+        sorted_hashes[:m] = (sorted_hashes[:m] ^ data[starts[:m] + j]) * FNV_PRIME
+    hashes = np.empty(n, dtype=np.uint64)
+    hashes[order] = sorted_hashes
+    return np.where(hashes == 0, np.uint64(1), hashes)
+
+
+def key_hash(key: str) -> int:
+    # key_hashes para una sola clave, en Python puro (pa.array importaría pandas)
+    h = int(FNV_OFFSET)
+    for byte in key.encode("utf-8"):
+        h = ((h ^ byte) * int(FNV_PRIME)) & 0xFFFFFFFFFFFFFFFF
+    return h or 1
+
+
+def _hash_capacity(n_entries: int) -> int:
+    capacity = 8
+    while capacity * LOAD_FACTOR < n_entries:
+        capacity *= 2
+    return capacity
+
+
+def build_hash_table(keys: pa.Array) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Tabla hash con sondeo lineal para las claves no nulas (las repetidas se guardan todas).
+    La inserción es vectorizada por rondas: en cada ronda, cada clave pendiente intenta su
+    posición actual; la primera que llega a una celda vacía la ocupa y el resto avanza una
+    posición. Equivale a insertar una a una con sondeo lineal.
+    """
+    import pyarrow.compute as pc
+
+    valid = pc.is_valid(keys)
+    rows = pc.filter(pa.array(np.arange(len(keys), dtype=np.int32)), valid).to_numpy()
+    hashes = key_hashes(pc.filter(keys, valid))
+
+    capacity = _hash_capacity(len(rows))
+    mask = np.uint64(capacity - 1)
+    table_hash = np.zeros(capacity, dtype=np.uint64)
+    table_row = np.full(capacity, -1, dtype=np.int32)
+
+    pending = np.arange(len(rows))
+    position = (hashes & mask).astype(np.int64)
+    while len(pending):
+        pos = position[pending]
+        free = table_hash[pos] == 0
+        # primera clave pendiente por celda libre
+        _, first = np.unique(pos, return_index=True)
+        winners = np.zeros(len(pending), dtype=bool)
+        winners[first] = True
+        winners &= free
+
+        placed = pending[winners]
+        table_hash[position[placed]] = hashes[placed]
+        table_row[position[placed]] = rows[placed]
+
+        pending = pending[~winners]
+        position[pending] = (position[pending] + 1) & (capacity - 1)
+
+    return table_hash, table_row
+
+
+def _write_ipc(table: pa.Table, path: str) -> None:
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def build_lookup_index(dim_book: "pd.DataFrame", path: str = LOOKUP_INDEX_PATH) -> str:
+    """
+    Construye una nueva versión del índice en `path` (directorio) y la publica al final
+    cambiando CURRENT, para que un lector no vea un índice a medias ni un hueco sin índice.
+    Devuelve la ruta escrita.
+    """
+    import pyarrow.compute as pc
+
+    from utils_parquet import to_arrow_table
+
+    columns = [c for c in ROW_COLUMNS if c in dim_book.columns]
+    rows = to_arrow_table(dim_book[columns].reset_index(drop=True)).replace_schema_metadata(None)
+    # Texto plano en el fichero (sin diccionarios de category)
+    rows = pa.table({name: pc.cast(rows[name], pa.string()) for name in rows.column_names})
+
+    version = f"v{time.time_ns()}"
+    tmp_path = os.path.join(path, version + ".tmp")
+    os.makedirs(tmp_path)
+
+    _write_ipc(rows, os.path.join(tmp_path, "rows.arrow"))
+
+    manifest: Dict[str, Any] = {"version": INDEX_VERSION, "n_filas": rows.num_rows, "hash": "fnv1a64", "campos": {}}
+    claves: Dict[str, pa.Array] = {}
+    for field in HASH_FIELDS:
+        if field not in rows.column_names:
+            continue
+        claves[field] = normalize_keys(field, rows[field].combine_chunks())
+        table_hash, table_row = build_hash_table(claves[field])
+        np.save(os.path.join(tmp_path, f"{field}.hash.npy"), table_hash)
+        np.save(os.path.join(tmp_path, f"{field}.row.npy"), table_row)
+        manifest["campos"][field] = {
+            "capacidad": int(len(table_hash)),
+            "entradas": int((table_row >= 0).sum()),
+        }
+    _write_ipc(pa.table(claves), os.path.join(tmp_path, "claves.arrow"))
+
+    # Títulos normalizados ordenados (orden de bytes UTF-8 = orden de str en Python)
+    if "titulo_normalizado" in rows.column_names:
+        titulos = normalize_keys("titulo_normalizado", rows["titulo_normalizado"].combine_chunks())
+        valid = pc.is_valid(titulos)
+        row_ids = pc.filter(pa.array(np.arange(rows.num_rows, dtype=np.int32)), valid)
+        titulos = pc.filter(titulos, valid)
+        order = pc.sort_indices(titulos)
+        _write_ipc(
+            pa.table({"titulo_normalizado": titulos.take(order), "row": row_ids.take(order)}),
+            os.path.join(tmp_path, "titulos.arrow"),
+        )
+        manifest["titulos"] = len(titulos)
+
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_path, os.path.join(path, version))
+    previous = _current_version(path)
+    pointer_tmp = os.path.join(path, CURRENT_FILE + ".tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(path, CURRENT_FILE))
+    _prune_versions(path, keep={version, previous})
+    return path
+
+
+def _current_version(path: str) -> Optional[str]:
+    # Nombre de la versión vigente, o None en un índice sin versiones (formato anterior)
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_versions(path: str, keep: set) -> None:
+    # Versiones antiguas, construcciones interrumpidas (*.tmp) y ficheros del formato anterior
+    for name in os.listdir(path):
+        if name == CURRENT_FILE or name in keep:
+            continue
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+
+
+def _read_ipc_mmap(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _as_array(column: pa.ChunkedArray) -> pa.Array:
+    # Con un único bloque se usa tal cual (sin copiar los buffers mapeados)
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def open_lookup_index(path: str = LOOKUP_INDEX_PATH) -> Dict[str, Any]:
+    # Abre el índice sin leer los datos: todo queda mapeado en memoria. La versión se resuelve
+    # una sola vez, así que todos los ficheros salen de la misma construcción
+    version = _current_version(path)
+    if version is not None:
+        path = os.path.join(path, version)
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != INDEX_VERSION:
+        raise ValueError(f"Versión de índice no soportada: {manifest.get('version')}")
+
+    rows = _read_ipc_mmap(os.path.join(path, "rows.arrow"))
+    claves = _read_ipc_mmap(os.path.join(path, "claves.arrow"))
+    index: Dict[str, Any] = {
+        "manifest": manifest,
+        "rows": {name: _as_array(rows[name]) for name in rows.column_names},
+        "hash": {},
+    }
+    for field in manifest["campos"]:
+        index["hash"][field] = (
+            np.load(os.path.join(path, f"{field}.hash.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, f"{field}.row.npy"), mmap_mode="r"),
+            _as_array(claves[field]),
+        )
+    titulos_path = os.path.join(path, "titulos.arrow")
+    if os.path.exists(titulos_path):
+        titulos = _read_ipc_mmap(titulos_path)
+        index["titulos"] = (_as_array(titulos["titulo_normalizado"]), _as_array(titulos["row"]))
+    return index
+
+
+def _row_dict(index: Dict[str, Any], row: int) -> Dict[str, Any]:
+    return {name: values[row].as_py() for name, values in index["rows"].items()}
+
+
+def lookup(index: Dict[str, Any], field: str, value: Any) -> List[Dict[str, Any]]:
+    """
+    Consulta puntual: filas de dim_book cuyo `field` (isbn13, isbn10, asin, book_id)
+    coincide con `value` tras normalizarlo. Lista vacía si no existe.
+    """
+    if field not in index["hash"]:
+        raise ValueError(f"Campo sin índice hash: {field}")
+    key = lookup_key(field, value)
+    if key is None:
+        return []
+
+    table_hash, table_row, claves = index["hash"][field]
+    mask = len(table_hash) - 1
+    h = key_hash(key)
+    pos = h & mask
+    matches: List[Dict[str, Any]] = []
+    while table_hash[pos] != 0:
+        if int(table_hash[pos]) == h:
+            row = int(table_row[pos])
+            # Se confirma con la clave guardada (descarta colisiones de la huella)
+            if claves[row].as_py() == key:
+                matches.append(_row_dict(index, row))
+        pos = (pos + 1) & mask
+    return matches
+
+
+def _lower_bound(values: pa.Array, target: str) -> int:
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid].as_py() < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def prefix_search(index: Dict[str, Any], prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    # Títulos normalizados que empiezan por `prefix` (en orden alfabético, hasta `limit`)
+    if "titulos" not in index:
+        return []
+    key = lookup_key("titulo_normalizado", prefix) or ""
+    titulos, row_ids = index["titulos"]
+
+    matches: List[Dict[str, Any]] = []
+    pos = _lower_bound(titulos, key)
+    while pos < len(titulos) and len(matches) < limit:
+        if not titulos[pos].as_py().startswith(key):
+            break
+        matches.append(_row_dict(index, row_ids[pos].as_py()))
+        pos += 1
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas sobre el índice de dim_book")
+    parser.add_argument("--index", default=LOOKUP_INDEX_PATH, help="Directorio del índice")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--isbn13")
+    group.add_argument("--isbn10")
+    group.add_argument("--asin")
+    group.add_argument("--book-id", dest="book_id")
+    group.add_argument("--titulo-prefijo", dest="titulo_prefijo")
+    parser.add_argument("--limite", type=int, default=10, help="Máximo de resultados por prefijo")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = open_lookup_index(args.index)
+    t_open = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if args.titulo_prefijo is not None:
+        results = prefix_search(index, args.titulo_prefijo, args.limite)
+    else:
+        field = next(f for f in HASH_FIELDS if getattr(args, f) is not None)
+        results = lookup(index, field, getattr(args, field))
+    t_query = time.perf_counter() - t0
+
+    for row in results:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"{len(results)} resultado(s) | apertura {t_open * 1000:.2f} ms | consulta {t_query * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
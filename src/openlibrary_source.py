@@ -0,0 +1,348 @@
+# src/openlibrary_source.py
+
+# Tercera fuente opcional: volcados masivos de Open Library (https://openlibrary.org/developers/dumps).
+# Formato de cada línea (comprimido con gzip o en texto plano):
+#     <tipo>\t<clave>\t<revisión>\t<última modificación>\t<JSON>
+# (también se admiten líneas que son solo el JSON).
+#
+# Lectura en streaming: el proceso principal descomprime el volcado línea a línea y reparte
+# bloques de OPENLIBRARY_CHUNK_LINES líneas a un pool de procesos. Cada proceso descarta
+# pronto lo que no interesa (tipo de registro y búsqueda en los bytes crudos antes de
+# decodificar el JSON) y devuelve solo las ediciones aceptadas, ya mapeadas a las columnas
+# que build_staging espera. Como mucho hay 2 × procesos bloques en vuelo, así que la memoria
+# no crece con el tamaño del volcado (solo con las filas aceptadas).
+#
+# Filtro de interés (basta con cumplir uno):
+#   - ISBN presente en landing/ (Goodreads o Google Books), si OPENLIBRARY_MATCH_ISBNS=true
+#   - alguna materia (subjects) de la edición, o de su obra si hay volcado de obras, contiene
+#     uno de los términos de OPENLIBRARY_SUBJECTS (sin distinguir mayúsculas)
+#
+# Volcados opcionales:
+#   - OPENLIBRARY_WORKS_DUMP: obras; se leen antes para conocer las materias de cada obra
+#     (solo se guardan las obras que cumplen el filtro de materias)
+#   - OPENLIBRARY_AUTHORS_DUMP: autores; se leen después, solo para las claves de autor de
+#     las ediciones aceptadas. Sin él se usa `by_statement` de la edición.
+
+import gzip
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from utils_isbn import clean_isbn, normalize_isbn13, to_isbn13
+
+DEFAULT_CHUNK_LINES = 20_000
+
+# Columnas de salida (mismos nombres que el CSV de Google Books, más páginas y formato).
+# Como en Google Books, `title` es el título corto y el subtítulo va aparte.
+OPENLIBRARY_COLUMNS = [
+    "ol_key", "title", "subtitle", "authors", "publisher", "pub_date", "language", "categories",
+    "isbn13", "isbn10", "paginas", "formato", "source_file",
+]
+
+# Códigos MARC de idioma → ISO 639-1 (el resto se deja con 3 letras, también válido en R3)
+MARC_LANGUAGES = {
+    "eng": "en", "spa": "es", "fre": "fr", "ger": "de", "ita": "it", "por": "pt",
+    "cat": "ca", "dut": "nl", "rus": "ru", "jpn": "ja", "chi": "zh", "ara": "ar",
+    "pol": "pl", "swe": "sv", "dan": "da", "nor": "no", "fin": "fi", "gre": "el",
+    "tur": "tr", "kor": "ko", "heb": "he", "hin": "hi", "glg": "gl", "baq": "eu",
+}
+
+ISO_DATE = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?")
+YEAR = re.compile(r"(?<!\d)(1[5-9]\d\d|20\d\d)(?!\d)")
+
+# Filtro del proceso de trabajo (lo fija _init_worker)
+_filter: Dict[str, Any] = {}
+
+
+def openlibrary_options() -> Dict[str, Any]:
+    # Configuración por entorno (OPENLIBRARY_*); sin OPENLIBRARY_DUMP la fuente está desactivada
+    def paths(name: str) -> List[str]:
+        return [p.strip() for p in os.getenv(name, "").split(",") if p.strip()]
+
+    return {
+        "dumps": paths("OPENLIBRARY_DUMP"),
+        "works_dumps": paths("OPENLIBRARY_WORKS_DUMP"),
+        "authors_dumps": paths("OPENLIBRARY_AUTHORS_DUMP"),
+        "subjects": [s.strip().lower() for s in os.getenv("OPENLIBRARY_SUBJECTS", "").split(",") if s.strip()],
+        "match_isbns": os.getenv("OPENLIBRARY_MATCH_ISBNS", "true").lower() == "true",
+        "workers": int(os.getenv("OPENLIBRARY_WORKERS", os.cpu_count() or 1)),
+        "chunk_lines": int(os.getenv("OPENLIBRARY_CHUNK_LINES", DEFAULT_CHUNK_LINES)),
+    }
+
+
+def interest_isbns(*frames) -> Set[str]:
+    # ISBN-13 de las fuentes de landing/ (los ISBN-10 se convierten a ISBN-13)
+    isbns: Set[str] = set()
+    for df in frames:
+        if "isbn13" in df.columns:
+            isbns.update(filter(None, (normalize_isbn13(v) for v in df["isbn13"].dropna())))
+        if "isbn10" in df.columns:
+            isbns.update(filter(None, (to_isbn13(v) for v in df["isbn10"].dropna())))
+    return isbns
+
+
+# --------------------------
+# Lectura en streaming
+# --------------------------
+
+def _open_dump(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_chunks(paths: List[str], chunk_lines: int) -> Iterator[List[bytes]]:
+    # Bloques de líneas crudas (sin decodificar) de uno o varios volcados
+    for path in paths:
+        with _open_dump(path) as f:
+            chunk: List[bytes] = []
+            for line in f:
+                chunk.append(line)
+                if len(chunk) >= chunk_lines:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+
+def _split_line(line: bytes) -> Tuple[bytes, bytes]:
+    # (tipo, json) de una línea del volcado; tipo vacío si la línea es solo JSON
+    if line.startswith(b"{"):
+        return b"", line
+    parts = line.split(b"\t", 4)
+    return (parts[0], parts[4]) if len(parts) == 5 else (b"", b"")
+
+
+def _record_type(record_type: bytes, record: Dict[str, Any]) -> str:
+    if record_type:
+        return record_type.decode("ascii", "replace")
+    return (record.get("type") or {}).get("key", "")
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    global _filter
+    _filter = options
+
+
+def _subject_match(subjects: List[str], terms: List[str]) -> bool:
+    lowered = [s.lower() for s in subjects if isinstance(s, str)]
+    return any(term in s for term in terms for s in lowered)
+
+
+def _clean_date(value: Any) -> Optional[str]:
+    # Fechas libres de Open Library ("March 1999", "c1999"...): ISO si ya lo es; si no, el año
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if ISO_DATE.fullmatch(value):
+        return value
+    year = YEAR.search(value)
+    return year.group(1) if year else value
+
+
+def _first_isbn(values: Any, normalize: Callable[[Optional[str]], Optional[str]]) -> Optional[str]:
+    for value in values or []:
+        isbn = normalize(value)
+        if isbn:
+            return isbn
+    return None
+
+
+def _clean_isbn10(value: Optional[str]) -> Optional[str]:
+    isbn = clean_isbn(value)
+    return isbn if isbn and len(isbn) == 10 else None
+
+
+def _edition_row(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Edición → fila (None si no cumple el filtro de interés)
+    isbn13 = _first_isbn(record.get("isbn_13"), normalize_isbn13)
+    isbn10 = _first_isbn(record.get("isbn_10"), _clean_isbn10)
+    if isbn13 is None and isbn10 is not None:
+        isbn13 = to_isbn13(isbn10)
+
+    candidates = {normalize_isbn13(v) for v in record.get("isbn_13") or []}
+    candidates |= {to_isbn13(v) for v in record.get("isbn_10") or []}
+    work_keys = [w.get("key") for w in record.get("works") or [] if isinstance(w, dict)]
+    subjects = record.get("subjects") or []
+    work_subjects = _filter["work_subjects"]
+
+    accepted = bool(candidates & _filter["isbns"])
+    if not accepted and _filter["subjects"]:
+        accepted = _subject_match(subjects, _filter["subjects"]) or any(k in work_subjects for k in work_keys)
+    if not accepted:
+        return None
+
+    if not subjects:
+        subjects = next((work_subjects[k] for k in work_keys if k in work_subjects), [])
+    languages = [l.get("key", "").rsplit("/", 1)[-1] for l in record.get("languages") or [] if isinstance(l, dict)]
+    language = MARC_LANGUAGES.get(languages[0], languages[0]) if languages else None
+    author_keys = [a.get("key") for a in record.get("authors") or [] if isinstance(a, dict) and a.get("key")]
+    by_statement = (record.get("by_statement") or "").strip().rstrip(".") or None
+    pages = record.get("number_of_pages")
+
+    return {
+        "ol_key": record.get("key"),
+        "title": record.get("title"),
+        "subtitle": record.get("subtitle"),
+        "authors": by_statement,
+        "author_keys": author_keys,
+        "publisher": "|".join(p for p in record.get("publishers") or [] if isinstance(p, str)) or None,
+        "pub_date": _clean_date(record.get("publish_date")),
+        "language": language,
+        "categories": "|".join(s.strip() for s in subjects if isinstance(s, str) and s.strip()) or None,
+        "isbn13": isbn13,
+        "isbn10": isbn10,
+        "paginas": pages if isinstance(pages, int) and pages > 0 else None,
+        "formato": record.get("physical_format"),
+    }
+
+
+def _prefilter(payload: bytes) -> bool:
+    # Descarte barato sobre los bytes crudos antes de decodificar el JSON
+    if _filter["subjects"] or _filter["work_subjects"]:
+        return True
+    return b'"isbn_' in payload
+
+
+def parse_editions_chunk(lines: List[bytes]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    rows: List[Dict[str, Any]] = []
+    stats = {"lineas": len(lines), "ediciones": 0, "json_invalidos": 0}
+    for line in lines:
+        record_type, payload = _split_line(line)
+        if record_type and record_type != b"/type/edition":
+            continue
+        if not payload or not _prefilter(payload):
+            continue
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            stats["json_invalidos"] += 1
+            continue
+        if _record_type(record_type, record) != "/type/edition":
+            continue
+        stats["ediciones"] += 1
+        row = _edition_row(record)
+        if row is not None:
+            rows.append(row)
+    return rows, stats
+
+
+def parse_works_chunk(lines: List[bytes]) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+    # Obras cuyas materias contienen algún término de interés: {clave: materias}
+    works: Dict[str, List[str]] = {}
+    stats = {"lineas": len(lines), "json_invalidos": 0}
+    terms = [t.encode("utf-8") for t in _filter["subjects"]]
+    for line in lines:
+        record_type, payload = _split_line(line)
+        if record_type and record_type != b"/type/work":
+            continue
+        if not payload or not any(t in payload.lower() for t in terms):
+            continue
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            stats["json_invalidos"] += 1
+            continue
+        subjects = record.get("subjects") or []
+        if _subject_match(subjects, _filter["subjects"]):
+            works[record.get("key")] = [s for s in subjects if isinstance(s, str)]
+    return works, stats
+
+
+def parse_authors_chunk(lines: List[bytes]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    # Nombres de los autores pedidos: {clave: nombre}
+    names: Dict[str, str] = {}
+    stats = {"lineas": len(lines), "json_invalidos": 0}
+    wanted = _filter["author_keys"]
+    for line in lines:
+        record_type, payload = _split_line(line)
+        if record_type and record_type != b"/type/author":
+            continue
+        parts = line.split(b"\t", 2)
+        if len(parts) == 3 and parts[1].decode("utf-8", "replace") not in wanted:
+            continue
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            stats["json_invalidos"] += 1
+            continue
+        if record.get("key") in wanted and record.get("name"):
+            names[record["key"]] = record["name"]
+    return names, stats
+
+
+def _stream(
+    paths: List[str],
+    parse: Callable[[List[bytes]], Tuple[Any, Dict[str, int]]],
+    worker_filter: Dict[str, Any],
+    options: Dict[str, Any],
+    collect: Callable[[Any], None],
+) -> Dict[str, int]:
+    """
+    Reparte los bloques de `paths` entre procesos con `parse` y entrega cada resultado a
+    `collect` en el orden del fichero. Como mucho 2 × procesos bloques en vuelo.
+    """
+    workers = max(1, options["workers"])
+    totals: Dict[str, int] = {}
+
+    def consume(future) -> None:
+        result, stats = future.result()
+        collect(result)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(worker_filter,)) as pool:
+        pending: Deque = deque()
+        for chunk in iter_chunks(paths, options["chunk_lines"]):
+            pending.append(pool.submit(parse, chunk))
+            if len(pending) >= 2 * workers:
+                consume(pending.popleft())
+        while pending:
+            consume(pending.popleft())
+    return totals
+
+
+def load_openlibrary(options: Dict[str, Any], isbns: Set[str]):
+    """
+    Lee los volcados de Open Library y devuelve (DataFrame con OPENLIBRARY_COLUMNS, estadísticas).
+    `isbns`: ISBN-13 de interés (p.ej. interest_isbns(df_gr, df_gb)).
+    """
+    import pandas as pd
+
+    worker_filter: Dict[str, Any] = {
+        "isbns": frozenset(isbns) if options["match_isbns"] else frozenset(),
+        "subjects": options["subjects"],
+        "work_subjects": {},
+        "author_keys": frozenset(),
+    }
+    stats: Dict[str, Any] = {"volcados": options["dumps"]}
+
+    # 1. Obras con materias de interés (solo si hay términos y volcado de obras)
+    if options["works_dumps"] and options["subjects"]:
+        works: Dict[str, List[str]] = {}
+        stats["obras"] = _stream(options["works_dumps"], parse_works_chunk, worker_filter, options, works.update)
+        stats["obras"]["aceptadas"] = len(works)
+        worker_filter["work_subjects"] = works
+
+    # 2. Ediciones
+    rows: List[Dict[str, Any]] = []
+    stats["ediciones"] = _stream(options["dumps"], parse_editions_chunk, worker_filter, options, rows.extend)
+    stats["ediciones"]["aceptadas"] = len(rows)
+
+    # 3. Nombres de autor (solo las claves de las ediciones aceptadas)
+    if options["authors_dumps"] and rows:
+        worker_filter["author_keys"] = frozenset(k for row in rows for k in row["author_keys"])
+        names: Dict[str, str] = {}
+        stats["autores"] = _stream(options["authors_dumps"], parse_authors_chunk, worker_filter, options, names.update)
+        stats["autores"]["resueltos"] = len(names)
+        for row in rows:
+            resolved = [names[k] for k in row["author_keys"] if k in names]
+            if resolved:
+                row["authors"] = "|".join(resolved)
+
+    source_file = ",".join(os.path.basename(p) for p in options["dumps"])
+    df = pd.DataFrame(rows, columns=[c for c in OPENLIBRARY_COLUMNS if c != "source_file"])
+    df["source_file"] = source_file
+    df["paginas"] = df["paginas"].astype("float64")
+    return df, stats
@@ -0,0 +1,572 @@
+# src/polars_engine.py
+
+# Motor Polars de integrate_pipeline (PIPELINE_ENGINE=polars / `integrate --engine polars`).
+# build_staging, annotate_errors, deduplicate y compute_quality_metrics se expresan como
+# consultas perezosas de Polars (LazyFrame): el optimizador empuja proyecciones y filtros
+# (solo se convierten y calculan las columnas que se usan; el filtro de registros válidos se
+# aplica antes de ordenar y agregar) y el motor ejecuta cada plan en varios hilos.
+#
+# Las salidas son idénticas a las del motor pandas (ver bench_polars_engine.py, que lo
+# comprueba y compara tiempos):
+#   - Entradas: los mismos DataFrames de load_sources / load_openlibrary (mismos lectores).
+#   - Reglas: las mismas, como expresiones (ISBN, normalizaciones, R1-R5, book_id SHA-1).
+#     Las fechas que no son YYYY, YYYY-MM ni YYYY-MM-DD pasan por normalize_date (una vez
+#     por valor distinto), y la resolución de entidades usa la misma resolve_book_ids.
+#   - Salida: tablas pandas con el mismo plan de tipos (schema_plan.py); el resto del
+#     pipeline (CDC, sinks, índice, schema.md) no cambia.
+#
+# Polars es opcional: sin él, integrate_pipeline avisa y usa el motor pandas.
+
+import hashlib
+import os
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from entity_resolution import DEFAULT_MAX_BLOCK_SIZE, DEFAULT_THRESHOLD, resolve_book_ids
+from instrumentation import profiled_stage
+from integrate_pipeline import OPENLIBRARY_EXTRA_COLUMNS, normalize_date
+from schema_plan import BOOK_SOURCE_DETAIL_DTYPE_PLAN, DIM_BOOK_CATEGORIES, DIM_BOOK_DTYPE_PLAN, apply_dtype_plan_with_report
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+# Columnas de entrada por fuente y su tipo en Polars (el resto de columnas no se convierte)
+GOODREADS_INPUT = {
+    "title": "str", "author": "str", "rating": "float", "ratings_count": "int", "book_url": "str",
+    "isbn10": "str", "isbn13": "str", "asin": "str",
+}
+GOOGLEBOOKS_INPUT = {
+    "title": "str", "authors": "str", "publisher": "str", "pub_date": "str", "language": "str",
+    "categories": "str", "isbn10": "str", "isbn13": "str", "asin": "str",
+    "price_amount": "float", "price_currency": "str",
+}
+OPENLIBRARY_INPUT = {
+    "title": "str", "authors": "str", "publisher": "str", "pub_date": "str", "language": "str",
+    "categories": "str", "isbn10": "str", "isbn13": "str", "paginas": "float", "formato": "str",
+    "source_file": "str",
+}
+
+# Orden de columnas de staging (el mismo que produce pd.concat en build_staging)
+STAGING_BASE_COLUMNS = [
+    "titulo", "autor_principal", "rating", "ratings_count", "book_url", "isbn10", "isbn13", "asin",
+    "source_name", "source_file", "row_number", "autores", "editorial", "fecha_publicacion_raw",
+    "idioma_raw", "categorias", "precio", "moneda",
+]
+STAGING_DERIVED_COLUMNS = [
+    "titulo_normalizado", "idioma", "fecha_publicacion", "autores_list", "categorias_list",
+    "anio_publicacion", "longitud_titulo",
+]
+
+# Columnas del ganador por book_id y claves de orden (mismas que deduplicate)
+WINNER_COLUMNS = [
+    "titulo", "titulo_normalizado", "autor_principal", "editorial", "anio_publicacion",
+    "fecha_publicacion", "idioma", "isbn10", "isbn13", "asin", "paginas", "formato",
+    "precio", "moneda", "source_name",
+]
+SORT_KEYS = ["book_id", "has_isbn13", "has_precio", "prioridad_fuente", "longitud_titulo"]
+SORT_DESCENDING = [False, True, True, True, True]
+SOURCE_PRIORITY = {"googlebooks": 4, "openlibrary": 3, "goodreads": 2}
+
+# Columnas que llegan del lector con dtype string y pasan sin transformar a las tablas
+READER_STRING_COLUMNS = ["asin"]
+
+# Validadores de idioma (BCP-47 aproximado) y moneda (ISO-4217) como expresiones regulares:
+# equivalen a idioma_valido / moneda_valida (isalpha → \p{L}, isalnum → \p{L}|\p{N})
+IDIOMA_PATTERN = r"^\p{L}{2,3}(?:-_*(?:[\p{L}\p{N}]_*){1,8})*$"
+MONEDA_PATTERN = r"^\p{L}{3}$"
+
+ERROR_RULES = [
+    "R1_MISSING_KEY_TITULO_AUTOR",
+    "R2_INVALID_DATE",
+    "R3_INVALID_LANGUAGE",
+    "R4_INVALID_CURRENCY",
+    "R5_INVALID_RATING",
+]
+
+
+def _dtype(kind: str):
+    return {"str": pl.String, "float": pl.Float64, "int": pl.Int64}[kind]
+
+
+def source_frame(df: pd.DataFrame, columns: Dict[str, str]) -> "pl.LazyFrame":
+    # DataFrame de origen → LazyFrame con solo `columns` (las que falten, nulas) y la
+    # posición de cada fila (row_number = índice + 1, como en build_staging)
+    present = [c for c in columns if c in df.columns]
+    frame = pl.from_pandas(df[present], nan_to_null=True)
+    return frame.lazy().with_columns(
+        *[pl.col(c).cast(_dtype(columns[c]), strict=False) for c in present],
+        *[pl.lit(None, dtype=_dtype(kind)).alias(c) for c, kind in columns.items() if c not in present],
+        pl.Series("row_number", np.asarray(df.index) + 1, dtype=pl.Int64),
+    )
+
+
+# --------------------------
+# Expresiones de normalización
+# --------------------------
+
+def _null_if_empty(expr: "pl.Expr") -> "pl.Expr":
+    return pl.when(expr.str.len_chars() > 0).then(expr)
+
+
+# clean_isbn: solo 0-9 y X; vacío → nulo
+def clean_isbn_expr(expr: "pl.Expr") -> "pl.Expr":
+    return _null_if_empty(expr.cast(pl.String).str.replace_all(r"[^0-9Xx]", ""))
+
+
+# normalize_isbn13: 13 dígitos exactos
+def normalize_isbn13_expr(expr: "pl.Expr") -> "pl.Expr":
+    isbn = clean_isbn_expr(expr)
+    return pl.when(isbn.str.contains(r"^[0-9]{13}$")).then(isbn)
+
+
+# to_isbn13: prefijo 978 + los 9 primeros dígitos del ISBN-10 + dígito de control
+def to_isbn13_expr(expr: "pl.Expr") -> "pl.Expr":
+    isbn10 = clean_isbn_expr(expr)
+    core = pl.lit("978") + isbn10.str.slice(0, 9)
+    total = pl.sum_horizontal(
+        [core.str.slice(i, 1).cast(pl.Int32, strict=False) * (1 if i % 2 == 0 else 3) for i in range(12)]
+    )
+    check = (10 - total % 10) % 10
+    return pl.when(isbn10.str.contains(r"^[0-9]{9}.$")).then(core + check.cast(pl.String))
+
+
+def _strip_to_null(expr: "pl.Expr") -> "pl.Expr":
+    return _null_if_empty(expr.cast(pl.String).str.strip_chars())
+
+
+def _split_pipe_list(expr: "pl.Expr") -> "pl.Expr":
+    # "A1| A2|" → ["A1", "A2"]
+    return expr.str.split("|").list.eval(
+        pl.element().str.strip_chars().filter(pl.element().str.len_chars() > 0)
+    )
+
+
+def _fill_unparsed_dates(batch: "pl.Series") -> "pl.Series":
+    # Fechas que la ruta rápida no reconoce: normalize_date una vez por valor distinto
+    raw = batch.struct.field("raw")
+    fast = batch.struct.field("fast")
+    pending = fast.is_null() & raw.is_not_null()
+    if not pending.any():
+        return fast
+    mapping = {value: normalize_date(value) for value in raw.filter(pending).unique().to_list()}
+    return pl.select(
+        pl.when(pending).then(raw.replace_strict(mapping, default=None, return_dtype=pl.String)).otherwise(fast)
+    ).to_series()
+
+
+def normalize_date_expr(expr: "pl.Expr") -> "pl.Expr":
+    # normalize_date vectorizada: YYYY / YYYY-MM / YYYY-MM-DD (en el rango de fechas de
+    # pandas) con to_date; cualquier otro formato, con normalize_date
+    text = expr.cast(pl.String).str.strip_chars()
+    iso = (
+        pl.when(text.str.contains(r"^[0-9]{4}$")).then(text + "-01-01")
+        .when(text.str.contains(r"^[0-9]{4}-[0-9]{2}$")).then(text + "-01")
+        .when(text.str.contains(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")).then(text)
+    )
+    year = text.str.slice(0, 4).cast(pl.Int32, strict=False)
+    fast = pl.when(year.is_between(1678, 2261)).then(
+        iso.str.to_date("%Y-%m-%d", strict=False).dt.to_string("%Y-%m-%d")
+    )
+    return pl.struct(raw=expr.cast(pl.String), fast=fast).map_batches(_fill_unparsed_dates, return_dtype=pl.String)
+
+
+def idioma_valido_expr(expr: "pl.Expr") -> "pl.Expr":
+    return expr.cast(pl.String).str.strip_chars().str.contains(IDIOMA_PATTERN).fill_null(False)
+
+
+def moneda_valida_expr(expr: "pl.Expr") -> "pl.Expr":
+    text = expr.cast(pl.String).str.strip_chars()
+    return (text.str.contains(MONEDA_PATTERN) & (text.str.to_uppercase() == text)).fill_null(False)
+
+
+# --------------------------
+# Construcción staging
+# --------------------------
+
+def build_staging(df_gr: pd.DataFrame, df_gb: pd.DataFrame, df_ol: Optional[pd.DataFrame] = None) -> "pl.LazyFrame":
+    # Mismas reglas que integrate_pipeline.build_staging, como plan perezoso (collect() lo ejecuta)
+    gr_file = os.path.basename(df_gr.attrs.get("landing_path", "goodreads_books.json"))
+    gb_file = os.path.basename(df_gb.attrs.get("landing_path", "googlebooks_books.csv"))
+
+    gr = source_frame(df_gr, GOODREADS_INPUT).select(
+        pl.col("title").alias("titulo"),
+        pl.col("author").alias("autor_principal"),
+        "rating",
+        "ratings_count",
+        "book_url",
+        clean_isbn_expr(pl.col("isbn10")).alias("isbn10"),
+        normalize_isbn13_expr(pl.col("isbn13")).alias("isbn13"),
+        "asin",
+        pl.lit("goodreads").alias("source_name"),
+        pl.lit(gr_file).alias("source_file"),
+        "row_number",
+    )
+
+    # Google Books: isbn13 derivado del isbn10 si falta
+    isbn10 = clean_isbn_expr(pl.col("isbn10"))
+    isbn13 = normalize_isbn13_expr(pl.col("isbn13"))
+    gb = source_frame(df_gb, GOOGLEBOOKS_INPUT).select(
+        pl.col("title").alias("titulo"),
+        pl.col("authors").alias("autores"),
+        pl.col("publisher").alias("editorial"),
+        pl.col("pub_date").alias("fecha_publicacion_raw"),
+        pl.col("language").alias("idioma_raw"),
+        pl.col("categories").alias("categorias"),
+        isbn10.alias("isbn10"),
+        pl.when(isbn13.is_null() & isbn10.is_not_null()).then(to_isbn13_expr(pl.col("isbn10"))).otherwise(isbn13).alias("isbn13"),
+        "asin",
+        pl.col("price_amount").alias("precio"),
+        pl.col("price_currency").alias("moneda"),
+        pl.lit("googlebooks").alias("source_name"),
+        pl.lit(gb_file).alias("source_file"),
+        "row_number",
+    )
+
+    frames = [gr, gb]
+    columns = list(STAGING_BASE_COLUMNS)
+    if df_ol is not None and len(df_ol):
+        frames.append(
+            source_frame(df_ol, OPENLIBRARY_INPUT).select(
+                pl.col("title").alias("titulo"),
+                pl.col("authors").alias("autores"),
+                pl.col("publisher").alias("editorial"),
+                pl.col("pub_date").alias("fecha_publicacion_raw"),
+                pl.col("language").alias("idioma_raw"),
+                pl.col("categories").alias("categorias"),
+                clean_isbn_expr(pl.col("isbn10")).alias("isbn10"),
+                normalize_isbn13_expr(pl.col("isbn13")).alias("isbn13"),
+                "paginas",
+                "formato",
+                pl.lit("openlibrary").alias("source_name"),
+                "source_file",
+                "row_number",
+            )
+        )
+        columns += OPENLIBRARY_EXTRA_COLUMNS
+
+    staging = pl.concat(frames, how="diagonal_relaxed")
+
+    # Normalización
+    titulo = pl.col("titulo")
+    staging = staging.with_columns(
+        titulo.str.strip_chars().str.to_lowercase().str.replace_all(r"\s+", " ").alias("titulo_normalizado"),
+        _strip_to_null(pl.col("idioma_raw")).str.to_lowercase().alias("idioma"),
+        normalize_date_expr(pl.col("fecha_publicacion_raw")).alias("fecha_publicacion"),
+        _strip_to_null(pl.col("moneda")).str.to_uppercase().alias("moneda"),
+        pl.col("autores").fill_null(""),
+        pl.col("categorias").fill_null(""),
+    ).with_columns(
+        _split_pipe_list(pl.col("autores")).alias("autores_list"),
+        _split_pipe_list(pl.col("categorias")).alias("categorias_list"),
+    ).with_columns(
+        pl.col("autor_principal").fill_null(pl.col("autores_list").list.first()),
+        pl.col("fecha_publicacion").str.slice(0, 4).cast(pl.Int16).alias("anio_publicacion"),
+        titulo.fill_null("").str.len_chars().cast(pl.Int64).alias("longitud_titulo"),
+    )
+    return staging.select(columns + STAGING_DERIVED_COLUMNS)
+
+
+def _arrow_type(t: pa.DataType) -> pa.DataType:
+    # Polars exporta large_string / large_list; el motor pandas escribe string / list
+    if pa.types.is_large_string(t):
+        return pa.string()
+    if pa.types.is_large_list(t) or pa.types.is_list(t):
+        return pa.list_(_arrow_type(t.value_type))
+    return t
+
+
+def to_pandas(df: "pl.DataFrame", plan: Dict[str, str], arrow_native: bool = False) -> pd.DataFrame:
+    # Tabla Polars → pandas con el plan de tipos de schema_plan.py (mismos dtypes que el
+    # motor pandas en cada modo)
+    if arrow_native:
+        table = df.to_arrow(compat_level=pl.CompatLevel.oldest())
+        table = table.cast(pa.schema([pa.field(f.name, _arrow_type(f.type)) for f in table.schema]))
+        pdf = table.to_pandas(types_mapper=pd.ArrowDtype)
+    else:
+        pdf = df.to_pandas()
+        # load_sources lee el ASIN con dtype string y el motor pandas lo conserva tal cual
+        for col in READER_STRING_COLUMNS:
+            if col in pdf.columns:
+                pdf[col] = pdf[col].astype("string")
+    return apply_dtype_plan_with_report(pdf, plan, arrow_native)
+
+
+# --------------------------
+# Anotar errores (soft fail)
+# --------------------------
+
+def _blank(expr: "pl.Expr") -> "pl.Expr":
+    return expr.is_null() | (expr.cast(pl.String).str.strip_chars() == "")
+
+
+def annotate_errors(staging: "pl.LazyFrame") -> "pl.LazyFrame":
+    # Reglas R1-R5 de integrate_pipeline.annotate_errors → error_codes (lista) y has_error
+    rating = pl.col("rating")
+    rules = [
+        _blank(pl.col("titulo")) | _blank(pl.col("autor_principal")),
+        ~_blank(pl.col("fecha_publicacion_raw")) & pl.col("fecha_publicacion").is_null(),
+        pl.col("idioma").is_not_null() & ~idioma_valido_expr(pl.col("idioma")),
+        pl.col("moneda").is_not_null() & ~moneda_valida_expr(pl.col("moneda")),
+        rating.is_not_null() & ~rating.is_between(0, 5),
+    ]
+    codes = pl.concat_list([pl.when(rule).then(pl.lit(code)) for rule, code in zip(rules, ERROR_RULES)]).list.drop_nulls()
+    return staging.with_columns(codes.alias("error_codes")).with_columns(
+        (pl.col("error_codes").list.len() > 0).alias("has_error")
+    )
+
+
+# --------------------------
+# Deduplicación & dim_book
+# --------------------------
+
+def _hash_missing_ids(batch: "pl.Series") -> "pl.Series":
+    # book_id de las filas sin isbn13: SHA-1 de su clave (solo se hashean esas filas)
+    isbn = batch.struct.field("isbn")
+    key = batch.struct.field("key")
+    missing = isbn.is_null()
+    if not missing.any():
+        return isbn
+    hashes = [hashlib.sha1(k.encode("utf-8")).hexdigest() for k in key.filter(missing).to_list()]
+    return isbn.scatter(missing.arg_true(), hashes)
+
+
+def book_id_expr() -> "pl.Expr":
+    # generate_book_id_from_row: isbn13 o SHA-1 de titulo|autor|editorial|año ("2017.0")
+    def text(col: str) -> "pl.Expr":
+        return pl.col(col).cast(pl.String).str.strip_chars().str.to_lowercase().fill_null("")
+
+    key = pl.concat_str(
+        [
+            text("titulo_normalizado"),
+            text("autor_normalizado"),
+            text("editorial_normalizada"),
+            pl.col("anio_publicacion").cast(pl.Float64).cast(pl.String).fill_null(""),
+        ],
+        separator="|",
+    )
+    return pl.struct(isbn=normalize_isbn13_expr(pl.col("isbn13")), key=key).map_batches(_hash_missing_ids, return_dtype=pl.String)
+
+
+def deduplicate(
+    staging: "pl.DataFrame",
+    entity_resolution: bool = False,
+    er_threshold: float = DEFAULT_THRESHOLD,
+    er_max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+    arrow_native: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    integrate_pipeline.deduplicate sobre el staging de build_staging (ya ejecutado).
+    Devuelve (dim_book, book_source_detail) como DataFrames pandas con su plan de tipos.
+    """
+    normalized = {
+        "autor_normalizado": "autor_principal",
+        "editorial_normalizada": "editorial",
+    }
+    staged = staging.lazy().with_columns(
+        *[pl.col(base).cast(pl.String).fill_null("").str.strip_chars().str.to_lowercase().alias(col) for col, base in normalized.items()]
+    ).with_columns(book_id_expr().alias("book_id")).with_columns(
+        pl.col("book_id").alias("book_id_candidato")
+    ).collect()
+
+    # Resolución de entidades: la misma implementación que el motor pandas
+    er_stats: Dict[str, Any] = {}
+    if entity_resolution and len(staged):
+        with profiled_stage("resolve_book_ids", rows_in=len(staged)) as stage:
+            columns = ["book_id", "titulo_normalizado", "autor_normalizado", "anio_publicacion"]
+            resolved, er_stats = resolve_book_ids(staged.select(columns).to_pandas(), er_threshold, er_max_block_size)
+            staged = staged.with_columns(pl.Series("book_id", resolved.to_numpy(), dtype=pl.String))
+            stage["filas_salida"] = len(staged)
+
+    lf = staged.lazy().with_columns(
+        pl.col("isbn13").is_not_null().alias("has_isbn13"),
+        pl.col("precio").is_not_null().alias("has_precio"),
+        pl.col("source_name").replace_strict(SOURCE_PRIORITY, default=1, return_dtype=pl.Int8).alias("prioridad_fuente"),
+    )
+    lf = annotate_errors(lf)
+
+    # Ganador por book_id (solo válidos): primer valor no nulo de cada columna en el orden
+    # de supervivencia (como groupby().first()) y unión ordenada de autores/categorías
+    winners = (
+        lf.filter(~pl.col("has_error"))
+        .sort(SORT_KEYS, descending=SORT_DESCENDING, maintain_order=True)
+        .group_by("book_id", maintain_order=True)
+        .agg(
+            *[pl.col(c).drop_nulls().first() for c in WINNER_COLUMNS if c in staged.columns],
+            pl.col("autores_list").explode().drop_nulls().unique().sort().alias("autores"),
+            pl.col("categorias_list").explode().drop_nulls().unique().sort().alias("categorias"),
+        )
+    )
+    run_ts = datetime.now(UTC).isoformat()
+    dim_book = winners.select(
+        "book_id",
+        "titulo",
+        "titulo_normalizado",
+        "autor_principal",
+        "autores",
+        "editorial",
+        "anio_publicacion",
+        "fecha_publicacion",
+        "idioma",
+        "isbn10",
+        "isbn13",
+        "asin",
+        pl.col("paginas") if "paginas" in staged.columns else pl.lit(None, dtype=pl.Float64).alias("paginas"),
+        pl.col("formato") if "formato" in staged.columns else pl.lit(None).alias("formato"),
+        "categorias",
+        "precio",
+        "moneda",
+        pl.col("source_name").alias("fuente_ganadora"),
+        pl.lit(run_ts).alias("ts_ultima_act"),
+    )
+
+    # book_source_detail: todos los registros en el mismo orden, con source_id y row_number por fuente
+    detail_columns = [c for c in staged.columns if c != "book_id_candidato"] + [
+        "has_isbn13", "has_precio", "prioridad_fuente", "error_codes", "has_error",
+    ]
+    book_source_detail = (
+        lf.sort(SORT_KEYS, descending=SORT_DESCENDING, maintain_order=True)
+        .with_columns(
+            pl.int_range(1, pl.len() + 1, dtype=pl.Int64).alias("source_id"),
+            (pl.int_range(pl.len(), dtype=pl.Int64).over("source_name") + 1).alias("row_number"),
+        )
+        .select(detail_columns + ["source_id", "book_id_candidato", pl.lit(datetime.now(UTC).isoformat()).alias("ts_ingesta")])
+    )
+
+    # Un solo collect para las dos tablas (el plan común se ejecuta una vez); annotate_errors,
+    # el orden y la agregación se ejecutan aquí
+    with profiled_stage("collect", rows_in=len(staged)) as stage:
+        dim_book, book_source_detail = pl.collect_all([dim_book, book_source_detail])
+        stage["filas_salida"] = len(dim_book)
+
+    dim_book = to_pandas(dim_book, DIM_BOOK_DTYPE_PLAN, arrow_native)
+    book_source_detail = to_pandas(book_source_detail, BOOK_SOURCE_DETAIL_DTYPE_PLAN, arrow_native)
+    if "paginas" not in staged.columns:
+        # Sin Open Library el motor pandas deja paginas como float64 NaN (también en modo Arrow)
+        dim_book["paginas"] = np.nan
+    for col, source in DIM_BOOK_CATEGORIES.items():
+        dim_book[col] = dim_book[col].cat.set_categories(book_source_detail[source].cat.categories)
+    if er_stats:
+        book_source_detail.attrs["resolucion_entidades"] = er_stats
+    return dim_book, book_source_detail
+
+
+# --------------------------
+# Métricas de calidad
+# --------------------------
+
+def compute_quality_metrics(
+    dim_book: pd.DataFrame,
+    book_source_detail: pd.DataFrame,
+    profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    integrate_pipeline.compute_quality_metrics con una consulta Polars: duplicados, conteos
+    por fuente, validaciones y logs por archivo/regla salen de un único collect_all. Los
+    perfiles (nulos por columna) e informes de memoria son los mismos que en el motor pandas.
+    """
+    from integrate_pipeline import _public_profile, compute_profiles
+    from schema_plan import memory_report_of
+
+    if profiles is None:
+        profiles = compute_profiles(dim_book, book_source_detail)
+    nulos = profiles["book_source_detail"]["nulos_por_campo"]
+    n_rows = len(book_source_detail)
+
+    columns = [
+        "isbn13", "titulo_normalizado", "autor_principal", "editorial", "titulo", "source_name", "source_file",
+        "idioma", "moneda", "fecha_publicacion", "rating", "has_error", "error_codes",
+    ]
+    present = [c for c in columns if c in book_source_detail.columns]
+    detail = pl.from_pandas(book_source_detail[present], nan_to_null=True).lazy().with_columns(
+        *[pl.lit(None, dtype=pl.String).alias(c) for c in ["titulo_normalizado", "autor_principal", "editorial", "titulo"] if c not in present],
+        *[pl.col(c).cast(pl.String) for c in ["source_name", "source_file", "idioma", "moneda"] if c in present],
+    )
+
+    def pct(expr: "pl.Expr") -> "pl.Expr":
+        return expr.cast(pl.Float64).mean()
+
+    aggregates = {
+        "duplicados_por_isbn13": (pl.len().over("isbn13") > 1).sum(),
+        "duplicados_por_titulo_autor_editorial": (
+            pl.len().over(["titulo_normalizado", "autor_principal", "editorial"]) > 1
+        ).sum(),
+        "porcentaje_clave_titulo_autor_presente": pct(pl.col("titulo").is_not_null() & pl.col("autor_principal").is_not_null()),
+    }
+    if "idioma" in present:
+        aggregates["porcentaje_idiomas_validos"] = pct(idioma_valido_expr(pl.col("idioma")))
+    if "moneda" in present:
+        aggregates["porcentaje_monedas_validas"] = pct(moneda_valida_expr(pl.col("moneda")))
+    if "fecha_publicacion" in present:
+        aggregates["porcentaje_fechas_validas"] = pct(pl.col("fecha_publicacion").is_not_null())
+    if "rating" in present:
+        aggregates["porcentaje_ratings_validos"] = pct(pl.col("rating").is_null() | pl.col("rating").is_between(0, 5))
+    if "has_error" in present:
+        aggregates["porcentaje_registros_invalidos"] = pct(pl.col("has_error"))
+
+    queries = [detail.select(**aggregates)]
+    if "source_name" in present:
+        queries.append(
+            detail.group_by("source_name", maintain_order=True).len()
+            .sort("len", descending=True, maintain_order=True)
+        )
+    if "error_codes" in present and "source_file" in present and n_rows:
+        queries.append(
+            detail.select(pl.col("source_file").fill_null("UNKNOWN"), "error_codes")
+            .explode("error_codes")
+            .drop_nulls("error_codes")
+            .group_by(["source_file", "error_codes"], maintain_order=True)
+            .len()
+        )
+    results = pl.collect_all(queries)
+    row = results[0].row(0, named=True)
+
+    def value(name: str) -> float:
+        # Media sobre 0 filas: NaN (como el motor pandas)
+        return float(row[name]) if n_rows and row[name] is not None else float("nan")
+
+    metrics: Dict[str, Any] = {"dim_book": _public_profile(profiles["dim_book"])}
+    metrics["book_source_detail"] = {
+        **_public_profile(profiles["book_source_detail"]),
+        "duplicados_por_isbn13": int(row["duplicados_por_isbn13"] or 0),
+        "duplicados_por_titulo_autor_editorial": int(row["duplicados_por_titulo_autor_editorial"] or 0),
+        "filas_por_fuente": dict(results[1].iter_rows()) if "source_name" in present else {},
+    }
+
+    if "memoria" in dim_book.attrs:
+        metrics["dim_book"]["memoria_bytes"] = memory_report_of(dim_book)
+    if "memoria" in book_source_detail.attrs:
+        metrics["book_source_detail"]["memoria_bytes"] = memory_report_of(book_source_detail)
+    if "resolucion_entidades" in book_source_detail.attrs:
+        metrics["book_source_detail"]["resolucion_entidades"] = book_source_detail.attrs["resolucion_entidades"]
+
+    validaciones: Dict[str, Any] = {
+        "porcentaje_idiomas_validos": value("porcentaje_idiomas_validos") if "idioma" in present else 0.0,
+        "porcentaje_monedas_validas": value("porcentaje_monedas_validas") if "moneda" in present else 0.0,
+        "porcentaje_fechas_validas": value("porcentaje_fechas_validas") if "fecha_publicacion" in present else 0.0,
+        "porcentaje_clave_titulo_autor_presente": value("porcentaje_clave_titulo_autor_presente"),
+    }
+    validaciones["porcentaje_filas_validas"] = validaciones["porcentaje_clave_titulo_autor_presente"]
+    if "rating" in present:
+        validaciones["porcentaje_ratings_validos"] = value("porcentaje_ratings_validos")
+    for col in ["titulo", "isbn13", "precio"]:
+        if col in nulos:
+            validaciones[f"porcentaje_nulos_{col}"] = nulos[col]
+    if "has_error" in present:
+        validaciones["porcentaje_registros_invalidos"] = value("porcentaje_registros_invalidos")
+    metrics["validaciones"] = validaciones
+
+    logs_por_archivo: Dict[str, Dict[str, int]] = {}
+    logs_por_regla: Dict[str, int] = {}
+    if len(results) > 2:
+        for src, code, n in results[2].iter_rows():
+            logs_por_archivo.setdefault(src, {})[code] = int(n)
+            logs_por_regla[code] = logs_por_regla.get(code, 0) + int(n)
+    metrics["logs"] = {"por_archivo": logs_por_archivo, "por_regla": logs_por_regla}
+    return metrics
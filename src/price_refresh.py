@@ -0,0 +1,572 @@
+# src/price_refresh.py
+
+# Refresco ligero de precios de Google Books, sin repetir el enriquecimiento ni la integración.
+#
+# Los precios (saleInfo) cambian mucho más a menudo que los datos bibliográficos, y
+# enrich_googlebooks.py repite una búsqueda por libro. Aquí:
+#   1. Se leen los gb_id guardados en el landing de Google Books (sin repetir).
+#   2. Se pide solo saleInfo de cada volumen por id (GET volumes/<id>?fields=saleInfo(...)),
+#      en GOOGLE_BOOKS_PRICE_WORKERS hilos al ritmo adaptativo del host (rate_control.py).
+#      Las peticiones son condicionales: el ETag de la respuesta anterior va en
+#      If-None-Match y un 304 reutiliza el precio guardado en GOOGLE_BOOKS_PRICE_CACHE.
+#   3. Los precios que cambian se escriben en el landing (price_amount / price_currency), de
+#      modo que la siguiente integración completa los conserva.
+#   4. Se parchean las tablas publicadas:
+#      - book_source_detail: precio, moneda, has_precio y la regla R4 (moneda inválida) de
+#        las filas de Google Books. El detalle no guarda el gb_id: cada fila se empareja con
+#        su registro del landing por título, autores, ISBN-13, ISBN-10 y ASIN (si varios
+#        registros con la misma clave traen precios distintos, la fila no se toca y se avisa).
+#      - dim_book: solo se reconstruyen los libros con alguna fila cambiada, con las reglas
+#        de supervivencia de deduplicate (el precio decide el ganador: has_precio).
+#      - staging/books_staging.parquet, el delta CDC, los rollups (incrementales) y las
+#        métricas de quality_metrics.json (más la sección "refresco_precios").
+#
+# Uso:
+#     python src/price_refresh.py [--workers 8] [--dry-run]
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import requests
+from dotenv import load_dotenv
+
+from change_capture import apply_change_capture, change_capture_options, delta_path, write_delta
+from enrich_googlebooks import GOOGLE_BOOKS_API_URL, extract_price
+from integrate_pipeline import (
+    SURVIVOR_SORT_ASCENDING,
+    SURVIVOR_SORT_COLUMNS,
+    compute_profiles,
+    compute_quality_metrics,
+    moneda_valida,
+    normalize_currency,
+)
+from landing_format import find_landing_file, landing_format_options, read_landing_records, write_landing_records
+from lookup_index import LOOKUP_INDEX_PATH, build_lookup_index
+from rate_control import format_rate_metrics, rate_limited_get, rate_metrics, save_rate_state
+from rollups import (
+    STATE_TABLE,
+    book_contributions,
+    format_rollup_stats,
+    read_previous_rollups,
+    refresh_rollups,
+    rollup_options,
+    rollup_path,
+)
+from schema_plan import (
+    BOOK_SOURCE_DETAIL_DTYPE_PLAN,
+    DIM_BOOK_CATEGORIES,
+    DIM_BOOK_DTYPE_PLAN,
+    STAGING_DTYPE_PLAN,
+    apply_dtype_plan,
+)
+from sinks import create_executor, sink_options, submit_table, submit_task, wait_for
+from utils_isbn import clean_isbn, normalize_isbn13, to_isbn13
+from utils_parquet import read_parquet_filtered, standard_parquet_options, write_parquet
+
+PRICE_CACHE_PATH = os.path.join(".cache", "gb_prices.json")
+SALE_INFO_FIELDS = "saleInfo(saleability,listPrice,retailPrice)"
+
+DIM_BOOK_PATH = "standard/dim_book.parquet"
+BOOK_SOURCE_DETAIL_PATH = "standard/book_source_detail.parquet"
+STAGING_PATH = "staging/books_staging.parquet"
+METRICS_PATH = "docs/quality_metrics.json"
+
+SOURCE_NAME = "googlebooks"
+INVALID_CURRENCY = "R4_INVALID_CURRENCY"
+
+# Campos que emparejan una fila de book_source_detail con su registro del landing. Incluyen
+# los campos en bruto (editorial, fecha, idioma, categorías): dos registros repetidos que solo
+# difieren en ellos no se pueden emparejar por orden, porque deduplicate los reordena por precio
+MATCH_COLUMNS = ["titulo", "autores", "isbn13", "isbn10", "asin", "editorial", "fecha_publicacion_raw", "idioma_raw", "categorias"]
+# Campo del landing de Google Books de cada uno de los anteriores
+LANDING_MATCH_FIELDS = ["title", "authors", "isbn13", "isbn10", "asin", "publisher", "pub_date", "language", "categories"]
+
+
+def price_refresh_options() -> Dict[str, Any]:
+    # Configuración por entorno (GOOGLE_BOOKS_PRICE_*)
+    return {
+        "workers": int(os.getenv("GOOGLE_BOOKS_PRICE_WORKERS", "8")),
+        "cache_path": os.getenv("GOOGLE_BOOKS_PRICE_CACHE", PRICE_CACHE_PATH),
+        "arrow_native": os.getenv("PIPELINE_ARROW_NATIVE", "false").lower() == "true",
+    }
+
+
+# ------------------------------------------------------------
+# CACHÉ DE ETAGS
+# ------------------------------------------------------------
+
+def load_price_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    # gb_id → {etag, precio, moneda, ts} de la última respuesta 200 ({} si no hay fichero)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[AVISO] No se pudo leer la caché de precios ({path}): {e}")
+        return {}
+
+
+def save_price_cache(cache: Dict[str, Dict[str, Any]], path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------------------------------------------------------
+# DESCARGA DE saleInfo
+# ------------------------------------------------------------
+
+def fetch_sale_info(gb_id: str, cached: Optional[Dict[str, Any]], api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    saleInfo de un volumen. Devuelve {estado, precio, moneda, etag}, con estado:
+      - "sin_cambios": 304 (el precio es el de la caché)
+      - "descargado":  200
+      - "no_encontrado" / "error": se conserva el precio actual
+    """
+    params = {"fields": SALE_INFO_FIELDS}
+    if api_key:
+        params["key"] = api_key
+    headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+
+    try:
+        resp = rate_limited_get(f"{GOOGLE_BOOKS_API_URL}/{gb_id}", params=params, headers=headers, timeout=15)
+    except requests.exceptions.RequestException as e:
+        print(f"[ERROR RED] Fallo de red pidiendo el volumen {gb_id}: {e}")
+        return {"estado": "error"}
+
+    if resp.status_code == 304 and cached:
+        return {"estado": "sin_cambios", "precio": cached.get("precio"), "moneda": cached.get("moneda"), "etag": cached["etag"]}
+    if resp.status_code == 404:
+        return {"estado": "no_encontrado"}
+    if resp.status_code != 200:
+        print(f"[ERROR HTTP] Google Books devolvió {resp.status_code} para {gb_id}: {resp.text[:200]}...")
+        return {"estado": "error"}
+
+    data = resp.json()
+    precio, moneda = extract_price(data.get("saleInfo", {}) or {})
+    return {"estado": "descargado", "precio": precio, "moneda": moneda, "etag": resp.headers.get("ETag") or data.get("etag")}
+
+
+def fetch_prices(
+    gb_ids: List[str],
+    cache: Dict[str, Dict[str, Any]],
+    workers: int,
+    api_key: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    # Un resultado por gb_id; actualiza `cache` con las respuestas 200 y 304
+    def fetch(gb_id: str) -> Dict[str, Any]:
+        return fetch_sale_info(gb_id, cache.get(gb_id), api_key)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prices") as executor:
+        results = dict(zip(gb_ids, executor.map(fetch, gb_ids)))
+
+    ts = datetime.now(UTC).isoformat()
+    for gb_id, result in results.items():
+        if result["estado"] in ("descargado", "sin_cambios"):
+            cache[gb_id] = {"etag": result.get("etag"), "precio": result.get("precio"), "moneda": result.get("moneda"), "ts": ts}
+    return results
+
+
+# ------------------------------------------------------------
+# LANDING
+# ------------------------------------------------------------
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA
+
+
+def _same(a: Any, b: Any) -> bool:
+    return (_missing(a) and _missing(b)) or (not _missing(a) and not _missing(b) and a == b)
+
+
+def patch_landing(records: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> List[int]:
+    # Escribe en los registros los precios descargados; devuelve las posiciones que cambian
+    changed: List[int] = []
+    for i, record in enumerate(records):
+        result = results.get(record.get("gb_id"))
+        if not result or result["estado"] not in ("descargado", "sin_cambios"):
+            continue
+        precio = None if _missing(result.get("precio")) else float(result["precio"])
+        # Moneda vacía = sin moneda (el CSV del landing no distingue "" de nulo)
+        moneda = _text(result.get("moneda")) or None
+        if not (_same(record.get("price_amount"), precio) and _same(record.get("price_currency"), moneda)):
+            record["price_amount"] = precio
+            record["price_currency"] = moneda
+            changed.append(i)
+    return changed
+
+
+# ------------------------------------------------------------
+# PARCHE DE LAS TABLAS PUBLICADAS
+# ------------------------------------------------------------
+
+def _text(value: Any) -> str:
+    return "" if _missing(value) else str(value).strip()
+
+
+def landing_match_key(record: Dict[str, Any]) -> Tuple[str, ...]:
+    # Los mismos valores que build_staging deja en MATCH_COLUMNS (ISBN limpios, el resto en bruto)
+    isbn10 = clean_isbn(record.get("isbn10"))
+    isbn13 = normalize_isbn13(record.get("isbn13")) or to_isbn13(isbn10)
+    values = {**record, "isbn10": isbn10, "isbn13": isbn13}
+    return tuple(_text(values.get(field)) for field in LANDING_MATCH_FIELDS)
+
+
+def _landing_prices(records: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+    # Clave → filas del landing (en orden) y precios (normalizados como en staging) de sus registros
+    by_key: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for i, record in enumerate(records):
+        entry = by_key.setdefault(landing_match_key(record), {"filas": [], "precios": set()})
+        entry["filas"].append(i)
+        precio = None if _missing(record.get("price_amount")) else float(record["price_amount"])
+        entry["precios"].add((precio, normalize_currency(record.get("price_currency"))))
+    return by_key
+
+
+def patch_book_source_detail(
+    detail: pd.DataFrame,
+    records: List[Dict[str, Any]],
+) -> Tuple[pd.DataFrame, np.ndarray, Dict[str, Any]]:
+    """
+    Precios del landing en las filas de Google Books de book_source_detail. Devuelve el
+    detalle en orden de supervivencia, los book_id con alguna fila cambiada y contadores.
+    """
+    by_key = _landing_prices(records)
+    is_gb = (detail["source_name"].astype(object) == SOURCE_NAME).to_numpy()
+    positions = np.flatnonzero(is_gb)
+    keys = zip(*(detail[col].astype(object).to_numpy()[positions] for col in MATCH_COLUMNS))
+
+    precio = pd.to_numeric(detail["precio"], errors="coerce").astype(float).to_numpy(copy=True)
+    moneda = np.array([None if _missing(v) else v for v in detail["moneda"].astype(object)], dtype=object)
+    error_codes = [list(codes) if not _missing(codes) else [] for codes in detail["error_codes"]]
+    # Desempate de las filas de Google Books: su orden en el landing (= orden en staging);
+    # el resto conserva su orden actual. Las filas con la misma clave ya están en orden del
+    # landing entre sí: la k-ésima toma la k-ésima fila del landing con esa clave
+    orden = detail["source_id"].astype("int64").to_numpy(copy=True)
+    changed = np.zeros(len(detail), dtype=bool)
+    seen: Dict[Tuple[str, ...], int] = {}
+    stats = {"filas_google_books": int(len(positions)), "sin_correspondencia": 0, "ambiguas": 0, "filas_cambiadas": 0}
+
+    for pos, key in zip(positions, keys):
+        key = tuple(_text(v) for v in key)
+        entry = by_key.get(key)
+        if entry is None:
+            stats["sin_correspondencia"] += 1
+            continue
+        k = seen.get(key, 0)
+        seen[key] = k + 1
+        orden[pos] = entry["filas"][min(k, len(entry["filas"]) - 1)] + 1
+        if len(entry["precios"]) > 1:
+            stats["ambiguas"] += 1
+            continue
+        new_precio, new_moneda = next(iter(entry["precios"]))
+        if _same(precio[pos], new_precio) and _same(moneda[pos], new_moneda):
+            continue
+        precio[pos] = np.nan if new_precio is None else new_precio
+        moneda[pos] = new_moneda
+        # R4 se recalcula con la moneda nueva (los códigos quedan en orden de regla)
+        codes = [c for c in error_codes[pos] if c != INVALID_CURRENCY]
+        if new_moneda is not None and not moneda_valida(new_moneda):
+            codes.append(INVALID_CURRENCY)
+        error_codes[pos] = sorted(codes)
+        changed[pos] = True
+
+    stats["filas_cambiadas"] = int(changed.sum())
+    changed_ids = detail["book_id"].astype(object).to_numpy()[changed]
+    if not changed.any():
+        return detail, changed_ids, stats
+
+    detail = detail.copy()
+    detail["precio"] = precio
+    detail["moneda"] = moneda
+    detail["has_precio"] = ~np.isnan(precio)
+    detail["error_codes"] = error_codes
+    detail["has_error"] = np.array([len(codes) > 0 for codes in error_codes])
+
+    # Mismo orden que deduplicate (has_precio puede cambiar el ganador) y mismos source_id / row_number
+    detail["_orden"] = orden
+    detail = detail.sort_values(
+        by=SURVIVOR_SORT_COLUMNS + ["_orden"], ascending=SURVIVOR_SORT_ASCENDING + [True], kind="stable",
+    ).drop(columns="_orden").reset_index(drop=True)
+    detail["source_id"] = detail.index + 1
+    detail["row_number"] = detail.groupby("source_name", observed=True).cumcount() + 1
+    return detail, changed_ids, stats
+
+
+def rebuild_books(
+    dim_book: pd.DataFrame,
+    detail: pd.DataFrame,
+    book_ids: np.ndarray,
+    run_ts: str,
+) -> pd.DataFrame:
+    """
+    dim_book con las filas de `book_ids` reconstruidas desde `detail` (en orden de
+    supervivencia) como en deduplicate: primer valor no nulo por columna entre las filas
+    válidas y unión de autores / categorías. Los libros sin filas válidas desaparecen.
+    """
+    ids = set(book_ids.tolist())
+    rows = detail[detail["book_id"].astype(object).isin(ids) & ~detail["has_error"].astype(bool)]
+    winners = rows.groupby("book_id", as_index=False, sort=True).first()
+
+    def union(column: str) -> pd.Series:
+        merged = rows.groupby("book_id")[column].apply(lambda lists_: sorted({a for sub in lists_ for a in sub}))
+        return winners["book_id"].map(merged).apply(lambda x: x if isinstance(x, list) and len(x) > 0 else [])
+
+    rebuilt = pd.DataFrame({"book_id": winners["book_id"].astype(object)})
+    for col in dim_book.columns[1:]:
+        if col == "autores":
+            rebuilt[col] = union("autores_list")
+        elif col == "categorias":
+            rebuilt[col] = union("categorias_list")
+        elif col == "fuente_ganadora":
+            rebuilt[col] = winners["source_name"].astype(object)
+        elif col == "ts_ultima_act":
+            rebuilt[col] = run_ts
+        elif col in winners.columns:
+            rebuilt[col] = winners[col].astype(object)
+        else:
+            rebuilt[col] = None
+
+    kept = dim_book[~dim_book["book_id"].astype(object).isin(ids)]
+    combined = pd.concat([kept.astype(object), rebuilt], ignore_index=True)
+    return combined.sort_values("book_id", kind="stable").reset_index(drop=True)
+
+
+def patch_staging(staging: pd.DataFrame, records: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    # Precios del landing en las filas de Google Books del staging (row_number = fila del landing)
+    is_gb = (staging["source_name"].astype(object) == SOURCE_NAME).to_numpy()
+    rows = staging["row_number"].astype("int64").to_numpy()[is_gb] - 1
+    if is_gb.sum() != len(records) or (len(rows) and rows.max() >= len(records)):
+        print(f"[AVISO] {STAGING_PATH} no corresponde al landing actual; no se actualiza.")
+        return None
+    staging = staging.copy()
+    precio = pd.to_numeric(staging["precio"], errors="coerce").astype(float).to_numpy(copy=True)
+    moneda = staging["moneda"].astype(object).to_numpy(copy=True)
+    precio[is_gb] = [np.nan if _missing(records[i].get("price_amount")) else float(records[i]["price_amount"]) for i in rows]
+    moneda[is_gb] = [normalize_currency(records[i].get("price_currency")) for i in rows]
+    staging["precio"] = precio
+    staging["moneda"] = moneda
+    return staging
+
+
+def _numpy_columns(path: str) -> Dict[str, str]:
+    # Columnas numéricas que la integración escribió con dtype numpy (p. ej. paginas sin Open
+    # Library, float64 también en modo Arrow-nativo), según los metadatos pandas del Parquet
+    metadata = ds.dataset(path, format="parquet", partitioning="hive").schema.metadata or {}
+    columns: Dict[str, str] = {}
+    for col in json.loads(metadata.get(b"pandas", b"{}")).get("columns", []):
+        numpy_type = str(col.get("numpy_type"))
+        if col.get("pandas_type") != "categorical" and numpy_type in ("float64", "float32", "int64", "int32", "bool"):
+            columns[col["name"]] = numpy_type
+    return columns
+
+
+def read_table(path: str, plan: Dict[str, str], arrow_native: bool = False) -> pd.DataFrame:
+    # Con los dtypes de la integración: en modo Arrow-nativo, Arrow salvo los diccionarios
+    # (category, como los deja el plan de tipos) y las columnas que se escribieron con dtype numpy
+    mapper = (lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)) if arrow_native else None
+    df = read_parquet_filtered(path, types_mapper=mapper)
+    if arrow_native:
+        for col, numpy_type in _numpy_columns(path).items():
+            if col in df.columns and col not in plan:
+                df[col] = df[col].astype(numpy_type)
+    return apply_dtype_plan(df, plan, arrow_native)
+
+
+def restore_dtypes(df: pd.DataFrame, dtypes: pd.Series, plan: Dict[str, str], arrow_native: bool = False) -> pd.DataFrame:
+    # Tras el parche: el plan de tipos y, en el resto de columnas, los dtypes leídos
+    for col, dtype in dtypes.items():
+        if col in df.columns and col not in plan and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return apply_dtype_plan(df, plan, arrow_native)
+
+
+def update_metrics(
+    dim_book: pd.DataFrame,
+    detail: pd.DataFrame,
+    extra: Dict[str, Any],
+    path: str = METRICS_PATH,
+) -> None:
+    # Recalcula las métricas de las tablas; se conservan las de la integración que no cambian
+    # (entradas, perfilado, memoria, resolución de entidades)
+    metrics: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            metrics = json.load(f)
+    fresh = compute_quality_metrics(dim_book, detail, compute_profiles(dim_book, detail))
+    for key, value in fresh.items():
+        metrics[key] = {**metrics.get(key, {}), **value} if key in ("dim_book", "book_source_detail") else value
+    metrics.update(extra)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+
+
+def publish_patch(
+    records: List[Dict[str, Any]],
+    refresh_stats: Dict[str, Any],
+    arrow_native: bool = False,
+) -> Dict[str, Any]:
+    """
+    Parchea y vuelve a publicar standard/ (Parquet, Feather, CSV), staging, delta CDC,
+    rollups, índice de búsqueda y métricas con los precios de `records`.
+    """
+    run_ts = datetime.now(UTC).isoformat()
+    detail = read_table(BOOK_SOURCE_DETAIL_PATH, BOOK_SOURCE_DETAIL_DTYPE_PLAN, arrow_native)
+    previous = read_table(DIM_BOOK_PATH, DIM_BOOK_DTYPE_PLAN, arrow_native)
+    detail_dtypes = detail.dtypes
+
+    detail, changed_ids, patch_stats = patch_book_source_detail(detail, records)
+    refresh_stats.update(patch_stats)
+    if patch_stats["sin_correspondencia"] or patch_stats["ambiguas"]:
+        print(
+            f"[AVISO] {patch_stats['sin_correspondencia']} filas de Google Books sin registro en el landing y "
+            f"{patch_stats['ambiguas']} ambiguas no se actualizan (ejecutar la integración completa)."
+        )
+    if not len(changed_ids):
+        print("Ninguna fila de standard/ cambia.")
+        return refresh_stats
+
+    detail = restore_dtypes(detail, detail_dtypes, BOOK_SOURCE_DETAIL_DTYPE_PLAN, arrow_native)
+    dim_book = restore_dtypes(rebuild_books(previous, detail, changed_ids, run_ts), previous.dtypes, DIM_BOOK_DTYPE_PLAN, arrow_native)
+    # Categorías de dim_book = las del detalle, como en deduplicate (las hereda de staging)
+    for col, source in DIM_BOOK_CATEGORIES.items():
+        dim_book[col] = dim_book[col].cat.set_categories(detail[source].cat.categories)
+    refresh_stats["libros_reconstruidos"] = int(len(set(changed_ids.tolist())))
+
+    extra_metrics: Dict[str, Any] = {}
+    cdc_options = change_capture_options()
+    delta = None
+    if cdc_options["enabled"]:
+        # Como en la integración: la marca de esta ejecución en todas las filas y el CDC
+        # devuelve la anterior a las que no cambian
+        dim_book["ts_ultima_act"] = pd.Series(run_ts, index=dim_book.index, dtype=previous["ts_ultima_act"].dtype)
+        dim_book, delta, cdc_stats = apply_change_capture(dim_book, previous)
+        cdc_stats["delta"] = delta_path(cdc_stats["ts_ejecucion"], cdc_options["delta_dir"])
+        extra_metrics["cdc"] = cdc_stats
+
+    rollup_opts = rollup_options()
+    rollups, rollup_state = {}, None
+    if rollup_opts["enabled"]:
+        previous_rollups = read_previous_rollups(rollup_opts["dir"]) if rollup_opts["incremental"] else None
+        rollups, rollup_state, rollup_stats = refresh_rollups(
+            book_contributions(dim_book, detail), previous_rollups, rollup_opts["rebuild_fraction"],
+        )
+        extra_metrics["rollups"] = {**rollup_stats, "filas": {name: len(df) for name, df in rollups.items()}}
+        print(format_rollup_stats(rollup_stats, rollups))
+
+    staging = None
+    if os.path.exists(STAGING_PATH):
+        staging = read_table(STAGING_PATH, STAGING_DTYPE_PLAN, arrow_native)
+        staging_dtypes = staging.dtypes
+        staging = patch_staging(staging, records)
+
+    export_options = sink_options()
+    parquet_options = standard_parquet_options()
+    with create_executor(export_options) as executor:
+        futures = submit_table(
+            executor, "dim_book", dim_book, DIM_BOOK_PATH, export_options,
+            feather_path="standard/dim_book.feather", sort_by="book_id", **parquet_options,
+        )
+        futures += submit_table(
+            executor, "book_source_detail", detail, BOOK_SOURCE_DETAIL_PATH, export_options,
+            feather_path="standard/book_source_detail.feather", sort_by="book_id", **parquet_options,
+        )
+        if staging is not None:
+            staging = restore_dtypes(staging, staging_dtypes, STAGING_DTYPE_PLAN, arrow_native)
+            futures += submit_table(executor, "books_staging", staging, STAGING_PATH, export_options)
+        if delta is not None:
+            futures.append(submit_task(executor, write_delta, delta, extra_metrics["cdc"]["delta"]))
+        if rollup_state is not None:
+            os.makedirs(rollup_opts["dir"], exist_ok=True)
+            for name, df in rollups.items():
+                futures += submit_table(executor, name, df, rollup_path(name, rollup_opts["dir"]), export_options)
+            futures.append(submit_task(executor, write_parquet, rollup_state, rollup_path(STATE_TABLE, rollup_opts["dir"])))
+        # El índice solo guarda identificadores y títulos: se rehace si cambian los libros o sus ganadores
+        if delta is None or (delta["operacion"] != "update").any() or _index_columns_changed(previous, dim_book, changed_ids):
+            futures.append(submit_task(executor, build_lookup_index, dim_book, LOOKUP_INDEX_PATH))
+        written = wait_for(futures)
+
+    update_metrics(dim_book, detail, {**extra_metrics, "refresco_precios": refresh_stats})
+    for path in written:
+        print(f"Actualizado: {path}")
+    return refresh_stats
+
+
+def _index_columns_changed(previous: pd.DataFrame, dim_book: pd.DataFrame, book_ids: np.ndarray) -> bool:
+    from lookup_index import ROW_COLUMNS
+
+    columns = [c for c in ROW_COLUMNS if c in dim_book.columns]
+    ids = set(book_ids.tolist())
+    before = previous[previous["book_id"].astype(object).isin(ids)][columns].astype(object)
+    after = dim_book[dim_book["book_id"].astype(object).isin(ids)][columns].astype(object)
+    return not before.reset_index(drop=True).equals(after.reset_index(drop=True))
+
+
+def main():
+    load_dotenv()
+    options = price_refresh_options()
+    parser = argparse.ArgumentParser(description="Refresco de precios de Google Books (saleInfo) sin reintegrar")
+    parser.add_argument("--workers", type=int, default=options["workers"], help="Peticiones simultáneas (GOOGLE_BOOKS_PRICE_WORKERS)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo descarga y cuenta los cambios (no escribe landing ni standard/)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GOOGLE_BOOKS_API_KEY")
+    if not api_key:
+        print("[AVISO] GOOGLE_BOOKS_API_KEY no encontrado en el .env")
+
+    landing = find_landing_file("landing", SOURCE_NAME)
+    if not os.path.exists(landing):
+        raise FileNotFoundError(f"No se encuentra el landing de Google Books: {landing}")
+    records = read_landing_records(landing)
+    gb_ids = list(dict.fromkeys(r["gb_id"] for r in records if r.get("gb_id")))
+
+    t0 = time.perf_counter()
+    cache = load_price_cache(options["cache_path"])
+    results = fetch_prices(gb_ids, cache, args.workers, api_key)
+    save_price_cache(cache, options["cache_path"])
+    estados = pd.Series([r["estado"] for r in results.values()], dtype=object).value_counts().to_dict()
+
+    changed = patch_landing(records, results)
+    stats: Dict[str, Any] = {
+        "ts": datetime.now(UTC).isoformat(),
+        "volumenes": len(gb_ids),
+        **{estado: int(estados.get(estado, 0)) for estado in ("sin_cambios", "descargado", "no_encontrado", "error")},
+        "registros_landing_cambiados": len(changed),
+        "segundos_descarga": round(time.perf_counter() - t0, 3),
+    }
+    print(
+        f"Precios: {stats['volumenes']} volúmenes, {stats['sin_cambios']} sin cambios (304), "
+        f"{stats['descargado']} descargados, {stats['no_encontrado']} no encontrados, {stats['error']} errores "
+        f"→ {len(changed)} registros del landing cambian"
+    )
+    print(format_rate_metrics(rate_metrics()))
+    save_rate_state()
+
+    if args.dry_run or not changed:
+        return
+
+    landing_options = landing_format_options()
+    write_landing_records(records, landing, SOURCE_NAME, landing_options["batch_rows"])
+    print(f"Actualizado: {landing}")
+    if os.path.exists(BOOK_SOURCE_DETAIL_PATH) and os.path.exists(DIM_BOOK_PATH):
+        publish_patch(records, stats, options["arrow_native"])
+    else:
+        print("[AVISO] No hay tablas en standard/: se actualizan en la próxima integración.")
+
+
+if __name__ == "__main__":
+    main()
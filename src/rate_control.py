@@ -0,0 +1,285 @@
+# src/rate_control.py
+
+# Control de ritmo adaptativo por host para todo el tráfico saliente (fichas y búsquedas de
+# Goodreads, portadas, API de Google Books), en lugar de pausas fijas.
+#
+# AIMD (aumento aditivo / reducción multiplicativa), como el control de congestión de TCP:
+#   - Cada respuesta correcta y rápida sube la tasa del host en RATE_INCREASE / tasa
+#     (≈ +RATE_INCREASE peticiones/s por cada segundo sin problemas).
+#   - Un 429 / 503, un fallo de red o una respuesta más lenta que RATE_SLOW_LATENCY_S la
+#     multiplican por RATE_DECREASE (una sola reducción por ventana: las respuestas que ya
+#     estaban en vuelo no vuelven a reducirla).
+#   - Retry-After (segundos o fecha HTTP) bloquea el host hasta esa hora.
+# La tasa queda entre RATE_MIN y RATE_MAX. Las peticiones se reparten en huecos de 1/tasa
+# segundos por host, compartidos por todos los hilos del proceso.
+#
+# Con RATE_PERSIST=true la tasa aprendida de cada host se guarda al terminar en
+# RATE_STATE_PATH y la siguiente ejecución arranca desde ella.
+#
+# Uso:
+#     resp = rate_limited_get(url, headers=..., timeout=15)   # controlador compartido
+#     print(format_rate_metrics(rate_metrics()))
+#     save_rate_state()
+
+import json
+import os
+import threading
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+RATE_STATE_PATH = os.path.join(".cache", "rate_state.json")
+THROTTLE_STATUSES = (429, 503)
+
+
+def rate_control_options() -> Dict[str, Any]:
+    # Configuración por entorno (RATE_*); tasas en peticiones por segundo y host
+    return {
+        "initial": float(os.getenv("RATE_INITIAL", "2.0")),
+        "min": float(os.getenv("RATE_MIN", "0.2")),
+        "max": float(os.getenv("RATE_MAX", "10.0")),
+        "increase": float(os.getenv("RATE_INCREASE", "0.2")),
+        "decrease": float(os.getenv("RATE_DECREASE", "0.5")),
+        "slow_latency_s": float(os.getenv("RATE_SLOW_LATENCY_S", "3.0")),
+        "max_retries": int(os.getenv("RATE_MAX_RETRIES", "3")),
+        "persist": os.getenv("RATE_PERSIST", "true").lower() == "true",
+        "state_path": os.getenv("RATE_STATE_PATH", RATE_STATE_PATH),
+    }
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def load_rate_state(path: str) -> Dict[str, Dict[str, Any]]:
+    # Tasas guardadas por host ({} si no hay fichero o no se puede leer)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[AVISO] No se pudo leer el estado de ritmo ({path}): {e}")
+        return {}
+
+
+def open_rate_controller(options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    options = options or rate_control_options()
+    return {
+        "options": options,
+        "saved": load_rate_state(options["state_path"]) if options["persist"] else {},
+        "hosts": {},
+        "lock": threading.Lock(),
+    }
+
+
+def _host_state(controller: Dict[str, Any], host: str) -> Dict[str, Any]:
+    # Estado de un host (se crea al primer uso, con la tasa guardada si la hay). Con el lock tomado
+    state = controller["hosts"].get(host)
+    if state is None:
+        options = controller["options"]
+        saved = controller["saved"].get(host, {}).get("tasa")
+        rate = min(options["max"], max(options["min"], saved if saved else options["initial"]))
+        state = controller["hosts"][host] = {
+            "rate": rate,
+            "next_slot": 0.0,
+            "blocked_until": 0.0,
+            "hold_until": 0.0,
+            "requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "increases": 0,
+            "decreases": 0,
+            "latency_total": 0.0,
+            "wait_total": 0.0,
+            "min_rate": rate,
+            "max_rate": rate,
+        }
+    return state
+
+
+def acquire(controller: Dict[str, Any], url: str) -> float:
+    # Espera al siguiente hueco del host de `url`; devuelve los segundos esperados
+    with controller["lock"]:
+        state = _host_state(controller, _host(url))
+        now = time.monotonic()
+        slot = max(now, state["next_slot"], state["blocked_until"])
+        state["next_slot"] = slot + 1.0 / state["rate"]
+        wait = slot - now
+        state["wait_total"] += wait
+    if wait > 0:
+        time.sleep(wait)
+    return wait
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After en segundos ("120") o como fecha HTTP; None si falta o no se entiende
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - datetime.now(UTC)).total_seconds())
+
+
+def record_response(
+    controller: Dict[str, Any],
+    url: str,
+    status: Optional[int],
+    latency: float,
+    retry_after: Optional[float] = None,
+) -> float:
+    """
+    Ajusta la tasa del host con el resultado de una petición (status=None: fallo de red).
+    Devuelve la tasa nueva.
+    """
+    options = controller["options"]
+    with controller["lock"]:
+        state = _host_state(controller, _host(url))
+        now = time.monotonic()
+        state["requests"] += 1
+        state["latency_total"] += latency
+
+        if status in THROTTLE_STATUSES:
+            state["throttled"] += 1
+        elif status is None:
+            state["errors"] += 1
+
+        congested = status is None or status in THROTTLE_STATUSES or latency > options["slow_latency_s"]
+        if congested:
+            if now >= state["hold_until"]:
+                state["rate"] = max(options["min"], state["rate"] * options["decrease"])
+                state["decreases"] += 1
+                # Ventana: las respuestas en vuelo con la tasa anterior no vuelven a reducirla
+                state["hold_until"] = now + max(latency, 1.0 / state["rate"])
+        elif status is not None and status < 400:
+            state["rate"] = min(options["max"], state["rate"] + options["increase"] / state["rate"])
+            state["increases"] += 1
+
+        if retry_after is not None:
+            state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+
+        state["min_rate"] = min(state["min_rate"], state["rate"])
+        state["max_rate"] = max(state["max_rate"], state["rate"])
+        return state["rate"]
+
+
+def current_rate(controller: Dict[str, Any], host: str) -> Optional[float]:
+    with controller["lock"]:
+        state = controller["hosts"].get(host.lower())
+        return state["rate"] if state else None
+
+
+def request_with_rate(
+    controller: Dict[str, Any],
+    url: str,
+    max_retries: Optional[int] = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    requests.get(url, **kwargs) al ritmo del host. Un 429 / 503 se reintenta hasta
+    `max_retries` intentos (RATE_MAX_RETRIES), esperando lo que indique Retry-After; se
+    devuelve la última respuesta. Los fallos de red se registran y se propagan.
+    """
+    max_retries = max_retries or controller["options"]["max_retries"]
+    for attempt in range(1, max_retries + 1):
+        acquire(controller, url)
+        t0 = time.monotonic()
+        try:
+            resp = requests.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            record_response(controller, url, None, time.monotonic() - t0)
+            raise
+        retry_after = parse_retry_after(resp.headers.get("Retry-After")) if resp.status_code in THROTTLE_STATUSES else None
+        rate = record_response(controller, url, resp.status_code, time.monotonic() - t0, retry_after)
+
+        if resp.status_code in THROTTLE_STATUSES and attempt < max_retries:
+            wait = f", Retry-After {retry_after:.0f} s" if retry_after is not None else ""
+            print(f"[AVISO] {_host(url)} devolvió {resp.status_code}{wait}. Tasa {rate:.2f}/s; reintentando ({attempt}/{max_retries})...")
+            continue
+        return resp
+    return resp
+
+
+def rate_metrics(controller: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    # Métricas por host: tasa actual (peticiones/s) y contadores de la ejecución
+    controller = controller or shared_controller()
+    with controller["lock"]:
+        return {
+            host: {
+                "tasa_actual": round(s["rate"], 3),
+                "tasa_min": round(s["min_rate"], 3),
+                "tasa_max": round(s["max_rate"], 3),
+                "peticiones": s["requests"],
+                "limitadas": s["throttled"],
+                "errores_red": s["errors"],
+                "aumentos": s["increases"],
+                "reducciones": s["decreases"],
+                "latencia_media_s": round(s["latency_total"] / s["requests"], 3) if s["requests"] else None,
+                "espera_total_s": round(s["wait_total"], 3),
+            }
+            for host, s in sorted(controller["hosts"].items())
+        }
+
+
+def format_rate_metrics(metrics: Dict[str, Dict[str, Any]]) -> str:
+    lines = ["Ritmo por host (peticiones/s):"]
+    for host, m in metrics.items():
+        lines.append(
+            f"  {host}: tasa {m['tasa_actual']:.2f} (min {m['tasa_min']:.2f}, max {m['tasa_max']:.2f}), "
+            f"{m['peticiones']} peticiones, {m['limitadas']} limitadas (429/503), "
+            f"{m['reducciones']} reducciones, {m['espera_total_s']:.1f} s de espera"
+        )
+    return "\n".join(lines)
+
+
+def save_rate_state(controller: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    # Guarda la tasa de cada host usado (se conservan los demás). Solo con RATE_PERSIST=true
+    controller = controller or shared_controller()
+    options = controller["options"]
+    if not options["persist"] or not controller["hosts"]:
+        return None
+    path = options["state_path"]
+    state = load_rate_state(path)
+    ts = datetime.now(UTC).isoformat()
+    for host, metrics in rate_metrics(controller).items():
+        state[host] = {"tasa": metrics["tasa_actual"], "ts": ts}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------------------------------------------------------
+# CONTROLADOR COMPARTIDO
+# ------------------------------------------------------------
+
+# Un controlador por proceso: todas las descargas (de cualquier hilo) comparten el ritmo de
+# cada host
+_shared: Optional[Dict[str, Any]] = None
+_shared_lock = threading.Lock()
+
+
+def shared_controller() -> Dict[str, Any]:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = open_rate_controller()
+        return _shared
+
+
+def rate_limited_get(url: str, **kwargs: Any) -> requests.Response:
+    # requests.get con el controlador compartido (ver request_with_rate)
+    return request_with_rate(shared_controller(), url, **kwargs)
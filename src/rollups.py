@@ -0,0 +1,251 @@
+# src/rollups.py
+
+# Agregados precalculados (rollups) de dim_book para los cuadros de mando, materializados
+# por integrate_pipeline como tablas pequeñas de standard/ (Parquet + CSV):
+#   - agg_by_author:        libros y rating medio por autor (cada autor de `autores`; si la
+#                           lista está vacía, autor_principal)
+#   - agg_by_category:      libros y rating medio por categoría (sin categorías: nulo)
+#   - agg_by_year_language: libros y rating medio por año de publicación e idioma
+#   - agg_by_currency:      libros, precio medio y rating medio por moneda
+# El rating de un libro es la media de los ratings de sus registros válidos en
+# book_source_detail. Las medias se guardan junto a sus sumas y conteos (suma_*, n_*), que
+# son aditivos.
+#
+# Refresco incremental: la ejecución guarda también las aportaciones de cada libro
+# (agg_aportaciones.parquet: claves, precio y rating por book_id, con un hash por fila).
+# En la siguiente ejecución solo se agregan los libros cuyo hash cambia: a los agregados
+# anteriores se les restan sus aportaciones antiguas y se suman las nuevas. Si falta el
+# estado anterior o cambia más de PIPELINE_ROLLUPS_REBUILD_FRACTION de los libros, se
+# recalcula todo.
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from change_capture import row_hashes
+
+ROLLUPS_DIR = "standard"
+STATE_TABLE = "agg_aportaciones"
+
+# Tabla → claves de agrupación (las columnas de lista se expanden, un libro por elemento)
+ROLLUP_KEYS: Dict[str, List[str]] = {
+    "agg_by_author": ["autor"],
+    "agg_by_category": ["categoria"],
+    "agg_by_year_language": ["anio_publicacion", "idioma"],
+    "agg_by_currency": ["moneda"],
+}
+# El precio solo se agrega por moneda (no se mezclan importes de monedas distintas)
+PRICE_ROLLUPS = ["agg_by_currency"]
+
+CONTRIBUTION_COLUMNS = [
+    "book_id", "autor_principal", "autores", "categorias", "anio_publicacion", "idioma", "moneda", "precio", "rating",
+]
+
+
+def rollup_options() -> Dict[str, Any]:
+    # Configuración por entorno (PIPELINE_ROLLUPS*)
+    return {
+        "enabled": os.getenv("PIPELINE_ROLLUPS", "true").lower() == "true",
+        "incremental": os.getenv("PIPELINE_ROLLUPS_INCREMENTAL", "true").lower() == "true",
+        "dir": os.getenv("PIPELINE_ROLLUPS_DIR", ROLLUPS_DIR),
+        "rebuild_fraction": float(os.getenv("PIPELINE_ROLLUPS_REBUILD_FRACTION", "0.5")),
+    }
+
+
+def rollup_path(name: str, rollups_dir: str = ROLLUPS_DIR) -> str:
+    return os.path.join(rollups_dir, f"{name}.parquet")
+
+
+# --------------------------
+# Aportaciones por libro
+# --------------------------
+
+def _string_list(s: pd.Series) -> pa.Array:
+    # Lista de texto como array Arrow (listas nulas → vacías)
+    arr = pa.array(s, type=pa.list_(pa.string()), from_pandas=True)
+    return pc.if_else(pc.is_null(arr), pa.scalar([], type=pa.list_(pa.string())), arr)
+
+
+def book_contributions(dim_book: pd.DataFrame, book_source_detail: pd.DataFrame) -> pd.DataFrame:
+    """
+    Una fila por libro con lo que aporta a los rollups: claves (autores, categorías, año,
+    idioma, moneda), precio y rating medio de sus registros válidos.
+    """
+    detail = book_source_detail
+    if "has_error" in detail.columns:
+        detail = detail[~detail["has_error"].astype(bool)]
+    ratings = pd.to_numeric(detail["rating"], errors="coerce").astype(float) if "rating" in detail.columns else None
+    rating_by_book = (
+        ratings.groupby(detail["book_id"].astype(object).to_numpy(), sort=False).mean()
+        if ratings is not None else pd.Series(dtype=float)
+    )
+
+    book_id = dim_book["book_id"].astype(object).to_numpy()
+    return pd.DataFrame({
+        "book_id": book_id,
+        "autor_principal": dim_book["autor_principal"].astype(object).to_numpy(),
+        "autores": pd.arrays.ArrowExtensionArray(_string_list(dim_book["autores"])),
+        "categorias": pd.arrays.ArrowExtensionArray(_string_list(dim_book["categorias"])),
+        "anio_publicacion": dim_book["anio_publicacion"].astype("Int16").to_numpy(),
+        "idioma": dim_book["idioma"].astype(object).to_numpy(),
+        "moneda": dim_book["moneda"].astype(object).to_numpy(),
+        "precio": pd.to_numeric(dim_book["precio"], errors="coerce").astype(float).to_numpy(),
+        "rating": pd.Series(book_id).map(rating_by_book).astype(float).to_numpy(),
+    })
+
+
+def _explode(contrib: pd.DataFrame, column: str, fallback: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # (posición del libro, valor) por elemento de la lista `column`; los libros sin elementos
+    # aportan una fila con `fallback` (o nulo)
+    arr = pa.array(contrib[column], type=pa.list_(pa.string()))
+    rows = pc.list_parent_indices(arr).to_numpy()
+    values = pc.list_flatten(arr).to_numpy(zero_copy_only=False).astype(object)
+    empty = np.flatnonzero(pc.list_value_length(arr).to_numpy(zero_copy_only=False) == 0)
+    fill = contrib[fallback].to_numpy(dtype=object)[empty] if fallback else np.full(len(empty), None, dtype=object)
+    return np.concatenate([rows, empty]), np.concatenate([values, fill])
+
+
+def _key_frame(contrib: pd.DataFrame, name: str) -> pd.DataFrame:
+    # Filas (libro × clave) de un rollup con sus medidas
+    if name == "agg_by_author":
+        rows, values = _explode(contrib, "autores", fallback="autor_principal")
+        frame = pd.DataFrame({"autor": pd.Series(values, dtype=object)})
+    elif name == "agg_by_category":
+        rows, values = _explode(contrib, "categorias")
+        frame = pd.DataFrame({"categoria": pd.Series(values, dtype=object)})
+    else:
+        rows = np.arange(len(contrib))
+        frame = contrib[ROLLUP_KEYS[name]].reset_index(drop=True)
+    frame["precio"] = contrib["precio"].to_numpy()[rows]
+    frame["rating"] = contrib["rating"].to_numpy()[rows]
+    return frame
+
+
+def _measures(name: str) -> List[str]:
+    measures = ["n_libros", "n_rating", "suma_rating"]
+    if name in PRICE_ROLLUPS:
+        measures += ["n_precio", "suma_precio"]
+    return measures
+
+
+def _aggregate(contrib: pd.DataFrame, name: str) -> pd.DataFrame:
+    # Medidas aditivas por clave (los nulos son una clave más)
+    frame = _key_frame(contrib, name)
+    keys = ROLLUP_KEYS[name]
+    grouped = frame.groupby(keys, dropna=False, sort=True)
+    out = grouped.agg(
+        n_libros=("rating", "size"),
+        n_rating=("rating", "count"),
+        suma_rating=("rating", "sum"),
+        n_precio=("precio", "count"),
+        suma_precio=("precio", "sum"),
+    ).reset_index()
+    return out[keys + _measures(name)]
+
+
+def _finish(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    # Medias a partir de sumas y conteos; orden por clave (el mismo en completo e incremental)
+    keys = ROLLUP_KEYS[name]
+    df = df[df["n_libros"] > 0].sort_values(keys, na_position="last", kind="stable").reset_index(drop=True)
+    for col in _measures(name):
+        if col.startswith("n_"):
+            df[col] = df[col].astype("int64")
+    df["rating_medio"] = (df["suma_rating"] / df["n_rating"]).where(df["n_rating"] > 0)
+    if name in PRICE_ROLLUPS:
+        df["precio_medio"] = (df["suma_precio"] / df["n_precio"]).where(df["n_precio"] > 0)
+    if "anio_publicacion" in keys:
+        df["anio_publicacion"] = df["anio_publicacion"].astype("Int16")
+    return df
+
+
+def compute_rollups(contrib: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    # Todos los rollups desde las aportaciones de todos los libros
+    return {name: _finish(_aggregate(contrib, name), name) for name in ROLLUP_KEYS}
+
+
+# --------------------------
+# Refresco incremental
+# --------------------------
+
+def read_previous_rollups(rollups_dir: str = ROLLUPS_DIR) -> Optional[Dict[str, pd.DataFrame]]:
+    # Rollups y aportaciones de la ejecución anterior; None si falta alguno
+    paths = {name: rollup_path(name, rollups_dir) for name in [*ROLLUP_KEYS, STATE_TABLE]}
+    if not all(os.path.exists(p) for p in paths.values()):
+        return None
+    try:
+        return {name: pd.read_parquet(path) for name, path in paths.items()}
+    except Exception as e:
+        print(f"[AVISO] No se pudieron leer los rollups anteriores ({rollups_dir}): {e}. Se recalculan.")
+        return None
+
+
+def _with_hash(contrib: pd.DataFrame) -> pd.DataFrame:
+    return contrib.assign(hash=row_hashes(contrib, CONTRIBUTION_COLUMNS))
+
+
+def refresh_rollups(
+    contrib: pd.DataFrame,
+    previous: Optional[Dict[str, pd.DataFrame]],
+    rebuild_fraction: float = 0.5,
+) -> Tuple[Dict[str, pd.DataFrame], pd.DataFrame, Dict[str, Any]]:
+    """
+    Rollups de esta ejecución. Devuelve (rollups, estado de aportaciones a guardar, stats).
+    Con `previous` (read_previous_rollups) solo se agregan los libros nuevos, cambiados o
+    borrados; sin él, o con demasiados cambios, se recalcula todo.
+    """
+    state = _with_hash(contrib)
+    stats: Dict[str, Any] = {"libros": len(state)}
+
+    if previous is None:
+        stats["modo"] = "completo"
+        return compute_rollups(contrib), state, stats
+
+    old_state = previous[STATE_TABLE]
+    # Cada libro cuenta una vez en agg_by_currency: si no cuadra con el estado (escritura
+    # interrumpida, ficheros de ejecuciones distintas), se recalcula todo
+    if int(previous["agg_by_currency"]["n_libros"].sum()) != len(old_state):
+        print("[AVISO] Los rollups anteriores no coinciden con sus aportaciones; se recalculan.")
+        stats["modo"] = "completo"
+        return compute_rollups(contrib), state, stats
+
+    merged = state[["book_id", "hash"]].merge(
+        old_state[["book_id", "hash"]], on="book_id", how="outer", suffixes=("", "_antes"), sort=False
+    )
+    changed_ids = merged.loc[merged["hash"] != merged["hash_antes"], "book_id"]
+    stats["libros_cambiados"] = int(len(changed_ids))
+
+    if len(changed_ids) > rebuild_fraction * max(len(state), 1):
+        stats["modo"] = "completo"
+        return compute_rollups(contrib), state, stats
+
+    stats["modo"] = "incremental"
+    added = contrib[contrib["book_id"].isin(changed_ids)]
+    removed = old_state[old_state["book_id"].isin(changed_ids)][CONTRIBUTION_COLUMNS]
+    rollups: Dict[str, pd.DataFrame] = {}
+    for name, keys in ROLLUP_KEYS.items():
+        measures = _measures(name)
+        parts = [previous[name][keys + measures], _aggregate(added, name)]
+        minus = _aggregate(removed, name)
+        minus[measures] = -minus[measures]
+        parts.append(minus)
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            # Nada que sumar (p. ej. dim_book vacío en dos ejecuciones): rollup vacío con sus columnas
+            rollups[name] = _finish(_aggregate(contrib, name), name)
+            continue
+        combined = pd.concat(parts, ignore_index=True)
+        if "anio_publicacion" in keys:
+            combined["anio_publicacion"] = combined["anio_publicacion"].astype("Int16")
+        summed = combined.groupby(keys, dropna=False, sort=False)[measures].sum().reset_index()
+        rollups[name] = _finish(summed, name)
+    return rollups, state, stats
+
+
+def format_rollup_stats(stats: Dict[str, Any], rollups: Dict[str, pd.DataFrame]) -> str:
+    changed = f", {stats['libros_cambiados']} libros cambiados" if "libros_cambiados" in stats else ""
+    sizes = ", ".join(f"{name} {len(df)}" for name, df in rollups.items())
+    return f"Rollups ({stats['modo']}{changed}): {sizes} filas"
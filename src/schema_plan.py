@@ -0,0 +1,150 @@
+# src/schema_plan.py
+
+# Plan de tipos declarado para staging y las tablas de standard/.
+# Sin plan, casi todas las columnas quedan como `object` y los enteros con nulos como
+# float64. Tipos lógicos:
+#   - "category"     → columnas de texto repetido (diccionario)
+#   - "int8/16/32"   → enteros nullable pequeños (Int16 / int16[pyarrow], ...)
+#   - "bool"         → flags
+#   - "string_list"  → listas de texto como list<string>[pyarrow]
+# En modo Arrow-nativo los enteros y flags se resuelven a dtypes Arrow.
+
+import json
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+STAGING_DTYPE_PLAN: Dict[str, str] = {
+    "source_name": "category",
+    "source_file": "category",
+    "idioma_raw": "category",
+    "idioma": "category",
+    "moneda": "category",
+    "row_number": "int32",
+    "ratings_count": "int32",
+    "anio_publicacion": "int16",
+    "longitud_titulo": "int16",
+    "autores_list": "string_list",
+    "categorias_list": "string_list",
+}
+
+BOOK_SOURCE_DETAIL_DTYPE_PLAN: Dict[str, str] = {
+    **STAGING_DTYPE_PLAN,
+    "has_isbn13": "bool",
+    "has_precio": "bool",
+    "has_error": "bool",
+    "prioridad_fuente": "int8",
+    "error_codes": "string_list",
+    "source_id": "int32",
+}
+
+DIM_BOOK_DTYPE_PLAN: Dict[str, str] = {
+    "autores": "string_list",
+    "anio_publicacion": "int16",
+    "idioma": "category",
+    "categorias": "string_list",
+    "moneda": "category",
+    "fuente_ganadora": "category",
+}
+
+# Categorías de dim_book que heredan las de book_source_detail (groupby().first() las conserva)
+DIM_BOOK_CATEGORIES = {"idioma": "idioma", "moneda": "moneda", "fuente_ganadora": "source_name"}
+
+PANDAS_DTYPES = {
+    "int8": "Int8",
+    "int16": "Int16",
+    "int32": "Int32",
+    "bool": "bool",
+}
+
+ARROW_DTYPES = {
+    "int8": pd.ArrowDtype(pa.int8()),
+    "int16": pd.ArrowDtype(pa.int16()),
+    "int32": pd.ArrowDtype(pa.int32()),
+    "bool": pd.ArrowDtype(pa.bool_()),
+}
+
+STRING_LIST_DTYPE = pd.ArrowDtype(pa.list_(pa.string()))
+
+
+def _to_string_list(s: pd.Series) -> pd.Series:
+    if s.dtype == STRING_LIST_DTYPE:
+        return s
+    values = [list(v) if v is not None and not (isinstance(v, float) and pd.isna(v)) else None for v in s]
+    return pd.Series(pd.arrays.ArrowExtensionArray(pa.array(values, type=pa.list_(pa.string()))), index=s.index)
+
+
+def apply_dtype_plan(df: pd.DataFrame, plan: Dict[str, str], arrow_native: bool = False) -> pd.DataFrame:
+    # Convierte en sitio las columnas del plan presentes en df (el resto no se toca)
+    for col, logical in plan.items():
+        if col not in df.columns:
+            continue
+        if logical == "category":
+            df[col] = df[col].astype("category")
+        elif logical == "string_list":
+            df[col] = _to_string_list(df[col])
+        else:
+            dtype = ARROW_DTYPES[logical] if arrow_native else PANDAS_DTYPES[logical]
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def column_memory(df: pd.DataFrame) -> Dict[str, int]:
+    usage = df.memory_usage(deep=True, index=False)
+    return {col: int(usage[col]) for col in df.columns}
+
+
+def _unplanned(s: pd.Series, logical: str, arrow_native: bool) -> pd.Series:
+    # La columna con los tipos que tendría sin plan (object / int64 / float64 con nulos)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype(s.cat.categories.dtype)
+    if logical in ("int8", "int16", "int32"):
+        if arrow_native:
+            return s.astype(pd.ArrowDtype(pa.int64()))
+        return s.astype("float64") if s.isna().any() else s.astype("int64")
+    if logical == "string_list" and s.dtype == STRING_LIST_DTYPE and not arrow_native:
+        return pd.Series(s.tolist(), index=s.index, dtype=object)
+    return s
+
+
+def unplanned_memory(df: pd.DataFrame, plan: Dict[str, str], arrow_native: bool = False) -> Dict[str, int]:
+    # Bytes por columna sin ningún plan aplicado: dim_book y book_source_detail heredan del
+    # staging columnas ya planificadas (categorías, enteros pequeños, listas), que se miden
+    # con el tipo que tendrían sin plan
+    usage = column_memory(df)
+    for col, logical in plan.items():
+        if col in df.columns:
+            values = _unplanned(df[col], logical, arrow_native)
+            if values is not df[col]:
+                usage[col] = int(values.memory_usage(deep=True, index=False))
+    return usage
+
+
+def memory_report(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, Any]:
+    # Bytes por columna antes/después de aplicar el plan de tipos
+    columnas = {
+        col: {"antes": before.get(col, 0), "despues": after[col]}
+        for col in after
+    }
+    return {
+        "bytes_antes": int(sum(before.values())),
+        "bytes_despues": int(sum(after.values())),
+        "por_columna": columnas,
+    }
+
+
+def apply_dtype_plan_with_report(df: pd.DataFrame, plan: Dict[str, str], arrow_native: bool = False) -> pd.DataFrame:
+    # Aplica el plan y deja el informe de memoria en df.attrs["memoria"].
+    # Se guarda serializado: pandas hace deepcopy de attrs en cada operación que deriva un
+    # DataFrame, y copiar un str es inmediato (un dict por columna no lo es).
+    before = unplanned_memory(df, plan, arrow_native)
+    df = apply_dtype_plan(df, plan, arrow_native)
+    df.attrs["memoria"] = json.dumps(memory_report(before, column_memory(df)))
+    return df
+
+
+def memory_report_of(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    # Informe de memoria guardado por apply_dtype_plan_with_report (None si no hay)
+    report = df.attrs.get("memoria")
+    return json.loads(report) if report is not None else None
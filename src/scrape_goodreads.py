@@ -1,17 +1,34 @@
 # src/scrape_goodreads.py
 
-import json
 import os
 import re
 import asyncio
+import multiprocessing
+import threading
 import time
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Tuple, Optional
 from enum import Enum
 
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from cover_store import add_cover_url, add_covers, build_thumbnails, cover_ref, cover_store_options, read_cover_urls
+from html_archive import (
+    KIND_BOOK,
+    KIND_SEARCH,
+    archive_page,
+    html_archive_options,
+    latest_pages,
+    list_runs,
+    open_archive_writer,
+    read_archive_index,
+    read_page,
+)
+from landing_format import find_landing_file, landing_format_options, landing_path, read_landing_records, write_landing_records
+from rate_control import acquire, format_rate_metrics, rate_limited_get, rate_metrics, record_response, save_rate_state, shared_controller
+
 try:
     from playwright.async_api import async_playwright
     PLAYWRIGHT_AVAILABLE = True
@@ -28,7 +45,10 @@ defaultUser_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 # Rutas base del proyecto
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 LANDING_DIR = os.path.join(BASE_DIR, "landing")
-COVERS_DIR = os.path.join(BASE_DIR, "covers")
+STANDARD_DETAIL_PATH = os.path.join(BASE_DIR, "standard", "book_source_detail.parquet")
+
+# Campos que se reutilizan de un libro ya conocido (sin volver a pedir su ficha ni su portada)
+KNOWN_FIELDS = ["isbn10", "isbn13", "asin", "cover_local_path"]
 
 class Backend(str, Enum):
     REQUESTS = "requests"
@@ -58,59 +78,171 @@ def parse_rating_block(text: str) -> Tuple[Optional[float], Optional[int]]:
     except Exception:
         return None, None
 
-# Dada la URL de un libro en Goodreads, intenta extraer ISBN10, ISBN13 y ASIN
-# Devuelve (isbn10, isbn13, asin). Si no se encuentran, devuelve None en cada campo.
-def fetch_isbn_from_book_page(book_url: str, user_agent: Optional[str] = None,) -> Tuple[Optional[str], Optional[str], Optional[str]]: 
+# Extrae ISBN10, ISBN13 y ASIN del HTML de la ficha de un libro (sin red, se usa también
+# al re-extraer desde el archivo HTML). Devuelve None en los campos que no se encuentren.
+def extract_isbn_from_html(html: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+
+    isbn10: Optional[str] = None
+    isbn13: Optional[str] = None
+    asin: Optional[str] = None
+
+    # Busca el ISBN en el HTML/JSON crudo
+    # Intento específico para JSON tipo ,"isbn":"1491912057","isbn13":"9781491912058"
+    m13_json = re.search(r'"isbn13"\s*:\s*"([0-9\-]{13,17})"', html, re.IGNORECASE)
+    if m13_json:
+        candidate = m13_json.group(1).replace("-", "")
+        if len(candidate) == 13 and candidate.isdigit():
+            isbn13 = candidate
+
+    # Buscamos SOLO valores con exactamente 10 caracteres (ISBN10)
+    m10_json = re.search(r'"isbn"\s*:\s*"([0-9X]{10})"', html, re.IGNORECASE)
+    if m10_json:
+        candidate = m10_json.group(1)
+        if len(candidate) == 10 and all(c.isdigit() or c == "X" for c in candidate):
+            isbn10 = candidate
+
+    # Intento específico de ASIN en JSON: "asin":"XXXXXXXXXX"
+    m_asin_json = re.search(r'"asin"\s*:\s*"([A-Z0-9]{10})"', html, re.IGNORECASE)
+    if m_asin_json:
+        asin = m_asin_json.group(1).upper()
+
+    return isbn10, isbn13, asin
+
+# Descarga la ficha de un libro y devuelve su HTML (None si falla).
+# Con `archive` (ver html_archive.py) la ficha descargada se guarda en el archivo HTML.
+# Todas las descargas van al ritmo adaptativo de su host (ver rate_control.py).
+def fetch_book_page(book_url: str, user_agent: Optional[str] = None, archive: Optional[Dict] = None,) -> Optional[str]:
 
     headers = {"User-Agent": user_agent or "Mozilla/5.0"}
 
     try:
-        resp = requests.get(book_url, headers=headers, timeout=15)
+        resp = rate_limited_get(book_url, headers=headers, timeout=15)
         resp.raise_for_status()
     except requests.RequestException as e:
         print(f"  [ERROR] No se pudo obtener la ficha del libro: {book_url} -> {e}")
+        return None
+
+    archive_page(archive, KIND_BOOK, book_url, resp.text, estado=resp.status_code)
+    return resp.text
+
+# Dada la URL de un libro en Goodreads, intenta extraer ISBN10, ISBN13 y ASIN
+# Devuelve (isbn10, isbn13, asin). Si no se encuentran, devuelve None en cada campo.
+def fetch_isbn_from_book_page(book_url: str, user_agent: Optional[str] = None, archive: Optional[Dict] = None,) -> Tuple[Optional[str], Optional[str], Optional[str]]: 
+    html = fetch_book_page(book_url, user_agent, archive)
+    if html is None:
         return None, None, None
+    return extract_isbn_from_html(html)
 
-    html = resp.text
-    soup = BeautifulSoup(html, "lxml")
+# ------------------------------------------------------------
+# DESCARGA Y PARSEO EN PARALELO
+# ------------------------------------------------------------
 
-    isbn10: Optional[str] = None
-    isbn13: Optional[str] = None
-    asin: Optional[str] = None
+# Las descargas (fichas y portadas) van en hilos de E/S (GOODREADS_FETCH_WORKERS) y el parseo
+# con BeautifulSoup/lxml, que es CPU y con el GIL bloquearía a esos hilos, en un pool de
+# procesos (GOODREADS_PARSE_WORKERS; 0 = parsear en el propio hilo). Entre ambos hay una cola
+# acotada: un hilo que descarga espera si ya hay GOODREADS_PARSE_QUEUE páginas pendientes de
+# parsear, así que la memoria no crece aunque los parsers vayan por detrás.
+# El ritmo de las descargas lo fija rate_control.py por host, compartido por todos los hilos.
+
+def scrape_pipeline_options() -> Dict[str, int]:
+    parse_workers = int(os.getenv("GOODREADS_PARSE_WORKERS", os.cpu_count() or 1))
+    return {
+        "fetch_workers": int(os.getenv("GOODREADS_FETCH_WORKERS", "2")),
+        "parse_workers": parse_workers,
+        "parse_queue": int(os.getenv("GOODREADS_PARSE_QUEUE", 2 * max(1, parse_workers))),
+    }
+
+def open_scrape_pipeline(fetch_workers: int, parse_workers: int, parse_queue: int) -> Dict[str, Any]:
+    # Los procesos se crean con "spawn": un fork con hilos de descarga activos puede heredar
+    # locks tomados (requests, print...) y bloquear al hijo
+    parsers = None
+    if parse_workers > 0:
+        parsers = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+    return {
+        "fetchers": ThreadPoolExecutor(max_workers=max(1, fetch_workers), thread_name_prefix="goodreads-fetch"),
+        "parsers": parsers,
+        "pending": threading.BoundedSemaphore(max(1, parse_queue)),
+        "parse_workers": parse_workers,
+    }
+
+def close_scrape_pipeline(pipeline: Optional[Dict[str, Any]]) -> None:
+    if pipeline is None:
+        return
+    pipeline["fetchers"].shutdown(wait=True)
+    if pipeline["parsers"] is not None:
+        pipeline["parsers"].shutdown(wait=True)
+
+# Encola el parseo de `html` con fn (función de módulo, se envía a otro proceso) y devuelve
+# su Future. Sin pipeline o sin pool de procesos, parsea en el hilo actual.
+def _submit_parse(pipeline: Optional[Dict[str, Any]], fn: Callable[[str], Any], html: str) -> Future:
+    if pipeline is None or pipeline["parsers"] is None:
+        future: Future = Future()
+        future.set_result(fn(html))
+        return future
+    pipeline["pending"].acquire()
+    try:
+        future = pipeline["parsers"].submit(fn, html)
+    except BaseException:
+        pipeline["pending"].release()
+        raise
+    future.add_done_callback(lambda _: pipeline["pending"].release())
+    return future
+
+# Trabajo de un hilo de E/S para un libro: descarga su ficha (y encola su parseo) y su portada.
+# Devuelve (Future con (isbn10, isbn13, asin) o None si no hay ficha, cover_local_path)
+def _fetch_book_assets(book: Dict, fetch_page: bool, fetch_cover: bool, user_agent: Optional[str], archive: Optional[Dict], pipeline: Optional[Dict[str, Any]],) -> Tuple[Optional[Future], Optional[str]]:
+    parsed = None
+    if fetch_page:
+        html = fetch_book_page(book["book_url"], user_agent, archive)
+        if html is not None:
+            parsed = _submit_parse(pipeline, extract_isbn_from_html, html)
+    cover = download_cover(book["cover_url"]) if fetch_cover else None
+    return parsed, cover
 
-    # Busca el ISBN en el HTML/JSON crudo
-    if not (isbn10 and isbn13 and asin):
-        full_text = soup.get_text(" ", strip=True)
-        raw_html = html  # HTML original
-
-        # Intento específico para JSON tipo ,"isbn":"1491912057","isbn13":"9781491912058"
-        if not isbn13:
-            m13_json = re.search(r'"isbn13"\s*:\s*"([0-9\-]{13,17})"', raw_html, re.IGNORECASE)
-            if m13_json:
-                candidate = m13_json.group(1).replace("-", "")
-                if len(candidate) == 13 and candidate.isdigit():
-                    isbn13 = candidate
-
-        if not isbn10:
-            # Buscamos SOLO valores con exactamente 10 caracteres (ISBN10)
-            m10_json = re.search(r'"isbn"\s*:\s*"([0-9X]{10})"', raw_html, re.IGNORECASE)
-            if m10_json:
-                candidate = m10_json.group(1)
-                if len(candidate) == 10 and all(c.isdigit() or c == "X" for c in candidate):
-                    isbn10 = candidate
-
-        # Intento específico de ASIN en JSON: "asin":"XXXXXXXXXX"
-        if not asin:
-            m_asin_json = re.search(r'"asin"\s*:\s*"([A-Z0-9]{10})"', raw_html, re.IGNORECASE)
-            if m_asin_json:
-                asin = m_asin_json.group(1).upper()
+# ------------------------------------------------------------
+# LIBROS CONOCIDOS
+# ------------------------------------------------------------
 
-    return isbn10, isbn13, asin
+# Clave estable de un libro de Goodreads: el id numérico de /book/show/<id>-<slug>
+# (el slug puede cambiar); si no lo hay, la URL sin parámetros
+def book_key(book_url: Optional[str]) -> Optional[str]:
+    if not book_url:
+        return None
+    m = re.search(r"/book/show/(\d+)", book_url)
+    return m.group(1) if m else book_url.split("?")[0].split("#")[0]
+
+# Libros ya integrados: {clave: {isbn10, isbn13, asin, cover_local_path, book}}
+# Fuentes: el último landing de Goodreads (valores tal y como se extrajeron; `book` es
+# el registro completo) y las filas de Goodreads de standard/book_source_detail.parquet
+# (libros de ejecuciones anteriores, sin `book`)
+def load_known_books(landing_path: str, detail_path: str = STANDARD_DETAIL_PATH) -> Dict[str, Dict]:
+    known: Dict[str, Dict] = {}
+
+    if os.path.exists(landing_path):
+        for book in read_landing_records(landing_path):
+            key = book_key(book.get("book_url"))
+            if key:
+                known[key] = {**{field: book.get(field) for field in KNOWN_FIELDS}, "book": book}
+
+    if os.path.exists(detail_path):
+        from utils_parquet import read_parquet_filtered
+
+        columns = ["book_url", "isbn10", "isbn13", "asin"]
+        try:
+            detail = read_parquet_filtered(detail_path, columns=columns, filters=[("source_name", "=", "goodreads")])
+        except Exception as e:
+            print(f"[AVISO] No se pudo leer {detail_path}: {e}")
+        else:
+            for row in detail.astype(object).where(detail.notna(), None).itertuples(index=False):
+                key = book_key(row.book_url)
+                if key and key not in known:
+                    known[key] = {"isbn10": row.isbn10, "isbn13": row.isbn13, "asin": row.asin, "cover_local_path": None, "book": None}
 
-def parse_books_from_html(html: str, max_books: int, user_agent: Optional[str], fetch_isbn: bool,) -> List[Dict]:
+    return known
 
-    # Parseo de la página de resultados de búsqueda de Goodreads.
-    # Si fetch_isbn=true, entra a la ficha de cada libro para extraer ISBN10/13/ASIN.
+# Libros de una página de resultados de búsqueda (título, autor, valoración, URL y portada),
+# sin red: se usa también al re-extraer desde el archivo HTML
+def extract_books_from_html(html: str) -> List[Dict]:
 
     soup = BeautifulSoup(html, "lxml")
     rows = soup.select("table.tableList tr")
@@ -131,21 +263,10 @@ def parse_books_from_html(html: str, max_books: int, user_agent: Optional[str],
         #print(f"FILA: {i}")
         #print(row.prettify())
         #break
-        
-    # Muestra los titulos encontrados por página (máx. hasta max_books)
-    for i, row in enumerate(rows[:max_books], start=1):
-        title_tag = row.select_one("a.bookTitle")
-        if title_tag:
-            print(f"{i}. {title_tag.get_text(strip=True)}")
-        else:
-            print(f"{i}. [SIN TÍTULO]")
 
     books: List[Dict] = []
 
     for row in rows:
-        if len(books) >= max_books:
-            break
-                
         title_tag = row.select_one("a.bookTitle")
         author_tag = row.select_one("a.authorName")        
         rating_span = row.select_one("span.minirating")
@@ -155,36 +276,68 @@ def parse_books_from_html(html: str, max_books: int, user_agent: Optional[str],
         if not title_tag or not author_tag:
             continue
 
-        title = title_tag.get_text(strip=True)
-        author = author_tag.get_text(strip=True)
-        book_url = BASE_URL + title_tag.get("href", "")
-        cover_url = cover_img["src"] if cover_img else None
         rating, ratings_count = parse_rating_block(rating_span.get_text(strip=True) if rating_span else "")
+        books.append(
+            {
+                "title": title_tag.get_text(strip=True),
+                "author": author_tag.get_text(strip=True),
+                "rating": rating,
+                "ratings_count": ratings_count,
+                "book_url": BASE_URL + title_tag.get("href", ""),
+                "cover_url": cover_img["src"] if cover_img else None,
+            }
+        )
+
+    return books
+
+def parse_books_from_html(html: str, max_books: int, user_agent: Optional[str], fetch_isbn: bool, known: Optional[Dict[str, Dict]] = None, archive: Optional[Dict] = None, pipeline: Optional[Dict[str, Any]] = None,) -> List[Dict]:
+
+    # Parseo de la página de resultados de búsqueda de Goodreads.
+    # Si fetch_isbn=true, entra a la ficha de cada libro para extraer ISBN10/13/ASIN.
+    # Los libros de `known` (ver load_known_books) reutilizan sus ISBN/ASIN y portada.
+    # Con `pipeline` (ver open_scrape_pipeline) las fichas y portadas se descargan en paralelo y
+    # los HTML se parsean en el pool de procesos; el orden de los libros no cambia.
+
+    page_books = _submit_parse(pipeline, extract_books_from_html, html).result()[:max_books]
+
+    # Muestra los titulos encontrados por página (máx. hasta max_books)
+    for i, b in enumerate(page_books, start=1):
+        print(f"{i}. {b['title']}")
+
+    cached_books = [(known or {}).get(book_key(b["book_url"])) for b in page_books]
+    tasks = []
+
+    for b, cached in zip(page_books, cached_books):
+        fetch_page = fetch_isbn and cached is None
+        # DESCARGAR PORTADA (al almacén de portadas; cover_local_path = "cover:<clave>")
+        fetch_cover = bool(b["cover_url"]) and not (cached is not None and cached["cover_local_path"])
+
+        if fetch_isbn and cached is not None:
+            print(f"  · Libro conocido, sin pedir su ficha: {b['title']!r}")
+        elif fetch_page:
+            print(f"  · Obteniendo ISBN/ASIN para: {b['title']!r}")
+
+        args = (b, fetch_page, fetch_cover, user_agent, archive, pipeline)
+        tasks.append(pipeline["fetchers"].submit(_fetch_book_assets, *args) if pipeline is not None else _fetch_book_assets(*args))
+
+    books: List[Dict] = []
 
-        if fetch_isbn:
-            print(f"  · Obteniendo ISBN/ASIN para: {title!r}")
-            isbn10, isbn13, asin = fetch_isbn_from_book_page(book_url, user_agent)
-            print(f"    ISBN10: {isbn10} - ISBN13: {isbn13} - ASIN: {asin}")
-            time.sleep(0.5)     # pausa entre fichas
+    for b, cached, task in zip(page_books, cached_books, tasks):
+        parsed, cover = task.result() if isinstance(task, Future) else task
+
+        if parsed is not None:
+            isbn10, isbn13, asin = parsed.result()
+            print(f"    {b['title']!r} -> ISBN10: {isbn10} - ISBN13: {isbn13} - ASIN: {asin}")
+        elif fetch_isbn and cached is not None:
+            isbn10, isbn13, asin = cached["isbn10"], cached["isbn13"], cached["asin"]
         else:
             isbn10, isbn13, asin = None, None, None
 
-        # DESCARGAR PORTADA
-        local_cover_path = None
-        if cover_url:
-            filename = f"{title[:100]}.jpg"
-            safe_title = sanitize_filename(filename)
-            local_cover_path = os.path.join("covers", safe_title)
-            download_image(cover_url, local_cover_path)
+        local_cover_path = cached["cover_local_path"] if cached is not None and cached["cover_local_path"] else cover
 
         books.append(
             {
-                "title": title,
-                "author": author,
-                "rating": rating,
-                "ratings_count": ratings_count,
-                "book_url": book_url,
-                "cover_url": cover_url,                
+                **b,
                 "isbn10": isbn10,
                 "isbn13": isbn13,
                 "asin": asin,
@@ -198,28 +351,55 @@ def parse_books_from_html(html: str, max_books: int, user_agent: Optional[str],
 # DESCARGAR PORTADAS
 # ------------------------------------------------------------
 
-def download_image(url: str, dest_path: str):
+def cover_store_path() -> str:
+    # Almacén de portadas (ver cover_store.py), relativo a la raíz del proyecto
+    return os.path.join(BASE_DIR, cover_store_options()["path"])
+
+_COVER_STORE_LOCK = threading.Lock()
+# {url: clave} de urls.tsv del almacén, leído una vez por proceso (ver stored_cover_ref)
+_COVER_URLS: Optional[Dict[str, str]] = None
+
+# Portada ya guardada para esa URL ("cover:<clave>") o None. Cubre los libros conocidos solo
+# por standard/book_source_detail, que no guarda cover_local_path
+def stored_cover_ref(url: Optional[str]) -> Optional[str]:
+    global _COVER_URLS
+    if not url:
+        return None
+    with _COVER_STORE_LOCK:
+        if _COVER_URLS is None:
+            _COVER_URLS = read_cover_urls(cover_store_path())
+        key = _COVER_URLS.get(url)
+    return cover_ref(key) if key else None
+
+# Descarga la portada y la añade al almacén. Devuelve "cover:<clave>" o None si falla.
+# Una URL ya descargada en otra ejecución no se vuelve a pedir
+def download_cover(url: str) -> Optional[str]:
+    ref = stored_cover_ref(url)
+    if ref is not None:
+        return ref
     try:
-        r = requests.get(url, timeout=15)
+        r = rate_limited_get(url, timeout=15)
         r.raise_for_status()
-        with open(dest_path, "wb") as f:
-            f.write(r.content)
     except Exception as e:
         print(f"[ERROR] No se pudo descargar imagen {url}: {e}")
-
-# Sustituye caracteres prohibidos en nomobres de fichero por "_" 
-def sanitize_filename(name: str) -> str:    
-    return re.sub(r'[ \\/*?:"<>|]', "_", name)
+        return None
+    options = cover_store_options()
+    # El almacén admite un único escritor: los hilos de descarga añaden de uno en uno
+    with _COVER_STORE_LOCK:
+        key = add_covers([r.content], cover_store_path(), options["thumb_size"])[0]
+        add_cover_url(url, key, cover_store_path())
+        _COVER_URLS[url] = key
+    return cover_ref(key)
 
 # ------------------------------------------------------------
 #  ELEGIR BACKEND
 # ------------------------------------------------------------
 
-def scrape_goodreads_search(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, backend: Backend = Backend.REQUESTS, fetch_isbn: bool = False,) -> List[Dict]:
+def scrape_goodreads_search(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, backend: Backend = Backend.REQUESTS, fetch_isbn: bool = False, known: Optional[Dict[str, Dict]] = None, stop_after_known_pages: int = 0, archive: Optional[Dict] = None, pipeline: Optional[Dict[str, Any]] = None,) -> List[Dict]:
     if backend == Backend.REQUESTS:
-        return scrape_goodreads_requests(query, max_books, user_agent, fetch_isbn)
+        return scrape_goodreads_requests(query, max_books, user_agent, fetch_isbn, known, stop_after_known_pages, archive, pipeline)
     elif backend == Backend.PLAYWRIGHT:
-        return scrape_goodreads_playwright(query, max_books, user_agent, fetch_isbn)
+        return scrape_goodreads_playwright(query, max_books, user_agent, fetch_isbn, known, archive, pipeline)
     else:
         raise ValueError(f"Backend no soportado: {backend}")
     
@@ -227,10 +407,15 @@ def scrape_goodreads_search(query: str, max_books: int = defaultMax_books, user_
 #  BACKEND Requests + BeautifulSoup
 # ------------------------------------------------------------------------------
 
-def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False,) -> List[Dict]:
+# stop_after_known_pages > 0: se deja de paginar tras ese número de páginas seguidas en las que
+# todos los libros ya son conocidos; el resultado se completa con los libros del landing anterior
+# Con `archive` (ver html_archive.py) cada página descargada se guarda en el archivo HTML
+# Con `pipeline` (ver open_scrape_pipeline) las fichas se descargan y parsean en paralelo
+def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False, known: Optional[Dict[str, Dict]] = None, stop_after_known_pages: int = 0, archive: Optional[Dict] = None, pipeline: Optional[Dict[str, Any]] = None,) -> List[Dict]:
     headers = {"User-Agent": user_agent or "Mozilla/5.0"}
     books: List[Dict] = []
     page = 1
+    known_pages = 0
 
     while len(books) < max_books:
         remaining = max_books - len(books)  # 👈 lo que falta por completar
@@ -241,7 +426,7 @@ def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, use
         print(f"[Requests] Llamando a Goodreads (page={page}, remaining={remaining}): {url}")
 
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
+            resp = rate_limited_get(url, headers=headers, timeout=15)
             resp.raise_for_status()
         except requests.exceptions.HTTPError as e:
             print(f"[ERROR HTTP] Goodreads devolvió {resp.status_code}: {e}")
@@ -250,8 +435,10 @@ def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, use
             print(f"[ERROR RED] No se pudo conectar a Goodreads: {e}")
             break
 
+        archive_page(archive, KIND_SEARCH, url, resp.text, estado=resp.status_code, consulta=query, pagina=page, max_libros=max_books, fetch_isbn=fetch_isbn)
+
         # le pasamos solo lo que falta
-        page_books = parse_books_from_html( resp.text, remaining, user_agent, fetch_isbn,)
+        page_books = parse_books_from_html( resp.text, remaining, user_agent, fetch_isbn, known, archive, pipeline,)
 
         if not page_books:
             print("[INFO] No se encontraron más libros en esta página, fin de paginación.")
@@ -262,9 +449,16 @@ def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, use
                 break
             books.append(b)
 
-        page += 1
+        if known is not None and stop_after_known_pages > 0:
+            known_pages = known_pages + 1 if all(book_key(b["book_url"]) in known for b in page_books) else 0
+            if known_pages >= stop_after_known_pages:
+                print(f"[INFO] {known_pages} página(s) seguidas solo con libros conocidos, fin de paginación.")
+                seen = {book_key(b["book_url"]) for b in books}
+                previous = [e["book"] for k, e in known.items() if e["book"] is not None and k not in seen]
+                books.extend(previous[: max_books - len(books)])
+                break
 
-        time.sleep(0.5)     # Pequeña pausa para no saturar Goodreads
+        page += 1
 
     return books
 
@@ -272,13 +466,15 @@ def scrape_goodreads_requests(query: str, max_books: int = defaultMax_books, use
 #  BACKEND Playwright + BeautifulSoup
 # ------------------------------------------------------------
 
-def scrape_goodreads_playwright(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False,) -> List[Dict]:    
+def scrape_goodreads_playwright(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False, known: Optional[Dict[str, Dict]] = None, archive: Optional[Dict] = None, pipeline: Optional[Dict[str, Any]] = None,) -> List[Dict]:    
 
-    return asyncio.run(
-        _scrape_goodreads_playwright_async(query=query, max_books=max_books, user_agent=user_agent, fetch_isbn=fetch_isbn,)
+    html = asyncio.run(
+        _scrape_goodreads_playwright_async(query=query, max_books=max_books, user_agent=user_agent, fetch_isbn=fetch_isbn, archive=archive,)
     )
+    return parse_books_from_html(html, max_books, user_agent, fetch_isbn, known, archive, pipeline)
 
-async def _scrape_goodreads_playwright_async(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False,) -> List[Dict]:
+# Descarga la página de búsqueda con el navegador y devuelve su HTML
+async def _scrape_goodreads_playwright_async(query: str, max_books: int = defaultMax_books, user_agent: Optional[str] = None, fetch_isbn: bool = False, archive: Optional[Dict] = None,) -> str:
 
     query_param = query.replace(" ", "+")
     url = f"{BASE_URL}/search?q={query_param}"
@@ -288,11 +484,93 @@ async def _scrape_goodreads_playwright_async(query: str, max_books: int = defaul
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page(user_agent=user_agent or "Mozilla/5.0")
-        await page.goto(url, wait_until="networkidle")
+        # Mismo ritmo por host que el backend requests (la espera bloquea: es la única petición)
+        controller = shared_controller()
+        acquire(controller, url)
+        t0 = time.monotonic()
+        response = await page.goto(url, wait_until="networkidle")
+        record_response(controller, url, response.status if response else None, time.monotonic() - t0)
         html = await page.content()
         await browser.close()
 
-    return parse_books_from_html(html, max_books, user_agent, fetch_isbn)
+    archive_page(archive, KIND_SEARCH, url, html, consulta=query, pagina=1, max_libros=max_books, fetch_isbn=fetch_isbn)
+    return html
+
+# ------------------------------------------------------------
+#  RE-EXTRACCIÓN DESDE EL ARCHIVO HTML (sin red)
+# ------------------------------------------------------------
+
+# Tareas del pool: cada proceso lee y descomprime su página del archivo (no se envía el HTML)
+def _extract_search_entry(task: Tuple[str, Dict]) -> List[Dict]:
+    archive_path, entry = task
+    return extract_books_from_html(read_page(archive_path, entry))
+
+def _extract_book_entry(task: Tuple[str, Dict]) -> Tuple[Optional[str], Tuple[Optional[str], Optional[str], Optional[str]]]:
+    archive_path, entry = task
+    return book_key(entry["url"]), extract_isbn_from_html(read_page(archive_path, entry))
+
+# Regenera el landing de Goodreads a partir de las páginas archivadas de una ejecución
+# (por defecto la última): las búsquedas en orden de página, con el mismo máximo de libros, y
+# los ISBN/ASIN de la última ficha archivada de cada libro hasta el final de esa ejecución.
+# Sin ficha archivada se usan los valores conocidos (load_known_books, del landing actual);
+# las portadas no se descargan, se conserva el cover_local_path conocido (o el del almacén
+# para esa cover_url, ver stored_cover_ref). El parseo va en un pool de procesos.
+# Sin output_path se escribe el landing de Goodreads en el formato PIPELINE_LANDING_FORMAT.
+def reextract_landing(archive_path: str, output_path: Optional[str] = None, run: Optional[str] = None, workers: int = 1, detail_path: str = STANDARD_DETAIL_PATH,) -> Optional[List[Dict]]:
+    entries = read_archive_index(archive_path)
+    runs = [r for r in list_runs(entries) if r[KIND_SEARCH] > 0]
+    selected = runs[-1] if runs and run is None else next((r for r in runs if r["ejecucion"] == run), None)
+    if selected is None:
+        print(f"[ERROR] No hay páginas de búsqueda archivadas{f' de la ejecución {run}' if run else ''} en {archive_path}")
+        return None
+
+    # Una página de búsqueda por número de página (la última descarga si se repitió)
+    searches: Dict[int, Dict] = {}
+    for e in entries:
+        if e["ejecucion"] == selected["ejecucion"] and e["tipo"] == KIND_SEARCH:
+            searches[e.get("pagina") or 1] = e
+    searches_in_order = [searches[n] for n in sorted(searches)]
+    max_books = searches_in_order[0].get("max_libros") or defaultMax_books
+    fetch_isbn = searches_in_order[0].get("fetch_isbn", True)
+    print(f"Re-extrayendo la ejecución {selected['ejecucion']} ({selected['consulta']!r}): {len(searches)} página(s) de búsqueda, máx. {max_books} libros")
+
+    landing_options = landing_format_options()
+    # Los libros conocidos salen siempre del landing actual, aunque se escriba en otro fichero
+    known = load_known_books(find_landing_file(LANDING_DIR, "goodreads", landing_options["format"]), detail_path)
+    output_path = output_path or landing_path(LANDING_DIR, "goodreads", landing_options["format"])
+    books_pages = {book_key(url): e for url, e in latest_pages(entries, KIND_BOOK, as_of=selected["fin"]).items()}
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        books: List[Dict] = []
+        for page_books in pool.map(_extract_search_entry, [(archive_path, e) for e in searches_in_order]):
+            # Igual que en el scraping: se para en la primera página sin libros
+            if not page_books or len(books) >= max_books:
+                break
+            books.extend(page_books[: max_books - len(books)])
+
+        tasks = [(archive_path, books_pages[book_key(b["book_url"])]) for b in books if fetch_isbn and book_key(b["book_url"]) in books_pages]
+        chunksize = max(1, len(tasks) // (4 * max(1, workers)))
+        isbns = dict(pool.map(_extract_book_entry, tasks, chunksize=chunksize))
+
+    from_known = 0
+    for b in books:
+        key = book_key(b["book_url"])
+        cached = known.get(key)
+        if key in isbns:
+            isbn10, isbn13, asin = isbns[key]
+        elif fetch_isbn and cached is not None:
+            isbn10, isbn13, asin = cached["isbn10"], cached["isbn13"], cached["asin"]
+            from_known += 1
+        else:
+            isbn10, isbn13, asin = None, None, None
+        cover = cached["cover_local_path"] if cached and cached["cover_local_path"] else stored_cover_ref(b["cover_url"])
+        b.update({"isbn10": isbn10, "isbn13": isbn13, "asin": asin, "cover_local_path": cover})
+
+    print(f"[INFO] ISBN/ASIN: {len(isbns)} desde fichas archivadas, {from_known} de libros conocidos, {len(books) - len(isbns) - from_known} sin ficha")
+
+    write_landing_records(books, output_path, "goodreads", landing_options["batch_rows"])
+    print(f"Escrito {output_path}")
+    return books
 
 # ------------------------------------------------------------
 #  MAIN
@@ -305,6 +583,9 @@ def main():
     user_agent = os.getenv("GOODREADS_USER_AGENT", defaultUser_agent)
     backend_str = os.getenv("GOODREADS_BACKEND", "requests").lower()
     fetch_isbn_flag = os.getenv("GOODREADS_FETCH_ISBN", "true").lower() == "true"
+    skip_known = os.getenv("GOODREADS_SKIP_KNOWN", "true").lower() == "true"
+    stop_after_known_pages = int(os.getenv("GOODREADS_STOP_AFTER_KNOWN_PAGES", "0"))
+    archive_html = os.getenv("GOODREADS_ARCHIVE_HTML", "true").lower() == "true"
 
     if backend_str == "playwright":
         backend = Backend.PLAYWRIGHT        
@@ -315,15 +596,47 @@ def main():
     print(f"Fetch_isbn: {fetch_isbn_flag}")
     print(f"Buscando en Goodreads: '{query}' (máx. {max_books} libros)")
 
-    books = scrape_goodreads_search(query=query, max_books=max_books, user_agent=user_agent, backend=backend, fetch_isbn=fetch_isbn_flag,)
+    # Salida en el formato PIPELINE_LANDING_FORMAT (ver landing_format.py)
+    landing_options = landing_format_options()
+    output_path = landing_path(LANDING_DIR, "goodreads", landing_options["format"])
+
+    # Libros ya integrados: no se vuelve a pedir su ficha ni su portada
+    known = load_known_books(find_landing_file(LANDING_DIR, "goodreads", landing_options["format"])) if skip_known else None
+    if known is not None:
+        print(f"Libros conocidos: {len(known)}")
+
+    # Archivo de las páginas HTML descargadas (para re-extraer sin red, ver html_archive.py)
+    archive = None
+    if archive_html:
+        archive_options = html_archive_options()
+        archive = open_archive_writer(os.path.join(BASE_DIR, archive_options["path"]), archive_options["segment_mb"])
+
+    # Descargas en hilos y parseo en un pool de procesos (ver open_scrape_pipeline)
+    pipeline_options = scrape_pipeline_options()
+    print(f"Descarga: {pipeline_options['fetch_workers']} hilo(s); parseo: {pipeline_options['parse_workers']} proceso(s)")
+    pipeline = open_scrape_pipeline(**pipeline_options)
+    try:
+        books = scrape_goodreads_search(query=query, max_books=max_books, user_agent=user_agent, backend=backend, fetch_isbn=fetch_isbn_flag, known=known, stop_after_known_pages=stop_after_known_pages, archive=archive, pipeline=pipeline,)
+    finally:
+        close_scrape_pipeline(pipeline)
+        save_rate_state()
 
-    os.makedirs(LANDING_DIR, exist_ok=True)
-    output_path = os.path.join(LANDING_DIR, "goodreads_books.json")
+    if known is not None:
+        n_known = sum(book_key(b["book_url"]) in known for b in books)
+        print(f"[INFO] {n_known} libros conocidos (sin ficha ni portada), {len(books) - n_known} nuevos")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(books, f, ensure_ascii=False, indent=2)
+    write_landing_records(books, output_path, "goodreads", landing_options["batch_rows"])
 
     print(f"\nGuardados {len(books)} libros en {output_path}")
+    print(format_rate_metrics(rate_metrics()))
+    if archive is not None:
+        print(f"Páginas archivadas: {archive['pages']} ({archive['bytes'] / 1024:.0f} KB comprimidos) en {archive['path']}")
+
+    # Miniaturas de las portadas nuevas, en un pool de procesos
+    if any(b["cover_local_path"] for b in books):
+        options = cover_store_options()
+        added = build_thumbnails(cover_store_path(), options["thumb_size"], options["workers"])
+        print(f"Miniaturas de portadas añadidas: {added}")
 
 
 if __name__ == "__main__":
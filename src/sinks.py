@@ -0,0 +1,167 @@
+# src/sinks.py
+
+# Capa de salida ("sinks") de integrate_pipeline.
+# Cada tabla en memoria se escribe directamente en todos sus destinos (Parquet y CSV)
+# en un pool de hilos: las exportaciones corren en paralelo entre sí y con el resto
+# del pipeline, sin releer los Parquet recién escritos. El mismo pool ejecuta las lecturas
+# independientes (landing, dim_book anterior) con submit_io, solapadas con las etapas de CPU.
+#
+# Cada tarea se registra como etapa de perfilado que depende de la etapa del hilo principal
+# tras la que se encoló (instrumentation.last_main_stage): así la ruta crítica del informe
+# de tiempos sabe cuándo pudo empezar.
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from instrumentation import last_main_stage, profiled_stage
+from utils_feather import write_feather
+from utils_parquet import write_parquet
+
+CSV_DIR = "parquet_a_csv"
+DEFAULT_CSV_CHUNKSIZE = 50_000
+DEFAULT_MAX_WORKERS = 4
+
+# Extensión añadida al .csv según la compresión elegida
+CSV_COMPRESSION_EXTENSIONS = {
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "xz": ".xz",
+    "zstd": ".zst",
+    "zip": ".zip",
+}
+
+
+def sink_options() -> Dict[str, Any]:
+    # Configuración por entorno (EXPORT_*)
+    compression = os.getenv("EXPORT_CSV_COMPRESSION", "").strip().lower() or None
+    if compression is not None and compression not in CSV_COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Compresión CSV no soportada: {compression}")
+
+    return {
+        "csv": os.getenv("EXPORT_CSV", "true").lower() == "true",
+        "feather": os.getenv("EXPORT_FEATHER", "true").lower() == "true",
+        "csv_dir": os.getenv("EXPORT_CSV_DIR", CSV_DIR),
+        "csv_compression": compression,
+        "csv_chunksize": int(os.getenv("EXPORT_CSV_CHUNKSIZE", DEFAULT_CSV_CHUNKSIZE)),
+        "max_workers": int(os.getenv("EXPORT_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+    }
+
+
+def csv_path_for(name: str, options: Dict[str, Any]) -> str:
+    ext = CSV_COMPRESSION_EXTENSIONS.get(options["csv_compression"], "")
+    return os.path.join(options["csv_dir"], f"{name}.csv{ext}")
+
+
+# Escribe el CSV por bloques de `chunksize` filas (memoria acotada al formatear)
+def write_csv(
+    df: pd.DataFrame,
+    path: str,
+    chunksize: int = DEFAULT_CSV_CHUNKSIZE,
+    compression: Optional[str] = None,
+    depends_on: Optional[List[str]] = None,
+) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with profiled_stage("export", rows_in=len(df), depends_on=depends_on, destino=path) as stage:
+        df.to_csv(path, index=False, chunksize=chunksize, compression=compression)
+        stage["filas_salida"] = len(df)
+    return path
+
+
+def _write_parquet_task(df: pd.DataFrame, path: str, parquet_kwargs: Dict[str, Any], depends_on: List[str]) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with profiled_stage("export", rows_in=len(df), depends_on=depends_on, destino=path) as stage:
+        write_parquet(df, path, **parquet_kwargs)
+        stage["filas_salida"] = len(df)
+    return path
+
+
+def _write_feather_task(df: pd.DataFrame, path: str, depends_on: List[str]) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with profiled_stage("export", rows_in=len(df), depends_on=depends_on, destino=path) as stage:
+        write_feather(df, path)
+        stage["filas_salida"] = len(df)
+    return path
+
+
+def _profiled_task(fn: Callable[..., Any], df: pd.DataFrame, path: str, depends_on: List[str]) -> str:
+    with profiled_stage("export", rows_in=len(df), depends_on=depends_on, destino=path) as stage:
+        fn(df, path)
+        stage["filas_salida"] = len(df)
+    return path
+
+
+def _submitted_after() -> List[str]:
+    # Dependencia implícita de una tarea encolada ahora: la última etapa del hilo principal
+    stage = last_main_stage()
+    return [stage] if stage else []
+
+
+# Encola otra salida derivada de una tabla (p.ej. el índice de búsqueda) con su perfilado
+def submit_task(executor: ThreadPoolExecutor, fn: Callable[..., Any], df: pd.DataFrame, path: str) -> Future:
+    return executor.submit(_profiled_task, fn, df, path, _submitted_after())
+
+
+def _io_task(name: str, destino: Optional[str], depends_on: List[str], fn: Callable[..., Any], args: tuple) -> Any:
+    with profiled_stage(name, depends_on=depends_on, destino=destino) as stage:
+        result = fn(*args)
+        if hasattr(result, "__len__"):
+            stage["filas_salida"] = len(result)
+    return result
+
+
+def submit_io(executor: ThreadPoolExecutor, name: str, fn: Callable[..., Any], *args: Any, destino: Optional[str] = None) -> Future:
+    """
+    Encola una lectura o escritura independiente (`fn(*args)`) como etapa perfilada `name`.
+    El resultado del future es el de `fn`; quien lo consuma declara la dependencia con
+    profiled_stage(..., depends_on=[name]).
+    """
+    return executor.submit(_io_task, name, destino, _submitted_after(), fn, args)
+
+
+def create_executor(options: Dict[str, Any]) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=options["max_workers"], thread_name_prefix="sink")
+
+
+def submit_table(
+    executor: ThreadPoolExecutor,
+    name: str,
+    df: pd.DataFrame,
+    parquet_path: Optional[str],
+    options: Dict[str, Any],
+    feather_path: Optional[str] = None,
+    **parquet_kwargs,
+) -> List[Future]:
+    """
+    Encola la escritura de una tabla en todos sus destinos:
+      - Parquet en `parquet_path` (si se indica), con las opciones de write_parquet.
+      - Feather v2 sin comprimir en `feather_path` (si se indica y EXPORT_FEATHER=true).
+      - CSV en `<csv_dir>/<name>.csv[.gz|...]` si EXPORT_CSV=true.
+    El DataFrame no debe modificarse mientras haya escrituras pendientes.
+    Devuelve los futures; su resultado es la ruta escrita.
+    """
+    futures: List[Future] = []
+    after = _submitted_after()
+    if parquet_path:
+        futures.append(executor.submit(_write_parquet_task, df, parquet_path, parquet_kwargs, after))
+    if feather_path and options["feather"]:
+        futures.append(executor.submit(_write_feather_task, df, feather_path, after))
+    if options["csv"]:
+        futures.append(
+            executor.submit(
+                write_csv,
+                df,
+                csv_path_for(name, options),
+                options["csv_chunksize"],
+                options["csv_compression"],
+                after,
+            )
+        )
+    return futures
+
+
+# Espera a todas las escrituras y propaga la primera excepción
+def wait_for(futures: List[Future]) -> List[str]:
+    return [f.result() for f in futures]
@@ -0,0 +1,238 @@
+# src/sql_query.py
+
+# Consultas SQL ad hoc sobre las salidas del pipeline con DuckDB (motor columnar embebido),
+# directamente sobre los ficheros: sin cargar nada en pandas.
+#
+# Cada ejecución registra como vistas:
+#   - standard/<tabla>.parquet       → <tabla> (dim_book, book_source_detail, agg_by_*...;
+#                                       también los datasets particionados hive)
+#   - staging/books_staging.parquet  → books_staging
+#   - <PIPELINE_CDC_DIR>/delta_*.parquet → dim_book_delta (todos los deltas, con la columna
+#                                       `fichero` de origen)
+# Las vistas no leen nada al crearse: DuckDB lee solo las columnas que usa la consulta
+# (proyección), aplica los filtros sobre las estadísticas de row group (pushdown) y
+# recorre los ficheros en paralelo (QUERY_THREADS hilos).
+#
+# El resultado se muestra como tabla en la terminal (QUERY_MAX_ROWS filas), o se vuelca
+# por lotes a CSV en stdout (--format csv), o se escribe con COPY a CSV / Parquet (--out).
+# En ninguno de los casos se materializa entero en Python.
+#
+# DuckDB es opcional (pip install duckdb); el resto del pipeline no lo necesita.
+#
+# Uso (CLI):
+#     python src/sql_query.py "SELECT source_name, count(*) FROM book_source_detail WHERE isbn13 IS NULL GROUP BY 1"
+#     python src/sql_query.py --file consulta.sql --out resultado.parquet
+#     python src/sql_query.py --list
+#     python src/sql_query.py --explain "SELECT titulo FROM dim_book WHERE anio_publicacion > 2015"
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+STANDARD_DIR = "standard"
+STAGING_DIR = "staging"
+# Mismo valor por defecto que change_capture.DELTA_DIR (no se importa: arrastraría pandas)
+DELTA_DIR = "standard/dim_book_delta"
+DELTA_VIEW = "dim_book_delta"
+BATCH_ROWS = 10_000
+
+OUTPUT_FORMATS = ["table", "csv", "parquet"]
+
+
+def query_options() -> Dict[str, Any]:
+    # Configuración por entorno (QUERY_*; los directorios, los del pipeline)
+    return {
+        "threads": int(os.getenv("QUERY_THREADS", os.cpu_count() or 1)),
+        "memory_limit": os.getenv("QUERY_MEMORY_LIMIT", "").strip() or None,
+        "max_rows": int(os.getenv("QUERY_MAX_ROWS", "40")),
+        "standard_dir": STANDARD_DIR,
+        "rollups_dir": os.getenv("PIPELINE_ROLLUPS_DIR", STANDARD_DIR),
+        "staging_dir": STAGING_DIR,
+        "delta_dir": os.getenv("PIPELINE_CDC_DIR", DELTA_DIR),
+    }
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _parquet_scan(path: str) -> str:
+    # Fichero Parquet o dataset particionado (directorio hive col=valor/)
+    if os.path.isdir(path):
+        return f"read_parquet({_sql_string(os.path.join(path, '**', '*.parquet'))}, hive_partitioning = true)"
+    return f"read_parquet({_sql_string(path)})"
+
+
+def discover_views(options: Dict[str, Any]) -> Dict[str, str]:
+    # Vista → expresión de lectura, para todas las salidas presentes en disco
+    views: Dict[str, str] = {}
+    for directory in dict.fromkeys([options["standard_dir"], options["rollups_dir"], options["staging_dir"]]):
+        for path in sorted(glob.glob(os.path.join(directory, "*.parquet"))):
+            views[os.path.basename(path)[: -len(".parquet")]] = _parquet_scan(path)
+
+    deltas = os.path.join(options["delta_dir"], "delta_*.parquet")
+    if glob.glob(deltas):
+        views[DELTA_VIEW] = (
+            f"SELECT * EXCLUDE (filename), filename AS fichero "
+            f"FROM read_parquet({_sql_string(deltas)}, union_by_name = true, filename = true)"
+        )
+    return views
+
+
+def open_query_connection(options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Conexión DuckDB en memoria con una vista por salida del pipeline. Devuelve el handle
+    {con, views, options} que reciben show_query, stream_csv y write_query.
+    """
+    options = options or query_options()
+    con = duckdb.connect(":memory:")
+    con.execute(f"SET threads = {int(options['threads'])}")
+    if options["memory_limit"]:
+        con.execute(f"SET memory_limit = {_sql_string(options['memory_limit'])}")
+
+    views = discover_views(options)
+    for name, scan in views.items():
+        source = scan if scan.startswith("SELECT") else f"SELECT * FROM {scan}"
+        con.execute(f'CREATE VIEW "{name}" AS {source}')
+    return {"con": con, "views": views, "options": options}
+
+
+def list_views(handle: Dict[str, Any]) -> None:
+    # Vistas registradas con sus columnas (solo lee los metadatos Parquet)
+    con = handle["con"]
+    for name in handle["views"]:
+        columns = con.execute(f'DESCRIBE "{name}"').fetchall()
+        print(f"{name} ({len(columns)} columnas)")
+        print("  " + ", ".join(f"{c[0]} {c[1]}" for c in columns))
+
+
+def explain_query(handle: Dict[str, Any], sql: str) -> None:
+    # Plan físico: columnas proyectadas y filtros empujados a cada lectura Parquet
+    for _, plan in handle["con"].execute(f"EXPLAIN {sql}").fetchall():
+        print(plan)
+
+
+def show_query(handle: Dict[str, Any], sql: str, max_rows: int) -> int:
+    # Tabla en la terminal con las primeras `max_rows` filas; devuelve las filas mostradas
+    result = handle["con"].execute(sql)
+    columns = [d[0] for d in result.description]
+    rows = result.fetchmany(max_rows + 1)
+    truncated = len(rows) > max_rows
+    rows = rows[:max_rows]
+
+    cells = [[_cell(v) for v in row] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    print(" | ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("-+-".join("-" * w for w in widths))
+    for row in cells:
+        print(" | ".join(v.ljust(w) for v, w in zip(row, widths)))
+    if truncated:
+        print(f"... (más de {max_rows} filas: usar --out o --format csv para el resultado completo)")
+    return len(rows)
+
+
+def _cell(value: Any) -> str:
+    return "NULL" if value is None else str(value)
+
+
+def stream_csv(handle: Dict[str, Any], sql: str, out=None) -> int:
+    # Resultado completo como CSV en stdout, por lotes de BATCH_ROWS filas
+    out = out or sys.stdout
+    result = handle["con"].execute(sql)
+    # to_arrow_reader en DuckDB >= 1.4; antes, fetch_record_batch
+    to_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    reader = to_reader(BATCH_ROWS)
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(reader.schema.names)
+    n_rows = 0
+    for batch in reader:
+        writer.writerows(zip(*(col.to_pylist() for col in batch.columns)))
+        n_rows += batch.num_rows
+    return n_rows
+
+
+def write_query(handle: Dict[str, Any], sql: str, path: str, fmt: Optional[str] = None) -> int:
+    """
+    Escribe el resultado en `path` con COPY (DuckDB lo escribe por lotes, en paralelo).
+    Formato por extensión (.parquet, .csv, .csv.gz) salvo que se indique `fmt`.
+    Devuelve las filas escritas.
+    """
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "csv")
+    if fmt == "parquet":
+        copy_options = "FORMAT parquet, COMPRESSION zstd"
+    else:
+        copy_options = "FORMAT csv, HEADER true"
+        if path.endswith(".gz"):
+            copy_options += ", COMPRESSION gzip"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sql = sql.strip().rstrip(";")
+    return handle["con"].execute(f"COPY ({sql}) TO {_sql_string(path)} ({copy_options})").fetchone()[0]
+
+
+def main():
+    options = query_options()
+    parser = argparse.ArgumentParser(description="Consultas SQL (DuckDB) sobre standard/, staging/ y los deltas")
+    parser.add_argument("sql", nargs="?", help="Consulta SQL ('-' para leerla de stdin)")
+    parser.add_argument("--file", help="Fichero con la consulta SQL")
+    parser.add_argument("--out", help="Fichero de salida (.csv, .csv.gz o .parquet)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="table (terminal), csv (stdout o --out) o parquet (--out)")
+    parser.add_argument("--max-rows", type=int, default=options["max_rows"], help="Filas mostradas como tabla (QUERY_MAX_ROWS)")
+    parser.add_argument("--list", action="store_true", help="Vistas registradas y sus columnas")
+    parser.add_argument("--explain", action="store_true", help="Muestra el plan (proyección y filtros por lectura) sin ejecutar")
+    args = parser.parse_args()
+
+    if not DUCKDB_AVAILABLE:
+        print("[ERROR] duckdb no está instalado (pip install duckdb)", file=sys.stderr)
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    handle = open_query_connection(options)
+    if not handle["views"]:
+        print("[ERROR] No hay salidas que consultar: ejecutar antes la integración", file=sys.stderr)
+        sys.exit(1)
+    if args.list:
+        list_views(handle)
+        return
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            sql = f.read()
+    elif args.sql == "-":
+        sql = sys.stdin.read()
+    elif args.sql:
+        sql = args.sql
+    else:
+        parser.error("falta la consulta (argumento, '-' o --file)")
+
+    if args.explain:
+        explain_query(handle, sql)
+        return
+
+    try:
+        if args.out:
+            n_rows = write_query(handle, sql, args.out, args.format if args.format in ("csv", "parquet") else None)
+            print(f"Escrito {args.out}", file=sys.stderr)
+        elif args.format == "parquet":
+            parser.error("--format parquet necesita --out")
+        elif args.format == "csv":
+            n_rows = stream_csv(handle, sql)
+        else:
+            n_rows = show_query(handle, sql, args.max_rows)
+    except duckdb.Error as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{n_rows} fila(s) | {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
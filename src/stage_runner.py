@@ -0,0 +1,344 @@
+# src/stage_runner.py
+
+# Ejecutor de etapas scrape → enrich → integrate con caché por huella de contenido.
+# Cada etapa tiene una huella formada por:
+#   - entradas: SHA-256 del contenido de sus ficheros de entrada
+#   - código: SHA-256 del script y de los módulos de src/ que importa (directa o indirectamente)
+#   - configuración: variables de entorno que lee (los secretos solo como hash)
+# Si la huella no cambia y las salidas registradas siguen intactas, la etapa se omite y se
+# reutilizan sus salidas. Al terminar se informa qué etapas se ejecutaron, cuáles se
+# omitieron y por qué.
+#
+# Uso:
+#     python src/stage_runner.py                      # scrape, enrich, integrate
+#     python src/stage_runner.py integrate            # solo integrate
+#     python src/stage_runner.py --force scrape       # fuerza una etapa (y las que cambien después)
+#     python src/stage_runner.py --dry-run            # solo informa, no ejecuta
+#
+# Las fuentes externas (web de Goodreads, API de Google Books) no forman parte de la huella:
+# para refrescarlas se usa --force.
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from landing_format import find_landing_file, landing_format_options, landing_path
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SRC_DIR)
+STATE_PATH = os.path.join(".cache", "stages.json")
+
+# Ficheros de landing/ cuya extensión depende de PIPELINE_LANDING_FORMAT (ver landing_format.py)
+LANDING_GOODREADS = "landing:goodreads"
+LANDING_GOOGLEBOOKS = "landing:googlebooks"
+
+
+def integrate_outputs() -> List[str]:
+    """
+    Salidas de la integración que dependen de la configuración: Feather (EXPORT_FEATHER),
+    CSV (EXPORT_CSV*), índice de búsqueda y rollups (PIPELINE_ROLLUPS*). Los deltas del CDC
+    no cuentan: se acumulan uno por ejecución y borrarlos no invalida las tablas publicadas.
+    """
+    # Import diferido (pandas): las rutas salen de los módulos que escriben cada salida
+    from lookup_index import LOOKUP_INDEX_PATH
+    from rollups import ROLLUP_KEYS, STATE_TABLE, rollup_options, rollup_path
+    from sinks import csv_path_for, sink_options
+
+    options = sink_options()
+    rollup_opts = rollup_options()
+    tables = ["books_staging", "dim_book", "book_source_detail"]
+    paths = [LOOKUP_INDEX_PATH]
+    if options["feather"]:
+        paths += ["standard/dim_book.feather", "standard/book_source_detail.feather"]
+    if rollup_opts["enabled"]:
+        tables += list(ROLLUP_KEYS)
+        paths += [rollup_path(name, rollup_opts["dir"]) for name in [*ROLLUP_KEYS, STATE_TABLE]]
+    if options["csv"]:
+        paths += [csv_path_for(name, options) for name in tables]
+    return paths
+
+
+# Definición de etapas (rutas relativas a la raíz del proyecto)
+STAGES: Dict[str, Dict[str, Any]] = {
+    "scrape": {
+        "module": "scrape_goodreads",
+        "inputs": [],
+        "outputs": [LANDING_GOODREADS],
+        "env_prefixes": ["GOODREADS_", "PIPELINE_LANDING_"],
+    },
+    "enrich": {
+        "module": "enrich_googlebooks",
+        "inputs": [LANDING_GOODREADS],
+        "outputs": [LANDING_GOOGLEBOOKS],
+        "env_prefixes": ["GOOGLE_BOOKS_", "PIPELINE_LANDING_"],
+    },
+    "integrate": {
+        "module": "integrate_pipeline",
+        "inputs": [LANDING_GOODREADS, LANDING_GOOGLEBOOKS],
+        "outputs": [
+            "staging/books_staging.parquet",
+            "standard/dim_book.parquet",
+            "standard/book_source_detail.parquet",
+            "docs/quality_metrics.json",
+            "docs/schema.md",
+        ],
+        # Salidas según la configuración (Feather, CSV, índice, rollups)
+        "config_outputs": integrate_outputs,
+        "env_prefixes": ["PIPELINE_", "ER_", "STANDARD_", "EXPORT_", "OPENLIBRARY_"],
+        # Variables con rutas de entrada (separadas por comas): volcados de Open Library
+        "env_inputs": ["OPENLIBRARY_DUMP", "OPENLIBRARY_WORKS_DUMP", "OPENLIBRARY_AUTHORS_DUMP"],
+    },
+}
+
+# Variables cuyo valor no se guarda en claro en el estado
+SECRET_MARKERS = ("KEY", "TOKEN", "SECRET", "PASSWORD")
+
+
+# --------------------------
+# Huellas
+# --------------------------
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_digest(path: str, memo: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash del contenido de un fichero (None si no existe).
+    `memo` guarda {ruta: [tamaño, mtime_ns, hash]} de la ejecución anterior: si el fichero
+    no ha cambiado de tamaño ni de fecha, se reutiliza el hash sin volver a leerlo.
+    """
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    cached = memo.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    digest = _sha256_file(path)
+    memo[path] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+
+def local_modules(module: str) -> List[str]:
+    # Módulos de src/ que importa `module`, incluido él mismo (cierre transitivo)
+    seen: List[str] = []
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = os.path.join(SRC_DIR, f"{name}.py")
+        if name in seen or not os.path.isfile(path):
+            continue
+        seen.append(name)
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                pending.append(node.module.split(".")[0])
+    return sorted(seen)
+
+
+def stage_config(prefixes: List[str]) -> Dict[str, str]:
+    config: Dict[str, str] = {}
+    for key in sorted(os.environ):
+        if not key.startswith(tuple(prefixes)):
+            continue
+        value = os.environ[key]
+        if any(marker in key for marker in SECRET_MARKERS):
+            value = "sha256:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+        config[key] = value
+    return config
+
+
+def resolve_path(path: str, output: bool = False) -> str:
+    # landing:<fuente> → fichero del formato configurado (una salida) o el que exista (una entrada)
+    if not path.startswith("landing:"):
+        return path
+    source, fmt = path.split(":", 1)[1], landing_format_options()["format"]
+    return landing_path("landing", source, fmt) if output else find_landing_file("landing", source, fmt)
+
+
+def stage_inputs(stage: Dict[str, Any]) -> List[str]:
+    # Entradas fijas de la etapa más las rutas indicadas en sus variables `env_inputs`
+    paths = [resolve_path(path) for path in stage["inputs"]]
+    for name in stage.get("env_inputs", []):
+        paths.extend(p.strip() for p in os.getenv(name, "").split(",") if p.strip())
+    return paths
+
+
+def stage_outputs(stage: Dict[str, Any]) -> List[str]:
+    # Salidas fijas de la etapa más las que dependen de la configuración (`config_outputs`)
+    paths = [resolve_path(path, output=True) for path in stage["outputs"]]
+    if "config_outputs" in stage:
+        paths.extend(stage["config_outputs"]())
+    return paths
+
+
+def stage_components(stage: Dict[str, Any], memo: Dict[str, Any]) -> Dict[str, Dict[str, Optional[str]]]:
+    return {
+        "entradas": {path: file_digest(path, memo) for path in stage_inputs(stage)},
+        "codigo": {
+            f"src/{name}.py": file_digest(os.path.join("src", f"{name}.py"), memo)
+            for name in local_modules(stage["module"])
+        },
+        "configuracion": stage_config(stage["env_prefixes"]),
+    }
+
+
+def fingerprint(components: Dict[str, Any]) -> str:
+    payload = json.dumps(components, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def output_signature(path: str) -> Optional[List[int]]:
+    # Firma barata de una salida: [tamaño, mtime_ns] (directorios: suma de sus ficheros)
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    if os.path.isdir(path):
+        size, mtime = 0, 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                stat = os.stat(os.path.join(root, name))
+                size += stat.st_size
+                mtime = max(mtime, stat.st_mtime_ns)
+        return [size, mtime]
+    return None
+
+
+# --------------------------
+# Estado
+# --------------------------
+
+def load_state(path: str = STATE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"etapas": {}, "hashes": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: Dict[str, Any], path: str = STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def change_reasons(previous: Optional[Dict[str, Any]], components: Dict[str, Any], outputs: List[str]) -> List[str]:
+    # Motivos para ejecutar la etapa (lista vacía → se puede omitir)
+    if previous is None:
+        return ["sin ejecución previa"]
+
+    reasons: List[str] = []
+    labels = {"entradas": "entrada cambiada", "codigo": "código cambiado", "configuracion": "configuración cambiada"}
+    for group, label in labels.items():
+        before, now = previous["componentes"].get(group, {}), components[group]
+        changed = sorted(k for k in set(before) | set(now) if before.get(k) != now.get(k))
+        if changed:
+            reasons.append(f"{label}: {', '.join(changed)}")
+
+    for path in outputs:
+        signature = output_signature(path)
+        if signature is None:
+            reasons.append(f"salida ausente: {path}")
+        elif signature != previous["salidas"].get(path):
+            reasons.append(f"salida modificada: {path}")
+    return reasons
+
+
+# --------------------------
+# Ejecución
+# --------------------------
+
+def run_stage(name: str) -> None:
+    # Import diferido: cada script solo carga sus dependencias si su etapa se ejecuta
+    module = importlib.import_module(STAGES[name]["module"])
+    module.main()
+
+
+def run_pipeline(stage_names: List[str], force: List[str], dry_run: bool = False) -> List[Dict[str, Any]]:
+    """
+    Ejecuta las etapas en orden. Las huellas se calculan justo antes de cada etapa, así que
+    si una etapa anterior cambia sus salidas, las siguientes lo detectan en sus entradas.
+    Devuelve el informe: [{etapa, estado, motivos, segundos}].
+    """
+    state = load_state()
+    memo = state.setdefault("hashes", {})
+    report: List[Dict[str, Any]] = []
+
+    for name in stage_names:
+        stage = STAGES[name]
+        components = stage_components(stage, memo)
+        reasons = change_reasons(state["etapas"].get(name), components, stage_outputs(stage))
+        if name in force:
+            reasons.insert(0, "forzada (--force)")
+
+        if not reasons:
+            report.append({"etapa": name, "estado": "omitida", "motivos": ["sin cambios"], "segundos": 0.0})
+            continue
+        if dry_run:
+            report.append({"etapa": name, "estado": "pendiente", "motivos": reasons, "segundos": 0.0})
+            continue
+
+        print(f"\n=== Etapa '{name}': {'; '.join(reasons)} ===")
+        t0 = time.perf_counter()
+        run_stage(name)
+        elapsed = time.perf_counter() - t0
+
+        # Huella con el código/configuración con que se ha ejecutado y firmas de salidas
+        state["etapas"][name] = {
+            "huella": fingerprint(components),
+            "componentes": components,
+            "salidas": {path: output_signature(path) for path in stage_outputs(stage)},
+            "ejecutada": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        save_state(state)
+        report.append({"etapa": name, "estado": "ejecutada", "motivos": reasons, "segundos": elapsed})
+
+    save_state(state)
+    return report
+
+
+def print_report(report: List[Dict[str, Any]]) -> None:
+    print("\nResumen de etapas:")
+    for entry in report:
+        print(f"  {entry['etapa']:<10} {entry['estado']:<10} {entry['segundos']:>8.2f}s  {'; '.join(entry['motivos'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta scrape → enrich → integrate omitiendo etapas sin cambios")
+    parser.add_argument("stages", nargs="*", help=f"Etapas a ejecutar: {', '.join(STAGES)} (por defecto, todas)")
+    parser.add_argument("--force", action="append", default=[], choices=list(STAGES), help="Ejecuta la etapa aunque no haya cambios")
+    parser.add_argument("--dry-run", action="store_true", help="Solo informa de qué etapas se ejecutarían")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"etapas desconocidas: {', '.join(unknown)}")
+
+    # Rutas relativas a la raíz del proyecto, como en integrate_pipeline
+    os.chdir(BASE_DIR)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    load_dotenv()
+
+    stage_names = [name for name in STAGES if not args.stages or name in args.stages]
+    report = run_pipeline(stage_names, args.force, args.dry_run)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
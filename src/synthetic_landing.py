@@ -0,0 +1,315 @@
+# src/synthetic_landing.py
+
+# Generador de datos sintéticos con el mismo esquema que landing/:
+#   - goodreads_books.json  (lista de registros JSON, como scrape_goodreads.py)
+#   - googlebooks_books.csv (separador ';', como enrich_googlebooks.py)
+# Sirve para medir integrate_pipeline a cualquier escala (ver bench_scaling.py) sin
+# depender de la web ni de la API.
+#
+# Parámetros controlables:
+#   - isbn_overlap: fracción de filas Google Books que corresponden a un libro de Goodreads
+#     (mismo isbn13/título/autor); el resto son libros que solo están en Google Books
+#   - null_rate(s): fracción de nulos por campo opcional (global o por campo)
+#   - dup_rate: fracción de filas que repiten otra fila de la misma fuente
+#   - invalid_rates: fracción de filas que incumplen cada regla de annotate_errors
+#       R1 título o autor vacío            (ambas fuentes)
+#       R2 fecha no parseable              (Google Books: pub_date)
+#       R3 idioma no BCP-47                (Google Books: language)
+#       R4 moneda no ISO-4217              (Google Books: price_currency)
+#       R5 rating fuera de [0, 5]          (Goodreads: rating)
+#
+# Uso:
+#     python src/synthetic_landing.py --rows 100000 --out-dir bench_data/100k
+#     python src/synthetic_landing.py --rows 10000 --null-rates isbn13=0.3,publisher=0.2 --invalid-rates R2=0.05
+#
+# Por defecto NO se escribe en landing/ (los datos reales del scraping).
+
+import argparse
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_OUT_DIR = os.path.join("bench_data", "synthetic")
+GR_FILE = "goodreads_books.json"
+GB_FILE = "googlebooks_books.csv"
+
+GR_COLUMNS = [
+    "title", "author", "rating", "ratings_count", "book_url", "cover_url",
+    "isbn10", "isbn13", "asin", "cover_local_path",
+]
+GB_COLUMNS = [
+    "gb_id", "original_title", "original_author", "title", "subtitle", "authors", "publisher",
+    "pub_date", "language", "categories", "isbn13", "isbn10", "asin", "price_amount", "price_currency",
+]
+
+# Campos que pueden venir vacíos en cada fuente (título/autor se controlan con R1)
+GR_NULLABLE = ["rating", "ratings_count", "cover_url", "isbn10", "isbn13", "asin", "cover_local_path"]
+GB_NULLABLE = [
+    "subtitle", "publisher", "pub_date", "language", "categories", "isbn13", "isbn10", "asin",
+    "price_amount", "price_currency",
+]
+
+RULES = ["R1", "R2", "R3", "R4", "R5"]
+DEFAULT_NULL_RATE = 0.05
+DEFAULT_DUP_RATE = 0.02
+DEFAULT_INVALID_RATE = 0.01
+DEFAULT_ISBN_OVERLAP = 0.8
+
+# Valores que hacen fallar cada regla (ver idioma_valido / moneda_valida / normalize_date)
+INVALID_DATES = np.array(["fecha desconocida", "2020-13-45", "s/f", "31/02/2019"], dtype=object)
+INVALID_LANGUAGES = np.array(["english", "es_ES!", "123", "??"], dtype=object)
+INVALID_CURRENCIES = np.array(["EURO", "$", "€", "US"], dtype=object)
+INVALID_RATINGS = np.array([-1.0, 5.5, 7.2, 10.0])
+
+LANGUAGES = np.array(["en", "es", "en-GB", "fr", "de", "pt-BR"], dtype=object)
+CURRENCIES = np.array(["EUR", "USD", "GBP"], dtype=object)
+CATEGORIES = np.array([
+    "Computers", "Business & Economics", "Social Science", "Science", "Mathematics",
+    "Fiction", "History", "Philosophy", "Psychology", "Technology & Engineering",
+], dtype=object)
+PUBLISHERS = np.array([f"Editorial {i:03d}" for i in range(300)], dtype=object)
+
+N_WORDS = 20_000
+N_FIRST_NAMES = 500
+N_SURNAMES = 5_000
+
+
+# --------------------------
+# Piezas vectorizadas
+# --------------------------
+
+def _words(prefix: str, n: int) -> np.ndarray:
+    return np.array([f"{prefix}{i:05d}" for i in range(n)], dtype=object)
+
+
+def _phrases(rng: np.random.Generator, vocab: np.ndarray, n: int, n_min: int, n_max: int) -> np.ndarray:
+    # n frases de n_min..n_max palabras con frecuencias tipo Zipf (como títulos reales)
+    lengths = rng.integers(n_min, n_max + 1, size=n)
+    ranks = np.minimum(rng.zipf(1.3, size=int(lengths.sum())) - 1, len(vocab) - 1)
+    words = vocab[ranks]
+    bounds = np.cumsum(lengths)[:-1]
+    return np.array([" ".join(p) for p in np.split(words, bounds)], dtype=object)
+
+
+def _digits_to_str(digits: np.ndarray) -> np.ndarray:
+    # Matriz (n, k) de dígitos 0-9 → array de strings de k caracteres
+    n, k = digits.shape
+    raw = (digits.astype(np.uint8) + ord("0")).tobytes()
+    return np.array([raw[i * k:(i + 1) * k].decode("ascii") for i in range(n)], dtype=object)
+
+
+def synthetic_isbns(numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (isbn10, isbn13) válidos a partir de enteros distintos < 10^9.
+    isbn13 = 978 + 9 dígitos + control, igual que utils_isbn.to_isbn13(isbn10).
+    """
+    core = (numbers[:, None] // 10 ** np.arange(8, -1, -1)) % 10
+
+    check10 = (11 - (core * np.arange(10, 1, -1)).sum(axis=1) % 11) % 11
+    isbn10 = _digits_to_str(core).astype(object) + np.where(check10 == 10, "X", check10.astype(str)).astype(object)
+
+    core13 = np.hstack([np.tile([9, 7, 8], (len(numbers), 1)), core])
+    weights = np.where(np.arange(12) % 2 == 0, 1, 3)
+    check13 = (10 - (core13 * weights).sum(axis=1) % 10) % 10
+    isbn13 = _digits_to_str(np.hstack([core13, check13[:, None]]))
+    return isbn10, isbn13
+
+
+def _apply_duplicates(df: pd.DataFrame, dup_rate: float, rng: np.random.Generator) -> pd.DataFrame:
+    # Sustituye una fracción de filas por copias exactas de otras filas de la misma fuente
+    dup = rng.random(len(df)) < dup_rate
+    originals = np.flatnonzero(~dup)
+    if not dup.any() or len(originals) == 0:
+        return df
+    order = np.arange(len(df))
+    order[dup] = rng.choice(originals, size=int(dup.sum()))
+    return df.take(order).reset_index(drop=True)
+
+
+def _apply_nulls(df: pd.DataFrame, columns: list, null_rates: Dict[str, float], rng: np.random.Generator) -> None:
+    for col in columns:
+        rate = null_rates.get(col, 0.0)
+        if rate > 0:
+            df.loc[rng.random(len(df)) < rate, col] = None
+
+
+def _choose(rng: np.random.Generator, values: np.ndarray, n: int) -> np.ndarray:
+    return values[rng.integers(0, len(values), n)]
+
+
+# --------------------------
+# Generador
+# --------------------------
+
+def generate_landing(
+    n_rows: int,
+    isbn_overlap: float = DEFAULT_ISBN_OVERLAP,
+    null_rates: Optional[Dict[str, float]] = None,
+    dup_rate: float = DEFAULT_DUP_RATE,
+    invalid_rates: Optional[Dict[str, float]] = None,
+    seed: int = 42,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Devuelve (goodreads, googlebooks) con n_rows filas cada uno y las columnas de landing/.
+    null_rates: {campo: fracción}; los campos no indicados usan DEFAULT_NULL_RATE.
+    invalid_rates: {"R1".."R5": fracción}; las reglas no indicadas usan DEFAULT_INVALID_RATE.
+    """
+    rng = np.random.default_rng(seed)
+    rates = {col: DEFAULT_NULL_RATE for col in set(GR_NULLABLE) | set(GB_NULLABLE)}
+    rates.update(null_rates or {})
+    invalid = {rule: DEFAULT_INVALID_RATE for rule in RULES}
+    invalid.update(invalid_rates or {})
+
+    # Catálogo de libros: n_rows de Goodreads + los que solo están en Google Books
+    n_shared = int(round(n_rows * isbn_overlap))
+    n_books = n_rows + (n_rows - n_shared)
+    vocab = _words("w", N_WORDS)
+    titles = _phrases(rng, vocab, n_books, 2, 4)
+    subtitles = _phrases(rng, vocab, n_books, 3, 6)
+    first_authors = (
+        _words("nombre", N_FIRST_NAMES)[rng.integers(0, N_FIRST_NAMES, n_books)]
+        + " "
+        + _words("apellido", N_SURNAMES)[rng.integers(0, N_SURNAMES, n_books)]
+    )
+    # ~20% de libros con dos autores (separados por '|', como en Google Books)
+    second = rng.random(n_books) < 0.2
+    all_authors = first_authors.copy()
+    all_authors[second] = (
+        all_authors[second] + "|" + _words("coautor", N_SURNAMES)[rng.integers(0, N_SURNAMES, int(second.sum()))]
+    )
+    isbn10, isbn13 = synthetic_isbns(rng.choice(10 ** 9, size=n_books, replace=False))
+    full_titles = titles + ": " + subtitles
+
+    # Goodreads: libros 0..n_rows-1
+    gr_books = np.arange(n_rows)
+    gr = pd.DataFrame({
+        "title": full_titles[gr_books],
+        "author": first_authors[gr_books],
+        "rating": np.round(rng.uniform(1.0, 5.0, n_rows), 2),
+        "ratings_count": pd.array(rng.integers(0, 500_000, n_rows), dtype="Int64"),
+        "book_url": [f"https://www.goodreads.com/book/show/{i}" for i in gr_books],
+        "cover_url": [f"https://i.gr-assets.com/images/books/{i}.jpg" for i in gr_books],
+        "isbn10": isbn10[gr_books],
+        "isbn13": isbn13[gr_books],
+        "asin": isbn10[gr_books],
+        "cover_local_path": [f"cover:{i:032x}" for i in gr_books],
+    }, columns=GR_COLUMNS)
+
+    # Google Books: n_shared libros comunes + el resto solo de Google Books
+    gb_books = np.concatenate([
+        rng.choice(n_rows, size=n_shared, replace=False) if n_shared else np.array([], dtype=int),
+        np.arange(n_rows, n_books),
+    ])
+    rng.shuffle(gb_books)
+    years = rng.integers(1950, 2025, n_rows)
+    months = rng.integers(1, 13, n_rows)
+    days = rng.integers(1, 29, n_rows)
+    date_kind = rng.integers(0, 3, n_rows)
+    pub_dates = np.where(
+        date_kind == 0, years.astype(str),
+        np.where(
+            date_kind == 1,
+            np.char.add(np.char.add(years.astype(str), "-"), np.char.zfill(months.astype(str), 2)),
+            [f"{y}-{m:02d}-{d:02d}" for y, m, d in zip(years, months, days)],
+        ),
+    ).astype(object)
+    gb = pd.DataFrame({
+        "gb_id": [f"gb{i:012d}" for i in gb_books],
+        "original_title": full_titles[gb_books],
+        "original_author": first_authors[gb_books],
+        "title": titles[gb_books],
+        "subtitle": subtitles[gb_books],
+        "authors": all_authors[gb_books],
+        "publisher": _choose(rng, PUBLISHERS, n_rows),
+        "pub_date": pub_dates,
+        "language": _choose(rng, LANGUAGES, n_rows),
+        "categories": _choose(rng, CATEGORIES, n_rows),
+        "isbn13": isbn13[gb_books],
+        "isbn10": isbn10[gb_books],
+        "asin": None,
+        "price_amount": np.round(rng.uniform(5.0, 80.0, n_rows), 2),
+        "price_currency": _choose(rng, CURRENCIES, n_rows),
+    }, columns=GB_COLUMNS)
+
+    gr = _apply_duplicates(gr, dup_rate, rng)
+    gb = _apply_duplicates(gb, dup_rate, rng)
+    _apply_nulls(gr, GR_NULLABLE, rates, rng)
+    _apply_nulls(gb, GB_NULLABLE, rates, rng)
+
+    # Valores inválidos (después de los nulos para que la regla se dispare siempre)
+    for df, title_col, author_cols in ((gr, "title", ["author"]), (gb, "title", ["authors", "original_author"])):
+        mask = rng.random(len(df)) < invalid["R1"]
+        blank_title = mask & (rng.random(len(df)) < 0.5)
+        df.loc[blank_title, title_col] = ""
+        for col in author_cols:
+            df.loc[mask & ~blank_title, col] = ""
+    for rule, col, values in (
+        ("R2", "pub_date", INVALID_DATES),
+        ("R3", "language", INVALID_LANGUAGES),
+        ("R4", "price_currency", INVALID_CURRENCIES),
+    ):
+        mask = rng.random(len(gb)) < invalid[rule]
+        gb.loc[mask, col] = _choose(rng, values, int(mask.sum()))
+    mask = rng.random(len(gr)) < invalid["R5"]
+    gr.loc[mask, "rating"] = _choose(rng, INVALID_RATINGS, int(mask.sum()))
+
+    return gr, gb
+
+
+def write_landing(gr: pd.DataFrame, gb: pd.DataFrame, out_dir: str) -> Tuple[str, str]:
+    # Mismo formato que los scripts de extracción (JSON indentado y CSV con ';')
+    os.makedirs(out_dir, exist_ok=True)
+    gr_path = os.path.join(out_dir, GR_FILE)
+    gb_path = os.path.join(out_dir, GB_FILE)
+    gr.to_json(gr_path, orient="records", force_ascii=False, indent=2)
+    gb.to_csv(gb_path, sep=";", index=False, encoding="utf-8")
+    return gr_path, gb_path
+
+
+def parse_rates(text: str, valid: list, label: str) -> Dict[str, float]:
+    # "campo=0.1,campo2=0.3" → {"campo": 0.1, "campo2": 0.3}
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key not in valid:
+            raise ValueError(f"{label} desconocido: {key} (válidos: {', '.join(valid)})")
+        rates[key] = float(value)
+    return rates
+
+
+def main():
+    nullable = sorted(set(GR_NULLABLE) | set(GB_NULLABLE))
+    parser = argparse.ArgumentParser(description="Genera landing/ sintético (Goodreads JSON + Google Books CSV)")
+    parser.add_argument("--rows", type=int, default=10_000, help="Filas por fuente")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--isbn-overlap", type=float, default=DEFAULT_ISBN_OVERLAP, help="Fracción de filas Google Books con libro en Goodreads")
+    parser.add_argument("--null-rate", type=float, default=DEFAULT_NULL_RATE, help="Fracción de nulos en cada campo opcional")
+    parser.add_argument("--null-rates", default="", help=f"Por campo: campo=fracción,... ({', '.join(nullable)})")
+    parser.add_argument("--dup-rate", type=float, default=DEFAULT_DUP_RATE, help="Fracción de filas duplicadas por fuente")
+    parser.add_argument("--invalid-rate", type=float, default=DEFAULT_INVALID_RATE, help="Fracción de filas inválidas por regla")
+    parser.add_argument("--invalid-rates", default="", help="Por regla: R1=fracción,... (R1-R5)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        null_rates = {col: args.null_rate for col in nullable}
+        null_rates.update(parse_rates(args.null_rates, nullable, "campo"))
+        invalid_rates = {rule: args.invalid_rate for rule in RULES}
+        invalid_rates.update(parse_rates(args.invalid_rates, RULES, "regla"))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if os.path.abspath(args.out_dir) == os.path.abspath("landing"):
+        parser.error("--out-dir no puede ser landing/ (datos reales)")
+
+    gr, gb = generate_landing(args.rows, args.isbn_overlap, null_rates, args.dup_rate, invalid_rates, args.seed)
+    gr_path, gb_path = write_landing(gr, gb, args.out_dir)
+    print(f"Goodreads:    {gr_path} ({len(gr):,} filas)")
+    print(f"Google Books: {gb_path} ({len(gb):,} filas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# src/utils_feather.py
+
+# Publicación de tablas en Arrow IPC (Feather v2) sin comprimir.
+# Al no llevar compresión, el fichero se puede mapear en memoria: varios procesos comparten
+# las mismas páginas del page cache y la apertura no copia ni decodifica los datos.
+
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils_parquet import to_arrow_table
+
+
+# Se escribe en un temporal y se renombra: los lectores que tengan mapeado el fichero
+# anterior siguen viendo su versión (truncarlo en sitio les provocaría SIGBUS)
+def write_feather(df: pd.DataFrame, path: str) -> None:
+    tmp_path = path + ".tmp"
+    feather.write_feather(to_arrow_table(df), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_feather_mmap(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Abre un Feather v2 mapeado en memoria y devuelve una tabla Arrow sin copiar los buffers.
+    Para trabajar en pandas sin materializar objetos Python:
+        read_feather_mmap("standard/dim_book.feather").to_pandas(types_mapper=pd.ArrowDtype)
+    """
+    source = pa.memory_map(path, "r")
+    reader = pa.ipc.open_file(source)
+    table = reader.read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table
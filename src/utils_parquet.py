@@ -0,0 +1,186 @@
+# src/utils_parquet.py
+
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Valores por defecto de escritura (sobrescribibles con STANDARD_* en el entorno)
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+
+# Columnas de baja cardinalidad: se codifican por diccionario.
+# El resto (ids, títulos, URLs...) se escriben en plano, donde el diccionario no compensa.
+LOW_CARDINALITY_COLUMNS = [
+    "source_name",
+    "source_file",
+    "idioma",
+    "idioma_raw",
+    "moneda",
+    "fuente_ganadora",
+    "editorial",
+    "anio_publicacion",
+    "prioridad_fuente",
+    "has_isbn13",
+    "has_precio",
+    "has_error",
+]
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    # Las columnas respaldadas por Arrow se reutilizan sin copia
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # pd.read_parquet no sabe reconstruir dtypes como list<item: string>[pyarrow] a partir
+    # de los metadatos pandas: esas columnas se declaran como object (el resto de dtypes,
+    # p.ej. Int16 o category, se conservan al releer).
+    metadata = table.schema.metadata or {}
+    if b"pandas" in metadata:
+        pandas_meta = json.loads(metadata[b"pandas"])
+        for col in pandas_meta.get("columns", []):
+            if str(col.get("numpy_type", "")).startswith(("list<", "large_list<", "struct<")):
+                col["numpy_type"] = "object"
+        table = table.replace_schema_metadata({**metadata, b"pandas": json.dumps(pandas_meta).encode("utf-8")})
+    return table
+
+
+def _remove_existing(path: str) -> None:
+    # Un mismo destino puede pasar de fichero único a dataset particionado (o al revés)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _replace_output(tmp_path: str, path: str) -> None:
+    # Fichero sobre fichero: os.replace es atómico y los lectores ven el Parquet anterior o el
+    # nuevo. Con un directorio (dataset particionado) el anterior se aparta antes de poner el
+    # nuevo en su sitio, y se borra después: no se borra nada hasta que el nuevo está escrito.
+    if os.path.isfile(tmp_path) and not os.path.isdir(path):
+        os.replace(tmp_path, path)
+        return
+    old_path = path + ".old"
+    _remove_existing(old_path)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    _remove_existing(old_path)
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    path: str,
+    partition_cols: Optional[List[str]] = None,
+    row_group_size: Optional[int] = None,
+    compression: str = DEFAULT_COMPRESSION,
+    sort_by: Optional[str] = None,
+    dictionary_cols: Optional[List[str]] = None,
+) -> None:
+    """
+    Escribe un DataFrame en Parquet preparado para filtros con pushdown:
+      - partition_cols: layout de dataset particionado (hive: col=valor/) en un directorio `path`.
+        Sin particiones se escribe un único fichero, como hasta ahora.
+      - row_group_size: nº máximo de filas por row group.
+      - compression: códec (zstd por defecto).
+      - sort_by: columna por la que se ordena antes de escribir (p.ej. book_id); se
+        registra en los metadatos (sorting_columns) y deja estadísticas min/max útiles.
+      - dictionary_cols: columnas con codificación por diccionario
+        (por defecto las de LOW_CARDINALITY_COLUMNS presentes en la tabla).
+    Siempre se escriben estadísticas por columna y el page index.
+    Se escribe en `path`.tmp y se sustituye al terminar: si la escritura falla, el Parquet
+    anterior queda intacto.
+    """
+    table = to_arrow_table(df)
+    partition_cols = [c for c in (partition_cols or []) if c in table.column_names]
+    row_group_size = row_group_size or DEFAULT_ROW_GROUP_SIZE
+
+    if sort_by and sort_by in table.column_names:
+        table = table.sort_by(sort_by)
+
+    if dictionary_cols is None:
+        dictionary_cols = LOW_CARDINALITY_COLUMNS
+    file_columns = [c for c in table.column_names if c not in partition_cols]
+    use_dictionary = [c for c in dictionary_cols if c in file_columns]
+
+    sorting_columns = None
+    if sort_by and sort_by in file_columns:
+        sorting_columns = [pq.SortingColumn(file_columns.index(sort_by))]
+
+    tmp_path = path + ".tmp"
+    _remove_existing(tmp_path)
+
+    if not partition_cols:
+        pq.write_table(
+            table,
+            tmp_path,
+            row_group_size=row_group_size,
+            compression=compression,
+            use_dictionary=use_dictionary,
+            write_statistics=True,
+            write_page_index=True,
+            sorting_columns=sorting_columns,
+        )
+        _replace_output(tmp_path, path)
+        return
+
+    file_options = ds.ParquetFileFormat().make_write_options(
+        compression=compression,
+        use_dictionary=use_dictionary,
+        write_statistics=True,
+        write_page_index=True,
+        sorting_columns=sorting_columns,
+    )
+    ds.write_dataset(
+        table,
+        tmp_path,
+        format="parquet",
+        partitioning=partition_cols,
+        partitioning_flavor="hive",
+        file_options=file_options,
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, 1024),
+        max_rows_per_file=max(row_group_size, 1024) * 8,
+        existing_data_behavior="delete_matching",
+    )
+    _replace_output(tmp_path, path)
+
+
+def read_parquet_filtered(
+    path: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[tuple]] = None,
+    types_mapper: Optional[Callable[[pa.DataType], Any]] = None,
+) -> pd.DataFrame:
+    """
+    Lee un Parquet (fichero o dataset particionado) aplicando proyección y filtros
+    con pushdown: se descartan particiones y row groups por sus estadísticas.
+    `types_mapper` pasa a Table.to_pandas (p. ej. dtypes Arrow en el modo Arrow-nativo).
+    Ejemplo:
+        read_parquet_filtered(
+            "standard/dim_book.parquet",
+            columns=["book_id", "titulo", "anio_publicacion"],
+            filters=[("idioma", "=", "en"), ("anio_publicacion", ">=", 2015)],
+        )
+    """
+    # Claves de partición con su tipo inferido (no como diccionario, que no admite la
+    # partición nula __HIVE_DEFAULT_PARTITION__ al unificar)
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=False) if os.path.isdir(path) else None
+    table = pq.read_table(path, columns=columns, filters=filters, partitioning=partitioning)
+    return table.to_pandas(types_mapper=types_mapper)
+
+
+def standard_parquet_options() -> Dict[str, Any]:
+    # STANDARD_PARTITION_COLS="anio_publicacion,source_name" (vacío → fichero único)
+    partition_cols = [
+        c.strip() for c in os.getenv("STANDARD_PARTITION_COLS", "").split(",") if c.strip()
+    ]
+    return {
+        "partition_cols": partition_cols,
+        "row_group_size": int(os.getenv("STANDARD_ROW_GROUP_SIZE", DEFAULT_ROW_GROUP_SIZE)),
+        "compression": os.getenv("STANDARD_COMPRESSION", DEFAULT_COMPRESSION),
+    }
@@ -18,3 +18,78 @@ def compute_basic_counts(df: pd.DataFrame) -> Dict[str, Any]:
 
 def count_duplicates(df: pd.DataFrame, subset: list) -> int:
     return int(df.duplicated(subset=subset, keep=False).sum())
+
+
+# ------------------------------------------------------------
+# Motor de métricas en una pasada vectorizada por tabla
+# ------------------------------------------------------------
+
+def profile_table(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Perfil de una tabla recorriendo cada columna una sola vez:
+      - rows / columns
+      - nulos_por_campo: % de nulos
+      - tipos: dtype de cada columna
+      - ejemplos: primer valor no nulo (None si la columna está vacía)
+    El mismo perfil alimenta quality_metrics.json y schema.md.
+    """
+    n_rows = len(df)
+    nulos: Dict[str, float] = {}
+    tipos: Dict[str, str] = {}
+    ejemplos: Dict[str, Any] = {}
+
+    for j, col in enumerate(df.columns):
+        null_mask = df.iloc[:, j].isna().to_numpy(dtype=bool)
+        n_nulls = int(null_mask.sum())
+        nulos[col] = float(n_nulls / n_rows) if n_rows else float("nan")
+        tipos[col] = str(df.dtypes.iloc[j])
+        ejemplos[col] = df.iat[int(null_mask.argmin()), j] if n_nulls < n_rows else None
+
+    return {
+        "rows": int(n_rows),
+        "columns": int(df.shape[1]),
+        "nulos_por_campo": nulos,
+        "tipos": tipos,
+        "ejemplos": ejemplos,
+    }
+
+
+def factorize_column(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    # Los nulos reciben su propio código (igual que duplicated/value_counts(dropna=False))
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return codes, pd.Index(uniques)
+
+
+def count_duplicates_from_codes(codes_list: list) -> int:
+    # Nº de filas cuya clave se repite (equivale a duplicated(keep=False).sum()).
+    # Las claves de varias columnas se combinan re-factorizando para no desbordar int64.
+    key = codes_list[0].astype(np.int64)
+    for codes in codes_list[1:]:
+        key = pd.factorize(key * (int(codes.max(initial=0)) + 1) + codes)[0]
+    if len(key) == 0:
+        return 0
+    counts = np.bincount(key)
+    return int(counts[counts > 1].sum())
+
+
+def counts_from_codes(codes: np.ndarray, uniques: pd.Index) -> Dict[Any, int]:
+    # Conteos por valor ordenados de mayor a menor (como value_counts)
+    counts = np.bincount(codes, minlength=len(uniques)) if len(codes) else np.zeros(len(uniques), dtype=int)
+    order = np.argsort(-counts, kind="stable")
+    return {uniques[i]: int(counts[i]) for i in order if counts[i] > 0}
+
+
+def valid_ratio_by_unique(codes: np.ndarray, uniques: pd.Index, validator) -> float:
+    # Aplica el validador una vez por valor distinto y lo propaga a las filas por su código
+    if len(codes) == 0:
+        return float("nan")
+    valid_uniques = np.array([bool(validator(u)) for u in uniques], dtype=bool)
+    return float(valid_uniques[codes].mean())
+
+
+def count_list_items_by(df: pd.DataFrame, group_col: str, list_col: str, fill: str = "UNKNOWN") -> pd.Series:
+    # explode + groupby: nº de apariciones de cada elemento de la lista por valor de group_col
+    exploded = df[[group_col, list_col]].explode(list_col)
+    exploded = exploded[exploded[list_col].notna()]
+    groups = exploded[group_col].astype(object).fillna(fill)
+    return exploded.groupby([groups, exploded[list_col].astype(object)], sort=False).size()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+
+# Los módulos del pipeline son scripts planos de src/ (sin paquete): se añade src/ al path.
+# Las pruebas no escriben en landing/, staging/ ni standard/: trabajan en directorios temporales.
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+sys.path.insert(0, SRC_DIR)
+
+SAMPLE_GR_PATH = os.path.join(ROOT_DIR, "landing", "goodreads_books.json")
+SAMPLE_GB_PATH = os.path.join(ROOT_DIR, "landing", "googlebooks_books.csv")
+
+
+@pytest.fixture
+def sample_landing():
+    # Landing de ejemplo del repositorio (solo lectura): (goodreads, googlebooks)
+    return SAMPLE_GR_PATH, SAMPLE_GB_PATH
+
+
+@pytest.fixture
+def synthetic_landing_paths(tmp_path):
+    # Landing sintético pequeño (synthetic_landing.py): (goodreads, googlebooks)
+    from synthetic_landing import generate_landing, write_landing
+
+    gr, gb = generate_landing(500, seed=7)
+    return write_landing(gr, gb, str(tmp_path / "landing"))
@@ -0,0 +1,110 @@
+# tests/test_lookup_index.py
+
+# Índice de búsqueda (lookup_index.py): las consultas puntuales y por prefijo devuelven
+# exactamente las filas que daría un filtro sobre dim_book, y publicar una versión nueva
+# no deja a los lectores sin índice.
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lookup_index import (
+    CURRENT_FILE,
+    build_lookup_index,
+    lookup,
+    lookup_key,
+    open_lookup_index,
+    prefix_search,
+)
+
+N_BOOKS = 3000
+
+
+def make_dim_book(n: int = N_BOOKS, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    isbn13 = [f"978{rng.integers(10**9, 10**10):010d}" for _ in range(n)]
+    isbn10 = [f"{rng.integers(10**9, 10**10):010d}" for _ in range(n)]
+    asin = [f"B0{rng.integers(10**7, 10**8):08d}" for _ in range(n)]
+    # Huecos y repetidos: varios libros con el mismo ISBN-13 o sin ISBN/ASIN
+    for i in range(0, n, 7):
+        isbn13[i] = None
+    for i in range(5, n, 11):
+        isbn13[i] = isbn13[i - 1]
+    for i in range(0, n, 5):
+        asin[i] = None
+    titulos = [f"titulo {rng.choice(['big data', 'the art', 'python', 'datos'])} {i}" for i in range(n)]
+    return pd.DataFrame({
+        "book_id": [f"b{i:05d}" for i in range(n)],
+        "titulo": [t.title() for t in titulos],
+        "titulo_normalizado": titulos,
+        "autor_principal": [f"Autor {i % 97}" for i in range(n)],
+        "isbn13": isbn13,
+        "isbn10": isbn10,
+        "asin": asin,
+    })
+
+
+def expected_ids(dim_book: pd.DataFrame, field: str) -> dict:
+    # {clave normalizada: book_ids ordenados}, el resultado de filtrar dim_book
+    keys = dim_book[field].map(lambda v: lookup_key(field, v), na_action="ignore")
+    return {key: sorted(ids) for key, ids in dim_book.groupby(keys)["book_id"]}
+
+
+@pytest.fixture
+def dim_book():
+    return make_dim_book()
+
+
+@pytest.fixture
+def index_path(tmp_path, dim_book):
+    path = str(tmp_path / "dim_book.index")
+    build_lookup_index(dim_book, path)
+    return path
+
+
+@pytest.mark.parametrize("field", ["isbn13", "isbn10", "asin", "book_id"])
+def test_point_lookups_match_filter(dim_book, index_path, field):
+    index = open_lookup_index(index_path)
+    expected = expected_ids(dim_book, field)
+    for value in dim_book[field].dropna().unique():
+        found = sorted(r["book_id"] for r in lookup(index, field, value))
+        assert found == expected[lookup_key(field, value)], value
+
+
+def test_lookup_normalizes_and_misses(dim_book, index_path):
+    index = open_lookup_index(index_path)
+    isbn = dim_book["isbn13"].dropna().iloc[0]
+    hyphenated = f"{isbn[:3]}-{isbn[3:]}"
+    assert lookup(index, "isbn13", hyphenated) == lookup(index, "isbn13", isbn) != []
+    asin = dim_book["asin"].dropna().iloc[0]
+    assert lookup(index, "asin", asin.lower()) == lookup(index, "asin", asin)
+    assert lookup(index, "isbn13", "9780000000000") == []
+    assert lookup(index, "asin", None) == []
+
+
+def test_prefix_search_matches_sorted_filter(dim_book, index_path):
+    index = open_lookup_index(index_path)
+    for prefix in ["titulo big", "titulo the art 1", "titulo python 29", "zzz"]:
+        matching = dim_book[dim_book["titulo_normalizado"].str.startswith(prefix)]
+        expected = matching.sort_values("titulo_normalizado", kind="stable")["book_id"].head(10).tolist()
+        assert [r["book_id"] for r in prefix_search(index, prefix, limit=10)] == expected
+
+
+def test_rebuild_publishes_new_version(tmp_path, dim_book, index_path):
+    old_index = open_lookup_index(index_path)
+    changed = dim_book.copy()
+    changed.loc[0, "isbn10"] = "0000000001"
+    build_lookup_index(changed, index_path)
+
+    # El lector abierto antes sigue viendo su versión completa; uno nuevo ve la nueva
+    assert lookup(old_index, "isbn10", "0000000001") == []
+    assert [r["book_id"] for r in lookup(open_lookup_index(index_path), "isbn10", "0000000001")] == ["b00000"]
+
+    build_lookup_index(dim_book, index_path)
+    versions = sorted(n for n in os.listdir(index_path) if n != CURRENT_FILE)
+    with open(os.path.join(index_path, CURRENT_FILE), encoding="utf-8") as f:
+        assert f.read() in versions
+    # Solo la versión vigente y la anterior
+    assert len(versions) == 2
@@ -0,0 +1,30 @@
+# tests/test_polars_engine.py
+
+# Paridad de motores: con PIPELINE_ENGINE=polars, staging, dim_book, book_source_detail y
+# las métricas de calidad deben salir idénticos a los del motor pandas (ver bench_polars_engine.py).
+
+import pytest
+
+pytest.importorskip("polars")
+
+from bench_polars_engine import compare_outputs, run_pandas, run_polars
+from integrate_pipeline import load_sources
+
+
+def _parity_problems(gr_path: str, gb_path: str, arrow_native: bool, entity_resolution: bool):
+    df_gr, df_gb = load_sources(gr_path, gb_path, arrow_native=arrow_native)
+    expected, _ = run_pandas(df_gr, df_gb, entity_resolution)
+    actual, _ = run_polars(df_gr, df_gb, arrow_native, entity_resolution)
+    return compare_outputs(expected, actual)
+
+
+@pytest.mark.parametrize("entity_resolution", [False, True])
+@pytest.mark.parametrize("arrow_native", [False, True])
+def test_parity_on_sample_landing(sample_landing, arrow_native, entity_resolution):
+    assert _parity_problems(*sample_landing, arrow_native, entity_resolution) == []
+
+
+@pytest.mark.parametrize("entity_resolution", [False, True])
+@pytest.mark.parametrize("arrow_native", [False, True])
+def test_parity_on_synthetic_landing(synthetic_landing_paths, arrow_native, entity_resolution):
+    assert _parity_problems(*synthetic_landing_paths, arrow_native, entity_resolution) == []
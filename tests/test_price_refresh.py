@@ -0,0 +1,158 @@
+# tests/test_price_refresh.py
+
+# Refresco de precios (price_refresh.py): parchear standard/ con los precios nuevos debe dejar
+# las mismas tablas que una integración completa sobre el landing ya actualizado. La API de
+# Google Books se sustituye por respuestas simuladas (200 con ETag, 304 y 404).
+
+import json
+import random
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import integrate_pipeline
+import price_refresh
+from landing_format import read_landing_records
+from synthetic_landing import generate_landing, write_landing
+
+# Salidas comparadas (relativas al directorio de trabajo del pipeline)
+TABLES = [
+    "standard/dim_book.parquet",
+    "standard/book_source_detail.parquet",
+    "staging/books_staging.parquet",
+    "standard/agg_by_currency.parquet",
+    "standard/agg_by_author.parquet",
+    "standard/agg_aportaciones.parquet",
+]
+# Marcas de tiempo de ejecución y hashes que dependen de ellas
+RUN_COLUMNS = ["ts_ultima_act", "ts_ingesta", "hash"]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.headers = {"ETag": etag} if etag else {}
+        self.text = json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+
+def fake_volumes_api(prices):
+    # Respuestas de /volumes/<id> a partir de {gb_id: (importe, moneda) | None | "404"}
+    calls = []
+
+    def get(url, params=None, headers=None, timeout=None):
+        gb_id = url.rsplit("/", 1)[1]
+        if_none_match = (headers or {}).get("If-None-Match")
+        calls.append((gb_id, if_none_match))
+        price = prices.get(gb_id)
+        if price == "404":
+            return FakeResponse(404)
+        etag = f'"{gb_id}-{price}"'
+        if if_none_match == etag:
+            return FakeResponse(304)
+        if price is None:
+            sale = {"saleability": "NOT_FOR_SALE"}
+        else:
+            sale = {"saleability": "FOR_SALE", "listPrice": {"amount": price[0], "currencyCode": price[1]}}
+        return FakeResponse(200, {"saleInfo": sale}, etag)
+
+    return get, calls
+
+
+def _value(v):
+    if isinstance(v, (list, tuple, np.ndarray)):
+        return str([_value(x) for x in v])
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return "NA"
+    if isinstance(v, (float, np.floating)):
+        return str(int(v)) if float(v).is_integer() else str(round(float(v), 9))
+    return str(v)
+
+
+def _comparable(df):
+    df = df.drop(columns=[c for c in RUN_COLUMNS if c in df.columns])
+    return pd.DataFrame({c: [_value(v) for v in df[c].astype(object)] for c in df.columns})
+
+
+@pytest.fixture(params=[False, True], ids=["pandas", "arrow_native"])
+def pipeline_env(request, tmp_path, monkeypatch):
+    # Dos directorios de trabajo con el mismo landing sintético: "patch" (integración +
+    # refresco de precios) y "full" (integración completa con el landing ya refrescado)
+    gr, gb = generate_landing(400, seed=7)
+    for name in ("patch", "full"):
+        write_landing(gr, gb, str(tmp_path / name / "landing"))
+    monkeypatch.setenv("PIPELINE_ARROW_NATIVE", "true" if request.param else "false")
+    monkeypatch.setenv("RATE_PERSIST", "false")
+    monkeypatch.setenv("GOOGLE_BOOKS_PRICE_WORKERS", "2")
+    monkeypatch.setenv("GOOGLE_BOOKS_PRICE_CACHE", str(tmp_path / "patch" / ".cache" / "prices.json"))
+    monkeypatch.delenv("GOOGLE_BOOKS_API_KEY", raising=False)
+    return tmp_path
+
+
+def _refresh(monkeypatch, prices):
+    get, calls = fake_volumes_api(prices)
+    monkeypatch.setattr(price_refresh, "rate_limited_get", get)
+    monkeypatch.setattr("sys.argv", ["price_refresh"])
+    price_refresh.main()
+    return calls
+
+
+def _new_prices(records, seed=3):
+    # Cerca de un 30 % de los volúmenes cambia de precio, pasa a no estar a la venta o desaparece
+    rnd = random.Random(seed)
+    prices = {}
+    for record in records:
+        gb_id = record.get("gb_id")
+        if not gb_id or gb_id in prices:
+            continue
+        amount, currency = record.get("price_amount"), record.get("price_currency")
+        current = (float(amount), currency) if amount not in (None, "") and not pd.isna(amount) else None
+        r = rnd.random()
+        if r < 0.1:
+            prices[gb_id] = None
+        elif r < 0.13:
+            prices[gb_id] = (rnd.choice([5.0, 7.5]), rnd.choice(["EUR", "usd", "U$S"]))
+        elif r < 0.3:
+            prices[gb_id] = (round(rnd.uniform(1, 90), 2), rnd.choice(["EUR", "USD", "GBP"]))
+        elif r < 0.32:
+            prices[gb_id] = "404"
+        else:
+            prices[gb_id] = current
+    return prices
+
+
+def test_publish_patch_matches_full_integration(pipeline_env, monkeypatch):
+    patch_dir, full_dir = pipeline_env / "patch", pipeline_env / "full"
+
+    monkeypatch.chdir(patch_dir)
+    integrate_pipeline.main()
+    records = read_landing_records(str(patch_dir / "landing" / "googlebooks_books.csv"))
+    prices = _new_prices(records)
+    _refresh(monkeypatch, prices)
+
+    # Segunda ronda: casi todo 304 (ETag en caché) y un único precio nuevo
+    changed_id = next(gb_id for gb_id, price in prices.items() if isinstance(price, tuple))
+    prices[changed_id] = (prices[changed_id][0] + 1, prices[changed_id][1])
+    calls = _refresh(monkeypatch, prices)
+    assert sum(1 for _, etag in calls if etag) > len(calls) // 2
+
+    shutil.copy(patch_dir / "landing" / "googlebooks_books.csv", full_dir / "landing" / "googlebooks_books.csv")
+    monkeypatch.chdir(full_dir)
+    integrate_pipeline.main()
+
+    for table in TABLES:
+        patched = pd.read_parquet(patch_dir / table)
+        rebuilt = pd.read_parquet(full_dir / table)
+        assert patched.dtypes.astype(str).to_dict() == rebuilt.dtypes.astype(str).to_dict(), table
+        pd.testing.assert_frame_equal(_comparable(patched), _comparable(rebuilt), obj=table)
+
+    metrics = json.loads((patch_dir / "docs" / "quality_metrics.json").read_text(encoding="utf-8"))
+    full_metrics = json.loads((full_dir / "docs" / "quality_metrics.json").read_text(encoding="utf-8"))
+    assert metrics["refresco_precios"]["registros_landing_cambiados"] >= 1
+    assert metrics["validaciones"] == full_metrics["validaciones"]
+
@@ -0,0 +1,108 @@
+# tests/test_rollups.py
+
+# Rollups (rollups.py): el refresco incremental (restar las aportaciones antiguas de los libros
+# cambiados y sumar las nuevas) debe dar los mismos agregados que recalcularlo todo.
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from integrate_pipeline import build_staging, deduplicate, load_sources
+from rollups import (
+    ROLLUP_KEYS,
+    STATE_TABLE,
+    book_contributions,
+    compute_rollups,
+    read_previous_rollups,
+    refresh_rollups,
+    rollup_path,
+)
+from utils_parquet import write_parquet
+
+
+@pytest.fixture
+def contributions(synthetic_landing_paths):
+    dim_book, book_source_detail = deduplicate(build_staging(*load_sources(*synthetic_landing_paths)))
+    return book_contributions(dim_book, book_source_detail)
+
+
+def _next_run(contrib: pd.DataFrame, seed: int = 11) -> pd.DataFrame:
+    # Siguiente ejecución: precios, ratings y autores cambiados, libros borrados y libros nuevos
+    rng = np.random.default_rng(seed)
+    n = len(contrib)
+    nxt = contrib.copy()
+    prices = rng.choice(n, n // 10, replace=False)
+    nxt.loc[prices, "precio"] = np.round(rng.uniform(1, 50, len(prices)), 2)
+    nxt.loc[prices[: len(prices) // 2], "moneda"] = "GBP"
+    ratings = rng.choice(n, n // 20, replace=False)
+    nxt.loc[ratings, "rating"] = np.nan
+    authors = set(rng.choice(n, n // 20, replace=False).tolist())
+    nxt["autores"] = pd.arrays.ArrowExtensionArray(
+        pa.array([["Autora Nueva"] if i in authors else a for i, a in enumerate(nxt["autores"].tolist())])
+    )
+    removed = rng.choice(n, n // 20, replace=False)
+    nxt = nxt.drop(index=removed)
+    added = contrib.sample(n // 20, random_state=seed).assign(
+        book_id=lambda df: "nuevo-" + df["book_id"].astype(str),
+        anio_publicacion=pd.array([1999] * (n // 20), dtype="Int16"),
+    )
+    return pd.concat([nxt, added], ignore_index=True)
+
+
+def _publish(rollups, state, directory: str) -> None:
+    for name, df in rollups.items():
+        write_parquet(df, rollup_path(name, directory))
+    write_parquet(state, rollup_path(STATE_TABLE, directory))
+
+
+def _assert_same_rollups(actual, expected) -> None:
+    assert set(actual) == set(expected) == set(ROLLUP_KEYS)
+    for name in ROLLUP_KEYS:
+        pd.testing.assert_frame_equal(
+            actual[name].reset_index(drop=True), expected[name].reset_index(drop=True),
+            check_exact=False, rtol=1e-9, atol=1e-9, obj=name,
+        )
+
+
+def test_incremental_refresh_matches_full_rebuild(tmp_path, contributions):
+    rollups, state, stats = refresh_rollups(contributions, None)
+    assert stats["modo"] == "completo"
+    _publish(rollups, state, str(tmp_path))
+
+    nxt = _next_run(contributions)
+    incremental, _, stats = refresh_rollups(nxt, read_previous_rollups(str(tmp_path)), rebuild_fraction=1.0)
+    assert stats["modo"] == "incremental"
+    assert 0 < stats["libros_cambiados"] < len(nxt)
+    _assert_same_rollups(incremental, compute_rollups(nxt))
+
+
+def test_unchanged_run_keeps_rollups(tmp_path, contributions):
+    rollups, state, _ = refresh_rollups(contributions, None)
+    _publish(rollups, state, str(tmp_path))
+
+    again, _, stats = refresh_rollups(contributions, read_previous_rollups(str(tmp_path)))
+    assert stats["modo"] == "incremental" and stats["libros_cambiados"] == 0
+    _assert_same_rollups(again, compute_rollups(contributions))
+
+
+def test_empty_runs(tmp_path, contributions):
+    empty = contributions.iloc[:0]
+    rollups, state, _ = refresh_rollups(empty, None)
+    _publish(rollups, state, str(tmp_path))
+
+    again, _, stats = refresh_rollups(empty, read_previous_rollups(str(tmp_path)))
+    assert stats["modo"] == "incremental"
+    for name, df in again.items():
+        assert len(df) == 0
+        assert list(df.columns) == list(compute_rollups(contributions)[name].columns)
+
+
+def test_too_many_changes_rebuild(tmp_path, contributions):
+    rollups, state, _ = refresh_rollups(contributions, None)
+    _publish(rollups, state, str(tmp_path))
+
+    nxt = _next_run(contributions)
+    rebuilt, _, stats = refresh_rollups(nxt, read_previous_rollups(str(tmp_path)), rebuild_fraction=0.01)
+    assert stats["modo"] == "completo"
+    _assert_same_rollups(rebuilt, compute_rollups(nxt))